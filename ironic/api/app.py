@@ -29,6 +29,8 @@ from ironic.api import middleware
 from ironic.api.middleware import auth_token
 from ironic.api.middleware import json_ext
 from ironic.common import exception
+from ironic.common import metrics
+from ironic.common import policy
 from ironic.conf import CONF
 
 
@@ -68,6 +70,10 @@ def setup_app(pecan_config=None, extra_hooks=None):
 
     pecan.configuration.set_config(dict(pecan_config), overwrite=True)
 
+    # NOTE: parse the policy rules when starting rather than when handling
+    # the first request
+    policy.get_enforcer().load_rules()
+
     app = pecan.make_app(
         pecan_config.app.root,
         debug=CONF.pecan_debug,
@@ -112,6 +118,11 @@ def setup_app(pecan_config=None, extra_hooks=None):
     if CONF.healthcheck.enabled:
         app = healthcheck.Healthcheck(app, CONF)
 
+    # NOTE: like the healthcheck, the metrics are served without
+    # authentication
+    if CONF.metrics.prometheus_enabled:
+        app = metrics.MetricsMiddleware(app)
+
     # Create a CORS wrapper, and attach ironic-specific defaults that must be
     # included in all CORS responses.
     app = IronicCORS(app, CONF)
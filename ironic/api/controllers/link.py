@@ -31,6 +31,21 @@ def build_url(resource, resource_args, bookmark=False, base_url=None):
     return template % {'url': base_url, 'res': resource, 'args': resource_args}
 
 
+def make_links(url, resource, resource_args):
+    """Build the self and bookmark links of a resource.
+
+    This is a lightweight version of :meth:`Link.make_link` for responses
+    that are serialized without WSME.
+
+    :returns: a list of dictionaries with the ``href`` and ``rel`` keys.
+    """
+    return [{'href': build_url(resource, resource_args, base_url=url),
+             'rel': 'self'},
+            {'href': build_url(resource, resource_args, bookmark=True,
+                               base_url=url),
+             'rel': 'bookmark'}]
+
+
 class Link(base.APIBase):
     """A link representation."""
 
@@ -26,6 +26,7 @@ from wsme import types as wtypes
 from ironic.api.controllers import base
 from ironic.api.controllers import link
 from ironic.api.controllers.v1 import allocation
+from ironic.api.controllers.v1 import bulk
 from ironic.api.controllers.v1 import chassis
 from ironic.api.controllers.v1 import conductor
 from ironic.api.controllers.v1 import driver
@@ -234,6 +235,7 @@ class Controller(rest.RestController):
     conductors = conductor.ConductorsController()
     allocations = allocation.AllocationsController()
     events = event.EventsController()
+    bulk = bulk.BulkController()
 
     @expose.expose(V1)
     def get(self):
@@ -12,7 +12,6 @@
 
 import datetime
 
-from ironic_lib import metrics_utils
 from oslo_utils import uuidutils
 import pecan
 from six.moves import http_client
@@ -28,11 +27,12 @@ from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api import expose
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import policy
 from ironic.common import states as ir_states
 from ironic import objects
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 
 class Allocation(base.APIBase):
@@ -13,7 +13,6 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from ironic_lib import metrics_utils
 import pecan
 from pecan import rest
 import wsme
@@ -25,10 +24,11 @@ from ironic.api.controllers.v1 import types
 from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api import expose
 from ironic.common import exception
+from ironic.common import metrics
 from ironic.common import policy
 from ironic import objects
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 
 class BIOSSetting(base.APIBase):
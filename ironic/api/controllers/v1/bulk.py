@@ -0,0 +1,523 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Bulk operations on nodes.
+
+The nodes of a bulk request are grouped by the conductor managing them, and
+each conductor is sent a single RPC request for all its nodes. The response
+reports the result of the operation for each node. The power actions are
+asynchronous, their completion is tracked through the usual node API.
+"""
+
+import collections
+
+from oslo_log import log
+from oslo_utils import uuidutils
+import pecan
+from pecan import rest
+import six
+from six.moves import http_client
+import wsme
+from wsme.rest import json as wsme_json
+from wsme import types as wtypes
+
+from ironic.api.controllers.v1 import node as node_api
+from ironic.api.controllers.v1 import notification_utils as notify
+from ironic.api.controllers.v1 import port as port_api
+from ironic.api.controllers.v1 import portgroup as portgroup_api
+from ironic.api.controllers.v1 import types
+from ironic.api.controllers.v1 import utils as api_utils
+from ironic.api import expose
+from ironic.common import exception
+from ironic.common.i18n import _
+from ironic.common import metrics
+from ironic.common import policy
+from ironic.common import states as ir_states
+from ironic.conf import CONF
+from ironic import objects
+
+METRICS = metrics.get_metrics_logger(__name__)
+
+LOG = log.getLogger(__name__)
+
+_FILTERS = ('conductor_group', 'resource_class', 'owner', 'provision_state',
+            'maintenance', 'chassis_uuid')
+
+
+class BulkPower(wtypes.Base):
+    """API representation of a bulk power request."""
+
+    target = wsme.wsattr(wtypes.text, mandatory=True)
+    """The desired power state of the nodes"""
+
+    timeout = wsme.wsattr(wtypes.IntegerType(minimum=1))
+    """Timeout (in seconds) of the power actions"""
+
+    nodes = wsme.wsattr([wtypes.text])
+    """UUIDs or names of the nodes, mutually exclusive with the filters"""
+
+    conductor_group = wsme.wsattr(wtypes.text)
+    """Filter the nodes by conductor group"""
+
+    resource_class = wsme.wsattr(wtypes.text)
+    """Filter the nodes by resource class"""
+
+    owner = wsme.wsattr(wtypes.text)
+    """Filter the nodes by owner"""
+
+    provision_state = wsme.wsattr(wtypes.text)
+    """Filter the nodes by provision state"""
+
+    maintenance = wsme.wsattr(types.boolean)
+    """Filter the nodes by maintenance mode"""
+
+    chassis_uuid = wsme.wsattr(types.uuid)
+    """Filter the nodes by chassis"""
+
+
+class BulkNodeResult(wtypes.Base):
+    """API representation of the result of a bulk operation on a node."""
+
+    node = wtypes.text
+    """The UUID of the node, or the identifier requested if not found"""
+
+    accepted = types.boolean
+    """Whether the operation was accepted for the node"""
+
+    error = wtypes.text
+    """The reason why the operation was not accepted"""
+
+    def __init__(self, node, error=None):
+        self.node = node
+        self.accepted = error is None
+        self.error = error
+
+
+class BulkResult(wtypes.Base):
+    """API representation of the result of a bulk operation."""
+
+    nodes = [BulkNodeResult]
+    """The results of the operation on each node"""
+
+
+class BulkNodes(wtypes.Base):
+    """API representation of a bulk enrollment request."""
+
+    nodes = wsme.wsattr([types.jsontype], mandatory=True)
+    """The nodes to create, with their ports, portgroups and traits"""
+
+
+class BulkPort(port_api.Port):
+    """API representation of a port created with its node."""
+
+    node_uuid = wsme.wsattr(types.uuid)
+    """Not accepted, the port belongs to the node it is created with"""
+
+    portgroup_uuid = wsme.wsattr(types.uuid_or_name)
+    """The UUID or name of a portgroup created with the same node"""
+
+
+class BulkPortgroup(portgroup_api.Portgroup):
+    """API representation of a portgroup created with its node."""
+
+    node_uuid = wsme.wsattr(types.uuid)
+    """Not accepted, the portgroup belongs to the node it is created with"""
+
+
+def _get_list(item, key):
+    value = item.pop(key, None) or []
+    if not isinstance(value, list):
+        raise exception.Invalid(_("The %s of a node must be a list") % key)
+    return value
+
+
+def _prepare_portgroups(items):
+    """Convert the portgroups of a node of a bulk enrollment request.
+
+    :param items: a list of dicts with the fields of the portgroups.
+    :raises: Invalid if a portgroup is not valid.
+    :returns: a tuple (list of dicts with the portgroup object as
+        ``portgroup`` and an empty list of member ports as ``ports``,
+        dictionary mapping the UUIDs and names of the portgroups to tuples
+        (one of these dicts, whether the portgroup supports standalone
+        ports)).
+    """
+    groups = []
+    by_ident = {}
+    for item in items:
+        portgroup = wsme_json.fromjson(BulkPortgroup, item)
+        if portgroup.node_uuid is not wtypes.Unset:
+            raise exception.Invalid(
+                _("Cannot specify node_uuid on portgroup creation, the "
+                  "portgroup belongs to the node it is created with."))
+        if (portgroup.name
+                and not api_utils.is_valid_logical_name(portgroup.name)):
+            raise exception.Invalid(
+                _("Cannot create portgroup with invalid name "
+                  "'%(name)s'") % {'name': portgroup.name})
+
+        pg_dict = portgroup.as_dict()
+        pg_dict.pop('node_uuid', None)
+        api_utils.handle_post_port_like_extra_vif(pg_dict)
+        if not pg_dict.get('uuid'):
+            pg_dict['uuid'] = uuidutils.generate_uuid()
+
+        group = {'portgroup': objects.Portgroup(pecan.request.context,
+                                                **pg_dict),
+                 'ports': []}
+        groups.append(group)
+        standalone = pg_dict.get('standalone_ports_supported', True)
+        by_ident[pg_dict['uuid']] = (group, standalone)
+        if pg_dict.get('name'):
+            by_ident[pg_dict['name']] = (group, standalone)
+    return groups, by_ident
+
+
+def _prepare_ports(items, groups):
+    """Convert the ports of a node of a bulk enrollment request.
+
+    :param items: a list of dicts with the fields of the ports.
+    :param groups: the portgroups of the node by UUID and name, see
+        :func:`_prepare_portgroups`. The member ports are added to them.
+    :raises: Invalid if a port is not valid.
+    :raises: Conflict if a port can not be a member of its portgroup.
+    :returns: a list of the port objects not in a portgroup.
+    """
+    ports = []
+    for item in items:
+        port = wsme_json.fromjson(BulkPort, item)
+        if port.node_uuid is not wtypes.Unset:
+            raise exception.Invalid(
+                _("Cannot specify node_uuid on port creation, the port "
+                  "belongs to the node it is created with."))
+        if (port.is_smartnic and not types.locallinkconnectiontype
+                .validate_for_smart_nic(port.local_link_connection)):
+            raise exception.Invalid(
+                _("Smart NIC port must have port_id and hostname in "
+                  "local_link_connection"))
+
+        pdict = port.as_dict()
+        pdict.pop('node_uuid', None)
+        portgroup_ident = pdict.pop('portgroup_uuid', None)
+        vif = api_utils.handle_post_port_like_extra_vif(pdict)
+        if not pdict.get('uuid'):
+            pdict['uuid'] = uuidutils.generate_uuid()
+        rpc_port = objects.Port(pecan.request.context, **pdict)
+
+        if not portgroup_ident:
+            ports.append(rpc_port)
+            continue
+        if portgroup_ident not in groups:
+            raise exception.Invalid(
+                _("Portgroup %s is not created with the node of the "
+                  "port") % portgroup_ident)
+        group, standalone = groups[portgroup_ident]
+        if (pdict.get('pxe_enabled') or vif) and not standalone:
+            raise exception.Conflict(
+                _("Port group %s doesn't support standalone ports. This port "
+                  "cannot be created as a member of that port group because "
+                  "either 'extra/vif_port_id' was specified or "
+                  "'pxe_enabled' was set to True.") % portgroup_ident)
+        group['ports'].append(rpc_port)
+    return ports
+
+
+def _prepare_new_node(item):
+    """Convert a node of a bulk enrollment request to objects.
+
+    :param item: a dict with the fields of the node, and optionally its
+        ``ports``, ``portgroups`` and ``traits``.
+    :raises: Invalid, ClientSideError or NotAcceptable if the node or one
+        of its ports, portgroups or traits is not valid.
+    :raises: NoValidHost if no conductor can manage the node.
+    :returns: a tuple (RPC topic of the conductor managing the node, dict
+        with the objects to create as expected by
+        :meth:`ironic.objects.node.Node.create_many`, UUID of the chassis of
+        the node).
+    """
+    item = dict(item)
+    port_items = _get_list(item, 'ports')
+    portgroup_items = _get_list(item, 'portgroups')
+    traits = _get_list(item, 'traits')
+
+    node = wsme_json.fromjson(node_api.Node, item)
+    node_api.check_new_node(node)
+    # NOTE: get_topic_for checks if node.driver is in the hash ring and
+    # raises NoValidHost if it is not.
+    topic = pecan.request.rpcapi.get_topic_for(node)
+    if node.name != wtypes.Unset and node.name is not None:
+        node_api.check_node_names_acceptable(
+            [node.name], _("Cannot create node with invalid name '%(name)s'"))
+    node.provision_state = api_utils.initial_node_provision_state()
+    if not node.resource_class:
+        node.resource_class = CONF.default_resource_class
+
+    for trait in traits:
+        if not isinstance(trait, six.string_types):
+            raise exception.Invalid(_("Invalid trait %s") % trait)
+        api_utils.validate_trait(trait)
+
+    portgroups, groups_by_ident = _prepare_portgroups(portgroup_items)
+    ports = _prepare_ports(port_items, groups_by_ident)
+
+    return topic, {'node': objects.Node(pecan.request.context,
+                                        **node.as_dict()),
+                   'ports': ports,
+                   'portgroups': portgroups,
+                   'traits': traits}, node.chassis_uuid
+
+
+def _notify_new_node(emit, node, chassis_uuid):
+    """Emit the create notifications of a node and its ports and portgroups.
+
+    :param emit: the function emitting a notification, from
+        :mod:`ironic.api.controllers.v1.notification_utils`.
+    :param node: a dict with the objects of a node, as returned by
+        :func:`_prepare_new_node`.
+    :param chassis_uuid: the UUID of the chassis of the node.
+    """
+    context = pecan.request.context
+    node_obj = node['node']
+    emit(context, node_obj, 'create', chassis_uuid=chassis_uuid)
+    for group in node['portgroups']:
+        portgroup = group['portgroup']
+        emit(context, portgroup, 'create', node_uuid=node_obj.uuid)
+        for port in group['ports']:
+            emit(context, port, 'create', node_uuid=node_obj.uuid,
+                 portgroup_uuid=portgroup.uuid)
+    for port in node['ports']:
+        emit(context, port, 'create', node_uuid=node_obj.uuid,
+             portgroup_uuid=None)
+
+
+def _get_nodes(request):
+    """Get the nodes of a bulk request.
+
+    :param request: a :class:`BulkPower` instance.
+    :raises: ClientSideError (HTTP 400) if the nodes are not selected either
+        by a list or by filters, or if there are too many of them.
+    :returns: a tuple (list of Node objects, dictionary of errors for the
+        requested nodes that were not found).
+    """
+    limit = CONF.api.bulk_max_nodes
+    filters = dict((key, getattr(request, key)) for key in _FILTERS
+                   if getattr(request, key) is not wtypes.Unset)
+    context = pecan.request.context
+    errors = {}
+
+    if request.nodes is not wtypes.Unset:
+        if filters:
+            raise wsme.exc.ClientSideError(
+                _("The list of nodes and the node filters %s are mutually "
+                  "exclusive") % ', '.join(sorted(filters)))
+        idents = list(collections.OrderedDict.fromkeys(request.nodes))
+        if len(idents) > limit:
+            raise wsme.exc.ClientSideError(
+                _("No more than %d nodes can be requested at once") % limit)
+
+        uuids = [ident for ident in idents if uuidutils.is_uuid_like(ident)]
+        names = [ident for ident in idents if ident not in uuids]
+        nodes = []
+        if uuids:
+            nodes.extend(objects.Node.list(context,
+                                           filters={'uuid_in': uuids}))
+        if names:
+            nodes.extend(objects.Node.list(context,
+                                           filters={'name_in': names}))
+        found = set()
+        for node in nodes:
+            found.update((node.uuid, node.name))
+        for ident in idents:
+            if ident not in found:
+                errors[ident] = six.text_type(
+                    exception.NodeNotFound(node=ident))
+        return nodes, errors
+
+    if not filters:
+        raise wsme.exc.ClientSideError(
+            _("Either a list of nodes or node filters are required"))
+    nodes = objects.Node.list(context, limit=limit + 1, filters=filters)
+    if len(nodes) > limit:
+        raise wsme.exc.ClientSideError(
+            _("More than %d nodes match the filters, no more than %d nodes "
+              "can be requested at once") % (limit, limit))
+    return nodes, errors
+
+
+class BulkController(rest.RestController):
+    """REST controller for the bulk operations on nodes."""
+
+    _custom_actions = {
+        'nodes': ['POST'],
+        'power': ['PUT'],
+    }
+
+    @pecan.expose()
+    def _lookup(self, *remainder):
+        if not api_utils.allow_bulk_power():
+            pecan.abort(http_client.NOT_FOUND)
+
+    @METRICS.timer('BulkController.power')
+    @expose.expose(BulkResult, body=BulkPower,
+                   status_code=http_client.ACCEPTED)
+    def power(self, request):
+        """Set the power state of several nodes.
+
+        :param request: a :class:`BulkPower` with the target power state and
+            the nodes.
+        :raises: NotFound (HTTP 404) if the requested version of the API is
+            less than 1.55.
+        :raises: NotAcceptable (HTTP 406) for soft reboot, soft power off or
+            timeout parameter, if requested version of the API is less than
+            1.27.
+        :raises: ClientSideError (HTTP 400) if the target state is not
+            valid, or if the nodes are not properly selected.
+        :returns: a :class:`BulkResult` reporting for each node whether the
+            power action was accepted.
+        """
+        if not api_utils.allow_bulk_power():
+            raise exception.NotFound()
+
+        cdict = pecan.request.context.to_policy_values()
+        policy.authorize('baremetal:node:set_power_state', cdict, cdict)
+
+        target = request.target
+        timeout = request.timeout or None
+        if ((target in [ir_states.SOFT_REBOOT, ir_states.SOFT_POWER_OFF]
+             or timeout) and not api_utils.allow_soft_power_off()):
+            raise exception.NotAcceptable()
+        if target not in node_api.ALLOWED_TARGET_POWER_STATES:
+            raise wsme.exc.ClientSideError(
+                _("The requested action \"%s\" is not a valid power "
+                  "state") % target)
+
+        nodes, errors = _get_nodes(request)
+        rpcapi = pecan.request.rpcapi
+        by_topic = collections.defaultdict(list)
+        for node in nodes:
+            # Don't change power state for nodes being cleaned
+            if node.provision_state in (ir_states.CLEANWAIT,
+                                        ir_states.CLEANING):
+                errors[node.uuid] = six.text_type(
+                    exception.InvalidStateRequested(
+                        action=target, node=node.uuid,
+                        state=node.provision_state))
+                continue
+            try:
+                by_topic[rpcapi.get_topic_for(node)].append(node.uuid)
+            except exception.NoValidHost as e:
+                errors[node.uuid] = six.text_type(e)
+
+        accepted = []
+        for topic, uuids in by_topic.items():
+            try:
+                results = rpcapi.change_nodes_power_state(
+                    pecan.request.context, uuids, target, timeout=timeout,
+                    topic=topic)
+            except Exception as e:
+                LOG.warning('Failed to request the power state %(target)s '
+                            'for nodes %(nodes)s from %(topic)s: %(error)s',
+                            {'target': target, 'nodes': ', '.join(uuids),
+                             'topic': topic, 'error': e})
+                errors.update((uuid, six.text_type(e)) for uuid in uuids)
+                continue
+            for uuid in uuids:
+                error = results.get(uuid, _('No result from the conductor'))
+                if error is None:
+                    accepted.append(uuid)
+                else:
+                    errors[uuid] = error
+
+        return BulkResult(
+            nodes=([BulkNodeResult(uuid) for uuid in accepted]
+                   + [BulkNodeResult(ident, error)
+                      for ident, error in sorted(errors.items())]))
+
+    @METRICS.timer('BulkController.nodes')
+    @expose.expose(BulkResult, body=BulkNodes)
+    def nodes(self, request):
+        """Create several nodes with their ports, portgroups and traits.
+
+        :param request: a :class:`BulkNodes` with the nodes.
+        :raises: NotFound (HTTP 404) if the requested version of the API is
+            less than 1.56.
+        :raises: ClientSideError (HTTP 400) if there are too many nodes.
+        :returns: a :class:`BulkResult` reporting for each node, in the same
+            order, whether it was created.
+        """
+        if not api_utils.allow_bulk_nodes():
+            raise exception.NotFound()
+
+        context = pecan.request.context
+        cdict = context.to_policy_values()
+        policy.authorize('baremetal:node:create', cdict, cdict)
+        items = request.nodes
+        if any(isinstance(item, dict) and item.get('ports')
+               for item in items):
+            policy.authorize('baremetal:port:create', cdict, cdict)
+        if any(isinstance(item, dict) and item.get('portgroups')
+               for item in items):
+            policy.authorize('baremetal:portgroup:create', cdict, cdict)
+
+        limit = CONF.api.bulk_max_nodes
+        if len(items) > limit:
+            raise wsme.exc.ClientSideError(
+                _("No more than %d nodes can be requested at once") % limit)
+
+        uuids = [None] * len(items)
+        errors = [None] * len(items)
+        by_topic = collections.defaultdict(list)
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = _("A node must be a JSON object")
+                continue
+            # NOTE: the UUID is needed to map the node onto the hash ring,
+            # and to report the result.
+            if not item.get('uuid'):
+                item['uuid'] = uuidutils.generate_uuid()
+            uuids[index] = six.text_type(item['uuid'])
+            try:
+                topic, node, chassis_uuid = _prepare_new_node(item)
+            except (exception.IronicException, wsme.exc.ClientSideError) as e:
+                errors[index] = six.text_type(e)
+                continue
+            by_topic[topic].append((index, node, chassis_uuid))
+
+        rpcapi = pecan.request.rpcapi
+        for topic, nodes in by_topic.items():
+            for _index, node, chassis_uuid in nodes:
+                _notify_new_node(notify.emit_start_notification, node,
+                                 chassis_uuid)
+            try:
+                results = rpcapi.create_nodes(
+                    context, [node for _index, node, _chassis in nodes],
+                    topic=topic)
+            except Exception as e:
+                LOG.warning('Failed to create %(count)d nodes with %(topic)s: '
+                            '%(error)s',
+                            {'count': len(nodes), 'topic': topic, 'error': e})
+                results = [six.text_type(e)] * len(nodes)
+            for (index, node, chassis_uuid), error in zip(nodes, results):
+                errors[index] = error
+                if error is None:
+                    # NOTE: the traits are only part of the notification
+                    # payload, they are created from the trait names
+                    node['node'].traits = objects.TraitList(
+                        context, objects=[objects.Trait(context, trait=trait)
+                                          for trait in node['traits']])
+                    emit = notify.emit_end_notification
+                else:
+                    emit = notify.emit_error_notification
+                _notify_new_node(emit, node, chassis_uuid)
+
+        return BulkResult(nodes=[BulkNodeResult(uuid, error)
+                                 for uuid, error in zip(uuids, errors)])
@@ -15,7 +15,6 @@
 
 import datetime
 
-from ironic_lib import metrics_utils
 from oslo_utils import uuidutils
 import pecan
 from pecan import rest
@@ -33,10 +32,11 @@ from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api import expose
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import policy
 from ironic import objects
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 
 _DEFAULT_RETURN_FIELDS = ('uuid', 'description')
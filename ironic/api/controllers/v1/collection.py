@@ -13,11 +13,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo_log import log
+from oslo_serialization import jsonutils
 import pecan
 from wsme import types as wtypes
 
 from ironic.api.controllers import base
 from ironic.api.controllers import link
+from ironic.conf import CONF
+
+LOG = log.getLogger(__name__)
 
 
 class Collection(base.APIBase):
@@ -42,11 +47,125 @@ class Collection(base.APIBase):
         if not self.has_next(limit):
             return wtypes.Unset
 
-        resource_url = url or self._type
-        q_args = ''.join(['%s=%s&' % (key, kwargs[key]) for key in kwargs])
-        next_args = '?%(args)slimit=%(limit)d&marker=%(marker)s' % {
-            'args': q_args, 'limit': limit,
-            'marker': getattr(self.collection[-1], self.get_key_field())}
+        return get_next_link(self.collection, limit, url or self._type,
+                             key_field=self.get_key_field(), **kwargs)
+
+
+def get_next_link(items, limit, url, key_field='uuid', **kwargs):
+    """Return a link to the next subset of a list of objects.
+
+    :param items: the objects of the current subset.
+    :param limit: the maximum number of objects in a subset.
+    :param url: the resource URL of the collection.
+    :param key_field: the attribute of the objects used as a marker.
+    :param kwargs: additional query arguments of the link.
+    :returns: the link, or None if there is no next subset.
+    """
+    if not items or len(items) != limit:
+        return None
+
+    return build_next_link(getattr(items[-1], key_field), limit, url,
+                           **kwargs)
+
+
+def build_next_link(marker, limit, url, base_url=None, **kwargs):
+    """Build a link to the subset of a collection following a marker.
+
+    :param marker: the key of the last object of the current subset.
+    :param limit: the maximum number of objects in a subset.
+    :param url: the resource URL of the collection.
+    :param base_url: the public URL of the API, defaults to the one of the
+        current request.
+    :param kwargs: additional query arguments of the link.
+    :returns: the link.
+    """
+    q_args = ''.join(['%s=%s&' % (key, kwargs[key]) for key in kwargs])
+    next_args = '?%(args)slimit=%(limit)d&marker=%(marker)s' % {
+        'args': q_args, 'limit': limit, 'marker': marker}
+
+    return link.build_url(url, next_args, base_url=base_url)
+
+
+def fetch_chunks(fetch, limit, marker=None, chunk_size=None):
+    """Fetch a subset of a collection from the database in chunks.
+
+    The chunks contain the same objects as a single query of ``limit``
+    objects would return, provided that the query is sorted.
+
+    :param fetch: a callable accepting a limit and a marker object, and
+        returning a list of objects.
+    :param limit: the maximum number of objects to fetch.
+    :param marker: the marker object of the subset, if any.
+    :param chunk_size: the maximum number of objects fetched at once,
+        defaults to the ``[api]stream_chunk_size`` option.
+    :returns: a generator of lists of objects.
+    """
+    chunk_size = chunk_size or CONF.api.stream_chunk_size
+    while limit > 0:
+        chunk = fetch(min(chunk_size, limit), marker)
+        if chunk:
+            yield chunk
+        if len(chunk) < min(chunk_size, limit):
+            return
+        limit -= len(chunk)
+        marker = chunk[-1]
+
+
+def stream(resource, chunks, convert, limit, url, key_field='uuid',
+           **kwargs):
+    """Encode a collection as JSON while its objects are being fetched.
+
+    The result is the same as the one of a :class:`Collection`: the link to
+    the next subset is added if ``limit`` items were converted, with the
+    last fetched object as a marker.
+
+    :param resource: the name of the collection, e.g. "nodes".
+    :param chunks: an iterable of lists of objects.
+    :param convert: a callable converting a list of objects to a list of
+        JSON-ready items. Objects that cannot be listed are skipped.
+    :param limit: the maximum number of items in a subset.
+    :param url: the resource URL of the collection.
+    :param key_field: the attribute of the objects used as a marker.
+    :param kwargs: additional query arguments of the next link.
+    :returns: a generator of encoded (bytes) chunks of the collection.
+    """
+    # NOTE: the request is not available any more when the response body is
+    # being sent.
+    base_url = pecan.request.public_url
+    return _stream(resource, chunks, convert, limit, url, base_url,
+                   key_field, kwargs)
+
+
+def _stream(resource, chunks, convert, limit, url, base_url, key_field,
+            next_args):
+    prefix = '{"%s": [' % resource
+    count = 0
+    last = None
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            items = convert(chunk)
+            last = chunk[-1]
+            if not items:
+                continue
+            count += len(items)
+            data = prefix + ', '.join(jsonutils.dumps(item)
+                                      for item in items)
+            prefix = ', '
+            yield data.encode('utf-8')
+    except Exception:
+        if prefix == ', ':
+            # NOTE: the response status has already been sent, the best we
+            # can do is to interrupt the response.
+            LOG.exception('Failed to list %s, the response is incomplete',
+                          resource)
+        raise
 
-        return link.Link.make_link('next', pecan.request.public_url,
-                                   resource_url, next_args).href
+    data = '' if prefix == ', ' else prefix
+    data += ']'
+    if count and count == limit:
+        next_link = build_next_link(getattr(last, key_field), limit, url,
+                                    base_url=base_url, **next_args)
+        data += ', "next": %s' % jsonutils.dumps(next_link)
+    yield (data + '}').encode('utf-8')
@@ -12,7 +12,6 @@
 
 import datetime
 
-from ironic_lib import metrics_utils
 from oslo_log import log
 from oslo_utils import timeutils
 import pecan
@@ -28,13 +27,14 @@ from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api import expose
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import policy
 import ironic.conf
 from ironic import objects
 
 CONF = ironic.conf.CONF
 LOG = log.getLogger(__name__)
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 _DEFAULT_RETURN_FIELDS = ('hostname', 'conductor_group', 'alive')
 
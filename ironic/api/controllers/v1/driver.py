@@ -13,7 +13,6 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from ironic_lib import metrics_utils
 import pecan
 from pecan import rest
 from six.moves import http_client
@@ -27,11 +26,12 @@ from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api import expose
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import policy
 from ironic.drivers import base as driver_base
 
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 # Property information for drivers:
 #   key = driver name;
@@ -15,7 +15,6 @@
 
 import datetime
 
-from ironic_lib import metrics_utils
 import jsonschema
 from oslo_log import log
 from oslo_utils import strutils
@@ -41,6 +40,7 @@ from ironic.api.controllers.v1 import volume
 from ironic.api import expose
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import policy
 from ironic.common import states as ir_states
 from ironic.conductor import utils as conductor_utils
@@ -82,7 +82,7 @@ _CLEAN_STEPS_SCHEMA = {
     }
 }
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 # Vendor information for node's driver:
 #   key = driver name;
@@ -113,6 +113,16 @@ ALLOWED_TARGET_POWER_STATES = (ir_states.POWER_ON,
 
 _NODE_DESCRIPTION_MAX_LENGTH = 4096
 
+# Node fields covered by the entity tags in addition to the timestamps,
+# which may have a resolution of one second only
+_ETAG_NODE_FIELDS = ('power_state', 'target_power_state', 'provision_state',
+                     'target_provision_state', 'provision_updated_at',
+                     'reservation', 'maintenance', 'last_error',
+                     'console_enabled')
+
+# API version (minor) -> node fields hidden in this version
+_HIDDEN_FIELDS = {}
+
 
 def get_nodes_controller_reserved_names():
     global _NODES_CONTROLLER_RESERVED_WORDS
@@ -122,6 +132,71 @@ def get_nodes_controller_reserved_names():
     return _NODES_CONTROLLER_RESERVED_WORDS
 
 
+def check_node_names_acceptable(names, error_msg):
+    """Checks all node 'name's are acceptable, it does not return a value.
+
+    This function will raise an exception for unacceptable names.
+
+    :param names: list of node names to check
+    :param error_msg: error message in case of wsme.exc.ClientSideError,
+        should contain %(name)s placeholder.
+    :raises: exception.NotAcceptable
+    :raises: wsme.exc.ClientSideError
+    """
+    if not api_utils.allow_node_logical_names():
+        raise exception.NotAcceptable()
+
+    reserved_names = get_nodes_controller_reserved_names()
+    for name in names:
+        if not api_utils.is_valid_node_name(name):
+            raise wsme.exc.ClientSideError(
+                error_msg % {'name': name},
+                status_code=http_client.BAD_REQUEST)
+        if name in reserved_names:
+            raise wsme.exc.ClientSideError(
+                'The word "%(name)s" is reserved and can not be used as a '
+                'node name. Reserved words are: %(reserved)s.' %
+                {'name': name,
+                 'reserved': ', '.join(reserved_names)},
+                status_code=http_client.BAD_REQUEST)
+
+
+def check_new_node(node):
+    """Check the fields of a node to be created.
+
+    :param node: a Node API object of the node to be created.
+    :raises: Invalid if a field can not be set on node creation.
+    :raises: NotAcceptable if a field is not allowed in the requested API
+        version.
+    """
+    if node.conductor is not wtypes.Unset:
+        msg = _("Cannot specify conductor on node creation.")
+        raise exception.Invalid(msg)
+
+    reject_fields_in_newer_versions(node)
+
+    if node.traits is not wtypes.Unset:
+        msg = _("Cannot specify node traits on node creation. Traits must "
+                "be set via the node traits API.")
+        raise exception.Invalid(msg)
+
+    if (node.protected is not wtypes.Unset or
+            node.protected_reason is not wtypes.Unset):
+        msg = _("Cannot specify protected or protected_reason on node "
+                "creation. These fields can only be set for active nodes")
+        raise exception.Invalid(msg)
+
+    if (node.description is not wtypes.Unset and
+            len(node.description) > _NODE_DESCRIPTION_MAX_LENGTH):
+        msg = _("Cannot create node with description exceeds %s "
+                "characters") % _NODE_DESCRIPTION_MAX_LENGTH
+        raise exception.Invalid(msg)
+
+    if node.allocation_uuid is not wtypes.Unset:
+        msg = _("Allocation UUID cannot be specified, use allocations API")
+        raise exception.Invalid(msg)
+
+
 def hide_fields_in_newer_versions(obj):
     """This method hides fields that were added in newer API versions.
 
@@ -133,6 +208,20 @@ def hide_fields_in_newer_versions(obj):
         setattr(obj, field, wsme.Unset)
 
 
+def get_hidden_fields():
+    """Return the node fields hidden in the API version of the request.
+
+    The result only depends on the API version, it is computed once for
+    every version.
+    """
+    minor = pecan.request.version.minor
+    hidden = _HIDDEN_FIELDS.get(minor)
+    if hidden is None:
+        hidden = _HIDDEN_FIELDS[minor] = frozenset(
+            api_utils.disallowed_fields())
+    return hidden
+
+
 def reject_fields_in_newer_versions(obj):
     """When creating an object, reject fields that appear in newer versions."""
     for field in api_utils.disallowed_fields():
@@ -459,6 +548,14 @@ class NodeStatesController(rest.RestController):
         # DB. Ironic counts with a periodic task that verify the current
         # power states of the nodes and update the DB accordingly.
         rpc_node = api_utils.get_rpc_node(node_ident)
+        etag = api_utils.make_etag(
+            'states', pecan.request.version.minor,
+            api_utils.allow_raid_config(), rpc_node.uuid,
+            rpc_node.updated_at or rpc_node.created_at,
+            *[getattr(rpc_node, field) for field in _ETAG_NODE_FIELDS])
+        not_modified = api_utils.check_not_modified(etag)
+        if not_modified is not None:
+            return not_modified
         return NodeStates.convert(rpc_node)
 
     @METRICS.timer('NodeStatesController.raid')
@@ -663,7 +760,7 @@ class NodeStatesController(rest.RestController):
             raise exception.NodeInMaintenance(op=_('provisioning'),
                                               node=rpc_node.uuid)
 
-        m = ir_states.machine.copy()
+        m = ir_states.machine.copy(shallow=True)
         m.initialize(rpc_node.provision_state)
         if not m.is_actionable_event(ir_states.VERBS.get(target, target)):
             # Normally, we let the task manager recognize and deal with
@@ -1362,6 +1459,219 @@ class NodeCollection(collection.Collection):
         return sample
 
 
+class NodeSerializer(object):
+    """Fast conversion of nodes to their API representation.
+
+    This produces the same result as :meth:`Node.convert_with_links`
+    followed by the WSME serialization, without building WSME objects.
+    Everything that only depends on the request (API version, policies,
+    requested fields) is computed once, and chassis are fetched once for
+    all the nodes. The request itself is not used after the serializer is
+    created, so that the response can be streamed.
+
+    :param fields: the list of fields to return, or None for all of them.
+    """
+
+    _api_fields = None
+
+    def __init__(self, fields=None):
+        if NodeSerializer._api_fields is None:
+            # NOTE: the same fields as in Node.__init__
+            NodeSerializer._api_fields = tuple(
+                field for field in (list(objects.Node.fields)
+                                    + ['chassis_uuid', 'conductor'])
+                if hasattr(Node, field))
+
+        self.requested_fields = fields
+        self.show_conductor = (api_utils.allow_expose_conductors() and
+                               (fields is None or 'conductor' in fields))
+        self.show_allocation = (api_utils.allow_allocations() and
+                                (fields is None or
+                                 'allocation_uuid' in fields))
+
+        hidden = get_hidden_fields()
+        self.fields = [field for field in self._api_fields
+                       if field not in hidden
+                       and (fields is None or field in fields)
+                       and (field != 'conductor' or self.show_conductor)]
+
+        self.context = pecan.request.context
+        self.rpcapi = pecan.request.rpcapi
+        cdict = self.context.to_policy_values()
+        # NOTE: see Node.sanitize for the policies names
+        self.show_driver_secrets = policy.check("show_password", cdict, cdict)
+        self.show_instance_secrets = policy.check("show_instance_secrets",
+                                                  cdict, cdict)
+        self.version = pecan.request.version.minor
+        self.show_nostate = self.version < versions.MINOR_2_AVAILABLE_STATE
+        self.show_inspect_wait = api_utils.allow_inspect_wait_state()
+
+        self.url = pecan.request.public_url
+        self.sub_resources = []
+        if fields is None:
+            self.sub_resources.append('ports')
+            if api_utils.allow_links_node_states_and_driver_properties():
+                self.sub_resources.append('states')
+            if api_utils.allow_portgroups_subcontrollers():
+                self.sub_resources.append('portgroups')
+            if api_utils.allow_volume():
+                self.sub_resources.append('volume')
+
+        self._chassis_uuids = {}
+
+    def check_fields(self):
+        """Check that the requested fields exist.
+
+        :raises: InvalidParameterValue if invalid fields were requested.
+        """
+        if self.requested_fields is not None:
+            api_utils.check_for_invalid_fields(
+                self.requested_fields,
+                set(self._api_fields) | {'allocation_uuid'})
+
+    def get_etag(self, rpc_nodes, *parts):
+        """Compute the entity tag of the representation of nodes.
+
+        Changing the traits or the conductor of a node does not update its
+        ``updated_at`` field, and the timestamps may have a resolution of
+        one second only, so the tag also covers these and the states.
+
+        :param rpc_nodes: the list of nodes.
+        :param parts: additional values the representation depends on.
+        :returns: the entity tag, as a string.
+        """
+        parts = list(parts)
+        parts.extend([self.version, self.url, self.fields,
+                      self.show_allocation, self.show_driver_secrets,
+                      self.show_instance_secrets, self.sub_resources])
+        for rpc_node in rpc_nodes:
+            parts.append(rpc_node.uuid)
+            parts.append(rpc_node.updated_at or rpc_node.created_at)
+            parts.extend(getattr(rpc_node, field)
+                         for field in _ETAG_NODE_FIELDS)
+            if 'traits' in self.fields:
+                parts.append(self._get_value(rpc_node, 'traits'))
+            if self.show_conductor:
+                parts.append(self._get_value(rpc_node, 'conductor'))
+        return api_utils.make_etag(*parts)
+
+    def _get_chassis_uuid(self, chassis_id):
+        try:
+            return self._chassis_uuids[chassis_id]
+        except KeyError:
+            chassis = objects.Chassis.get(self.context, chassis_id)
+            self._chassis_uuids[chassis_id] = chassis.uuid
+            return chassis.uuid
+
+    def _get_value(self, rpc_node, field):
+        if field == 'chassis_uuid':
+            if not rpc_node.obj_attr_is_set('chassis_id'):
+                return wtypes.Unset
+            chassis_id = rpc_node.chassis_id
+            return (None if chassis_id is None
+                    else self._get_chassis_uuid(chassis_id))
+        if field == 'conductor':
+            # NOTE(kaifeng) It is possible a node gets orphaned in certain
+            # circumstances, set conductor to None in such case.
+            try:
+                return self.rpcapi.get_conductor_for(rpc_node)
+            except (exception.NoValidHost, exception.TemporaryFailure):
+                LOG.debug('Currently there is no conductor servicing node '
+                          '%(node)s.', {'node': rpc_node.uuid})
+                return None
+        if not rpc_node.obj_attr_is_set(field):
+            # NOTE(jroll) this is special-cased to "" and not Unset,
+            # because it is used in hash ring calculations
+            return '' if field == 'conductor_group' else wtypes.Unset
+
+        value = getattr(rpc_node, field)
+        if field == 'traits':
+            return value.get_trait_names() if value is not None else None
+        if isinstance(value, datetime.datetime):
+            return value.isoformat()
+        return value
+
+    def convert(self, rpc_node):
+        """Convert a node to a JSON-ready dictionary."""
+        result = {}
+        for field in self.fields:
+            value = self._get_value(rpc_node, field)
+            if value is not wtypes.Unset:
+                result[field] = value
+
+        if self.show_allocation:
+            result['allocation_uuid'] = None
+            if rpc_node.allocation_id:
+                try:
+                    allocation = objects.Allocation.get_by_id(
+                        self.context, rpc_node.allocation_id)
+                    result['allocation_uuid'] = allocation.uuid
+                except exception.AllocationNotFound:
+                    pass
+
+        if not self.show_driver_secrets and result.get('driver_info'):
+            result['driver_info'] = strutils.mask_dict_password(
+                result['driver_info'], "******")
+            if result['driver_info'].get('ssh_key_contents'):
+                result['driver_info']['ssh_key_contents'] = "******"
+
+        if not self.show_instance_secrets and result.get('instance_info'):
+            result['instance_info'] = strutils.mask_dict_password(
+                result['instance_info'], "******")
+            if result['instance_info'].get('image_url'):
+                result['instance_info']['image_url'] = "******"
+
+        provision_state = result.get('provision_state')
+        if self.show_nostate and provision_state == ir_states.AVAILABLE:
+            result['provision_state'] = ir_states.NOSTATE
+        elif (not self.show_inspect_wait
+              and provision_state == ir_states.INSPECTWAIT):
+            result['provision_state'] = ir_states.INSPECTING
+
+        for resource in self.sub_resources:
+            result[resource] = link.make_links(
+                self.url, 'nodes', '%s/%s' % (rpc_node.uuid, resource))
+        result['links'] = link.make_links(self.url, 'nodes', rpc_node.uuid)
+        return result
+
+    def convert_collection(self, rpc_nodes, limit, url=None, **kwargs):
+        """Convert a list of nodes to a JSON-ready collection.
+
+        :param rpc_nodes: the list of nodes.
+        :param limit: the page size, used to build the link to the next page.
+        :param url: the resource URL of the collection.
+        :param kwargs: additional query arguments of the next page link.
+        :returns: a dictionary with the ``nodes`` and, if there are more
+            nodes to list, the ``next`` keys.
+        """
+        if rpc_nodes:
+            self.check_fields()
+        result = {'nodes': [self.convert(rpc_node)
+                            for rpc_node in rpc_nodes]}
+        next_link = collection.get_next_link(rpc_nodes, limit,
+                                             url or 'nodes', **kwargs)
+        if next_link:
+            result['next'] = next_link
+        return result
+
+    def stream_collection(self, chunks, limit, url=None, **kwargs):
+        """Convert chunks of nodes to an encoded JSON collection.
+
+        :param chunks: an iterable of lists of nodes.
+        :param limit: the page size, used to build the link to the next page.
+        :param url: the resource URL of the collection.
+        :param kwargs: additional query arguments of the next page link.
+        :returns: a generator of encoded chunks of the same collection as
+            the one returned by :meth:`convert_collection`.
+        """
+        def _convert(rpc_nodes):
+            self.check_fields()
+            return [self.convert(rpc_node) for rpc_node in rpc_nodes]
+
+        return collection.stream('nodes', chunks, _convert, limit,
+                                 url or 'nodes', **kwargs)
+
+
 class NodeVendorPassthruController(rest.RestController):
     """REST controller for VendorPassthru.
 
@@ -1610,11 +1920,11 @@ class NodesController(rest.RestController):
         if subcontroller:
             return subcontroller(node_ident=ident), remainder[1:]
 
-    def _filter_by_conductor(self, nodes, conductor):
+    def _filter_by_conductor(self, nodes, conductor, rpcapi):
         filtered_nodes = []
         for n in nodes:
             try:
-                host = pecan.request.rpcapi.get_conductor_for(n)
+                host = rpcapi.get_conductor_for(n)
                 if host == conductor:
                     filtered_nodes.append(n)
             except (exception.NoValidHost, exception.TemporaryFailure):
@@ -1650,6 +1960,8 @@ class NodesController(rest.RestController):
 
         # The query parameters for the 'next' URL
         parameters = {}
+        # The chunks of nodes, when the response is streamed
+        chunks = None
 
         if instance_uuid:
             # NOTE(rloo) if instance_uuid is specified, the other query
@@ -1680,13 +1992,30 @@ class NodesController(rest.RestController):
                 if value is not None:
                     filters[key] = value
 
-            nodes = objects.Node.list(pecan.request.context, limit, marker_obj,
-                                      sort_key=sort_key, sort_dir=sort_dir,
-                                      filters=filters)
-
-            # Special filtering on results based on conductor field
-            if conductor:
-                nodes = self._filter_by_conductor(nodes, conductor)
+            context = pecan.request.context
+            rpcapi = pecan.request.rpcapi
+            if CONF.api.stream_collections:
+                def _fetch(chunk_limit, chunk_marker):
+                    return objects.Node.list(context, chunk_limit,
+                                             chunk_marker, sort_key=sort_key,
+                                             sort_dir=sort_dir,
+                                             filters=filters)
+
+                chunks = collection.fetch_chunks(_fetch, limit, marker_obj)
+                # Special filtering on results based on conductor field
+                if conductor:
+                    chunks = (self._filter_by_conductor(chunk, conductor,
+                                                        rpcapi)
+                              for chunk in chunks)
+            else:
+                nodes = objects.Node.list(context, limit, marker_obj,
+                                          sort_key=sort_key,
+                                          sort_dir=sort_dir, filters=filters)
+
+                # Special filtering on results based on conductor field
+                if conductor:
+                    nodes = self._filter_by_conductor(nodes, conductor,
+                                                      rpcapi)
 
             parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
             if associated:
@@ -1697,10 +2026,19 @@ class NodesController(rest.RestController):
         if detail is not None:
             parameters['detail'] = detail
 
-        return NodeCollection.convert_with_links(nodes, limit,
-                                                 url=resource_url,
-                                                 fields=fields,
-                                                 **parameters)
+        serializer = NodeSerializer(fields)
+        if chunks is not None:
+            return api_utils.stream_response(serializer.stream_collection(
+                chunks, limit, url=resource_url, **parameters))
+
+        # NOTE: the collection validator covers the nodes of the page and
+        # the request URL, which determines the link to the next page
+        etag = serializer.get_etag(nodes, pecan.request.path_qs)
+        not_modified = api_utils.check_not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        return serializer.convert_collection(nodes, limit, url=resource_url,
+                                             **parameters)
 
     def _get_nodes_by_instance(self, instance_uuid):
         """Retrieve a node by its instance uuid.
@@ -1717,30 +2055,9 @@ class NodesController(rest.RestController):
     def _check_names_acceptable(self, names, error_msg):
         """Checks all node 'name's are acceptable, it does not return a value.
 
-        This function will raise an exception for unacceptable names.
-
-        :param names: list of node names to check
-        :param error_msg: error message in case of wsme.exc.ClientSideError,
-            should contain %(name)s placeholder.
-        :raises: exception.NotAcceptable
-        :raises: wsme.exc.ClientSideError
+        See :func:`check_node_names_acceptable`.
         """
-        if not api_utils.allow_node_logical_names():
-            raise exception.NotAcceptable()
-
-        reserved_names = get_nodes_controller_reserved_names()
-        for name in names:
-            if not api_utils.is_valid_node_name(name):
-                raise wsme.exc.ClientSideError(
-                    error_msg % {'name': name},
-                    status_code=http_client.BAD_REQUEST)
-            if name in reserved_names:
-                raise wsme.exc.ClientSideError(
-                    'The word "%(name)s" is reserved and can not be used as a '
-                    'node name. Reserved words are: %(reserved)s.' %
-                    {'name': name,
-                     'reserved': ', '.join(reserved_names)},
-                    status_code=http_client.BAD_REQUEST)
+        check_node_names_acceptable(names, error_msg)
 
     def _update_changed_fields(self, node, rpc_node):
         """Update rpc_node based on changed fields in a node.
@@ -1792,7 +2109,7 @@ class NodesController(rest.RestController):
                 status_code=http_client.CONFLICT)
 
     @METRICS.timer('NodesController.get_all')
-    @expose.expose(NodeCollection, types.uuid, types.uuid, types.boolean,
+    @expose.expose(types.jsontype, types.uuid, types.uuid, types.boolean,
                    types.boolean, wtypes.text, types.uuid, int, wtypes.text,
                    wtypes.text, wtypes.text, types.listtype, wtypes.text,
                    wtypes.text, wtypes.text, types.boolean, wtypes.text,
@@ -1873,7 +2190,7 @@ class NodesController(rest.RestController):
                                           **extra_args)
 
     @METRICS.timer('NodesController.detail')
-    @expose.expose(NodeCollection, types.uuid, types.uuid, types.boolean,
+    @expose.expose(types.jsontype, types.uuid, types.uuid, types.boolean,
                    types.boolean, wtypes.text, types.uuid, int, wtypes.text,
                    wtypes.text, wtypes.text, wtypes.text, wtypes.text,
                    wtypes.text, wtypes.text, wtypes.text, wtypes.text)
@@ -1994,6 +2311,10 @@ class NodesController(rest.RestController):
         api_utils.check_allowed_fields(fields)
 
         rpc_node = api_utils.get_rpc_node_with_suffix(node_ident)
+        etag = NodeSerializer(fields).get_etag([rpc_node])
+        not_modified = api_utils.check_not_modified(etag)
+        if not_modified is not None:
+            return not_modified
         return Node.convert_with_links(rpc_node, fields=fields)
 
     @METRICS.timer('NodesController.post')
@@ -2010,32 +2331,7 @@ class NodesController(rest.RestController):
         if self.from_chassis:
             raise exception.OperationNotPermitted()
 
-        if node.conductor is not wtypes.Unset:
-            msg = _("Cannot specify conductor on node creation.")
-            raise exception.Invalid(msg)
-
-        reject_fields_in_newer_versions(node)
-
-        if node.traits is not wtypes.Unset:
-            msg = _("Cannot specify node traits on node creation. Traits must "
-                    "be set via the node traits API.")
-            raise exception.Invalid(msg)
-
-        if (node.protected is not wtypes.Unset or
-                node.protected_reason is not wtypes.Unset):
-            msg = _("Cannot specify protected or protected_reason on node "
-                    "creation. These fields can only be set for active nodes")
-            raise exception.Invalid(msg)
-
-        if (node.description is not wtypes.Unset and
-                len(node.description) > _NODE_DESCRIPTION_MAX_LENGTH):
-            msg = _("Cannot create node with description exceeds %s "
-                    "characters") % _NODE_DESCRIPTION_MAX_LENGTH
-            raise exception.Invalid(msg)
-
-        if node.allocation_uuid is not wtypes.Unset:
-            msg = _("Allocation UUID cannot be specified, use allocations API")
-            raise exception.Invalid(msg)
+        check_new_node(node)
 
         # NOTE(deva): get_topic_for checks if node.driver is in the hash ring
         #             and raises NoValidHost if it is not.
@@ -149,10 +149,21 @@ def handle_error_notification(context, obj, action, **kwargs):
         yield
     except Exception:
         with excutils.save_and_reraise_exception():
-            _emit_api_notification(context, obj, action,
-                                   fields.NotificationLevel.ERROR,
-                                   fields.NotificationStatus.ERROR,
-                                   **kwargs)
+            emit_error_notification(context, obj, action, **kwargs)
+
+
+def emit_error_notification(context, obj, action, **kwargs):
+    """Helper for emitting API 'error' notifications.
+
+    :param context: request context.
+    :param obj: resource rpc object.
+    :param action: Action string to go in the EventType.
+    :param kwargs: kwargs to use when creating the notification payload.
+    """
+    _emit_api_notification(context, obj, action,
+                           fields.NotificationLevel.ERROR,
+                           fields.NotificationStatus.ERROR,
+                           **kwargs)
 
 
 def emit_end_notification(context, obj, action, **kwargs):
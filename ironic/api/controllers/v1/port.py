@@ -15,7 +15,6 @@
 
 import datetime
 
-from ironic_lib import metrics_utils
 from oslo_log import log
 from oslo_utils import uuidutils
 import pecan
@@ -33,35 +32,44 @@ from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api import expose
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import policy
 from ironic.common import states as ir_states
+from ironic.conf import CONF
 from ironic import objects
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 LOG = log.getLogger(__name__)
 
 
 _DEFAULT_RETURN_FIELDS = ('uuid', 'address')
 
 
-def hide_fields_in_newer_versions(obj):
+def get_hidden_fields():
+    """Return the port fields hidden in the API version of the request."""
+    hidden = []
     # if requested version is < 1.18, hide internal_info field
     if not api_utils.allow_port_internal_info():
-        obj.internal_info = wsme.Unset
+        hidden.append('internal_info')
     # if requested version is < 1.19, hide local_link_connection and
     # pxe_enabled fields
     if not api_utils.allow_port_advanced_net_fields():
-        obj.pxe_enabled = wsme.Unset
-        obj.local_link_connection = wsme.Unset
+        hidden.extend(['pxe_enabled', 'local_link_connection'])
     # if requested version is < 1.24, hide portgroup_uuid field
     if not api_utils.allow_portgroups_subcontrollers():
-        obj.portgroup_uuid = wsme.Unset
+        hidden.append('portgroup_uuid')
     # if requested version is < 1.34, hide physical_network field.
     if not api_utils.allow_port_physical_network():
-        obj.physical_network = wsme.Unset
+        hidden.append('physical_network')
     # if requested version is < 1.53, hide is_smartnic field.
     if not api_utils.allow_port_is_smartnic():
-        obj.is_smartnic = wsme.Unset
+        hidden.append('is_smartnic')
+    return hidden
+
+
+def hide_fields_in_newer_versions(obj):
+    for field in get_hidden_fields():
+        setattr(obj, field, wsme.Unset)
 
 
 class Port(base.APIBase):
@@ -320,6 +328,149 @@ class PortCollection(collection.Collection):
         return sample
 
 
+class PortSerializer(object):
+    """Fast conversion of ports to their API representation.
+
+    This produces the same result as :meth:`Port.convert_with_links`
+    followed by the WSME serialization, without building WSME objects.
+    The hidden fields are computed once per request, and nodes and port
+    groups are fetched once for all the ports. The request itself is not
+    used after the serializer is created, so that the response can be
+    streamed.
+
+    :param fields: the list of fields to return, or None for all of them.
+    """
+
+    _api_fields = None
+
+    def __init__(self, fields=None):
+        if PortSerializer._api_fields is None:
+            # NOTE: the same fields as in Port.__init__
+            PortSerializer._api_fields = tuple(
+                field for field in (list(objects.Port.fields)
+                                    + ['node_uuid', 'portgroup_uuid'])
+                if hasattr(Port, field))
+
+        self.requested_fields = fields
+        hidden = get_hidden_fields()
+        self.fields = [field for field in self._api_fields
+                       if field not in hidden
+                       and (fields is None or field in fields)]
+        self.url = pecan.request.public_url
+        self.context = pecan.request.context
+        self._node_uuids = {}
+        self._portgroup_uuids = {}
+
+    def check_fields(self):
+        """Check that the requested fields exist.
+
+        :raises: InvalidParameterValue if invalid fields were requested.
+        """
+        if self.requested_fields is not None:
+            api_utils.check_for_invalid_fields(self.requested_fields,
+                                               self._api_fields)
+
+    def _get_node_uuid(self, node_id):
+        try:
+            return self._node_uuids[node_id]
+        except KeyError:
+            node = objects.Node.get(self.context, node_id)
+            self._node_uuids[node_id] = node.uuid
+            return node.uuid
+
+    def _get_portgroup_uuid(self, portgroup_id):
+        try:
+            return self._portgroup_uuids[portgroup_id]
+        except KeyError:
+            try:
+                portgroup = objects.Portgroup.get(self.context, portgroup_id)
+            except exception.PortgroupNotFound:
+                # NOTE(dtantsur): port group was deleted after we fetched the
+                # port list, it may mean that the port was deleted too, but
+                # we don't know it. Pretend that the port group was removed.
+                LOG.debug('Removing port group UUID from ports of the '
+                          'deleted port group %s', portgroup_id)
+                uuid = None
+            else:
+                uuid = portgroup.uuid
+            self._portgroup_uuids[portgroup_id] = uuid
+            return uuid
+
+    def convert(self, rpc_port):
+        """Convert a port to a JSON-ready dictionary.
+
+        :raises: NodeNotFound if the node of the port does not exist.
+        """
+        # NOTE: the node is always fetched, ports of deleted nodes are
+        # skipped even when node_uuid is not requested.
+        node_uuid = self._get_node_uuid(rpc_port.node_id)
+        result = {}
+        for field in self.fields:
+            if field == 'node_uuid':
+                value = node_uuid
+            elif field == 'portgroup_uuid':
+                value = (self._get_portgroup_uuid(rpc_port.portgroup_id)
+                         if rpc_port.portgroup_id else None)
+            elif not rpc_port.obj_attr_is_set(field):
+                continue
+            else:
+                value = getattr(rpc_port, field)
+                if isinstance(value, datetime.datetime):
+                    value = value.isoformat()
+            result[field] = value
+
+        result['links'] = link.make_links(self.url, 'ports', rpc_port.uuid)
+        return result
+
+    def _convert_list(self, rpc_ports):
+        if rpc_ports:
+            self.check_fields()
+        ports = []
+        for rpc_port in rpc_ports:
+            try:
+                ports.append(self.convert(rpc_port))
+            except exception.NodeNotFound:
+                # NOTE(dtantsur): node was deleted after we fetched the port
+                # list, meaning that the port was also deleted. Skip it.
+                LOG.debug('Skipping port %s as its node was deleted',
+                          rpc_port.uuid)
+        return ports
+
+    def convert_collection(self, rpc_ports, limit, url=None, **kwargs):
+        """Convert a list of ports to a JSON-ready collection.
+
+        :param rpc_ports: the list of ports.
+        :param limit: the page size, used to build the link to the next page.
+        :param url: the resource URL of the collection.
+        :param kwargs: additional query arguments of the next page link.
+        :returns: a dictionary with the ``ports`` and, if there are more
+            ports to list, the ``next`` keys.
+        """
+        ports = self._convert_list(rpc_ports)
+        result = {'ports': ports}
+        # NOTE: the link is based on the converted ports, like in
+        # PortCollection.convert_with_links
+        if len(ports) == limit:
+            next_link = collection.get_next_link(rpc_ports, limit,
+                                                 url or 'ports', **kwargs)
+            if next_link:
+                result['next'] = next_link
+        return result
+
+    def stream_collection(self, chunks, limit, url=None, **kwargs):
+        """Convert chunks of ports to an encoded JSON collection.
+
+        :param chunks: an iterable of lists of ports.
+        :param limit: the page size, used to build the link to the next page.
+        :param url: the resource URL of the collection.
+        :param kwargs: additional query arguments of the next page link.
+        :returns: a generator of encoded chunks of the same collection as
+            the one returned by :meth:`convert_collection`.
+        """
+        return collection.stream('ports', chunks, self._convert_list, limit,
+                                 url or 'ports', **kwargs)
+
+
 class PortsController(rest.RestController):
     """REST controller for Ports."""
 
@@ -359,44 +510,50 @@ class PortsController(rest.RestController):
         if node_ident and portgroup_ident:
             raise exception.OperationNotPermitted()
 
+        context = pecan.request.context
         if portgroup_ident:
             # FIXME: Since all we need is the portgroup ID, we can
             #                 make this more efficient by only querying
             #                 for that column. This will get cleaned up
             #                 as we move to the object interface.
             portgroup = api_utils.get_rpc_portgroup(portgroup_ident)
-            ports = objects.Port.list_by_portgroup_id(pecan.request.context,
-                                                      portgroup.id, limit,
-                                                      marker_obj,
-                                                      sort_key=sort_key,
-                                                      sort_dir=sort_dir)
+
+            def _fetch(limit, marker):
+                return objects.Port.list_by_portgroup_id(
+                    context, portgroup.id, limit, marker, sort_key=sort_key,
+                    sort_dir=sort_dir)
         elif node_ident:
             # FIXME(comstud): Since all we need is the node ID, we can
             #                 make this more efficient by only querying
             #                 for that column. This will get cleaned up
             #                 as we move to the object interface.
             node = api_utils.get_rpc_node(node_ident)
-            ports = objects.Port.list_by_node_id(pecan.request.context,
-                                                 node.id, limit, marker_obj,
-                                                 sort_key=sort_key,
-                                                 sort_dir=sort_dir)
+
+            def _fetch(limit, marker):
+                return objects.Port.list_by_node_id(
+                    context, node.id, limit, marker, sort_key=sort_key,
+                    sort_dir=sort_dir)
         elif address:
-            ports = self._get_ports_by_address(address)
+            def _fetch(limit, marker):
+                return self._get_ports_by_address(address)
         else:
-            ports = objects.Port.list(pecan.request.context, limit,
-                                      marker_obj, sort_key=sort_key,
-                                      sort_dir=sort_dir)
+            def _fetch(limit, marker):
+                return objects.Port.list(context, limit, marker,
+                                         sort_key=sort_key, sort_dir=sort_dir)
         parameters = {}
 
         if detail is not None:
             parameters['detail'] = detail
 
-        return PortCollection.convert_with_links(ports, limit,
-                                                 url=resource_url,
-                                                 fields=fields,
-                                                 sort_key=sort_key,
-                                                 sort_dir=sort_dir,
-                                                 **parameters)
+        serializer = PortSerializer(fields)
+        if CONF.api.stream_collections and not address:
+            return api_utils.stream_response(serializer.stream_collection(
+                collection.fetch_chunks(_fetch, limit, marker_obj), limit,
+                url=resource_url, sort_key=sort_key, sort_dir=sort_dir,
+                **parameters))
+        return serializer.convert_collection(
+            _fetch(limit, marker_obj), limit, url=resource_url,
+            sort_key=sort_key, sort_dir=sort_dir, **parameters)
 
     def _get_ports_by_address(self, address):
         """Retrieve a port by its address.
@@ -437,7 +594,7 @@ class PortsController(rest.RestController):
             raise exception.NotAcceptable()
 
     @METRICS.timer('PortsController.get_all')
-    @expose.expose(PortCollection, types.uuid_or_name, types.uuid,
+    @expose.expose(types.jsontype, types.uuid_or_name, types.uuid,
                    types.macaddress, types.uuid, int, wtypes.text,
                    wtypes.text, types.listtype, types.uuid_or_name,
                    types.boolean)
@@ -495,7 +652,7 @@ class PortsController(rest.RestController):
                                           detail=detail)
 
     @METRICS.timer('PortsController.detail')
-    @expose.expose(PortCollection, types.uuid_or_name, types.uuid,
+    @expose.expose(types.jsontype, types.uuid_or_name, types.uuid,
                    types.macaddress, types.uuid, int, wtypes.text,
                    wtypes.text, types.uuid_or_name)
     def detail(self, node=None, node_uuid=None, address=None, marker=None,
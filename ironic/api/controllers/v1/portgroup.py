@@ -12,7 +12,7 @@
 
 import datetime
 
-from ironic_lib import metrics_utils
+from oslo_log import log
 from oslo_utils import uuidutils
 import pecan
 from six.moves import http_client
@@ -29,11 +29,14 @@ from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api import expose
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import policy
 from ironic.common import states as ir_states
+from ironic.conf import CONF
 from ironic import objects
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
+LOG = log.getLogger(__name__)
 
 _DEFAULT_RETURN_FIELDS = ('uuid', 'address', 'name')
 
@@ -247,6 +250,125 @@ class PortgroupCollection(collection.Collection):
         return sample
 
 
+class PortgroupSerializer(object):
+    """Fast conversion of portgroups to their API representation.
+
+    This produces the same result as :meth:`Portgroup.convert_with_links`
+    followed by the WSME serialization, without building WSME objects.
+    Nodes are fetched once for all the portgroups. The request itself is
+    not used after the serializer is created, so that the response can be
+    streamed.
+
+    :param fields: the list of fields to return, or None for all of them.
+    """
+
+    _api_fields = None
+
+    def __init__(self, fields=None):
+        if PortgroupSerializer._api_fields is None:
+            # NOTE: the same fields as in Portgroup.__init__
+            PortgroupSerializer._api_fields = tuple(
+                field for field in (list(objects.Portgroup.fields)
+                                    + ['node_uuid'])
+                if hasattr(Portgroup, field))
+
+        self.requested_fields = fields
+        self.fields = [field for field in self._api_fields
+                       if fields is None or field in fields]
+        self.url = pecan.request.host_url
+        self.context = pecan.request.context
+        self._node_uuids = {}
+
+    def check_fields(self):
+        """Check that the requested fields exist.
+
+        :raises: InvalidParameterValue if invalid fields were requested.
+        """
+        if self.requested_fields is not None:
+            api_utils.check_for_invalid_fields(self.requested_fields,
+                                               self._api_fields)
+
+    def _get_node_uuid(self, node_id):
+        try:
+            return self._node_uuids[node_id]
+        except KeyError:
+            node = objects.Node.get(self.context, node_id)
+            self._node_uuids[node_id] = node.uuid
+            return node.uuid
+
+    def convert(self, rpc_portgroup):
+        """Convert a portgroup to a JSON-ready dictionary.
+
+        :raises: NodeNotFound if the node of the portgroup does not exist.
+        """
+        node_uuid = self._get_node_uuid(rpc_portgroup.node_id)
+        result = {}
+        for field in self.fields:
+            if field == 'node_uuid':
+                value = node_uuid
+            elif not rpc_portgroup.obj_attr_is_set(field):
+                continue
+            else:
+                value = getattr(rpc_portgroup, field)
+                if isinstance(value, datetime.datetime):
+                    value = value.isoformat()
+            result[field] = value
+
+        if self.requested_fields is None:
+            result['ports'] = link.make_links(
+                self.url, 'portgroups', rpc_portgroup.uuid + '/ports')
+        result['links'] = link.make_links(self.url, 'portgroups',
+                                          rpc_portgroup.uuid)
+        return result
+
+    def _convert_list(self, rpc_portgroups):
+        if rpc_portgroups:
+            self.check_fields()
+        portgroups = []
+        for rpc_portgroup in rpc_portgroups:
+            try:
+                portgroups.append(self.convert(rpc_portgroup))
+            except exception.NodeNotFound:
+                # NOTE: the node was deleted after we fetched the portgroup
+                # list, meaning that the portgroup was also deleted.
+                LOG.debug('Skipping portgroup %s as its node was deleted',
+                          rpc_portgroup.uuid)
+        return portgroups
+
+    def convert_collection(self, rpc_portgroups, limit, url=None, **kwargs):
+        """Convert a list of portgroups to a JSON-ready collection.
+
+        :param rpc_portgroups: the list of portgroups.
+        :param limit: the page size, used to build the link to the next page.
+        :param url: the resource URL of the collection.
+        :param kwargs: additional query arguments of the next page link.
+        :returns: a dictionary with the ``portgroups`` and, if there are more
+            portgroups to list, the ``next`` keys.
+        """
+        portgroups = self._convert_list(rpc_portgroups)
+        result = {'portgroups': portgroups}
+        if len(portgroups) == limit:
+            next_link = collection.get_next_link(rpc_portgroups, limit,
+                                                 url or 'portgroups',
+                                                 **kwargs)
+            if next_link:
+                result['next'] = next_link
+        return result
+
+    def stream_collection(self, chunks, limit, url=None, **kwargs):
+        """Convert chunks of portgroups to an encoded JSON collection.
+
+        :param chunks: an iterable of lists of portgroups.
+        :param limit: the page size, used to build the link to the next page.
+        :param url: the resource URL of the collection.
+        :param kwargs: additional query arguments of the next page link.
+        :returns: a generator of encoded chunks of the same collection as
+            the one returned by :meth:`convert_collection`.
+        """
+        return collection.stream('portgroups', chunks, self._convert_list,
+                                 limit, url or 'portgroups', **kwargs)
+
+
 class PortgroupsController(pecan.rest.RestController):
     """REST controller for portgroups."""
 
@@ -313,31 +435,39 @@ class PortgroupsController(pecan.rest.RestController):
 
         node_ident = self.parent_node_ident or node_ident
 
+        context = pecan.request.context
         if node_ident:
             # FIXME: Since all we need is the node ID, we can
             #        make this more efficient by only querying
             #        for that column. This will get cleaned up
             #        as we move to the object interface.
             node = api_utils.get_rpc_node(node_ident)
-            portgroups = objects.Portgroup.list_by_node_id(
-                pecan.request.context, node.id, limit,
-                marker_obj, sort_key=sort_key, sort_dir=sort_dir)
+
+            def _fetch(limit, marker):
+                return objects.Portgroup.list_by_node_id(
+                    context, node.id, limit, marker, sort_key=sort_key,
+                    sort_dir=sort_dir)
         elif address:
-            portgroups = self._get_portgroups_by_address(address)
+            def _fetch(limit, marker):
+                return self._get_portgroups_by_address(address)
         else:
-            portgroups = objects.Portgroup.list(pecan.request.context, limit,
-                                                marker_obj, sort_key=sort_key,
-                                                sort_dir=sort_dir)
+            def _fetch(limit, marker):
+                return objects.Portgroup.list(context, limit, marker,
+                                              sort_key=sort_key,
+                                              sort_dir=sort_dir)
         parameters = {}
         if detail is not None:
             parameters['detail'] = detail
 
-        return PortgroupCollection.convert_with_links(portgroups, limit,
-                                                      url=resource_url,
-                                                      fields=fields,
-                                                      sort_key=sort_key,
-                                                      sort_dir=sort_dir,
-                                                      **parameters)
+        serializer = PortgroupSerializer(fields)
+        if CONF.api.stream_collections and not address:
+            return api_utils.stream_response(serializer.stream_collection(
+                collection.fetch_chunks(_fetch, limit, marker_obj), limit,
+                url=resource_url, sort_key=sort_key, sort_dir=sort_dir,
+                **parameters))
+        return serializer.convert_collection(
+            _fetch(limit, marker_obj), limit, url=resource_url,
+            sort_key=sort_key, sort_dir=sort_dir, **parameters)
 
     def _get_portgroups_by_address(self, address):
         """Retrieve a portgroup by its address.
@@ -356,7 +486,7 @@ class PortgroupsController(pecan.rest.RestController):
             return []
 
     @METRICS.timer('PortgroupsController.get_all')
-    @expose.expose(PortgroupCollection, types.uuid_or_name, types.macaddress,
+    @expose.expose(types.jsontype, types.uuid_or_name, types.macaddress,
                    types.uuid, int, wtypes.text, wtypes.text, types.listtype,
                    types.boolean)
     def get_all(self, node=None, address=None, marker=None,
@@ -397,7 +527,7 @@ class PortgroupsController(pecan.rest.RestController):
                                                detail=detail)
 
     @METRICS.timer('PortgroupsController.detail')
-    @expose.expose(PortgroupCollection, types.uuid_or_name, types.macaddress,
+    @expose.expose(types.jsontype, types.uuid_or_name, types.macaddress,
                    types.uuid, int, wtypes.text, wtypes.text)
     def detail(self, node=None, address=None, marker=None,
                limit=None, sort_key='id', sort_dir='asc'):
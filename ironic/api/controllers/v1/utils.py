@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
 import inspect
 import re
 
@@ -369,6 +370,68 @@ def vendor_passthru(ident, method, topic, data=None, driver_passthru=False):
     return wsme.api.Response(return_value, **response_params)
 
 
+def _chain_chunks(first, body):
+    yield first
+    for chunk in body:
+        yield chunk
+
+
+def stream_response(body):
+    """Send a JSON document streamed as the response body.
+
+    The first chunk is produced before returning, so that errors happening
+    before any data is sent (for example invalid parameters) are reported
+    with the right status code.
+
+    :param body: an iterable of encoded chunks of a JSON document.
+    :returns: A WSME response object to be returned by the API.
+    """
+    body = iter(body)
+    first = next(body, b'')
+    # NOTE: pecan only avoids reading the whole body of generators
+    pecan.response.app_iter = _chain_chunks(first, body)
+    pecan.override_template(None, content_type='application/json')
+    return wsme.api.Response(None, status_code=http_client.OK,
+                             return_type=None)
+
+
+def make_etag(*parts):
+    """Build an entity tag from the values a representation depends on.
+
+    :param parts: the values, converted to strings.
+    :returns: the entity tag, as a string.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(six.text_type(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def check_not_modified(etag):
+    """Set the entity tag of the response and check the request one.
+
+    The entity tag is weak, since it does not cover the exact encoding of
+    the representation. Only ``If-None-Match`` is honored: the modification
+    time of a resource does not cover the API version, the requested fields
+    or the related resources its representation depends on.
+
+    :param etag: the entity tag of the representation, see
+        :func:`make_etag`.
+    :returns: A WSME response object with the "304 Not Modified" status to
+        be returned by the API if the client has the current representation,
+        otherwise None.
+    """
+    pecan.response.etag = (etag, False)
+
+    request = pecan.request
+    if request.method not in ('GET', 'HEAD'):
+        return
+    if etag in request.if_none_match:
+        return wsme.api.Response(None, status_code=http_client.NOT_MODIFIED,
+                                 return_type=None)
+
+
 def check_for_invalid_fields(fields, object_fields):
     """Check for requested non-existent fields.
 
@@ -1031,3 +1094,19 @@ def allow_expose_events():
     Version 1.54 of the API added the events endpoint.
     """
     return pecan.request.version.minor >= versions.MINOR_54_EVENTS
+
+
+def allow_bulk_power():
+    """Check if accessing the bulk power endpoint is allowed.
+
+    Version 1.55 of the API added the bulk power endpoint.
+    """
+    return pecan.request.version.minor >= versions.MINOR_55_BULK_POWER
+
+
+def allow_bulk_nodes():
+    """Check if accessing the bulk enrollment endpoint is allowed.
+
+    Version 1.56 of the API added the bulk enrollment endpoint.
+    """
+    return pecan.request.version.minor >= versions.MINOR_56_BULK_NODES
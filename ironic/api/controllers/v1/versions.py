@@ -92,6 +92,8 @@ BASE_VERSION = 1
 # v1.52: Add allocation API.
 # v1.53: Add support for Smart NIC port
 # v1.54: Add events support.
+# v1.55: Add bulk power API.
+# v1.56: Add bulk enrollment API.
 
 MINOR_0_JUNO = 0
 MINOR_1_INITIAL_VERSION = 1
@@ -148,6 +150,8 @@ MINOR_51_NODE_DESCRIPTION = 51
 MINOR_52_ALLOCATION = 52
 MINOR_53_PORT_SMARTNIC = 53
 MINOR_54_EVENTS = 54
+MINOR_55_BULK_POWER = 55
+MINOR_56_BULK_NODES = 56
 
 # When adding another version, update:
 # - MINOR_MAX_VERSION
@@ -155,7 +159,7 @@ MINOR_54_EVENTS = 54
 #   explanation of what changed in the new version
 # - common/release_mappings.py, RELEASE_MAPPING['master']['api']
 
-MINOR_MAX_VERSION = MINOR_54_EVENTS
+MINOR_MAX_VERSION = MINOR_56_BULK_NODES
 
 # String representations of the minor and maximum versions
 _MIN_VERSION_STRING = '{}.{}'.format(BASE_VERSION, MINOR_1_INITIAL_VERSION)
@@ -138,17 +138,19 @@ class NoExceptionTracebackHook(hooks.PecanHook):
     # catches and handles all the errors, so 'on_error' dedicated for unhandled
     # exceptions never fired.
     def after(self, state):
-        # Omit empty body. Some errors may not have body at this level yet.
-        if not state.response.body:
-            return
-
         # Do nothing if there is no error.
         # Status codes in the range 200 (OK) to 399 (400 = BAD_REQUEST) are not
         # an error.
+        # NOTE: this is checked first, reading the body of a streamed
+        # response would load it completely.
         if (http_client.OK <= state.response.status_int
                 < http_client.BAD_REQUEST):
             return
 
+        # Omit empty body. Some errors may not have body at this level yet.
+        if not state.response.body:
+            return
+
         json_body = state.response.json
         # Do not remove traceback when traceback config is set
         if cfg.CONF.debug_tracebacks_in_api:
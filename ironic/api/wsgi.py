@@ -11,6 +11,7 @@
 # under the License.
 """WSGI script for Ironic API, installed by pbr."""
 
+import atexit
 import sys
 
 from oslo_config import cfg
@@ -18,6 +19,7 @@ import oslo_i18n as i18n
 from oslo_log import log
 
 from ironic.api import app
+from ironic.common import notification_queue
 from ironic.common import service
 
 
@@ -38,4 +40,8 @@ def initialize_wsgi_app(show_deprecated=False):
                     "be removed in Rocky release. Please use automatically "
                     "generated ironic-api-wsgi instead.")
 
+    # NOTE: the WSGI server does not tell the application it is stopping,
+    # send the queued notifications when the interpreter exits
+    atexit.register(notification_queue.stop)
+
     return app.VersionSelectorApplication()
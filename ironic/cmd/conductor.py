@@ -24,11 +24,13 @@ import sys
 from oslo_config import cfg
 from oslo_log import log
 from oslo_reports import guru_meditation_report as gmr
+from oslo_reports.models import with_default_views
 from oslo_service import service
 
 from ironic.common import profiler
 from ironic.common import rpc_service
 from ironic.common import service as ironic_service
+from ironic.conductor import task_manager
 from ironic import version
 
 CONF = cfg.CONF
@@ -59,6 +61,20 @@ def issue_startup_warnings(conf):
     warn_about_missing_default_boot_option(conf)
 
 
+def node_locks_report():
+    """Generate the section of the GMR with the node locks held."""
+    locks = {}
+    for lock in task_manager.list_held_locks():
+        locks[lock.node_uuid] = {
+            'purpose': lock.purpose,
+            'held_seconds': '%.1f' % lock.age(),
+            'acquired_at': (lock.stack
+                            or 'not recorded, see '
+                               '[conductor]slow_lock_threshold'),
+        }
+    return with_default_views.ModelWithDefaultViews(locks)
+
+
 def main():
     # NOTE(lucasagomes): Safeguard to prevent 'ironic.conductor.manager'
     # from being imported prior to the configuration options being loaded.
@@ -71,6 +87,8 @@ def main():
     # Parse config file and command line options, then start logging
     ironic_service.prepare_service(sys.argv)
 
+    gmr.TextGuruMeditation.register_section('Node Locks',
+                                            node_locks_report)
     gmr.TextGuruMeditation.setup_autorun(version)
 
     mgr = rpc_service.RPCService(CONF.host,
@@ -19,7 +19,10 @@ Run storage database migration.
 
 from __future__ import print_function
 
+import json
+import os
 import sys
+import time
 
 from oslo_config import cfg
 
@@ -78,6 +81,12 @@ ONLINE_MIGRATIONS = (
     (dbapi, 'update_to_latest_versions'),
 )
 
+# These migration functions walk the tables in ranges and accept a
+# ``checkpoint`` dictionary keeping their progress between calls. It is
+# persisted in the file given by the --checkpoint-file argument, so that an
+# interrupted run resumes where it stopped.
+RESUMABLE_MIGRATIONS = ('update_to_latest_versions',)
+
 # These are the models added in supported releases. We skip the version check
 # for them since the tables do not exist when it happens.
 NEW_MODELS = [
@@ -86,8 +95,44 @@ NEW_MODELS = [
 ]
 
 
+class MigrationCheckpoint(object):
+    """Progress of the resumable online data migrations.
+
+    :param path: the file to persist the progress to, or None to keep it
+        in memory only.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.data = {}
+        if path and os.path.exists(path):
+            with open(path) as fp:
+                self.data = json.load(fp)
+
+    def get(self, migration_name):
+        """Get the progress dictionary of a migration function."""
+        return self.data.setdefault(migration_name, {})
+
+    def save(self):
+        """Atomically write the progress to the file."""
+        if not self.path:
+            return
+        tmp_path = '%s.tmp' % self.path
+        with open(tmp_path, 'w') as fp:
+            json.dump(self.data, fp)
+        os.rename(tmp_path, self.path)
+
+    def clear(self):
+        """Forget the progress once the migrations are completed."""
+        self.data = {}
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class DBCommand(object):
 
+    _checkpoint = None
+
     def _check_versions(self, ignore_missing_tables=False):
         """Check the versions of objects.
 
@@ -148,8 +193,12 @@ class DBCommand(object):
 
     def online_data_migrations(self):
         self._check_versions()
-        self._run_online_data_migrations(max_count=CONF.command.max_count,
-                                         options=CONF.command.options)
+        self._run_online_data_migrations(
+            max_count=CONF.command.max_count,
+            options=CONF.command.options,
+            batch_size=CONF.command.batch_size,
+            max_rate=CONF.command.max_rate,
+            checkpoint_file=CONF.command.checkpoint_file)
 
     def _run_migration_functions(self, context, max_count, options):
         """Runs the migration functions.
@@ -176,6 +225,11 @@ class DBCommand(object):
         for migration_func_obj, migration_func_name in ONLINE_MIGRATIONS:
             migration_func = getattr(migration_func_obj, migration_func_name)
             migration_opts = options.get(migration_func_name, {})
+            if (self._checkpoint is not None
+                    and migration_func_name in RESUMABLE_MIGRATIONS):
+                migration_opts = dict(
+                    migration_opts,
+                    checkpoint=self._checkpoint.get(migration_func_name))
             num_to_migrate = max_count - total_migrated
             try:
                 total_to_do, num_migrated = migration_func(context,
@@ -191,6 +245,7 @@ class DBCommand(object):
                   % {'migration': migration_func.__name__,
                      'total': total_to_do,
                      'done': num_migrated})
+            self._print_progress(migration_opts.get('checkpoint'))
             total_migrated += num_migrated
             if total_migrated >= max_count:
                 # NOTE(rloo). max_count objects have been migrated so we have
@@ -207,25 +262,63 @@ class DBCommand(object):
 
         return True
 
-    def _run_online_data_migrations(self, max_count=None, options=None):
+    @staticmethod
+    def _print_progress(checkpoint):
+        """Print the per-model progress of a resumable migration."""
+        if not checkpoint:
+            return
+        for name, state in sorted(checkpoint.items()):
+            if state['migrated'] or state['remaining']:
+                print(_('  %(model)s: %(done)i migrated, %(left)i remaining.')
+                      % {'model': name, 'done': state['migrated'],
+                         'left': state['remaining']})
+
+    def _run_batch(self, admin_context, batch_size, options, max_rate):
+        """Run one batch of migrations, throttled to max_rate objects/s.
+
+        :returns: whether the migrations are done, see
+            _run_migration_functions.
+        """
+        start = time.time()
+        finished_migrating = self._run_migration_functions(
+            admin_context, batch_size, options)
+        self._checkpoint.save()
+        if max_rate and not finished_migrating:
+            # NOTE: a batch that is not finished migrated batch_size objects
+            delay = float(batch_size) / max_rate - (time.time() - start)
+            if delay > 0:
+                time.sleep(delay)
+        return finished_migrating
+
+    def _run_online_data_migrations(self, max_count=None, options=None,
+                                    batch_size=50, max_rate=None,
+                                    checkpoint_file=None):
         """Perform online data migrations for the release.
 
         Online data migrations are done by running all the data migration
-        functions in the ONLINE_MIGRATIONS list. If max_count is None, all
-        the functions will be run in batches of 50 objects, until the
-        migrations are done. Otherwise, this will run (some of) the functions
-        until max_count objects have been migrated.
+        functions in the ONLINE_MIGRATIONS list, in batches of batch_size
+        objects. If max_count is None, batches are run until the migrations
+        are done. Otherwise, this will run (some of) the functions until
+        max_count objects have been migrated.
 
         :param: max_count: the maximum number of individual object migrations
             or modified rows, a value >= 1. If None, migrations are run in a
-            loop in batches of 50, until completion.
+            loop in batches, until completion.
         :param: options: options to pass to migrations. List of values in the
             form of <migration name>.<option>=<value>
+        :param: batch_size: the number of objects migrated in a batch, a
+            value >= 1.
+        :param: max_rate: the maximum number of objects to migrate per second,
+            a value >= 1. If None, batches are run without pauses.
+        :param: checkpoint_file: the file keeping the progress of the
+            migrations, so that an interrupted run can be resumed. It is
+            removed once the migrations are completed.
         :raises: SystemExit. With exit code of:
             0: when all migrations are complete.
             1: when objects were migrated and the command needs to be
                re-run (because there might be more objects to be migrated)
-            127: if max_count is < 1 or any option is invalid
+            127: if max_count, batch_size or max_rate is < 1 or any option
+               is invalid
         :raises: Exception from a migration function
         """
         parsed_options = {}
@@ -240,26 +333,38 @@ class DBCommand(object):
                 else:
                     parsed_options.setdefault(migration, {})[key] = value
 
+        for name, value in (('max-count', max_count),
+                            ('batch-size', batch_size),
+                            ('max-rate', max_rate)):
+            if value is not None and value < 1:
+                print(_('"%s" must be a positive value.') % name,
+                      file=sys.stderr)
+                sys.exit(127)
+
+        try:
+            self._checkpoint = MigrationCheckpoint(checkpoint_file)
+        except (IOError, ValueError) as e:
+            print(_('Cannot read the checkpoint file %(file)s: %(err)s')
+                  % {'file': checkpoint_file, 'err': e}, file=sys.stderr)
+            sys.exit(127)
+
         admin_context = context.get_admin_context()
         finished_migrating = False
         if max_count is None:
-            max_count = 50
             print(_('Running batches of %i until migrations have been '
-                    'completed.') % max_count)
+                    'completed.') % batch_size)
             while not finished_migrating:
-                finished_migrating = self._run_migration_functions(
-                    admin_context, max_count, parsed_options)
-            print(_('Data migrations have completed.'))
-            sys.exit(0)
-
-        if max_count < 1:
-            print(_('"max-count" must be a positive value.'), file=sys.stderr)
-            sys.exit(127)
+                finished_migrating = self._run_batch(
+                    admin_context, batch_size, parsed_options, max_rate)
+        else:
+            while not finished_migrating and max_count > 0:
+                count = min(batch_size, max_count)
+                finished_migrating = self._run_batch(
+                    admin_context, count, parsed_options, max_rate)
+                max_count -= count
 
-        finished_migrating = self._run_migration_functions(admin_context,
-                                                           max_count,
-                                                           parsed_options)
         if finished_migrating:
+            self._checkpoint.clear()
             print(_('Data migrations have completed.'))
             sys.exit(0)
         else:
@@ -317,7 +422,8 @@ def add_command_parsers(subparsers):
                "1 (error) if there are still pending objects to be migrated. "
                "Before upgrading to a newer release, this command must be run "
                "until code 0 is returned. "
-               "It returns 127 (error) if max-count is < 1. "
+               "It returns 127 (error) if max-count, batch-size or max-rate "
+               "is < 1. "
                "It returns 2 (error) if the database is not compatible with "
                "this release. If this happens, this command should be run "
                "using the previous release of ironic, before upgrading and "
@@ -331,6 +437,21 @@ def add_command_parsers(subparsers):
         dest='options', default=[],
         help=_("Options to pass to the migrations in the form of "
                "<migration name>.<option>=<value>"))
+    parser.add_argument(
+        '--batch-size', metavar='<number>', dest='batch_size', type=int,
+        default=50,
+        help=_("Number of objects to migrate in a batch. Every batch is "
+               "run in short database transactions. Defaults to 50."))
+    parser.add_argument(
+        '--max-rate', metavar='<number>', dest='max_rate', type=int,
+        help=_("Maximum number of objects to migrate per second. Batches "
+               "are spaced out to not exceed it. If unspecified, batches "
+               "are run without pauses."))
+    parser.add_argument(
+        '--checkpoint-file', metavar='<path>', dest='checkpoint_file',
+        help=_("File to record the progress of the migrations in. An "
+               "interrupted run resumes from it, it is removed once the "
+               "migrations are completed."))
     parser.set_defaults(func=command_object.online_data_migrations)
 
 
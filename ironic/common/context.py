@@ -27,6 +27,8 @@ class RequestContext(context.RequestContext):
         """
         super(RequestContext, self).__init__(**kwargs)
         self.is_public_api = is_public_api
+        # The policy decisions made for this context, see ironic.common.policy
+        self.policy_decisions = {}
 
     def to_policy_values(self):
         policy_values = super(RequestContext, self).to_policy_values()
@@ -34,6 +36,11 @@ class RequestContext(context.RequestContext):
             'project_name': self.project_name,
             'is_public_api': self.is_public_api,
         })
+        try:
+            policy_values.policy_decisions = self.policy_decisions
+        except AttributeError:
+            # NOTE: older versions of oslo.context return a dictionary
+            pass
         return policy_values
 
     @classmethod
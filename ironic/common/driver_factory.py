@@ -30,6 +30,20 @@ LOG = log.getLogger(__name__)
 
 EM_SEMAPHORE = 'extension_manager'
 
+# NOTE: maps (hardware type, interface names) to the validated interface
+# implementations, so that building a driver for a node with the same
+# hardware type and interfaces is a single dictionary lookup.
+_DRIVER_CACHE = {}
+
+
+def clear_driver_cache():
+    """Drop the cached interfaces of the drivers built for tasks.
+
+    Called when the drivers or interfaces are loaded and when the
+    configuration is reloaded.
+    """
+    _DRIVER_CACHE.clear()
+
 
 def build_driver_for_task(task):
     """Builds a composable driver for a given task.
@@ -49,29 +63,42 @@ def build_driver_for_task(task):
     """
     node = task.node
 
-    hw_type = get_hardware_type(node.driver)
-    check_and_update_node_interfaces(node, hw_type=hw_type)
+    key = _driver_cache_key(node)
+    impls = _DRIVER_CACHE.get(key) if key is not None else None
+    if impls is None:
+        hw_type = get_hardware_type(node.driver)
+        check_and_update_node_interfaces(node, hw_type=hw_type)
+        impls = tuple((iface,
+                       get_interface(hw_type, iface,
+                                     getattr(node, '%s_interface' % iface)))
+                      for iface in _INTERFACE_LOADERS)
+        _DRIVER_CACHE[_driver_cache_key(node)] = impls
 
     bare_driver = driver_base.BareDriver()
-    _attach_interfaces_to_driver(bare_driver, node, hw_type)
+    for iface, impl in impls:
+        setattr(bare_driver, iface, impl)
 
     return bare_driver
 
 
-def _attach_interfaces_to_driver(bare_driver, node, hw_type):
-    """Attach interface implementations to a bare driver object.
+def _driver_cache_key(node):
+    """Get the key of the driver of a node in the cache.
 
-    :param bare_driver: BareDriver instance to attach interfaces to
     :param node: Node object
-    :param hw_type: hardware type instance
-    :raises: InterfaceNotFoundInEntrypoint if the entry point was not found.
-    :raises: IncompatibleInterface if driver is a hardware type and
-             the requested implementation is not compatible with it.
+    :returns: a tuple of the hardware type and of the names of the interfaces
+        of the node, or None if some interfaces are not set.
     """
+    key = [node.driver]
     for iface in _INTERFACE_LOADERS:
-        impl_name = getattr(node, '%s_interface' % iface)
-        impl = get_interface(hw_type, iface, impl_name)
-        setattr(bare_driver, iface, impl)
+        field_name = '%s_interface' % iface
+        # NOTE: see check_and_update_node_interfaces for the missing fields
+        if field_name not in node:
+            return None
+        impl_name = getattr(node, field_name)
+        if impl_name is None:
+            return None
+        key.append(impl_name)
+    return tuple(key)
 
 
 def get_interface(hw_type, interface_type, interface_name):
@@ -397,6 +424,8 @@ class BaseDriverFactory(object):
             cls._extension_manager.map(_warn_if_unsupported)
 
         LOG.info(cls._logging_template, cls._extension_manager.names())
+        # NOTE: the cached drivers may use the previously loaded ones
+        clear_driver_cache()
 
     @property
     def names(self):
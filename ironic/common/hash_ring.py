@@ -21,12 +21,15 @@ from tooz import hashring
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.conf import CONF
 from ironic.db import api as dbapi
 
 
 LOG = log.getLogger(__name__)
 
+METRICS = metrics.get_metrics_logger(__name__)
+
 
 class HashRingManager(object):
     _hash_rings = None
@@ -56,6 +59,7 @@ class HashRingManager(object):
             if self.__class__._hash_rings is None or self.updated_at < limit:
                 LOG.debug('Rebuilding cached hash rings')
                 rings = self._load_hash_rings()
+                METRICS.send_counter('HashRingManager.rebuild', 1)
                 self.__class__._hash_rings = rings
                 self.updated_at = time.time()
                 LOG.debug('Finished rebuilding hash rings, available drivers '
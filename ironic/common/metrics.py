@@ -0,0 +1,345 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-process registry of the metrics of a service.
+
+The metric loggers returned by :func:`get_metrics_logger` send the metrics
+to the backend configured in ``[metrics]backend`` like the ones of
+ironic-lib, and also record them in :data:`REGISTRY`:
+
+* timers as histograms of seconds, named ``<name>_seconds``,
+* counters as counters, named ``<name>_total``,
+* gauges as gauges.
+
+The dots and other characters not allowed in Prometheus metric names are
+replaced with underscores. When ``[metrics]prometheus_enabled`` is set, the
+registry is exposed in the Prometheus text format at ``/metrics`` of the API
+(see :class:`MetricsMiddleware`) and on ``[metrics]prometheus_port`` of the
+conductor.
+"""
+
+import bisect
+import random
+import re
+import threading
+
+from ironic_lib import metrics as ironic_lib_metrics
+from ironic_lib import metrics_utils
+import six
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+# Upper bounds of the histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 300.0, 1800.0)
+
+_INVALID_CHARS = re.compile(r'[^a-zA-Z0-9_:]')
+_BACKEND_INVALID_CHARS = re.compile(r'[^\w]+')
+
+
+def metric_name(name):
+    """Convert a metric name to a valid Prometheus metric name."""
+    name = _INVALID_CHARS.sub('_', name)
+    if not name.startswith('ironic_'):
+        name = 'ironic_' + name
+    return name
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def _escape(value):
+    return (six.text_type(value).replace('\\', r'\\')
+            .replace('\n', r'\n').replace('"', r'\"'))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (key, _escape(value))
+                             for key, value in labels)
+
+
+class _Metric(object):
+    """A metric with a value for every combination of label values."""
+
+    type = None
+
+    def __init__(self, name, documentation=''):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values = {}
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted(labels.items())) if labels else ()
+
+    def samples(self):
+        """Get the samples of the metric.
+
+        :returns: a list of tuples (name suffix, labels, value), where labels
+            is a sorted tuple of (name, value) pairs.
+        """
+        with self._lock:
+            return [('', key, value) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    type = COUNTER
+
+    def inc(self, amount=1, labels=None):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down."""
+
+    type = GAUGE
+
+    def set(self, value, labels=None):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Counts of observed values in buckets, with their sum."""
+
+    type = HISTOGRAM
+
+    def __init__(self, name, documentation='', buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=None):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(
+                key, ([0] * (len(self.buckets) + 1), 0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total)
+                      for key, (counts, total) in self._values.items()]
+        result = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                result.append(('_bucket',
+                               key + (('le', _format_value(bound)),),
+                               cumulative))
+            result.append(('_sum', key, total))
+            result.append(('_count', key, cumulative))
+        return result
+
+
+class Registry(object):
+    """A set of metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = []
+
+    def _get(self, cls, name, documentation, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = cls(name, documentation, **kwargs)
+                    self._metrics[name] = metric
+        if not isinstance(metric, cls):
+            raise ValueError('Metric %(name)s is a %(type)s' %
+                             {'name': name, 'type': metric.type})
+        return metric
+
+    def counter(self, name, documentation=''):
+        """Get or create a counter."""
+        return self._get(Counter, name, documentation)
+
+    def gauge(self, name, documentation=''):
+        """Get or create a gauge."""
+        return self._get(Gauge, name, documentation)
+
+    def histogram(self, name, documentation='', buckets=DEFAULT_BUCKETS):
+        """Get or create a histogram."""
+        return self._get(Histogram, name, documentation, buckets=buckets)
+
+    def add_collector(self, collector):
+        """Add a function collecting metrics when the registry is rendered.
+
+        :param collector: a function without arguments returning an iterable
+            of metrics (e.g. :class:`Counter` objects).
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def remove_collector(self, collector):
+        """Remove a collector, if it was added."""
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def collect(self):
+        """Get all the metrics, sorted by name."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for collector in collectors:
+            metrics.extend(collector())
+        return sorted(metrics, key=lambda metric: metric.name)
+
+    def render(self):
+        """Render the metrics in the Prometheus text format."""
+        lines = []
+        for metric in self.collect():
+            if metric.documentation:
+                lines.append('# HELP %s %s' % (
+                    metric.name,
+                    metric.documentation.replace('\\', r'\\')
+                    .replace('\n', r'\n')))
+            lines.append('# TYPE %s %s' % (metric.name, metric.type))
+            for suffix, labels, value in metric.samples():
+                lines.append('%s%s%s %s' % (metric.name, suffix,
+                                            _format_labels(labels),
+                                            _format_value(value)))
+        lines.append('')
+        return '\n'.join(lines)
+
+
+REGISTRY = Registry()
+"""The metrics of this process."""
+
+
+def _backend_name(name, labels):
+    """Append the values of the labels to a metric name for the backend."""
+    if not labels:
+        return name
+    return '.'.join(
+        [name] + [_BACKEND_INVALID_CHARS.sub(
+            '_', six.text_type(value)).strip('_') or 'unspecified'
+            for _key, value in sorted(labels.items())])
+
+
+class MetricLogger(ironic_lib_metrics.MetricLogger):
+    """A metric logger recording the metrics in :data:`REGISTRY`.
+
+    The ``send_*`` methods accept an optional ``labels`` dict. The labels
+    are recorded as such in the registry, while their values are appended
+    to the metric name, sorted by label name, for the backend (e.g.
+    ``TaskManager.lock_wait.power_state_sync`` for the ``purpose`` label
+    ``power state sync``).
+
+    :param backend: the ironic-lib metric logger to send the metrics to.
+    """
+
+    def __init__(self, backend):
+        super(MetricLogger, self).__init__(backend._prefix,
+                                           backend._delimiter)
+        self._backend = backend
+
+    def send_gauge(self, name, value, labels=None):
+        self._gauge(name, value, labels=labels)
+
+    def send_counter(self, name, value, sample_rate=None, labels=None):
+        if sample_rate is None or random.random() < sample_rate:
+            self._counter(name, value, sample_rate=sample_rate,
+                          labels=labels)
+
+    def send_timer(self, name, value, labels=None):
+        self._timer(name, value, labels=labels)
+
+    def send_histogram(self, name, value, labels=None,
+                       buckets=DEFAULT_BUCKETS):
+        """Send a value which distribution is of interest.
+
+        Recorded as a histogram named ``<name>`` with the given buckets in
+        the registry, and sent as a timer to the backend, the only metric
+        type of ironic-lib with a distribution.
+        """
+        REGISTRY.histogram(metric_name(name), buckets=buckets).observe(
+            value, labels=labels)
+        self._backend._timer(_backend_name(name, labels), value)
+
+    def _gauge(self, name, value, labels=None):
+        REGISTRY.gauge(metric_name(name)).set(value, labels=labels)
+        self._backend._gauge(_backend_name(name, labels), value)
+
+    def _counter(self, name, value, sample_rate=None, labels=None):
+        # NOTE: the sampling is done by the caller, count the sampled out
+        # events too
+        REGISTRY.counter(metric_name(name) + '_total').inc(
+            value / sample_rate if sample_rate else value, labels=labels)
+        self._backend._counter(_backend_name(name, labels), value,
+                               sample_rate=sample_rate)
+
+    def _timer(self, name, value, labels=None):
+        # NOTE: timers are in milliseconds
+        REGISTRY.histogram(metric_name(name) + '_seconds').observe(
+            value / 1000.0, labels=labels)
+        self._backend._timer(_backend_name(name, labels), value)
+
+
+def get_metrics_logger(prefix='', backend=None, host=None, delimiter='.'):
+    """Get a metric logger recording the metrics in :data:`REGISTRY`.
+
+    Takes the same arguments as
+    :func:`ironic_lib.metrics_utils.get_metrics_logger`.
+    """
+    return MetricLogger(metrics_utils.get_metrics_logger(
+        prefix, backend=backend, host=host, delimiter=delimiter))
+
+
+def application(environ, start_response):
+    """WSGI application rendering :data:`REGISTRY`."""
+    if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+        start_response('405 Method Not Allowed',
+                       [('Content-Type', 'text/plain'), ('Allow', 'GET')])
+        return [b'Only the GET method is allowed\n']
+    body = REGISTRY.render().encode('utf-8')
+    start_response('200 OK', [('Content-Type', CONTENT_TYPE),
+                              ('Content-Length', str(len(body)))])
+    return [body]
+
+
+class MetricsMiddleware(object):
+    """Serve the metrics at a path, before the wrapped application.
+
+    :param app: the wrapped WSGI application.
+    :param path: the path to serve the metrics at.
+    """
+
+    def __init__(self, app, path='/metrics'):
+        self.app = app
+        self.path = path
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') == self.path:
+            return application(environ, start_response)
+        return self.app(environ, start_response)
@@ -0,0 +1,367 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Asynchronous sending of versioned notifications.
+
+When ``[DEFAULT]notification_async`` is enabled, notifications are put into
+a bounded in-process queue and sent by a background thread, so that a slow
+message bus does not delay the code emitting them (often while holding a
+node lock). The notifications are sent in the order they were queued, which
+preserves the order of the notifications about a node.
+"""
+
+import collections
+import errno
+import os
+import re
+import threading
+
+from oslo_concurrency import lockutils
+from oslo_config import cfg
+from oslo_log import log
+from oslo_serialization import jsonutils
+from oslo_utils import timeutils
+
+from ironic.common import context as ironic_context
+from ironic.common import exception
+from ironic.common.i18n import _
+from ironic.common import metrics
+from ironic.common import rpc
+
+LOG = log.getLogger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
+CONF = cfg.CONF
+
+DROP = 'drop'
+BLOCK = 'block'
+SPILL = 'spill'
+
+# The maximum number of notifications taken from the queue at once
+BATCH_SIZE = 50
+# The time given to the queued notifications to be sent when stopping
+STOP_TIMEOUT = 60
+
+# <host>.<pid>.<sequence number>.json
+_SPILL_FILE_RE = re.compile(
+    r'^(?P<host>.+)\.(?P<pid>\d+)\.(?P<seq>\d{20})\.json$')
+
+Notification = collections.namedtuple(
+    'Notification', ['context', 'publisher_id', 'level', 'event_type',
+                     'payload'])
+"""A notification to send, with its payload already serialized."""
+
+_QUEUE = None
+
+
+def send(notification):
+    """Send a notification synchronously.
+
+    :param notification: a :class:`Notification`.
+    :raises: oslo_messaging.exceptions.MessageDeliveryFailure
+    """
+    notifier = rpc.get_versioned_notifier(notification.publisher_id)
+    notify = getattr(notifier, notification.level)
+    notify(notification.context, event_type=notification.event_type,
+           payload=notification.payload)
+
+
+class NotificationQueue(object):
+    """A bounded queue of notifications sent by a background thread.
+
+    :param size: the maximum number of notifications in memory.
+    :param overflow: what to do with a notification when the queue is full:
+        ``drop`` it, ``block`` until there is room in the queue, or ``spill``
+        it to a file in ``spill_dir``, to be sent after the ones in memory.
+    :param spill_dir: the directory for the spilled notifications.
+    :param sender: the function sending a notification.
+    """
+
+    def __init__(self, size, overflow=BLOCK, spill_dir=None, sender=send):
+        if overflow == SPILL and not spill_dir:
+            raise exception.ConfigInvalid(
+                error_msg=_('[DEFAULT]notification_spill_dir must be set '
+                            'when [DEFAULT]notification_queue_overflow is '
+                            '"spill"'))
+        self._size = size
+        self._overflow = overflow
+        self._spill_dir = spill_dir
+        self._sender = sender
+        self._cond = threading.Condition()
+        self._queue = collections.deque()
+        # Names of the files of the spilled notifications, oldest first
+        self._spilled = collections.deque()
+        self._spill_sequence = 0
+        self._sending = 0
+        self._thread = None
+        self._stopped = False
+        if spill_dir:
+            self._recover_spilled()
+            if self._spilled:
+                self._start()
+
+    def _recover_spilled(self):
+        """Queue the notifications spilled by the exited processes.
+
+        The spilled files are named after the host and the PID of the
+        process which wrote them, so that the workers of a service can
+        share the directory. The files of the processes of this host which
+        are no longer running are claimed by renaming them, so that only
+        one process sends them.
+        """
+        try:
+            names = os.listdir(self._spill_dir)
+        except OSError as e:
+            LOG.warning('Cannot list the spilled notifications in %(dir)s: '
+                        '%(error)s', {'dir': self._spill_dir, 'error': e})
+            return
+
+        orphans = []
+        for name in names:
+            match = _SPILL_FILE_RE.match(name)
+            if match is None or match.group('host') != CONF.host:
+                continue
+            pid = int(match.group('pid'))
+            if pid == os.getpid():
+                # NOTE: left by an exited process with the same PID, do not
+                # overwrite its files with new ones
+                self._spill_sequence = max(self._spill_sequence,
+                                           int(match.group('seq')) + 1)
+            elif _is_running(pid):
+                continue
+            try:
+                mtime = os.stat(os.path.join(self._spill_dir, name)).st_mtime
+            except OSError:
+                # NOTE: claimed by another process in the meantime
+                continue
+            orphans.append((mtime, pid, match.group('seq'), name))
+
+        # NOTE: the order of the notifications of each process is kept
+        for _mtime, _pid, _seq, name in sorted(orphans):
+            new_name = self._next_spill_name()
+            try:
+                os.rename(os.path.join(self._spill_dir, name),
+                          os.path.join(self._spill_dir, new_name))
+            except OSError:
+                # NOTE: claimed by another process in the meantime
+                continue
+            self._spilled.append(new_name)
+        if self._spilled:
+            LOG.info('Found %(count)d spilled notifications in %(dir)s',
+                     {'count': len(self._spilled), 'dir': self._spill_dir})
+
+    def __len__(self):
+        with self._cond:
+            return len(self._queue) + len(self._spilled)
+
+    def put(self, notification):
+        """Queue a notification.
+
+        Once the queue is stopped, notifications are sent synchronously.
+
+        :param notification: a :class:`Notification`.
+        :returns: False if the notification was dropped, True otherwise.
+        """
+        with self._cond:
+            if not self._stopped:
+                self._start()
+                # NOTE: once notifications are spilled, the next ones must be
+                # spilled too to preserve their order
+                if self._spilled or len(self._queue) >= self._size:
+                    if self._overflow == DROP:
+                        LOG.warning('The notification queue is full, '
+                                    'dropping notification %s',
+                                    notification.event_type)
+                        METRICS.send_counter('NotificationQueue.dropped', 1)
+                        return False
+                    elif self._overflow == SPILL:
+                        self._spill(notification)
+                        self._cond.notify_all()
+                        return True
+                    while (len(self._queue) >= self._size
+                           and not self._stopped):
+                        self._cond.wait()
+
+            if not self._stopped:
+                self._queue.append(notification)
+                self._cond.notify_all()
+                return True
+
+        self._send(notification)
+        return True
+
+    def _next_spill_name(self):
+        name = '%s.%d.%020d.json' % (CONF.host, os.getpid(),
+                                     self._spill_sequence)
+        self._spill_sequence += 1
+        return name
+
+    def _spill(self, notification):
+        name = self._next_spill_name()
+        data = notification._asdict()
+        # NOTE: do not write the credentials of the request to the disk,
+        # they are not needed to send the notification
+        data['context'] = dict(
+            (key, value)
+            for key, value in notification.context.to_dict().items()
+            if 'token' not in key)
+        fd = os.open(os.path.join(self._spill_dir, name),
+                     os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(jsonutils.dumps(data))
+        self._spilled.append(name)
+        METRICS.send_counter('NotificationQueue.spilled', 1)
+
+    def _load_spilled(self):
+        """Move spilled notifications back to the memory queue."""
+        while self._spilled and len(self._queue) < self._size:
+            name = self._spilled.popleft()
+            path = os.path.join(self._spill_dir, name)
+            try:
+                with open(path) as f:
+                    data = jsonutils.loads(f.read())
+                os.unlink(path)
+            except (IOError, OSError, ValueError) as e:
+                LOG.error('Cannot load spilled notification %(path)s: '
+                          '%(error)s', {'path': path, 'error': e})
+                continue
+            data['context'] = ironic_context.RequestContext.from_dict(
+                data['context'])
+            self._queue.append(Notification(**data))
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name='notification-sender')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _send(self, notification):
+        try:
+            self._sender(notification)
+        except Exception:
+            LOG.exception('Failed to send notification %s',
+                          notification.event_type)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while (not self._queue and not self._spilled
+                       and not self._stopped):
+                    self._cond.wait()
+                if not self._queue:
+                    self._load_spilled()
+                if not self._queue:
+                    if self._stopped:
+                        return
+                    continue
+                batch = [self._queue.popleft()
+                         for _ in range(min(BATCH_SIZE, len(self._queue)))]
+                self._sending = len(batch)
+                depth = len(self._queue) + len(self._spilled)
+                # NOTE: wake up the threads blocked on a full queue
+                self._cond.notify_all()
+
+            METRICS.send_gauge('NotificationQueue.depth', depth)
+            for notification in batch:
+                self._send(notification)
+
+            with self._cond:
+                self._sending = 0
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait for the queued notifications to be sent.
+
+        :param timeout: the maximum time to wait in seconds, None to wait
+            until the queue is empty.
+        :returns: True if the queue is empty, False on timeout.
+        """
+        watch = timeutils.StopWatch(duration=timeout).start()
+        with self._cond:
+            while self._queue or self._spilled or self._sending:
+                if timeout is None:
+                    self._cond.wait()
+                elif watch.expired():
+                    return False
+                else:
+                    self._cond.wait(watch.leftover())
+            return True
+
+    def stop(self, timeout=None):
+        """Send the queued notifications and stop the background thread.
+
+        The notifications queued afterwards are sent synchronously.
+
+        :param timeout: the maximum time to wait in seconds.
+        """
+        with self._cond:
+            # NOTE: do not load the spilled notifications any more
+            spilled, self._spilled = self._spilled, collections.deque()
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._queue:
+            LOG.warning('%d notifications were not sent before stopping',
+                        len(self._queue))
+        if spilled:
+            LOG.info('%(count)d spilled notifications in %(dir)s will be '
+                     'sent on restart',
+                     {'count': len(spilled), 'dir': self._spill_dir})
+
+
+def _is_running(pid):
+    """Check whether a process of this host is running."""
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno != errno.ESRCH
+    return True
+
+
+@lockutils.synchronized('notification_queue')
+def get_queue():
+    """Get the notification queue, creating it if needed.
+
+    :raises: ConfigInvalid if the options of the queue are invalid.
+    """
+    global _QUEUE
+    if _QUEUE is None:
+        _QUEUE = NotificationQueue(
+            CONF.notification_queue_size,
+            overflow=CONF.notification_queue_overflow,
+            spill_dir=CONF.notification_spill_dir)
+    return _QUEUE
+
+
+def emit(notification):
+    """Send a notification, asynchronously if configured so.
+
+    :param notification: a :class:`Notification`.
+    :raises: oslo_messaging.exceptions.MessageDeliveryFailure if the
+        notification is sent synchronously.
+    """
+    if CONF.notification_async:
+        get_queue().put(notification)
+    else:
+        send(notification)
+
+
+def stop(timeout=STOP_TIMEOUT):
+    """Stop the notification queue, if any, sending the notifications left.
+
+    :param timeout: the maximum time to wait in seconds.
+    """
+    global _QUEUE
+    queue, _QUEUE = _QUEUE, None
+    if queue is not None:
+        queue.stop(timeout)
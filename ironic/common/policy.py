@@ -22,6 +22,7 @@ from oslo_concurrency import lockutils
 from oslo_config import cfg
 from oslo_log import log
 from oslo_policy import policy
+import six
 
 from ironic.common import exception
 
@@ -519,19 +520,74 @@ def get_oslo_policy_enforcer():
 # at module-load time.
 
 
+def _freeze(values):
+    try:
+        return frozenset((key, tuple(value) if isinstance(value, list)
+                          else value)
+                         for key, value in values.items())
+    except (AttributeError, TypeError):
+        # NOTE: not a mapping, or values which cannot be hashed
+        return None
+
+
+def _get_decision_key(rule, target, creds):
+    """Get the key of a policy decision in the cache of the credentials.
+
+    :returns: a tuple (cache, key), or (None, None) if the decision cannot
+        be cached.
+    """
+    decisions = getattr(creds, 'policy_decisions', None)
+    if decisions is None or not isinstance(rule, six.string_types):
+        return None, None
+
+    frozen_creds = _freeze(creds)
+    frozen_target = frozen_creds if target is creds else _freeze(target)
+    if frozen_creds is None or frozen_target is None:
+        return None, None
+    return decisions, (rule, frozen_target, frozen_creds)
+
+
+def _enforce(do_raise, rule, target, creds, *args, **kwargs):
+    decisions, key = _get_decision_key(rule, target, creds)
+    if args or kwargs:
+        # NOTE: custom exceptions and checks are not cached
+        key = None
+    if key is not None and key in decisions:
+        if do_raise and not decisions[key]:
+            raise policy.PolicyNotAuthorized(rule, target, creds)
+        return decisions[key]
+
+    enforcer = get_enforcer()
+    try:
+        if do_raise:
+            result = enforcer.authorize(rule, target, creds, do_raise=True,
+                                        *args, **kwargs)
+        else:
+            result = enforcer.enforce(rule, target, creds, *args, **kwargs)
+    except policy.PolicyNotAuthorized:
+        if key is not None:
+            decisions[key] = False
+        raise
+    if key is not None:
+        decisions[key] = result
+    return result
+
+
 def authorize(rule, target, creds, *args, **kwargs):
     """A shortcut for policy.Enforcer.authorize()
 
     Checks authorization of a rule against the target and credentials, and
     raises an exception if the rule is not defined.
     Always returns true if CONF.auth_strategy == noauth.
+
+    The decisions are cached in the credentials returned by
+    :meth:`ironic.common.context.RequestContext.to_policy_values`, so that
+    a rule is evaluated once per request context and target.
     """
     if CONF.auth_strategy == 'noauth':
         return True
-    enforcer = get_enforcer()
     try:
-        return enforcer.authorize(rule, target, creds, do_raise=True,
-                                  *args, **kwargs)
+        return _enforce(True, rule, target, creds, *args, **kwargs)
     except policy.PolicyNotAuthorized:
         raise exception.HTTPForbidden(resource=rule)
 
@@ -540,7 +596,7 @@ def check(rule, target, creds, *args, **kwargs):
     """A shortcut for policy.Enforcer.enforce()
 
     Checks authorization of a rule against the target and credentials
-    and returns True or False.
+    and returns True or False. The decisions are cached as in
+    :func:`authorize`.
     """
-    enforcer = get_enforcer()
-    return enforcer.enforce(rule, target, creds, *args, **kwargs)
+    return _enforce(False, rule, target, creds, *args, **kwargs)
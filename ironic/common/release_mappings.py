@@ -131,11 +131,11 @@ RELEASE_MAPPING = {
         }
     },
     'master': {
-        'api': '1.54',
-        'rpc': '1.48',
+        'api': '1.56',
+        'rpc': '1.50',
         'objects': {
             'Allocation': ['1.0'],
-            'Node': ['1.32', '1.31', '1.30', '1.29', '1.28'],
+            'Node': ['1.33', '1.32', '1.31', '1.30', '1.29', '1.28'],
             'Conductor': ['1.3'],
             'Chassis': ['1.3'],
             'Port': ['1.9'],
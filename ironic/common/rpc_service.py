@@ -20,10 +20,13 @@ from oslo_config import cfg
 from oslo_log import log
 import oslo_messaging as messaging
 from oslo_service import service
+from oslo_service import wsgi
 from oslo_utils import importutils
 
 from ironic.common import context
+from ironic.common import driver_factory
 from ironic.common.json_rpc import server as json_rpc
+from ironic.common import metrics
 from ironic.common import rpc
 from ironic.objects import base as objects_base
 
@@ -41,6 +44,7 @@ class RPCService(service.Service):
         self.manager = manager_class(host, manager_module.MANAGER_TOPIC)
         self.topic = self.manager.topic
         self.rpcserver = None
+        self.metrics_server = None
         self.deregister = True
 
     def start(self):
@@ -57,6 +61,13 @@ class RPCService(service.Service):
             self.rpcserver = rpc.get_server(target, endpoints, serializer)
         self.rpcserver.start()
 
+        if CONF.metrics.prometheus_enabled:
+            self.metrics_server = wsgi.Server(
+                CONF, 'ironic-metrics', metrics.application,
+                host=CONF.metrics.prometheus_host_ip,
+                port=CONF.metrics.prometheus_port)
+            self.metrics_server.start()
+
         self.handle_signal()
         self.manager.init_host(admin_context)
 
@@ -71,6 +82,13 @@ class RPCService(service.Service):
         except Exception as e:
             LOG.exception('Service error occurred when stopping the '
                           'RPC server. Error: %s', e)
+        if self.metrics_server is not None:
+            try:
+                self.metrics_server.stop()
+                self.metrics_server.wait()
+            except Exception as e:
+                LOG.exception('Service error occurred when stopping the '
+                              'metrics server. Error: %s', e)
         try:
             self.manager.del_host(deregister=self.deregister)
         except Exception as e:
@@ -82,6 +100,11 @@ class RPCService(service.Service):
                  '%(host)s.',
                  {'service': self.topic, 'host': self.host})
 
+    def reset(self):
+        super(RPCService, self).reset()
+        # NOTE: called when the configuration is reloaded
+        driver_factory.clear_driver_cache()
+
     def _handle_signal(self, signo, frame):
         LOG.info('Got signal SIGUSR1. Not deregistering on next shutdown '
                  'of service %(service)s on host %(host)s.',
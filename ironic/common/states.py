@@ -517,3 +517,8 @@ machine.add_transition(ADOPTFAIL, ADOPTING, 'adopt')
 
 # A node that failed adoption can be moved back to manageable
 machine.add_transition(ADOPTFAIL, MANAGEABLE, 'manage')
+
+# Tasks and API requests use shallow copies of the machine, which share its
+# state and transition tables and only track their own current and target
+# states. Freeze it so that the shared tables cannot be changed.
+machine.freeze()
@@ -17,6 +17,7 @@ from oslo_service import wsgi
 from ironic.api import app
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import notification_queue
 from ironic.conf import CONF
 
 
@@ -61,9 +62,13 @@ class WSGIService(service.ServiceBase):
     def wait(self):
         """Wait for the service to stop serving this API.
 
+        The notifications queued by the requests are sent before returning.
+
         :returns: None
         """
         self.server.wait()
+        # NOTE: the requests in progress are finished at this point
+        notification_queue.stop()
 
     def reset(self):
         """Reset server greenpool size to default.
@@ -13,14 +13,15 @@
 """Functionality related to allocations."""
 
 import random
+import time
 
-from ironic_lib import metrics_utils
 from oslo_config import cfg
 from oslo_log import log
-import retrying
+from oslo_utils import timeutils
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import states
 from ironic.conductor import task_manager
 from ironic import objects
@@ -28,7 +29,7 @@ from ironic import objects
 
 CONF = cfg.CONF
 LOG = log.getLogger(__name__)
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 
 def do_allocate(context, allocation):
@@ -181,11 +182,25 @@ def _verify_node(node, allocation):
 # node_locked_retry_attempt times, we try to allocate *any* node the same
 # number of times. This avoids getting stuck on a node reserved e.g. for power
 # sync periodic task.
-@retrying.retry(
-    retry_on_exception=lambda e: isinstance(e, exception.AllocationFailed),
-    stop_max_attempt_number=CONF.conductor.node_locked_retry_attempts,
-    wait_fixed=CONF.conductor.node_locked_retry_interval * 1000)
 def _allocate_node(context, allocation, nodes):
+    """Try to allocate one of the nodes, retrying if they are all locked."""
+    attempts = CONF.conductor.node_locked_retry_attempts
+    watch = timeutils.StopWatch(
+        duration=max(attempts - 1, 0)
+        * CONF.conductor.node_locked_retry_interval).start()
+    failures = 0
+    while True:
+        try:
+            return _allocate_any_node(context, allocation, nodes)
+        except exception.AllocationFailed:
+            failures += 1
+            if failures >= attempts or not nodes:
+                raise
+            time.sleep(task_manager.get_lock_retry_delay(failures, attempts,
+                                                         watch))
+
+
+def _allocate_any_node(context, allocation, nodes):
     """Go through the list of nodes and try to allocate one of them."""
     retry_nodes = []
     for node in nodes:
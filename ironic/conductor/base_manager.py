@@ -14,36 +14,49 @@
 
 import inspect
 import threading
+import time
 
 import eventlet
 import futurist
 from futurist import periodics
-from futurist import rejection
+from futurist import waiters
 from oslo_db import exception as db_exception
 from oslo_log import log
 from oslo_utils import excutils
+from oslo_utils import timeutils
 from oslo_utils import versionutils
 import six
+from six.moves import queue
 
 from ironic.common import context as ironic_context
 from ironic.common import driver_factory
 from ironic.common import exception
 from ironic.common import hash_ring
 from ironic.common.i18n import _
+from ironic.common import metrics
+from ironic.common import notification_queue
 from ironic.common import release_mappings as versions
 from ironic.common import rpc
 from ironic.common import states
+from ironic.conductor import deadlines
+from ironic.conductor import node_snapshot
 from ironic.conductor import notification_utils as notify_utils
+from ironic.conductor import power_events
 from ironic.conductor import task_manager
+from ironic.conductor import work_scheduler
 from ironic.conf import CONF
 from ironic.db import api as dbapi
 from ironic.drivers import base as driver_base
+from ironic.drivers.modules import console_proxy
+from ironic.drivers.modules.redfish import events as redfish_events
 from ironic import objects
 from ironic.objects import fields as obj_fields
 
 
 LOG = log.getLogger(__name__)
 
+METRICS = metrics.get_metrics_logger(__name__)
+
 
 def _check_enabled_interfaces():
     """Sanity-check enabled_*_interfaces configs.
@@ -77,6 +90,7 @@ class BaseConductorManager(object):
         self.sensors_notifier = rpc.get_sensors_notifier()
         self._started = False
         self._shutdown = None
+        self._node_snapshot = None
 
     def init_host(self, admin_context=None):
         """Initialize the conductor host.
@@ -96,15 +110,18 @@ class BaseConductorManager(object):
 
         self.dbapi = dbapi.get_instance()
 
+        self._node_snapshot = None
+        if CONF.conductor.node_snapshot:
+            self._node_snapshot = node_snapshot.NodeSnapshot(self.dbapi)
+        """Snapshot of the nodes shared by the periodic tasks, if enabled."""
+
         self._keepalive_evt = threading.Event()
         """Event for the keepalive thread."""
 
-        # TODO(dtantsur): make the threshold configurable?
-        rejection_func = rejection.reject_when_reached(
-            CONF.conductor.workers_pool_size)
-        self._executor = futurist.GreenThreadPoolExecutor(
-            max_workers=CONF.conductor.workers_pool_size,
-            check_and_reject=rejection_func)
+        self._executor = work_scheduler.WorkScheduler(
+            CONF.conductor.workers_pool_size,
+            weights=CONF.conductor.work_class_weights,
+            admission=CONF.conductor.work_class_admission)
         """Executor for performing tasks async."""
 
         # TODO(jroll) delete the use_groups argument and use the default
@@ -120,6 +137,10 @@ class BaseConductorManager(object):
 
         _check_enabled_interfaces()
 
+        if CONF.notification_async:
+            # NOTE: fail early if the options of the queue are invalid
+            notification_queue.get_queue()
+
         # NOTE(deva): these calls may raise DriverLoadError or DriverNotFound
         # NOTE(vdrok): Instantiate network and storage interface factory on
         # startup so that all the interfaces are loaded at the very
@@ -173,6 +194,15 @@ class BaseConductorManager(object):
                 LOG.error('Failed to register hardware types. %s', e)
                 self.del_host()
 
+        if deadlines.enabled():
+            deadlines.start(self._check_wait_deadlines)
+            for provision_state in deadlines.WAIT_STATES:
+                self._arm_wait_deadlines(ironic_context.get_admin_context(),
+                                         provision_state)
+
+        power_events.POWER_EVENTS.start(self._on_power_event)
+        metrics.REGISTRY.add_collector(self._collect_metrics)
+
         # Start periodic tasks
         self._periodic_tasks_worker = self._executor.submit(
             self._periodic_tasks.start, allow_empty=True)
@@ -188,8 +218,9 @@ class BaseConductorManager(object):
 
         # Start consoles if it set enabled in a greenthread.
         try:
-            self._spawn_worker(self._start_consoles,
-                               ironic_context.get_admin_context())
+            with work_scheduler.work_class(work_scheduler.BACKGROUND):
+                self._spawn_worker(self._start_consoles,
+                                   ironic_context.get_admin_context())
         except exception.NoFreeConductorWorker:
             LOG.warning('Failed to start worker for restarting consoles.')
 
@@ -277,10 +308,53 @@ class BaseConductorManager(object):
 
         self._periodic_tasks = periodics.PeriodicWorker(
             periodic_task_callables,
-            executor_factory=periodics.ExistingExecutor(self._executor))
+            executor_factory=periodics.ExistingExecutor(
+                self._executor.executor_for(work_scheduler.PERIODIC)))
         # This is only used in tests currently. Delete it?
         self._periodic_task_callables = periodic_task_callables
 
+    def _collect_metrics(self):
+        """Collect the metrics of the workers and of the periodic tasks.
+
+        :returns: a list of metrics, see :meth:`metrics.Registry.collect`.
+        """
+        running, queued = self._executor.stats()
+        workers = metrics.Gauge(
+            'ironic_conductor_workers',
+            'Number of workers of the conductor.')
+        workers.set(self._executor.max_workers)
+        workers_running = metrics.Gauge(
+            'ironic_conductor_workers_running',
+            'Number of workers of the conductor running work.')
+        workers_running.set(running)
+        work_queued = metrics.Gauge(
+            'ironic_conductor_work_queued',
+            'Number of work items waiting for a worker, by work class.')
+        for work_class, count in queued.items():
+            work_queued.set(count, labels={'work_class': work_class})
+
+        runs = metrics.Counter(
+            'ironic_conductor_periodic_task_runs_total',
+            'Number of runs of the periodic tasks.')
+        failures = metrics.Counter(
+            'ironic_conductor_periodic_task_failures_total',
+            'Number of failed runs of the periodic tasks.')
+        elapsed = metrics.Counter(
+            'ironic_conductor_periodic_task_seconds_total',
+            'Time spent running the periodic tasks.')
+        waiting = metrics.Counter(
+            'ironic_conductor_periodic_task_waiting_seconds_total',
+            'Time the periodic tasks waited to run after being due.')
+        for watcher in self._periodic_tasks.iter_watchers():
+            labels = {'task': watcher.work.name}
+            runs.inc(watcher.runs, labels=labels)
+            failures.inc(watcher.failures, labels=labels)
+            elapsed.inc(watcher.elapsed, labels=labels)
+            waiting.inc(watcher.elapsed_waiting, labels=labels)
+
+        return [workers, workers_running, work_queued, runs, failures,
+                elapsed, waiting]
+
     def del_host(self, deregister=True):
         # Conductor deregistration fails if called on non-initialized
         # conductor (e.g. when rpc server is unreachable).
@@ -305,9 +379,17 @@ class BaseConductorManager(object):
         # Waiting here to give workers the chance to finish. This has the
         # benefit of releasing locks workers placed on nodes, as well as
         # having work complete normally.
+        deadlines.stop()
+        power_events.POWER_EVENTS.stop()
+        # NOTE: terminates the console commands, releasing the SOL sessions
+        console_proxy.stop()
+        metrics.REGISTRY.remove_collector(self._collect_metrics)
         self._periodic_tasks.stop()
         self._periodic_tasks.wait()
+        # NOTE: after the periodic tasks, which start the listener
+        redfish_events.stop_listener()
         self._executor.shutdown(wait=True)
+        notification_queue.stop()
         self._started = False
 
     def _register_and_validate_hardware_interfaces(self, hardware_types):
@@ -357,7 +439,9 @@ class BaseConductorManager(object):
         """Iterate over nodes mapped to this conductor.
 
         Requests node set from and filters out nodes that are not
-        mapped to this conductor.
+        mapped to this conductor. The nodes are taken from the node snapshot
+        shared by the periodic tasks when it is enabled and supports the
+        query, see :mod:`ironic.conductor.node_snapshot`.
 
         Yields tuples (node_uuid, driver, conductor_group, ...) where ... is
         derived from fields argument, e.g.: fields=None means yielding ('uuid',
@@ -371,7 +455,12 @@ class BaseConductorManager(object):
         :return: generator yielding tuples of requested fields
         """
         columns = ['uuid', 'driver', 'conductor_group'] + list(fields or ())
-        node_list = self.dbapi.get_nodeinfo_list(columns=columns, **kwargs)
+        snapshot = self._node_snapshot
+        if snapshot is not None and snapshot.supports(**kwargs):
+            node_list = snapshot.get_nodeinfo_list(columns=columns, **kwargs)
+        else:
+            node_list = self.dbapi.get_nodeinfo_list(columns=columns,
+                                                     **kwargs)
         for result in node_list:
             if self._shutdown:
                 break
@@ -385,6 +474,10 @@ class BaseConductorManager(object):
         Spawns a greenthread if there are free slots in pool, otherwise raises
         exception. Execution control returns immediately to the caller.
 
+        The work is of the class set by :func:`work_scheduler.work_class`,
+        or of the class of the work calling this method, interactive by
+        default.
+
         :returns: Future object.
         :raises: NoFreeConductorWorker if worker pool is currently full.
 
@@ -423,6 +516,32 @@ class BaseConductorManager(object):
             node_uuid.encode('utf-8'),
             replicas=CONF.hash_distribution_replicas)
 
+    def _arm_wait_deadlines(self, context, provision_state, node_uuids=None,
+                            min_delay=0):
+        """Set the deadlines of the nodes in a wait state.
+
+        The deadlines are computed from the timestamps in the database.
+
+        :param context: request context.
+        :param provision_state: one of the wait states.
+        :param node_uuids: the UUIDs of the nodes to consider, None for all
+            the nodes mapped to this conductor.
+        :param min_delay: the minimum number of seconds from now to the
+            deadlines.
+        """
+        filters = {'provision_state': provision_state}
+        if node_uuids is not None:
+            filters['uuid_in'] = node_uuids
+        for (node_uuid, driver, conductor_group, provision_updated_at,
+             inspection_started_at) in self.iter_nodes(
+                fields=['provision_updated_at', 'inspection_started_at'],
+                filters=filters):
+            since = (inspection_started_at
+                     if provision_state == states.INSPECTWAIT
+                     else provision_updated_at)
+            deadlines.arm(node_uuid, provision_state, since=since,
+                          min_delay=min_delay)
+
     def _fail_if_in_state(self, context, filters, provision_state,
                           sort_key, callback_method=None,
                           err_handler=None, last_error=None,
@@ -497,56 +616,196 @@ class BaseConductorManager(object):
             if workers_count >= CONF.conductor.periodic_max_workers:
                 break
 
+    @METRICS.timer('BaseConductorManager._start_consoles')
     def _start_consoles(self, context):
         """Start consoles if set enabled.
 
+        The consoles are started concurrently by up to
+        ``[console]restore_workers`` workers.
+
         :param: context: request context
         """
+        watch = timeutils.StopWatch().start()
         filters = {'console_enabled': True}
 
-        node_iter = self.iter_nodes(filters=filters)
+        nodes_queue = queue.Queue()
+        for node_uuid, driver, conductor_group in self.iter_nodes(
+                filters=filters):
+            nodes_queue.put(node_uuid)
+
+        if nodes_queue.empty():
+            return
+
+        number_of_workers = min(CONF.console.restore_workers,
+                                nodes_queue.qsize())
+        futures = []
+
+        for worker_number in range(max(0, number_of_workers - 1)):
+            try:
+                futures.append(
+                    self._spawn_worker(self._start_consoles_nodes_task,
+                                       context, nodes_queue))
+            except exception.NoFreeConductorWorker:
+                LOG.warning("There are no more conductor workers for "
+                            "starting consoles. %(workers)d workers have "
+                            "been already spawned.",
+                            {'workers': worker_number})
+                break
+
+        try:
+            started = self._start_consoles_nodes_task(context, nodes_queue)
+        finally:
+            waiters.wait_for_all(futures)
+
+        started += sum(future.result() for future in futures)
+        LOG.info('Started %(count)d consoles in %(time).2f seconds',
+                 {'count': started, 'time': watch.elapsed()})
+
+    def _start_consoles_nodes_task(self, context, nodes):
+        """Start the consoles of the nodes from a synchronized queue.
+
+        :param: context: request context
+        :param: nodes: a queue of node UUIDs.
+        :returns: the number of consoles started.
+        """
+        started = 0
+        while not self._shutdown:
+            try:
+                node_uuid = nodes.get_nowait()
+            except queue.Empty:
+                break
 
-        for node_uuid, driver, conductor_group in node_iter:
             try:
-                with task_manager.acquire(context, node_uuid, shared=False,
-                                          purpose='start console') as task:
-                    notify_utils.emit_console_notification(
-                        task, 'console_restore',
-                        obj_fields.NotificationStatus.START)
-                    try:
-                        LOG.debug('Trying to start console of node %(node)s',
-                                  {'node': node_uuid})
-                        task.driver.console.start_console(task)
-                        LOG.info('Successfully started console of node '
-                                 '%(node)s', {'node': node_uuid})
-                        notify_utils.emit_console_notification(
-                            task, 'console_restore',
-                            obj_fields.NotificationStatus.END)
-                    except Exception as err:
-                        msg = (_('Failed to start console of node %(node)s '
-                                 'while starting the conductor, so changing '
-                                 'the console_enabled status to False, error: '
-                                 '%(err)s')
-                               % {'node': node_uuid, 'err': err})
-                        LOG.error(msg)
-                        # If starting console failed, set node console_enabled
-                        # back to False and set node's last error.
-                        task.node.last_error = msg
-                        task.node.console_enabled = False
-                        task.node.save()
-                        notify_utils.emit_console_notification(
-                            task, 'console_restore',
-                            obj_fields.NotificationStatus.ERROR)
+                if self._start_console(context, node_uuid):
+                    started += 1
             except exception.NodeLocked:
                 LOG.warning('Node %(node)s is locked while trying to '
                             'start console on conductor startup',
                             {'node': node_uuid})
-                continue
             except exception.NodeNotFound:
                 LOG.warning("During starting console on conductor "
                             "startup, node %(node)s was not found",
                             {'node': node_uuid})
-                continue
+            except Exception:
+                LOG.exception('Unexpected error when starting console of '
+                              'node %(node)s on conductor startup',
+                              {'node': node_uuid})
             finally:
                 # Yield on every iteration
                 eventlet.sleep(0)
+        return started
+
+    def _start_console(self, context, node_uuid):
+        """Start the console of a node on conductor startup.
+
+        :param: context: request context
+        :param: node_uuid: the UUID of the node.
+        :returns: True if the console was started, False otherwise.
+        :raises: NodeLocked if the node is locked by another process.
+        :raises: NodeNotFound if the node does not exist any more.
+        """
+        purpose = 'start console'
+        with task_manager.acquire(context, node_uuid, shared=False,
+                                  purpose=purpose) as task:
+            if not task.node.console_enabled:
+                return False
+            notify_utils.emit_console_notification(
+                task, 'console_restore', obj_fields.NotificationStatus.START)
+
+        # NOTE: the console subprocess may take up to
+        # [console]subprocess_timeout seconds to start, do not hold the
+        # exclusive lock on the node while waiting for it.
+        error = None
+        with task_manager.acquire(context, node_uuid, shared=True,
+                                  purpose=purpose) as task:
+            LOG.debug('Trying to start console of node %(node)s',
+                      {'node': node_uuid})
+            try:
+                task.driver.console.start_console(task)
+            except Exception as err:
+                error = err
+
+        # NOTE: the node may be locked by another operation in the meantime,
+        # retry for longer than a single acquire does, since a console left
+        # running or a failure left unrecorded would not be retried.
+        attempts = CONF.conductor.node_locked_retry_attempts
+        watch = timeutils.StopWatch(
+            duration=max(attempts - 1, 0)
+            * CONF.conductor.node_locked_retry_interval).start()
+        failures = 0
+        while True:
+            try:
+                return self._record_console_start(context, node_uuid, error)
+            except exception.NodeLocked:
+                failures += 1
+                if failures >= attempts:
+                    break
+                time.sleep(task_manager.get_lock_retry_delay(
+                    failures, attempts, watch))
+
+        if error is not None:
+            LOG.error('Failed to start console of node %(node)s on conductor '
+                      'startup: %(err)s. The failure could not be recorded '
+                      'since the node is locked', {'node': node_uuid,
+                                                   'err': error})
+            return False
+
+        LOG.error('Could not record the start of the console of node '
+                  '%(node)s on conductor startup since the node is locked, '
+                  'stopping the console', {'node': node_uuid})
+        with task_manager.acquire(context, node_uuid, shared=True,
+                                  purpose=purpose) as task:
+            try:
+                task.driver.console.stop_console(task)
+            except Exception as err:
+                LOG.error('Failed to stop console of node %(node)s: '
+                          '%(err)s', {'node': node_uuid, 'err': err})
+        return False
+
+    def _record_console_start(self, context, node_uuid, error):
+        """Record the result of starting the console of a node.
+
+        :param: context: request context
+        :param: node_uuid: the UUID of the node.
+        :param: error: the exception raised when starting the console, if
+            any.
+        :returns: True if the console was started, False otherwise.
+        :raises: NodeLocked if the node is locked by another process.
+        :raises: NodeNotFound if the node does not exist any more.
+        """
+        with task_manager.acquire(context, node_uuid, shared=False,
+                                  purpose='start console') as task:
+            if error is not None:
+                msg = (_('Failed to start console of node %(node)s '
+                         'while starting the conductor, so changing '
+                         'the console_enabled status to False, error: '
+                         '%(err)s') % {'node': node_uuid, 'err': error})
+                LOG.error(msg)
+                # If starting console failed, set node console_enabled
+                # back to False and set node's last error.
+                task.node.last_error = msg
+                task.node.console_enabled = False
+                task.node.save()
+                notify_utils.emit_console_notification(
+                    task, 'console_restore',
+                    obj_fields.NotificationStatus.ERROR)
+                return False
+
+            if not task.node.console_enabled:
+                # NOTE: the console was disabled while it was being
+                # started, make sure it does not keep running.
+                LOG.info('Console of node %(node)s was disabled while it '
+                         'was being started on conductor startup, stopping '
+                         'it', {'node': node_uuid})
+                try:
+                    task.driver.console.stop_console(task)
+                except Exception as err:
+                    LOG.error('Failed to stop console of node %(node)s: '
+                              '%(err)s', {'node': node_uuid, 'err': err})
+                return False
+
+            LOG.info('Successfully started console of node %(node)s',
+                     {'node': node_uuid})
+            notify_utils.emit_console_notification(
+                task, 'console_restore', obj_fields.NotificationStatus.END)
+            return True
@@ -0,0 +1,215 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Deadlines of the nodes waiting in a provision state.
+
+A node entering one of the wait states (deploy wait, clean wait, rescue wait
+or inspect wait) gets a deadline in memory, after the timeout of the state.
+When a deadline expires, the callback of the scheduler is called with the
+nodes in question, which checks their timeout against the database and fails
+them. The periodic scans for timed out nodes are kept, less often, as a
+safety net for the nodes this conductor did not see entering a wait state.
+"""
+
+import datetime
+import heapq
+import threading
+
+from oslo_log import log
+from oslo_utils import timeutils
+
+from ironic.common import states
+from ironic.conf import CONF
+
+LOG = log.getLogger(__name__)
+
+_TIMEOUT_OPTIONS = {
+    states.DEPLOYWAIT: 'deploy_callback_timeout',
+    states.CLEANWAIT: 'clean_callback_timeout',
+    states.RESCUEWAIT: 'rescue_callback_timeout',
+    states.INSPECTWAIT: 'inspect_wait_timeout',
+}
+
+WAIT_STATES = frozenset(_TIMEOUT_OPTIONS)
+
+_SCHEDULER = None
+
+
+def enabled():
+    """Whether the deadlines of the nodes in wait states are used."""
+    return (CONF.conductor.wait_deadlines
+            and CONF.conductor.check_provision_state_interval > 0)
+
+
+def get_timeout(provision_state):
+    """Get the timeout in seconds of a wait state, 0 if it is disabled."""
+    return max(0, getattr(CONF.conductor, _TIMEOUT_OPTIONS[provision_state]))
+
+
+class DeadlineScheduler(object):
+    """Calls a function when the deadlines of nodes expire.
+
+    :param callback: a function called with a provision state and a list of
+        UUIDs of the nodes whose deadline in this state expired.
+    """
+
+    def __init__(self, callback):
+        self._callback = callback
+        self._cond = threading.Condition()
+        # Heap of (deadline, node UUID, provision state), with stale entries
+        self._heap = []
+        # Node UUID to (deadline, provision state)
+        self._deadlines = {}
+        self._thread = None
+        self._stopped = False
+
+    def __len__(self):
+        with self._cond:
+            return len(self._deadlines)
+
+    def arm(self, node_uuid, provision_state, since=None, min_delay=0):
+        """Set the deadline of a node in a wait state.
+
+        :param node_uuid: the UUID of the node.
+        :param provision_state: the wait state the node is in.
+        :param since: when the timeout started, defaults to now.
+        :param min_delay: the minimum number of seconds from now to the
+            deadline.
+        """
+        timeout = get_timeout(provision_state)
+        if not timeout:
+            self.disarm(node_uuid)
+            return
+        now = timeutils.utcnow()
+        since = timeutils.normalize_time(since) if since else now
+        deadline = max(since + datetime.timedelta(seconds=timeout),
+                       now + datetime.timedelta(seconds=min_delay))
+        with self._cond:
+            self._deadlines[node_uuid] = (deadline, provision_state)
+            heapq.heappush(self._heap, (deadline, node_uuid, provision_state))
+            if self._heap[0][1] == node_uuid:
+                self._cond.notify_all()
+
+    def disarm(self, node_uuid):
+        """Remove the deadline of a node, if any."""
+        with self._cond:
+            self._deadlines.pop(node_uuid, None)
+
+    def pop_expired(self, now=None):
+        """Remove and return the expired deadlines.
+
+        :returns: a dict mapping provision states to lists of node UUIDs.
+        """
+        now = now or timeutils.utcnow()
+        expired = {}
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, node_uuid, provision_state = heapq.heappop(
+                    self._heap)
+                if (self._deadlines.get(node_uuid)
+                        != (deadline, provision_state)):
+                    # Disarmed or re-armed since
+                    continue
+                del self._deadlines[node_uuid]
+                expired.setdefault(provision_state, []).append(node_uuid)
+        return expired
+
+    def _next_wait(self):
+        """Seconds until the next deadline, None if there is none."""
+        while self._heap:
+            deadline, node_uuid, provision_state = self._heap[0]
+            if (self._deadlines.get(node_uuid)
+                    == (deadline, provision_state)):
+                return max(0, timeutils.delta_seconds(timeutils.utcnow(),
+                                                      deadline))
+            heapq.heappop(self._heap)
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name='wait-deadlines')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                wait = self._next_wait()
+                if wait is None or wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            for provision_state, node_uuids in self.pop_expired().items():
+                try:
+                    self._callback(provision_state, node_uuids)
+                except Exception:
+                    LOG.exception('Failed to process the expired deadlines '
+                                  'of nodes %(nodes)s in state %(state)s',
+                                  {'nodes': ', '.join(node_uuids),
+                                   'state': provision_state})
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def start(callback):
+    """Start the deadline scheduler of this process.
+
+    :param callback: see :class:`DeadlineScheduler`.
+    :returns: the scheduler.
+    """
+    global _SCHEDULER
+    stop()
+    _SCHEDULER = DeadlineScheduler(callback)
+    _SCHEDULER.start()
+    return _SCHEDULER
+
+
+def stop():
+    """Stop the deadline scheduler of this process, if any."""
+    global _SCHEDULER
+    scheduler, _SCHEDULER = _SCHEDULER, None
+    if scheduler is not None:
+        scheduler.stop()
+
+
+def node_state_changed(node):
+    """Arm or disarm the deadline of a node after a provision state change.
+
+    Does nothing if the deadline scheduler is not running.
+
+    :param node: the node with its new provision state.
+    """
+    scheduler = _SCHEDULER
+    if scheduler is None:
+        return
+    if node.provision_state in WAIT_STATES:
+        scheduler.arm(node.uuid, node.provision_state)
+    else:
+        scheduler.disarm(node.uuid)
+
+
+def arm(node_uuid, provision_state, since=None, min_delay=0):
+    """Set the deadline of a node, if the deadline scheduler is running.
+
+    See :meth:`DeadlineScheduler.arm`.
+    """
+    scheduler = _SCHEDULER
+    if scheduler is not None:
+        scheduler.arm(node_uuid, provision_state, since=since,
+                      min_delay=min_delay)
@@ -47,30 +47,35 @@ import tempfile
 import eventlet
 from futurist import periodics
 from futurist import waiters
-from ironic_lib import metrics_utils
 from oslo_db import exception as db_exception
 from oslo_log import log
 import oslo_messaging as messaging
 from oslo_utils import excutils
 from oslo_utils import uuidutils
 from oslo_utils import versionutils
+import six
 from six.moves import queue
 
+from ironic.common import context as ironic_context
 from ironic.common import driver_factory
 from ironic.common import exception
 from ironic.common import faults
 from ironic.common.glance_service import service_utils as glance_utils
 from ironic.common.i18n import _
 from ironic.common import images
+from ironic.common import metrics
 from ironic.common import network
 from ironic.common import release_mappings as versions
 from ironic.common import states
 from ironic.common import swift
 from ironic.conductor import allocations
 from ironic.conductor import base_manager
+from ironic.conductor import deadlines
 from ironic.conductor import notification_utils as notify_utils
+from ironic.conductor import power_events
 from ironic.conductor import task_manager
 from ironic.conductor import utils
+from ironic.conductor import work_scheduler
 from ironic.conf import CONF
 from ironic.drivers import base as drivers_base
 from ironic import objects
@@ -81,7 +86,7 @@ MANAGER_TOPIC = 'ironic.conductor_manager'
 
 LOG = log.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 SYNC_EXCLUDED_STATES = (states.DEPLOYWAIT, states.CLEANWAIT, states.ENROLL)
 
@@ -95,13 +100,24 @@ _SEEN_AGENT_VERSION_DEPRECATIONS = []
 _SEEN_NO_DEPLOY_STEP_DEPRECATIONS = set()
 
 
+def _wait_check_interval(interval):
+    """Interval of the scans for timed out nodes in wait states.
+
+    With the deadlines of the nodes kept in memory, the scans are only a
+    safety net and run less often.
+    """
+    if deadlines.enabled():
+        return max(interval, CONF.conductor.wait_reconcile_interval)
+    return interval
+
+
 class ConductorManager(base_manager.BaseConductorManager):
     """Ironic Conductor manager main class."""
 
     # NOTE(rloo): This must be in sync with rpcapi.ConductorAPI's.
     # NOTE(pas-ha): This also must be in sync with
     #               ironic.common.release_mappings.RELEASE_MAPPING['master']
-    RPC_API_VERSION = '1.48'
+    RPC_API_VERSION = '1.50'
 
     target = messaging.Target(version=RPC_API_VERSION)
 
@@ -136,6 +152,61 @@ class ConductorManager(base_manager.BaseConductorManager):
         node_obj.create()
         return node_obj
 
+    @METRICS.timer('ConductorManager.create_nodes')
+    def create_nodes(self, context, nodes):
+        """Create nodes with their ports, port groups and traits.
+
+        The nodes are validated first, then the valid ones are created in
+        transactions of up to ``[conductor]bulk_create_chunk_size`` nodes.
+        When a transaction fails, its nodes are created one by one to find
+        the faulty ones.
+
+        :param context: an admin context
+        :param nodes: a list of dicts with created (but not saved to the
+            database) objects, see
+            :meth:`ironic.objects.node.Node.create_many`.
+        :returns: a list with, for each of the nodes in the same order,
+            ``None`` if the node was created, or an error message.
+        """
+        LOG.debug("RPC create_nodes called for %d nodes.", len(nodes))
+        errors = [None] * len(nodes)
+        valid = []
+        for index, item in enumerate(nodes):
+            try:
+                driver_factory.check_and_update_node_interfaces(item['node'])
+                for group in item.get('portgroups', []):
+                    utils.validate_new_portgroup_physnets(
+                        group['portgroup'], group.get('ports', []))
+            except exception.IronicException as e:
+                errors[index] = six.text_type(e)
+            else:
+                valid.append(index)
+
+        chunk_size = CONF.conductor.bulk_create_chunk_size
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            try:
+                objects.Node.create_many(context,
+                                         [nodes[index] for index in chunk])
+                continue
+            except (exception.IronicException, db_exception.DBError) as e:
+                if len(chunk) == 1:
+                    errors[chunk[0]] = six.text_type(e)
+                    continue
+                LOG.debug('Failed to create %(count)d nodes in a single '
+                          'transaction, creating them one by one: %(error)s',
+                          {'count': len(chunk), 'error': e})
+
+            for index in chunk:
+                try:
+                    objects.Node.create_many(context, [nodes[index]])
+                except (exception.IronicException, db_exception.DBError) as e:
+                    errors[index] = six.text_type(e)
+
+        LOG.info('Created %(created)d of %(count)d nodes.',
+                 {'created': errors.count(None), 'count': len(nodes)})
+        return errors
+
     def _check_update_protected(self, node_obj, delta):
         if 'protected' in delta:
             if not node_obj.protected:
@@ -299,40 +370,184 @@ class ConductorManager(base_manager.BaseConductorManager):
 
         with task_manager.acquire(context, node_id, shared=False,
                                   purpose='changing node power state') as task:
-            task.driver.power.validate(task)
-
-            if (new_state not in
-                task.driver.power.get_supported_power_states(task)):
-                # FIXME(naohirot):
-                # After driver composition, we should print power interface
-                # name here instead of driver.
-                raise exception.InvalidParameterValue(
-                    _('The driver %(driver)s does not support the power state,'
-                      ' %(state)s') %
-                    {'driver': task.node.driver, 'state': new_state})
-
-            if new_state in (states.SOFT_REBOOT, states.SOFT_POWER_OFF):
-                power_timeout = (timeout
-                                 or CONF.conductor.soft_power_off_timeout)
-            else:
-                power_timeout = timeout
-
-            # Set the target_power_state and clear any last_error, since we're
-            # starting a new operation. This will expose to other processes
-            # and clients that work is in progress.
-            if new_state in (states.POWER_ON, states.REBOOT,
-                             states.SOFT_REBOOT):
-                task.node.target_power_state = states.POWER_ON
-            else:
-                task.node.target_power_state = states.POWER_OFF
-
-            task.node.last_error = None
-            task.node.save()
+            power_timeout = self._prepare_power_action(task, new_state,
+                                                       timeout)
             task.set_spawn_error_hook(utils.power_state_error_handler,
                                       task.node, task.node.power_state)
             task.spawn_after(self._spawn_worker, utils.node_power_action,
                              task, new_state, timeout=power_timeout)
 
+    def _prepare_power_action(self, task, new_state, timeout):
+        """Validate a power action and record its target power state.
+
+        :param task: a TaskManager instance with an exclusive lock.
+        :param new_state: the desired power state of the node.
+        :param timeout: timeout (in seconds) of the power action, ``None``
+            to use the default timeout.
+        :raises: InvalidParameterValue
+        :raises: MissingParameterValue
+        :returns: the timeout to pass to the power action.
+        """
+        task.driver.power.validate(task)
+
+        if (new_state not in
+                task.driver.power.get_supported_power_states(task)):
+            # FIXME(naohirot):
+            # After driver composition, we should print power interface
+            # name here instead of driver.
+            raise exception.InvalidParameterValue(
+                _('The driver %(driver)s does not support the power state,'
+                  ' %(state)s') %
+                {'driver': task.node.driver, 'state': new_state})
+
+        if new_state in (states.SOFT_REBOOT, states.SOFT_POWER_OFF):
+            power_timeout = (timeout
+                             or CONF.conductor.soft_power_off_timeout)
+        else:
+            power_timeout = timeout
+
+        # Set the target_power_state and clear any last_error, since we're
+        # starting a new operation. This will expose to other processes
+        # and clients that work is in progress.
+        if new_state in (states.POWER_ON, states.REBOOT,
+                         states.SOFT_REBOOT):
+            task.node.target_power_state = states.POWER_ON
+        else:
+            task.node.target_power_state = states.POWER_OFF
+
+        task.node.last_error = None
+        task.node.save()
+        return power_timeout
+
+    @METRICS.timer('ConductorManager.change_nodes_power_state')
+    @messaging.expected_exceptions(exception.NoFreeConductorWorker)
+    def change_nodes_power_state(self, context, node_ids, new_state,
+                                 timeout=None):
+        """RPC method to change the power state of several nodes.
+
+        The nodes are validated and locked synchronously, as with
+        :meth:`change_node_power_state`, but locking a node is not retried:
+        the nodes locked by other operations are reported as such, so that
+        the call returns within the RPC timeout however many nodes are
+        locked. The power actions then run in the background, in up to
+        ``[conductor]bulk_power_workers`` workers.
+
+        :param context: an admin context.
+        :param node_ids: a list of ids or uuids of nodes.
+        :param new_state: the desired power state of the nodes.
+        :param timeout: timeout (in seconds) positive integer (> 0) for any
+          power state. ``None`` indicates to use default timeout.
+        :raises: NoFreeConductorWorker when there is no free worker to start
+                 the power actions. None of them is started in this case.
+        :returns: a dictionary mapping the given node ids to ``None`` for
+            the nodes which power action was started, or to an error
+            message.
+        """
+        LOG.debug("RPC change_nodes_power_state called for %(count)d "
+                  "nodes. The desired new state is %(state)s.",
+                  {'count': len(node_ids), 'state': new_state})
+
+        results = {}
+        nodes_queue = queue.Queue()
+        try:
+            for node_id in node_ids:
+                try:
+                    # NOTE: besides NodeNotFound and NodeLocked, building
+                    # the driver of a node may fail. Locking is not retried,
+                    # retrying for each of many locked nodes would exceed
+                    # the RPC timeout.
+                    task = task_manager.acquire(
+                        context, node_id, shared=False, retry=False,
+                        purpose='changing node power state')
+                except exception.IronicException as e:
+                    results[node_id] = six.text_type(e)
+                    continue
+
+                try:
+                    power_timeout = self._prepare_power_action(
+                        task, new_state, timeout)
+                except exception.IronicException as e:
+                    task.release_resources()
+                    results[node_id] = six.text_type(e)
+                    continue
+                except Exception:
+                    with excutils.save_and_reraise_exception():
+                        task.release_resources()
+
+                nodes_queue.put((task, task.node.power_state, power_timeout))
+                results[node_id] = None
+        except Exception as e:
+            # NOTE: do not leave the nodes prepared so far locked
+            with excutils.save_and_reraise_exception():
+                self._abort_nodes_power_state(nodes_queue, e)
+
+        if nodes_queue.empty():
+            return results
+
+        number_of_workers = min(CONF.conductor.bulk_power_workers,
+                                nodes_queue.qsize())
+        spawned = 0
+        try:
+            while spawned < number_of_workers:
+                self._spawn_worker(self._change_nodes_power_state_task,
+                                   nodes_queue, new_state)
+                spawned += 1
+        except exception.NoFreeConductorWorker as e:
+            if not spawned:
+                with excutils.save_and_reraise_exception():
+                    self._abort_nodes_power_state(nodes_queue, e)
+            LOG.warning("There are no more conductor workers for the bulk "
+                        "power action. %(workers)d workers have been "
+                        "already spawned.", {'workers': spawned})
+        return results
+
+    def _abort_nodes_power_state(self, nodes, error):
+        """Release the nodes of power actions which will not be started.
+
+        :param nodes: a queue of tuples (task, power state, timeout) with
+            the tasks holding an exclusive lock on the nodes.
+        :param error: the exception preventing the power actions.
+        """
+        while not nodes.empty():
+            task, power_state, _timeout = nodes.get()
+            try:
+                if isinstance(error, exception.NoFreeConductorWorker):
+                    utils.power_state_error_handler(error, task.node,
+                                                    power_state)
+                else:
+                    task.node.target_power_state = states.NOSTATE
+                    task.node.save()
+            except Exception:
+                LOG.exception('Failed to reset the target power state of '
+                              'node %s', task.node.uuid)
+            finally:
+                task.release_resources()
+
+    def _change_nodes_power_state_task(self, nodes, new_state):
+        """Run power actions on nodes from a synchronized queue.
+
+        :param nodes: a queue of tuples (task, power state, timeout) with
+            the tasks holding an exclusive lock on the nodes, released
+            once the power action is done.
+        :param new_state: the desired power state of the nodes.
+        """
+        while True:
+            try:
+                task, _power_state, timeout = nodes.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                utils.node_power_action(task, new_state, timeout=timeout)
+            except Exception as e:
+                # NOTE: the error is recorded in the last_error of the node
+                LOG.debug('Bulk power action failed for node %(node)s: '
+                          '%(error)s', {'node': task.node.uuid, 'error': e})
+            finally:
+                task.release_resources()
+                # Yield on every iteration
+                eventlet.sleep(0)
+
     @METRICS.timer('ConductorManager.vendor_passthru')
     @messaging.expected_exceptions(exception.NoFreeConductorWorker,
                                    exception.NodeLocked,
@@ -1667,8 +1882,11 @@ class ConductorManager(base_manager.BaseConductorManager):
         filters = {'maintenance': False}
 
         # NOTE(etingof): prioritize non-responding nodes to fail them fast
+        # NOTE: the nodes which BMC sends power events are only polled every
+        # [conductor]power_event_poll_interval seconds
         nodes = sorted(
-            self.iter_nodes(fields=['id'], filters=filters),
+            (n for n in self.iter_nodes(fields=['id'], filters=filters)
+             if power_events.POWER_EVENTS.poll_due(n[0])),
             key=lambda n: -self.power_state_sync_count.get(n[0], 0)
         )
 
@@ -1703,6 +1921,24 @@ class ConductorManager(base_manager.BaseConductorManager):
     def _sync_power_state_nodes_task(self, context, nodes):
         """Invokes power state sync on nodes from synchronized queue.
 
+        See :meth:`_sync_power_state_node` for the conditions of the sync.
+        """
+        while not self._shutdown:
+            try:
+                (node_uuid, driver, conductor_group,
+                 node_id) = nodes.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                self._sync_power_state_node(context, node_uuid)
+            finally:
+                # Yield on every iteration
+                eventlet.sleep(0)
+
+    def _sync_power_state_node(self, context, node_uuid, event=False):
+        """Sync the power state of a node.
+
         Attempt to grab a lock and sync only if the following conditions
         are met:
 
@@ -1717,6 +1953,13 @@ class ConductorManager(base_manager.BaseConductorManager):
         cause a deploy/cleaning callback to fail. There's not much we
         can do here to avoid failing a brand new deploy to a node that
         we've locked here, though.
+
+        :param context: an admin context.
+        :param node_uuid: the UUID of the node.
+        :param event: whether the sync is triggered by a power event of the
+            node rather than by the periodic task. The node mapping is only
+            checked in this case, the periodic task only queues the nodes
+            mapped to this conductor.
         """
         # FIXME(comstud): Since our initial state checks are outside
         # of the lock (to try to avoid the lock), some checks are
@@ -1729,48 +1972,82 @@ class ConductorManager(base_manager.BaseConductorManager):
         # add a way to pass constraints to task_manager.acquire()
         # (through to its DB API call) so that we can eliminate our call
         # and first set of checks below.
-
-        while not self._shutdown:
-            try:
-                (node_uuid, driver, conductor_group,
-                 node_id) = nodes.get_nowait()
-            except queue.Empty:
-                break
-
-            try:
-                # NOTE(dtantsur): start with a shared lock, upgrade if needed
-                with task_manager.acquire(context, node_uuid,
-                                          purpose='power state sync',
-                                          shared=True) as task:
-                    # NOTE(deva): we should not acquire a lock on a node in
-                    #             DEPLOYWAIT/CLEANWAIT, as this could cause
-                    #             an error within a deploy ramdisk POSTing back
-                    #             at the same time.
-                    # NOTE(dtantsur): it's also pointless (and dangerous) to
-                    # sync power state when a power action is in progress
-                    if (task.node.provision_state in SYNC_EXCLUDED_STATES
-                            or task.node.maintenance
-                            or task.node.target_power_state
-                            or task.node.reservation):
-                        continue
-                    count = do_sync_power_state(
-                        task, self.power_state_sync_count[node_uuid])
-                    if count:
-                        self.power_state_sync_count[node_uuid] = count
-                    else:
-                        # don't bloat the dict with non-failing nodes
-                        del self.power_state_sync_count[node_uuid]
-            except exception.NodeNotFound:
-                LOG.info("During sync_power_state, node %(node)s was not "
-                         "found and presumed deleted by another process.",
-                         {'node': node_uuid})
-            except exception.NodeLocked:
-                LOG.info("During sync_power_state, node %(node)s was "
-                         "already locked by another process. Skip.",
-                         {'node': node_uuid})
-            finally:
-                # Yield on every iteration
-                eventlet.sleep(0)
+        if event:
+            # NOTE: the events received from now on trigger another sync,
+            # the power state is read from the BMC afterwards
+            power_events.POWER_EVENTS.clear(node_uuid)
+        try:
+            # NOTE(dtantsur): start with a shared lock, upgrade if needed
+            with task_manager.acquire(context, node_uuid,
+                                      purpose='power state sync',
+                                      shared=True) as task:
+                if event and not self._mapped_to_this_conductor(
+                        node_uuid, task.node.driver,
+                        task.node.conductor_group):
+                    return
+                # NOTE(deva): we should not acquire a lock on a node in
+                #             DEPLOYWAIT/CLEANWAIT, as this could cause
+                #             an error within a deploy ramdisk POSTing back
+                #             at the same time.
+                # NOTE(dtantsur): it's also pointless (and dangerous) to
+                # sync power state when a power action is in progress
+                if (task.node.provision_state in SYNC_EXCLUDED_STATES
+                        or task.node.maintenance
+                        or task.node.target_power_state
+                        or task.node.reservation):
+                    return
+                count = do_sync_power_state(
+                    task, self.power_state_sync_count[node_uuid])
+                if count:
+                    self.power_state_sync_count[node_uuid] = count
+                else:
+                    # don't bloat the dict with non-failing nodes
+                    del self.power_state_sync_count[node_uuid]
+
+                if (count and not event
+                        and power_events.POWER_EVENTS.is_subscribed(
+                            node_uuid)):
+                    # NOTE: the events of the node are lost, poll it at the
+                    # normal interval until its subscription is renewed
+                    LOG.warning("During sync_power_state, the power state "
+                                "of node %(node)s was out of sync or could "
+                                "not be read, even though its BMC sends "
+                                "power events. Polling it again every "
+                                "%(interval)s seconds.",
+                                {'node': node_uuid,
+                                 'interval':
+                                 CONF.conductor.sync_power_state_interval})
+                    power_events.POWER_EVENTS.unsubscribed(node_uuid)
+                else:
+                    power_events.POWER_EVENTS.polled(node_uuid)
+        except exception.NodeNotFound:
+            LOG.info("During sync_power_state, node %(node)s was not "
+                     "found and presumed deleted by another process.",
+                     {'node': node_uuid})
+        except exception.NodeLocked:
+            LOG.info("During sync_power_state, node %(node)s was "
+                     "already locked by another process. Skip.",
+                     {'node': node_uuid})
+
+    def _on_power_event(self, node_uuid):
+        """Sync the power state of a node after a power event of its BMC.
+
+        Called by :data:`power_events.POWER_EVENTS`, the sync runs in a
+        worker of the periodic work class. The events received until the
+        worker starts are coalesced.
+
+        :param node_uuid: the UUID of the node.
+        """
+        context = ironic_context.get_admin_context()
+        try:
+            with work_scheduler.work_class(work_scheduler.PERIODIC):
+                self._spawn_worker(self._sync_power_state_node, context,
+                                   node_uuid, event=True)
+        except exception.NoFreeConductorWorker:
+            LOG.warning("No free conductor workers to sync the power state "
+                        "of node %(node)s after a power event, it is left to "
+                        "the periodic sync.", {'node': node_uuid})
+            power_events.POWER_EVENTS.clear(node_uuid)
 
     @METRICS.timer('ConductorManager._power_failure_recovery')
     @periodics.periodic(spacing=CONF.conductor.power_failure_recovery_interval,
@@ -1864,15 +2141,17 @@ class ConductorManager(base_manager.BaseConductorManager):
 
     @METRICS.timer('ConductorManager._check_deploy_timeouts')
     @periodics.periodic(
-        spacing=CONF.conductor.check_provision_state_interval,
+        spacing=_wait_check_interval(
+            CONF.conductor.check_provision_state_interval),
         enabled=CONF.conductor.check_provision_state_interval > 0
         and CONF.conductor.deploy_callback_timeout != 0)
-    def _check_deploy_timeouts(self, context):
+    def _check_deploy_timeouts(self, context, node_uuids=None):
         """Periodically checks whether a deploy RPC call has timed out.
 
         If a deploy call has timed out, the deploy failed and we clean up.
 
         :param context: request context.
+        :param node_uuids: the UUIDs of the nodes to check, None for all.
         """
         # FIXME(rloo): If the value is < 0, it will be enabled. That doesn't
         #              seem right.
@@ -1882,6 +2161,8 @@ class ConductorManager(base_manager.BaseConductorManager):
                    'provision_state': states.DEPLOYWAIT,
                    'maintenance': False,
                    'provisioned_before': callback_timeout}
+        if node_uuids is not None:
+            filters['uuid_in'] = node_uuids
         sort_key = 'provision_updated_at'
         callback_method = utils.cleanup_after_timeout
         err_handler = utils.provisioning_error_handler
@@ -2079,16 +2360,18 @@ class ConductorManager(base_manager.BaseConductorManager):
 
     @METRICS.timer('ConductorManager._check_cleanwait_timeouts')
     @periodics.periodic(
-        spacing=CONF.conductor.check_provision_state_interval,
+        spacing=_wait_check_interval(
+            CONF.conductor.check_provision_state_interval),
         enabled=CONF.conductor.check_provision_state_interval > 0
         and CONF.conductor.clean_callback_timeout != 0)
-    def _check_cleanwait_timeouts(self, context):
+    def _check_cleanwait_timeouts(self, context, node_uuids=None):
         """Periodically checks for nodes being cleaned.
 
         If a node doing cleaning is unresponsive (detected when it stops
         heart beating), the operation should be aborted.
 
         :param context: request context.
+        :param node_uuids: the UUIDs of the nodes to check, None for all.
         """
         # FIXME(rloo): If the value is < 0, it will be enabled. That doesn't
         #              seem right.
@@ -2098,32 +2381,64 @@ class ConductorManager(base_manager.BaseConductorManager):
                    'provision_state': states.CLEANWAIT,
                    'maintenance': False,
                    'provisioned_before': callback_timeout}
+        if node_uuids is not None:
+            filters['uuid_in'] = node_uuids
         self._fail_if_in_state(context, filters, states.CLEANWAIT,
                                'provision_updated_at',
                                keep_target_state=True,
                                callback_method=utils.cleanup_cleanwait_timeout)
 
     @METRICS.timer('ConductorManager._check_rescuewait_timeouts')
-    @periodics.periodic(spacing=CONF.conductor.check_rescue_state_interval,
-                        enabled=bool(CONF.conductor.rescue_callback_timeout))
-    def _check_rescuewait_timeouts(self, context):
+    @periodics.periodic(
+        spacing=_wait_check_interval(
+            CONF.conductor.check_rescue_state_interval),
+        enabled=bool(CONF.conductor.rescue_callback_timeout))
+    def _check_rescuewait_timeouts(self, context, node_uuids=None):
         """Periodically checks if rescue has timed out waiting for heartbeat.
 
         If a rescue call has timed out, fail the rescue and clean up.
 
         :param context: request context.
+        :param node_uuids: the UUIDs of the nodes to check, None for all.
         """
         callback_timeout = CONF.conductor.rescue_callback_timeout
         filters = {'reserved': False,
                    'provision_state': states.RESCUEWAIT,
                    'maintenance': False,
                    'provisioned_before': callback_timeout}
+        if node_uuids is not None:
+            filters['uuid_in'] = node_uuids
         self._fail_if_in_state(context, filters, states.RESCUEWAIT,
                                'provision_updated_at',
                                keep_target_state=True,
                                callback_method=utils.cleanup_rescuewait_timeout
                                )
 
+    @METRICS.timer('ConductorManager._check_wait_deadlines')
+    def _check_wait_deadlines(self, provision_state, node_uuids):
+        """Fail the nodes whose deadline in a wait state expired.
+
+        Called by the deadline scheduler. The timeouts are checked against
+        the database, so the nodes touched since their deadline was set, or
+        that could not be failed (e.g. because they are locked), get a new
+        deadline.
+
+        :param provision_state: the wait state the nodes are in.
+        :param node_uuids: the UUIDs of the nodes.
+        """
+        context = ironic_context.get_admin_context()
+        check = {
+            states.DEPLOYWAIT: self._check_deploy_timeouts,
+            states.CLEANWAIT: self._check_cleanwait_timeouts,
+            states.RESCUEWAIT: self._check_rescuewait_timeouts,
+            states.INSPECTWAIT: self._check_inspect_wait_timeouts,
+        }[provision_state]
+        with work_scheduler.work_class(work_scheduler.PERIODIC):
+            check(context, node_uuids=node_uuids)
+        self._arm_wait_deadlines(
+            context, provision_state, node_uuids=node_uuids,
+            min_delay=CONF.conductor.check_provision_state_interval)
+
     @METRICS.timer('ConductorManager._sync_local_state')
     @periodics.periodic(spacing=CONF.conductor.sync_local_state_interval,
                         enabled=CONF.conductor.sync_local_state_interval > 0)
@@ -3091,13 +3406,15 @@ class ConductorManager(base_manager.BaseConductorManager):
 
     @METRICS.timer('ConductorManager._check_inspect_wait_timeouts')
     @periodics.periodic(
-        spacing=CONF.conductor.check_provision_state_interval,
+        spacing=_wait_check_interval(
+            CONF.conductor.check_provision_state_interval),
         enabled=CONF.conductor.check_provision_state_interval > 0
         and CONF.conductor.inspect_wait_timeout != 0)
-    def _check_inspect_wait_timeouts(self, context):
+    def _check_inspect_wait_timeouts(self, context, node_uuids=None):
         """Periodically checks inspect_wait_timeout and fails upon reaching it.
 
         :param: context: request context
+        :param: node_uuids: the UUIDs of the nodes to check, None for all.
 
         """
         # FIXME(rloo): If the value is < 0, it will be enabled. That doesn't
@@ -3107,6 +3424,8 @@ class ConductorManager(base_manager.BaseConductorManager):
         filters = {'reserved': False,
                    'provision_state': states.INSPECTWAIT,
                    'inspection_started_before': callback_timeout}
+        if node_uuids is not None:
+            filters['uuid_in'] = node_uuids
         sort_key = 'inspection_started_at'
         last_error = _("timeout reached while inspecting the node")
         self._fail_if_in_state(context, filters, states.INSPECTWAIT,
@@ -3225,8 +3544,9 @@ class ConductorManager(base_manager.BaseConductorManager):
 
         # NOTE(dtantsur): we acquire a shared lock to begin with, drivers are
         # free to promote it to an exclusive one.
-        with task_manager.acquire(context, node_id, shared=True,
-                                  purpose='heartbeat') as task:
+        with work_scheduler.work_class(work_scheduler.HEARTBEAT), \
+                task_manager.acquire(context, node_id, shared=True,
+                                     purpose='heartbeat') as task:
             task.spawn_after(
                 self._spawn_worker, heartbeat_with_deprecation,
                 task, callback_url, agent_version)
@@ -0,0 +1,223 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A snapshot of the nodes shared by the periodic tasks of a conductor.
+
+Every periodic task used to scan the nodes table on its own. With the
+snapshot, the columns needed by all the periodic tasks are fetched by a
+single query, at most once every ``[conductor]node_snapshot_max_age``
+seconds, and the filters of the periodic tasks are applied in memory.
+
+After the first load, a refresh only fetches the nodes created or updated
+since the previous refresh. Deleted nodes are dropped by the full reloads
+done every ``[conductor]node_snapshot_full_refresh_interval`` seconds; until
+then the periodic tasks handle them as any node deleted during a scan.
+"""
+
+import datetime
+import threading
+
+from oslo_log import log
+from oslo_utils import timeutils
+
+from ironic.conf import CONF
+
+LOG = log.getLogger(__name__)
+
+# The columns used by the conductor periodic tasks and by the filters
+# evaluated in memory. The columns requested by other periodic tasks, e.g.
+# the ones of the drivers, are added on demand.
+BASE_COLUMNS = ('uuid', 'driver', 'conductor_group', 'id', 'reservation',
+                'maintenance', 'fault', 'provision_state',
+                'provision_updated_at', 'inspection_started_at',
+                'power_state', 'target_power_state', 'instance_uuid',
+                'console_enabled', 'conductor_affinity', 'resource_class',
+                'owner')
+
+# NOTE: the timestamps of the nodes are set by the clocks of the API services
+# and of the other conductors, and may be truncated to seconds by the
+# database, the incremental refreshes look back this many seconds.
+_CLOCK_SKEW = 60
+
+
+# NOTE: every filter is a function taking the value of the filter and
+# returning a predicate on the rows of the snapshot
+def _equals(column):
+    def _filter(value):
+        return lambda row: row[column] == value
+    return _filter
+
+
+def _is_set(column):
+    def _filter(value):
+        return lambda row: (row[column] is not None) == bool(value)
+    return _filter
+
+
+def _before(column):
+    def _filter(value):
+        limit = timeutils.utcnow() - datetime.timedelta(seconds=value)
+        return lambda row: row[column] is not None and row[column] < limit
+    return _filter
+
+
+def _reserved_by_any_of(value):
+    value = set(value)
+    return lambda row: row['reservation'] in value
+
+
+_FILTERS = {
+    'associated': _is_set('instance_uuid'),
+    'reserved': _is_set('reservation'),
+    'with_power_state': _is_set('power_state'),
+    'reserved_by_any_of': _reserved_by_any_of,
+    'provisioned_before': _before('provision_updated_at'),
+    'inspection_started_before': _before('inspection_started_at'),
+}
+for _column in ('console_enabled', 'maintenance', 'driver', 'resource_class',
+                'provision_state', 'uuid', 'id', 'fault', 'conductor_group',
+                'owner'):
+    _FILTERS[_column] = _equals(_column)
+
+
+class NodeSnapshot(object):
+    """Nodes cached in memory for the periodic tasks of a conductor.
+
+    :param dbapi: the database API to fetch the nodes with.
+    """
+
+    def __init__(self, dbapi):
+        self._dbapi = dbapi
+        self._lock = threading.Lock()
+        self._columns = list(BASE_COLUMNS)
+        self._index = {column: i for i, column in enumerate(self._columns)}
+        # Node UUID to a tuple of the values of the columns
+        self._rows = {}
+        self._refreshed_at = None
+        self._reloaded_at = None
+        self._reload = True
+
+    def __len__(self):
+        return len(self._rows)
+
+    @staticmethod
+    def supports(filters=None, sort_key=None, sort_dir=None, **kwargs):
+        """Whether a query can be served from the snapshot.
+
+        Queries with pagination, sorted by a column not in
+        :data:`BASE_COLUMNS` or with filters not evaluated in memory are not.
+        This includes the ``uuid_in`` filter, used for checks of specific
+        nodes which need their current state.
+
+        :param filters: the filters of the query.
+        :param sort_key: the column to sort the nodes by.
+        :param sort_dir: the direction of the sort, ignored.
+        :param kwargs: the other arguments of the query.
+        """
+        return (not any(value is not None for value in kwargs.values())
+                and (sort_key is None or sort_key in BASE_COLUMNS)
+                and set(filters or ()).issubset(_FILTERS))
+
+    def invalidate(self):
+        """Reload all the nodes on the next query."""
+        with self._lock:
+            self._reload = True
+
+    def _refresh(self):
+        """Refresh the snapshot if it is too old, under the lock."""
+        now = timeutils.utcnow()
+        if (not self._reload and self._refreshed_at is not None
+                and timeutils.delta_seconds(self._refreshed_at, now)
+                < CONF.conductor.node_snapshot_max_age):
+            return
+
+        uuid_index = self._index['uuid']
+        if (self._reload or self._reloaded_at is None
+                or timeutils.delta_seconds(self._reloaded_at, now)
+                >= CONF.conductor.node_snapshot_full_refresh_interval):
+            rows = self._dbapi.get_nodeinfo_list(columns=self._columns)
+            self._rows = {row[uuid_index]: tuple(row) for row in rows}
+            self._reloaded_at = now
+            self._reload = False
+            LOG.debug('Loaded %d nodes into the node snapshot',
+                      len(self._rows))
+        else:
+            since = self._refreshed_at - datetime.timedelta(
+                seconds=_CLOCK_SKEW)
+            rows = self._dbapi.get_nodeinfo_list(
+                columns=self._columns, filters={'updated_since': since})
+            count = 0
+            for row in rows:
+                self._rows[row[uuid_index]] = tuple(row)
+                count += 1
+            LOG.debug('Refreshed %d nodes of the node snapshot', count)
+        self._refreshed_at = now
+
+    def get_nodeinfo_list(self, columns, filters=None, sort_key=None,
+                          sort_dir=None):
+        """Get specific columns for the matching nodes.
+
+        Same as the method of the database API of the same name, with the
+        supported filters only (see :meth:`supports`). The snapshot is
+        refreshed first if it is older than
+        ``[conductor]node_snapshot_max_age`` seconds.
+
+        :param columns: list of the column names to return.
+        :param filters: the filters to apply.
+        :param sort_key: the column to sort the nodes by, then by ID.
+        :param sort_dir: the direction of the sort, 'asc' (the default) or
+            'desc'.
+        :returns: a list of tuples of the specified columns.
+        """
+        filters = filters or {}
+        with self._lock:
+            missing = [column for column in columns
+                       if column not in self._index]
+            if missing:
+                self._columns.extend(missing)
+                self._index = {column: i
+                               for i, column in enumerate(self._columns)}
+                self._reload = True
+            self._refresh()
+            index = self._index
+            rows = list(self._rows.values())
+
+        checks = [_FILTERS[name](value) for name, value in filters.items()]
+        rows = [row for row in rows
+                if all(check(_Row(index, row)) for check in checks)]
+
+        id_index = index['id']
+        if sort_key is None or sort_key == 'id':
+            rows.sort(key=lambda row: row[id_index],
+                      reverse=sort_dir == 'desc')
+        else:
+            # NOTE: NULL values come first in the ascending order, as in the
+            # database
+            key_index = index[sort_key]
+            rows.sort(key=lambda row: (row[key_index] is not None,
+                                       row[key_index], row[id_index]),
+                      reverse=sort_dir == 'desc')
+        return [tuple(row[index[column]] for column in columns)
+                for row in rows]
+
+
+class _Row(object):
+    """Access to the values of a row of the snapshot by column name."""
+
+    __slots__ = ('_index', '_row')
+
+    def __init__(self, index, row):
+        self._index = index
+        self._row = row
+
+    def __getitem__(self, column):
+        return self._row[self._index[column]]
@@ -0,0 +1,155 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Power state change events sent by the BMCs of the nodes.
+
+Power interfaces able to receive events from the BMCs (e.g. through the
+Redfish EventService) record the nodes with an active subscription with
+:meth:`PowerEvents.subscribed` and report the events with
+:meth:`PowerEvents.received`. An event is
+only a hint: the conductor reacts by synchronizing the power state of the
+node from its BMC right away, see :meth:`PowerEvents.start`. The periodic
+power state synchronization skips the subscribed nodes until
+``[conductor]power_event_poll_interval`` seconds have passed since their last
+synchronization, as a safety net for the events that were lost.
+
+The events received within ``[conductor]power_event_min_interval`` seconds of
+the last synchronization of a node are deferred to the next periodic power
+state synchronization, so that a flood of events cannot keep the conductor
+reading the power state of a node from its BMC.
+"""
+
+import threading
+
+from oslo_log import log
+from oslo_utils import timeutils
+
+from ironic.conf import CONF
+
+LOG = log.getLogger(__name__)
+
+
+class PowerEvents(object):
+    """The nodes subscribed to power events and their pending events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Node UUID to the stop watch started at its last synchronization
+        self._subscribed = {}
+        # Node UUIDs with an event received but not yet taken into account
+        self._pending = set()
+        # Node UUIDs with an event deferred to the periodic synchronization
+        self._deferred = set()
+        self._handler = None
+
+    def start(self, handler):
+        """Start handling the events.
+
+        :param handler: a function called with the UUID of a node when an
+            event is received for it. It must call :meth:`clear` before
+            reading the power state from the BMC, the events received
+            until then are coalesced, and :meth:`polled` once done.
+        """
+        with self._lock:
+            self._handler = handler
+            self._pending.clear()
+
+    def stop(self):
+        """Stop handling the events, they are ignored from now on."""
+        with self._lock:
+            self._handler = None
+            self._pending.clear()
+
+    def subscribed(self, node_uuid):
+        """Record that a node has an active subscription."""
+        with self._lock:
+            if node_uuid not in self._subscribed:
+                self._subscribed[node_uuid] = timeutils.StopWatch().start()
+
+    def unsubscribed(self, node_uuid):
+        """Record that a node has no subscription anymore."""
+        with self._lock:
+            self._subscribed.pop(node_uuid, None)
+            self._pending.discard(node_uuid)
+            self._deferred.discard(node_uuid)
+
+    def is_subscribed(self, node_uuid):
+        """Whether a node has an active subscription."""
+        return node_uuid in self._subscribed
+
+    def list_subscribed(self):
+        """Get the UUIDs of the nodes with an active subscription."""
+        with self._lock:
+            return list(self._subscribed)
+
+    def __len__(self):
+        return len(self._subscribed)
+
+    def poll_due(self, node_uuid):
+        """Whether the power state of a node has to be polled.
+
+        :returns: True if the node has no subscription, has a deferred
+            event or was not synchronized for
+            ``[conductor]power_event_poll_interval`` seconds.
+        """
+        watch = self._subscribed.get(node_uuid)
+        return (watch is None or node_uuid in self._deferred
+                or watch.elapsed() >= CONF.conductor.power_event_poll_interval)
+
+    def polled(self, node_uuid):
+        """Record that the power state of a node was synchronized."""
+        with self._lock:
+            if node_uuid in self._subscribed:
+                self._subscribed[node_uuid] = timeutils.StopWatch().start()
+            self._deferred.discard(node_uuid)
+
+    def received(self, node_uuid):
+        """Report an event for a node.
+
+        Events for nodes without a subscription, and events for nodes with
+        an event already pending are ignored. Events received within
+        ``[conductor]power_event_min_interval`` seconds of the last
+        synchronization of the node are deferred to the periodic power state
+        synchronization.
+
+        :returns: True if the handler was called.
+        """
+        with self._lock:
+            handler = self._handler
+            if (handler is None or node_uuid not in self._subscribed
+                    or node_uuid in self._pending):
+                return False
+            if (self._subscribed[node_uuid].elapsed()
+                    < CONF.conductor.power_event_min_interval):
+                self._deferred.add(node_uuid)
+                return False
+            self._pending.add(node_uuid)
+        try:
+            handler(node_uuid)
+        except Exception:
+            self.clear(node_uuid)
+            LOG.exception('Failed to handle a power event for node %s',
+                          node_uuid)
+            return False
+        return True
+
+    def clear(self, node_uuid):
+        """Take the pending event of a node into account.
+
+        Events received afterwards call the handler again.
+        """
+        with self._lock:
+            self._pending.discard(node_uuid)
+
+
+POWER_EVENTS = PowerEvents()
+"""The power events of this process."""
@@ -99,13 +99,15 @@ class ConductorAPI(object):
     |    1.46 - Added reset_interfaces to update_node
     |    1.47 - Added support for conductor groups
     |    1.48 - Added allocation API
+    |    1.49 - Added change_nodes_power_state
+    |    1.50 - Added create_nodes
 
     """
 
     # NOTE(rloo): This must be in sync with manager.ConductorManager's.
     # NOTE(pas-ha): This also must be in sync with
     #               ironic.common.release_mappings.RELEASE_MAPPING['master']
-    RPC_API_VERSION = '1.48'
+    RPC_API_VERSION = '1.50'
 
     def __init__(self, topic=None):
         super(ConductorAPI, self).__init__()
@@ -223,6 +225,23 @@ class ConductorAPI(object):
         cctxt = self.client.prepare(topic=topic or self.topic, version='1.36')
         return cctxt.call(context, 'create_node', node_obj=node_obj)
 
+    def create_nodes(self, context, nodes, topic=None):
+        """Synchronously, have a conductor validate and create nodes.
+
+        Create the nodes with their ports, port groups and traits in the
+        database.
+
+        :param context: request context.
+        :param nodes: a list of dicts with the created (but not saved)
+                      objects, see
+                      :meth:`ironic.objects.node.Node.create_many`.
+        :param topic: RPC topic. Defaults to self.topic.
+        :returns: a list with, for each node in the same order, ``None`` if
+                  the node was created, otherwise an error message.
+        """
+        cctxt = self.client.prepare(topic=topic or self.topic, version='1.50')
+        return cctxt.call(context, 'create_nodes', nodes=nodes)
+
     def update_node(self, context, node_obj, topic=None,
                     reset_interfaces=False):
         """Synchronously, have a conductor update the node's information.
@@ -271,6 +290,30 @@ class ConductorAPI(object):
         return cctxt.call(context, 'change_node_power_state', node_id=node_id,
                           new_state=new_state, timeout=timeout)
 
+    def change_nodes_power_state(self, context, node_ids, new_state,
+                                 topic=None, timeout=None):
+        """Change the power state of several nodes.
+
+        Synchronously, acquire locks and start the conductor background
+        tasks to change the power state of the nodes.
+
+        :param context: request context.
+        :param node_ids: a list of node ids or uuids.
+        :param new_state: one of ironic.common.states power state values
+        :param timeout: timeout (in seconds) positive integer (> 0) for any
+           power state. ``None`` indicates to use default timeout.
+        :param topic: RPC topic. Defaults to self.topic.
+        :raises: NoFreeConductorWorker when there is no free worker to start
+                 async task.
+        :returns: a dictionary mapping the node ids to ``None`` if the power
+                  action was started, otherwise to an error message.
+
+        """
+        cctxt = self.client.prepare(topic=topic or self.topic, version='1.49')
+        return cctxt.call(context, 'change_nodes_power_state',
+                          node_ids=node_ids, new_state=new_state,
+                          timeout=timeout)
+
     def vendor_passthru(self, context, node_id, driver_method, http_method,
                         info, topic=None):
         """Receive requests for vendor-specific actions.
@@ -101,27 +101,181 @@ raised in the background thread.):
 """
 
 import copy
+import random
+import threading
+import time
+import traceback
 
 import futurist
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import excutils
 from oslo_utils import timeutils
-import retrying
 import six
 
 from ironic.common import driver_factory
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import states
+from ironic.conductor import deadlines
 from ironic.conductor import notification_utils as notify
+from ironic.db import api as dbapi
 from ironic import objects
 from ironic.objects import fields
 
 LOG = logging.getLogger(__name__)
 
+METRICS = metrics.get_metrics_logger(__name__)
+
 CONF = cfg.CONF
 
+# Upper bounds of the buckets of the histogram of DB queries per task
+_QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class HeldLock(object):
+    """An exclusive node lock held by a thread of this conductor.
+
+    :param node_uuid: the UUID of the node.
+    :param purpose: the purpose of the lock.
+    :param stack: the formatted stack trace of where the lock was acquired,
+        if recorded.
+    """
+
+    def __init__(self, node_uuid, purpose, stack=None):
+        self.node_uuid = node_uuid
+        self.purpose = purpose
+        self.stack = stack
+        self._watch = timeutils.StopWatch().start()
+
+    def age(self):
+        """Get the number of seconds the lock has been held."""
+        return self._watch.elapsed()
+
+
+class _LockWaiters(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.count = 0
+
+
+class LocalLocks(object):
+    """Node locks held by this conductor, and threads waiting for them.
+
+    A thread failing to lock a node held by another thread of the same
+    conductor waits to be woken up when the lock is released, instead of
+    polling the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._held = {}
+        self._waiters = {}
+
+    def is_held(self, node_id):
+        """Whether a node is locked by a thread of this conductor."""
+        return node_id in self._held
+
+    def holder(self, node_id):
+        """Get the :class:`HeldLock` of a node, None if unknown."""
+        return self._held.get(node_id)
+
+    def list_held(self):
+        """Get the :class:`HeldLock` objects of the locks held."""
+        with self._lock:
+            return [holder for holder in self._held.values()
+                    if holder is not None]
+
+    def acquired(self, node_id, holder=None):
+        """Record that a node was locked by a thread of this conductor.
+
+        :param node_id: the ID of the node.
+        :param holder: a :class:`HeldLock` describing the lock.
+        """
+        with self._lock:
+            self._held[node_id] = holder
+
+    def released(self, node_id):
+        """Record the release of a node lock and wake up its waiters."""
+        with self._lock:
+            self._held.pop(node_id, None)
+            waiters = self._waiters.pop(node_id, None)
+        if waiters is not None:
+            waiters.event.set()
+
+    def register(self, node_id):
+        """Register interest in the release of a node lock.
+
+        Registering before trying to lock the node ensures that a release
+        happening between the attempt and the wait is not missed.
+
+        :param node_id: the ID of the node.
+        :returns: an event set when the lock is released, to be passed to
+            :meth:`unregister`.
+        """
+        with self._lock:
+            waiters = self._waiters.get(node_id)
+            if waiters is None:
+                waiters = self._waiters[node_id] = _LockWaiters()
+            waiters.count += 1
+            return waiters.event
+
+    def unregister(self, node_id, event):
+        """Unregister interest in the release of a node lock."""
+        with self._lock:
+            waiters = self._waiters.get(node_id)
+            if waiters is not None and waiters.event is event:
+                waiters.count -= 1
+                if not waiters.count:
+                    del self._waiters[node_id]
+
+
+_LOCAL_LOCKS = LocalLocks()
+
+
+def list_held_locks():
+    """List the exclusive node locks held by this conductor.
+
+    :returns: a list of :class:`HeldLock` objects, the oldest first.
+    """
+    return sorted(_LOCAL_LOCKS.list_held(), key=lambda lock: -lock.age())
+
+
+def _query_count():
+    return dbapi.get_instance().get_query_count()
+
+
+def get_lock_retry_delay(failures, attempts, watch):
+    """Get the delay before the next attempt to lock a node.
+
+    The delays start at half of ``[conductor]node_locked_retry_interval``
+    and double after each failure, with a random jitter to avoid contending
+    threads retrying at the same time. The last attempt is delayed until
+    the end of the total retry period, ``node_locked_retry_attempts - 1``
+    intervals, so that a lock held for as long as before can still be
+    acquired.
+
+    :param failures: the number of failed attempts so far.
+    :param attempts: the maximum number of attempts.
+    :param watch: a StopWatch started with the total retry period as
+        duration before the first attempt.
+    :returns: the delay in seconds.
+    """
+    leftover = max(watch.leftover(), 0)
+    if failures >= attempts - 1:
+        return leftover
+    delay = (CONF.conductor.node_locked_retry_interval * 2 ** failures / 4.0
+             * random.uniform(0.5, 1.5))
+    return min(delay, leftover)
+
+
+def _report_lock_wait(purpose, elapsed):
+    # NOTE: timers are reported as histograms by statsd
+    METRICS.send_timer('TaskManager.lock_wait', elapsed * 1000,
+                       labels={'purpose': purpose})
+
 
 def require_exclusive_lock(f):
     """Decorator to require an exclusive lock.
@@ -197,6 +351,10 @@ class TaskManager(object):
 
         self._spawn_method = None
         self._on_error_method = None
+        self._held_lock = None
+        # NOTE: only the DB queries of the thread acquiring the task are
+        # counted, see _report_release
+        self._query_mark = _query_count()
 
         self.context = context
         self._node = None
@@ -204,7 +362,7 @@ class TaskManager(object):
         self.shared = shared
         self._retry = retry
 
-        self.fsm = states.machine.copy()
+        self.fsm = states.machine.copy(shallow=True)
         self._purpose = purpose
         self._debug_timer = timeutils.StopWatch()
 
@@ -221,7 +379,7 @@ class TaskManager(object):
                       {'type': 'shared' if shared else 'exclusive',
                        'node': node.uuid, 'purpose': purpose})
             if not self.shared:
-                self._lock()
+                self._lock(node.id)
             else:
                 self._debug_timer.restart()
                 self.node = node
@@ -253,7 +411,7 @@ class TaskManager(object):
             self.fsm.initialize(start_state=self.node.provision_state,
                                 target_state=self.node.target_provision_state)
 
-    def _lock(self):
+    def _lock(self, node_id):
         self._debug_timer.restart()
 
         if self._retry:
@@ -262,22 +420,56 @@ class TaskManager(object):
             attempts = 1
 
         # NodeLocked exceptions can be annoying. Let's try to alleviate
-        # some of that pain by retrying our lock attempts. The retrying
-        # module expects a wait_fixed value in milliseconds.
-        @retrying.retry(
-            retry_on_exception=lambda e: isinstance(e, exception.NodeLocked),
-            stop_max_attempt_number=attempts,
-            wait_fixed=CONF.conductor.node_locked_retry_interval * 1000)
-        def reserve_node():
-            self.node = objects.Node.reserve(self.context, CONF.host,
-                                             self.node_id)
-            LOG.debug("Node %(node)s successfully reserved for %(purpose)s "
-                      "(took %(time).2f seconds)",
-                      {'node': self.node.uuid, 'purpose': self._purpose,
-                       'time': self._debug_timer.elapsed()})
-            self._debug_timer.restart()
-
-        reserve_node()
+        # some of that pain by retrying our lock attempts. If the lock is
+        # held by this conductor, wait for its release, otherwise back off.
+        watch = timeutils.StopWatch(
+            duration=max(attempts - 1, 0)
+            * CONF.conductor.node_locked_retry_interval).start()
+        failures = 0
+        while True:
+            released = _LOCAL_LOCKS.register(node_id)
+            try:
+                self.node = objects.Node.reserve(self.context, CONF.host,
+                                                 self.node_id)
+                stack = None
+                if CONF.conductor.slow_lock_threshold:
+                    stack = ''.join(traceback.format_stack()[:-1])
+                self._held_lock = HeldLock(self.node.uuid, self._purpose,
+                                           stack)
+                _LOCAL_LOCKS.acquired(node_id, self._held_lock)
+                break
+            except exception.NodeLocked:
+                failures += 1
+                if failures >= attempts:
+                    _report_lock_wait(self._purpose,
+                                      self._debug_timer.elapsed())
+                    holder = _LOCAL_LOCKS.holder(node_id)
+                    if holder is not None:
+                        LOG.debug('Node %(node)s is locked by this conductor '
+                                  'for %(purpose)s since %(age).2f seconds',
+                                  {'node': holder.node_uuid,
+                                   'purpose': holder.purpose,
+                                   'age': holder.age()})
+                    raise
+
+                delay = get_lock_retry_delay(failures, attempts, watch)
+                if _LOCAL_LOCKS.is_held(node_id):
+                    # NOTE: a wake-up does not count as an attempt, unless
+                    # the retry period is over
+                    if released.wait(delay) and not watch.expired():
+                        failures -= 1
+                else:
+                    time.sleep(delay)
+            finally:
+                _LOCAL_LOCKS.unregister(node_id, released)
+
+        elapsed = self._debug_timer.elapsed()
+        _report_lock_wait(self._purpose, elapsed)
+        LOG.debug("Node %(node)s successfully reserved for %(purpose)s "
+                  "(took %(time).2f seconds)",
+                  {'node': self.node.uuid, 'purpose': self._purpose,
+                   'time': elapsed})
+        self._debug_timer.restart()
 
     def upgrade_lock(self, purpose=None):
         """Upgrade a shared lock to an exclusive lock.
@@ -292,13 +484,15 @@ class TaskManager(object):
         """
         if purpose is not None:
             self._purpose = purpose
+            if self._held_lock is not None:
+                self._held_lock.purpose = purpose
         if self.shared:
             LOG.debug('Upgrading shared lock on node %(uuid)s for %(purpose)s '
                       'to an exclusive one (shared lock was held %(time).2f '
                       'seconds)',
                       {'uuid': self.node.uuid, 'purpose': self._purpose,
                        'time': self._debug_timer.elapsed()})
-            self._lock()
+            self._lock(self.node.id)
             self.shared = False
 
     def spawn_after(self, _spawn_method, *args, **kwargs):
@@ -348,12 +542,16 @@ class TaskManager(object):
                 # squelch the exception if the node was deleted
                 # within the task's context.
                 pass
+            finally:
+                if self.node:
+                    _LOCAL_LOCKS.released(self.node.id)
         if self.node:
             LOG.debug("Successfully released %(type)s lock for %(purpose)s "
                       "on node %(node)s (lock was held %(time).2f sec)",
                       {'type': 'shared' if self.shared else 'exclusive',
                        'purpose': self._purpose, 'node': self.node.uuid,
                        'time': self._debug_timer.elapsed()})
+            self._report_release()
         self.node = None
         self.driver = None
         self.ports = None
@@ -362,6 +560,34 @@ class TaskManager(object):
         self.volume_targets = None
         self.fsm = None
 
+    def _report_release(self):
+        """Report the metrics of the task and a slow lock on release."""
+        labels = {'purpose': self._purpose}
+        # NOTE: the queries of the work spawned with spawn_after run in
+        # another thread and are not counted
+        if self._query_mark is not None:
+            METRICS.send_histogram('TaskManager.db_queries',
+                                   _query_count() - self._query_mark,
+                                   labels=labels, buckets=_QUERY_BUCKETS)
+            self._query_mark = None
+
+        held_lock, self._held_lock = self._held_lock, None
+        if held_lock is None:
+            return
+        held = held_lock.age()
+        METRICS.send_timer('TaskManager.lock_hold', held * 1000,
+                           labels=labels)
+        threshold = CONF.conductor.slow_lock_threshold
+        if threshold and held > threshold:
+            LOG.warning('Exclusive lock on node %(node)s for %(purpose)s was '
+                        'held for %(time).2f seconds, longer than '
+                        '[conductor]slow_lock_threshold (%(threshold)d '
+                        'seconds). It was acquired at:\n%(stack)s',
+                        {'node': held_lock.node_uuid,
+                         'purpose': self._purpose, 'time': held,
+                         'threshold': threshold,
+                         'stack': held_lock.stack or '(not recorded)'})
+
     def _write_exception(self, future):
         """Set node last_error if exception raised in thread."""
         node = self.node
@@ -393,7 +619,7 @@ class TaskManager(object):
         if self.node is None:
             # Rare case if resource released before notification
             task = copy.copy(self)
-            task.fsm = states.machine.copy()
+            task.fsm = states.machine.copy(shallow=True)
             task.node = self._saved_node
         else:
             task = self
@@ -486,6 +712,7 @@ class TaskManager(object):
 
         # publish the state transition by saving the Node
         self.node.save()
+        deadlines.node_state_changed(self.node)
         LOG.info('Node %(node)s moved to provision state "%(state)s" from '
                  'state "%(previous)s"; target provision state is '
                  '"%(target)s"',
@@ -516,6 +743,7 @@ class TaskManager(object):
             # All of the above are asserted in tests such that we'll
             # catch if eventlet ever changes this behavior.
             fut = None
+            self._query_mark = None
             try:
                 fut = self._spawn_method(*self._spawn_args,
                                          **self._spawn_kwargs)
@@ -917,6 +917,28 @@ def validate_port_physnet(task, port_obj):
                    'pg_physnet': pg_physnet})
 
 
+def validate_new_portgroup_physnets(portgroup_obj, port_objs):
+    """Validate the physical networks of the ports of a new portgroup.
+
+    All the member ports of a portgroup should have the same value (which
+    may be None) for their physical_network field, see
+    :func:`validate_port_physnet`.
+
+    :param portgroup_obj: a created (but not saved) portgroup object.
+    :param port_objs: the created (but not saved) member port objects.
+    :raises: PortgroupPhysnetInconsistent if the ports are not all assigned
+             the same physical network.
+    """
+    physnets = set(port_obj.physical_network
+                   if 'physical_network' in port_obj else None
+                   for port_obj in port_objs)
+    if len(physnets) > 1:
+        raise exception.PortgroupPhysnetInconsistent(
+            portgroup=portgroup_obj.uuid,
+            physical_networks=', '.join(sorted(six.text_type(physnet)
+                                               for physnet in physnets)))
+
+
 def remove_node_rescue_password(node, save=True):
     """Helper to remove rescue password from a node.
 
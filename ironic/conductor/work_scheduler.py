@@ -0,0 +1,293 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Prioritized scheduling of the work of a conductor.
+
+The work of a conductor runs in a single pool of
+``[conductor]workers_pool_size`` green threads, but is split into classes:
+
+* ``interactive``: work requested through the API, e.g. deployments or power
+  actions.
+* ``heartbeat``: work triggered by the heartbeats of the ramdisk agent.
+* ``periodic``: work spawned by the periodic tasks, e.g. power state sync.
+* ``background``: work run on behalf of the conductor itself, e.g. restoring
+  the consoles on startup.
+
+Work submitted by a work item is of the same class as that item, so that
+for example the workers spawned by a periodic task are periodic work. The
+class can also be set explicitly with :func:`work_class`.
+
+Every class has its own queue. When a worker becomes free, the next work
+item is taken from the queues in proportion to the weights of the classes.
+Admission control rejects new work of a class once the work running and
+queued for all classes reaches the share of the capacity allowed to that
+class, so that periodic work is shed before user-facing work.
+"""
+
+import collections
+import contextlib
+import threading
+import time
+
+import futurist
+from oslo_log import log
+
+from ironic.common import exception
+from ironic.common.i18n import _
+from ironic.common import metrics
+
+LOG = log.getLogger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
+
+INTERACTIVE = 'interactive'
+HEARTBEAT = 'heartbeat'
+PERIODIC = 'periodic'
+BACKGROUND = 'background'
+
+WORK_CLASSES = (INTERACTIVE, HEARTBEAT, PERIODIC, BACKGROUND)
+
+DEFAULT_WEIGHTS = {INTERACTIVE: 8, HEARTBEAT: 4, PERIODIC: 2, BACKGROUND: 1}
+DEFAULT_ADMISSION = {INTERACTIVE: 100, HEARTBEAT: 100, PERIODIC: 50,
+                     BACKGROUND: 75}
+
+_LOCAL = threading.local()
+
+_WorkItem = collections.namedtuple(
+    '_WorkItem', ['work_class', 'future', 'fn', 'args', 'kwargs',
+                  'queued_at'])
+
+
+@contextlib.contextmanager
+def work_class(cls):
+    """Make the work submitted in this context of the given class.
+
+    :param cls: one of :data:`WORK_CLASSES`.
+    """
+    previous = getattr(_LOCAL, 'work_class', None)
+    _LOCAL.work_class = cls
+    try:
+        yield
+    finally:
+        _LOCAL.work_class = previous
+
+
+def current_work_class():
+    """Get the class of the work submitted by the current thread."""
+    return getattr(_LOCAL, 'work_class', None) or INTERACTIVE
+
+
+def _parse_classes(values, defaults, name):
+    result = dict(defaults)
+    for work_class, value in (values or {}).items():
+        if work_class not in WORK_CLASSES:
+            raise exception.ConfigInvalid(
+                error_msg=_('Unknown work class %(cls)s in %(opt)s, '
+                            'supported are %(supported)s') %
+                {'cls': work_class, 'opt': name,
+                 'supported': ', '.join(WORK_CLASSES)})
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            value = -1
+        if value < 0:
+            raise exception.ConfigInvalid(
+                error_msg=_('The value for work class %(cls)s in %(opt)s '
+                            'must be a non-negative integer') %
+                {'cls': work_class, 'opt': name})
+        result[work_class] = value
+    return result
+
+
+class WorkScheduler(object):
+    """An executor running work from prioritized per-class queues.
+
+    :param max_workers: the maximum number of work items running at once.
+    :param max_queued: the maximum number of work items waiting for a
+        worker, defaults to ``max_workers``.
+    :param weights: a dict mapping work classes to their weight, the share
+        of the freed workers given to the queued work of a class.
+    :param admission: a dict mapping work classes to the percentage of the
+        capacity (the running plus queued work items of all classes) that
+        can be used when admitting work of a class.
+    :raises: ConfigInvalid if the weights or admission are invalid.
+    """
+
+    def __init__(self, max_workers, max_queued=None, weights=None,
+                 admission=None):
+        self.max_workers = max_workers
+        if max_queued is None:
+            max_queued = max_workers
+        self._weights = _parse_classes(weights, DEFAULT_WEIGHTS,
+                                       '[conductor]work_class_weights')
+        admission = _parse_classes(admission, DEFAULT_ADMISSION,
+                                   '[conductor]work_class_admission')
+        capacity = max_workers + max_queued
+        self._limits = {work_class: capacity * percent // 100
+                        for work_class, percent in admission.items()}
+        self._executor = futurist.GreenThreadPoolExecutor(
+            max_workers=max_workers)
+        self._cond = threading.Condition()
+        self._queues = {work_class: collections.deque()
+                        for work_class in WORK_CLASSES}
+        # Current weights of the smooth weighted round-robin
+        self._current = dict.fromkeys(WORK_CLASSES, 0)
+        self._running = 0
+        self._shutdown = False
+
+    @property
+    def alive(self):
+        """Whether the scheduler accepts work."""
+        return not self._shutdown
+
+    def stats(self):
+        """Get the number of work items running and queued.
+
+        :returns: a tuple of the number of running work items and of a dict
+            mapping work classes to the number of queued work items.
+        """
+        with self._cond:
+            return self._running, {work_class: len(queue)
+                                   for work_class, queue
+                                   in self._queues.items()}
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit work of the current class.
+
+        :returns: a future.
+        :raises: futurist.RejectedSubmission if the work is not admitted.
+        """
+        return self.spawn(current_work_class(), fn, *args, **kwargs)
+
+    def spawn(self, work_class, fn, *args, **kwargs):
+        """Submit work of the given class.
+
+        :param work_class: one of :data:`WORK_CLASSES`.
+        :returns: a future.
+        :raises: futurist.RejectedSubmission if the work is not admitted.
+        :raises: RuntimeError if the scheduler is shut down.
+        """
+        future = futurist.Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError(_('Can not schedule new work after the '
+                                     'shutdown'))
+            outstanding = self._running + sum(
+                len(queue) for queue in self._queues.values())
+            if outstanding >= self._limits[work_class]:
+                METRICS.send_counter(
+                    'WorkScheduler.%s.rejected' % work_class, 1)
+                raise futurist.RejectedSubmission(
+                    'Rejecting %(cls)s work, %(count)d work items are '
+                    'running or queued' % {'cls': work_class,
+                                           'count': outstanding})
+            queue = self._queues[work_class]
+            queue.append(_WorkItem(work_class, future, fn, args, kwargs,
+                                   time.time()))
+            items = self._dequeue()
+            depth = len(queue)
+        METRICS.send_gauge('WorkScheduler.%s.queued' % work_class, depth)
+        self._start(items)
+        return future
+
+    def executor_for(self, work_class):
+        """Get an executor submitting work of the given class.
+
+        :param work_class: one of :data:`WORK_CLASSES`.
+        """
+        return _ClassExecutor(self, work_class)
+
+    def _select(self):
+        """Select the class to take work from, None if all queues are empty.
+
+        Uses the smooth weighted round-robin over the non-empty queues.
+        """
+        candidates = [work_class for work_class in WORK_CLASSES
+                      if self._queues[work_class]]
+        if not candidates:
+            return None
+        total = 0
+        for work_class in candidates:
+            # NOTE: work with a zero weight only runs when nothing else is
+            # queued
+            self._current[work_class] += self._weights[work_class]
+            total += self._weights[work_class]
+        selected = max(candidates, key=lambda c: self._current[c])
+        self._current[selected] -= total
+        return selected
+
+    def _dequeue(self):
+        """Take the work items to run from the queues, under the lock."""
+        items = []
+        while self._running < self.max_workers:
+            work_class = self._select()
+            if work_class is None:
+                break
+            items.append(self._queues[work_class].popleft())
+            self._running += 1
+        return items
+
+    def _start(self, items):
+        for item in items:
+            self._executor.submit(self._run, item)
+
+    def _run(self, item):
+        queue = self._queues[item.work_class]
+        METRICS.send_gauge('WorkScheduler.%s.queued' % item.work_class,
+                           len(queue))
+        METRICS.send_timer('WorkScheduler.%s.wait' % item.work_class,
+                           (time.time() - item.queued_at) * 1000)
+        try:
+            if item.future.set_running_or_notify_cancel():
+                try:
+                    with work_class(item.work_class):
+                        result = item.fn(*item.args, **item.kwargs)
+                except BaseException as e:
+                    item.future.set_exception(e)
+                else:
+                    item.future.set_result(result)
+        finally:
+            with self._cond:
+                self._running -= 1
+                items = self._dequeue()
+                self._cond.notify_all()
+            self._start(items)
+
+    def shutdown(self, wait=True):
+        """Stop accepting work.
+
+        :param wait: whether to wait for the running and queued work.
+        """
+        with self._cond:
+            self._shutdown = True
+            if wait:
+                while self._running or any(self._queues.values()):
+                    self._cond.wait()
+        self._executor.shutdown(wait=wait)
+
+
+class _ClassExecutor(object):
+    """An executor submitting work of a class to a :class:`WorkScheduler`."""
+
+    def __init__(self, scheduler, work_class):
+        self._scheduler = scheduler
+        self._work_class = work_class
+
+    @property
+    def alive(self):
+        return self._scheduler.alive
+
+    def submit(self, fn, *args, **kwargs):
+        return self._scheduler.spawn(self._work_class, fn, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        # NOTE: the scheduler is shut down by its owner
+        pass
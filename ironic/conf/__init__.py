@@ -28,6 +28,7 @@ from ironic.conf import default
 from ironic.conf import deploy
 from ironic.conf import dhcp
 from ironic.conf import drac
+from ironic.conf import fake
 from ironic.conf import glance
 from ironic.conf import healthcheck
 from ironic.conf import ilo
@@ -61,6 +62,7 @@ default.register_opts(CONF)
 deploy.register_opts(CONF)
 drac.register_opts(CONF)
 dhcp.register_opts(CONF)
+fake.register_opts(CONF)
 glance.register_opts(CONF)
 healthcheck.register_opts(CONF)
 ilo.register_opts(CONF)
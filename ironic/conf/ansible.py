@@ -37,6 +37,24 @@ opts = [
                       'running ironic-conductor process. '
                       'Provide the full path when ansible-playbook is not in '
                       '$PATH or installed in not default location.')),
+    cfg.FloatOpt('batch_window',
+                 default=0,
+                 min=0,
+                 help=_('Time (in seconds) to collect concurrent requests '
+                        'to run the same playbook with the same tags for '
+                        'different nodes. Collected requests are executed '
+                        'by a single "ansible-playbook" process with '
+                        'a generated multi-host inventory and per-host '
+                        'variables. Requires the "ironic_events" callback '
+                        'plugin shipped with the default playbooks. '
+                        'Default of 0 disables batching and runs one '
+                        'process per node.')),
+    cfg.IntOpt('batch_max_size',
+               default=50,
+               min=1,
+               help=_('Maximum number of nodes to include in a single '
+                      'batched "ansible-playbook" run. Only used when '
+                      '"batch_window" is set.')),
     cfg.StrOpt('playbooks_path',
                default=os.path.join('$pybasedir',
                                     'drivers/modules/ansible/playbooks'),
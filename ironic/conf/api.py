@@ -58,6 +58,29 @@ opts = [
                default=300,
                deprecated_group='agent', deprecated_name='heartbeat_timeout',
                help=_('Maximum interval (in seconds) for agent heartbeats.')),
+    cfg.BoolOpt('stream_collections',
+                default=False,
+                help=_('Whether to stream the responses of the node, port '
+                       'and portgroup lists. The items are fetched from the '
+                       'database and encoded in chunks of '
+                       '"stream_chunk_size" items while the response is '
+                       'being sent, so that the memory used by a request '
+                       'does not depend on the number of items returned. '
+                       'Since the response status is sent with the first '
+                       'chunk, an error occurring later results in an '
+                       'incomplete response.')),
+    cfg.IntOpt('stream_chunk_size',
+               default=100,
+               min=1,
+               help=_('The number of items fetched from the database and '
+                      'encoded at once when "stream_collections" is '
+                      'enabled.')),
+    cfg.IntOpt('bulk_max_nodes',
+               default=1000,
+               min=1,
+               help=_('The maximum number of nodes a bulk request (PUT '
+                      '/v1/bulk/power or POST /v1/bulk/nodes) can act '
+                      'on.')),
 ]
 
 opt_group = cfg.OptGroup(name='api',
@@ -27,6 +27,31 @@ opts = [
                       'itself for handling heart beats and periodic tasks. '
                       'On top of that, `sync_power_state_workers` will take '
                       'up to 7 green threads with the default value of 8.')),
+    cfg.DictOpt('work_class_weights',
+                default={'interactive': 8, 'heartbeat': 4, 'periodic': 2,
+                         'background': 1},
+                help=_('Relative weights of the classes of work of the '
+                       'conductor, used to pick the next queued work when '
+                       'a worker becomes free. The classes are '
+                       '"interactive" (work requested through the API), '
+                       '"heartbeat" (work triggered by agent heartbeats), '
+                       '"periodic" (work spawned by periodic tasks) and '
+                       '"background" (work of the conductor itself, such '
+                       'as restoring consoles on startup). Work of a class '
+                       'with weight 0 only runs when no other work is '
+                       'queued.')),
+    cfg.DictOpt('work_class_admission',
+                default={'interactive': 100, 'heartbeat': 100,
+                         'periodic': 50, 'background': 75},
+                help=_('Percentage of the capacity of the conductor that '
+                       'can be in use when admitting new work of each class '
+                       '(see "work_class_weights"). The capacity is twice '
+                       '"workers_pool_size": the running work plus the '
+                       'queued work. New work of a class is rejected once '
+                       'the work running or queued for all classes reaches '
+                       'its percentage, so with the default values periodic '
+                       'work is shed first, leaving room for the work '
+                       'requested by users.')),
     cfg.IntOpt('heartbeat_interval',
                default=10,
                help=_('Seconds between conductor heart beats.')),
@@ -53,11 +78,47 @@ opts = [
                default=60,
                help=_('Interval between syncing the node power state to the '
                       'database, in seconds. Set to 0 to disable syncing.')),
+    cfg.IntOpt('power_event_poll_interval',
+               default=600,
+               min=0,
+               help=_('Interval between syncing the power state of the nodes '
+                      'which BMC sends power events to the conductor (e.g. '
+                      'through the Redfish EventService), in seconds. These '
+                      'nodes are synchronized when an event is received, '
+                      'the periodic sync only runs as a safety net. Rounded '
+                      'up to a multiple of "sync_power_state_interval".')),
+    cfg.IntOpt('power_event_min_interval',
+               default=10,
+               min=0,
+               help=_('Minimum interval between syncing the power state of '
+                      'a node when its BMC sends power events, in seconds. '
+                      'The events received within this interval of the last '
+                      'sync of the node are deferred to the next periodic '
+                      'sync, see "sync_power_state_interval", rather than '
+                      'reading the power state from the BMC right away.')),
     cfg.IntOpt('check_provision_state_interval',
                default=60,
                min=0,
                help=_('Interval between checks of provision timeouts, '
                       'in seconds. Set to 0 to disable checks.')),
+    cfg.BoolOpt('wait_deadlines',
+                default=True,
+                help=_('Detect the timeouts of the nodes in the "deploy '
+                       'wait", "clean wait", "rescue wait" and "inspect '
+                       'wait" states with deadlines kept in memory by the '
+                       'conductor, instead of scanning the database every '
+                       '"check_provision_state_interval" seconds. The scans '
+                       'still run every "wait_reconcile_interval" seconds, '
+                       'for the nodes this conductor did not see entering a '
+                       'wait state.')),
+    cfg.IntOpt('wait_reconcile_interval',
+               default=600,
+               min=1,
+               help=_('Interval (seconds) between the scans for timed out '
+                      'nodes in wait states when "wait_deadlines" is '
+                      'enabled. The value of "check_provision_state_interval" '
+                      'or "check_rescue_state_interval" is used if it is '
+                      'larger.')),
     cfg.IntOpt('check_rescue_state_interval',
                default=60,
                min=1,
@@ -84,17 +145,67 @@ opts = [
                help=_('The maximum number of worker threads that can be '
                       'started simultaneously to sync nodes power states from '
                       'the periodic task.')),
+    cfg.IntOpt('bulk_power_workers',
+               default=8, min=1,
+               help=_('The maximum number of worker threads that can be '
+                      'started simultaneously to run the power actions of a '
+                      'bulk power request (PUT /v1/bulk/power). The power '
+                      'actions of the nodes of the request mapped to this '
+                      'conductor run concurrently in these workers.')),
+    cfg.IntOpt('bulk_create_chunk_size',
+               default=100, min=1,
+               help=_('The number of nodes created in a single database '
+                      'transaction by a bulk enrollment request (POST '
+                      '/v1/bulk/nodes). When a transaction fails, its nodes '
+                      'are created one by one to report the faulty ones.')),
     cfg.IntOpt('periodic_max_workers',
                default=8,
                help=_('Maximum number of worker threads that can be started '
                       'simultaneously by a periodic task. Should be less '
                       'than RPC thread pool size.')),
+    cfg.BoolOpt('node_snapshot',
+                default=False,
+                help=_('Serve the node scans of the periodic tasks from a '
+                       'snapshot of the nodes kept in memory by the '
+                       'conductor, instead of querying the database in '
+                       'every periodic task. The snapshot is refreshed at '
+                       'most once every "node_snapshot_max_age" seconds '
+                       'with the nodes updated since the previous refresh.')),
+    cfg.IntOpt('node_snapshot_max_age',
+               default=10,
+               min=0,
+               help=_('Maximum age (seconds) of the node snapshot used by '
+                      'the periodic tasks when "node_snapshot" is enabled. '
+                      'The periodic tasks running within this interval '
+                      'share a single database query.')),
+    cfg.IntOpt('node_snapshot_full_refresh_interval',
+               default=600,
+               min=1,
+               help=_('Interval (seconds) between the full reloads of the '
+                      'node snapshot when "node_snapshot" is enabled. The '
+                      'other refreshes only fetch the nodes updated since '
+                      'the previous refresh, the full reloads drop the '
+                      'deleted nodes.')),
     cfg.IntOpt('node_locked_retry_attempts',
                default=3,
                help=_('Number of attempts to grab a node lock.')),
     cfg.IntOpt('node_locked_retry_interval',
                default=1,
-               help=_('Seconds to sleep between node lock attempts.')),
+               help=_('Seconds to sleep between node lock attempts. The '
+                      'attempts are spread over '
+                      '"node_locked_retry_attempts" - 1 intervals with an '
+                      'exponential backoff; a node locked by another thread '
+                      'of the same conductor is retried as soon as it is '
+                      'released.')),
+    cfg.IntOpt('slow_lock_threshold',
+               default=0,
+               min=0,
+               help=_('Log a warning with the stack trace of where a node '
+                      'lock was acquired when an exclusive lock is held for '
+                      'longer than this number of seconds. Setting it also '
+                      'records the stack traces of the locks held by the '
+                      'conductor in its Guru Meditation Report. Set to 0 '
+                      '(the default) to disable.')),
     cfg.BoolOpt('send_sensor_data',
                 default=False,
                 help=_('Enable sending sensor data message via the '
@@ -194,6 +305,23 @@ opts = [
                       '255 characters and is case insensitive. This '
                       'conductor will only manage nodes with a matching '
                       '"conductor_group" field set on the node.')),
+    cfg.IntOpt('max_concurrent_bmc_requests',
+               default=1000,
+               min=0,
+               help=_('Maximum number of requests to BMCs that hardware '
+                      'interfaces using the shared BMC I/O layer may have '
+                      'in flight at the same time. Further requests wait '
+                      'for a free slot. Bounds the memory used by '
+                      'concurrent BMC queries. Set to 0 to disable '
+                      'the limit.')),
+    cfg.IntOpt('max_concurrent_requests_per_bmc',
+               default=0,
+               min=0,
+               help=_('Maximum number of requests that hardware interfaces '
+                      'using the shared BMC I/O layer may have in flight '
+                      'to a single BMC address at the same time. Useful for '
+                      'BMCs and PDUs that cannot handle many concurrent '
+                      'requests. Set to 0 to disable the limit.')),
 ]
 
 
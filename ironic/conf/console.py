@@ -36,7 +36,7 @@ opts = [
                min=0,
                help=_('Timeout (in seconds) for the terminal session to be '
                       'closed on inactivity. Set to 0 to disable timeout. '
-                      'Used only by Socat console.')),
+                      'Used only by Socat console and the console proxy.')),
     cfg.IntOpt('subprocess_checking_interval',
                default=1,
                help=_('Time interval (in seconds) for checking the status of '
@@ -49,10 +49,32 @@ opts = [
                default=1,
                help=_('Time (in seconds) to wait for the shellinabox console '
                       'subprocess to exit before sending SIGKILL signal.')),
+    cfg.IntOpt('restore_workers',
+               default=8,
+               min=1,
+               help=_('The maximum number of consoles started concurrently '
+                      'when the conductor starts. The exclusive lock on a '
+                      'node is not held while its console subprocess is '
+                      'starting.')),
     cfg.IPOpt('socat_address',
               default='$my_ip',
               help=_('IP address of Socat service running on the host of '
-                     'ironic conductor. Used only by Socat console.')),
+                     'ironic conductor. Used only by Socat console and the '
+                     'console proxy.')),
+    cfg.PortOpt('proxy_port',
+                default=6390,
+                help=_('The TCP port on which the console proxy of the '
+                       'conductor listens for the console connections of '
+                       'all the nodes. Used only by the ipmitool-proxy '
+                       'console interface.')),
+    cfg.IntOpt('proxy_idle_timeout',
+               default=600,
+               min=0,
+               help=_('Time (in seconds) after which the console '
+                      'subprocess of a node is stopped when no client is '
+                      'connected to the console proxy for it. It is '
+                      'started again on the next connection. Used only by '
+                      'the ipmitool-proxy console interface.')),
 ]
 
 
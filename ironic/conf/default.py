@@ -282,6 +282,38 @@ topic queue in this list.
 The list of versioned notifications is visible in
 https://docs.openstack.org/ironic/latest/admin/notifications.html
 """)),
+    cfg.BoolOpt('notification_async',
+                default=False,
+                help=_('Whether to send the versioned notifications from a '
+                       'background thread. The notifications are put into '
+                       'a queue of "notification_queue_size" notifications '
+                       'and sent in order, so that a slow message bus does '
+                       'not delay the operations emitting them.')),
+    cfg.IntOpt('notification_queue_size',
+               default=1000,
+               min=1,
+               help=_('The maximum number of notifications kept in memory '
+                      'when "notification_async" is enabled.')),
+    cfg.StrOpt('notification_queue_overflow',
+               default='block',
+               choices=[('block', _('wait until there is room in the '
+                                    'queue')),
+                        ('drop', _('drop the notification')),
+                        ('spill', _('write the notification to a file in '
+                                    '"notification_spill_dir", to be sent '
+                                    'later'))],
+               help=_('What to do with a notification when the queue of '
+                      'notifications is full.')),
+    cfg.StrOpt('notification_spill_dir',
+               help=_('The directory where notifications are written when '
+                      'the queue of notifications is full and '
+                      '"notification_queue_overflow" is "spill". The '
+                      'notifications left there by a process which exited '
+                      'are sent by the next process of the same host '
+                      'started with this directory. The files are named '
+                      'after the host and the process, so that the '
+                      'directory can be shared by the workers and the '
+                      'services of a host.')),
 ]
 
 path_opts = [
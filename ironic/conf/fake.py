@@ -0,0 +1,130 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+from ironic.common.i18n import _
+
+# NOTE: these options simulate slow and flaky hardware with the fake
+# interfaces, e.g. for capacity planning of the conductor workers.
+opts = [
+    cfg.StrOpt('power_delay',
+               default='0',
+               help=_('Delay in seconds of every operation of the "fake" '
+                      'power interface (getting and setting the power '
+                      'state, rebooting). Either a single number, '
+                      'or a range MIN:MAX for a delay chosen uniformly in '
+                      'the range. Can be overridden per node with the '
+                      '"fake_power_delay" driver_info field.')),
+    cfg.FloatOpt('power_failure_rate',
+                 default=0.0,
+                 min=0.0,
+                 max=1.0,
+                 help=_('Probability (between 0 and 1) that an operation '
+                        'of the "fake" power interface fails after its '
+                        'delay. Can be overridden per node with the '
+                        '"fake_power_failure_rate" driver_info field.')),
+    cfg.FloatOpt('power_stuck_rate',
+                 default=0.0,
+                 min=0.0,
+                 max=1.0,
+                 help=_('Probability (between 0 and 1) that an operation '
+                        'of the "fake" power interface gets stuck for '
+                        '"stuck_duration" seconds, then fails. Can be '
+                        'overridden per node with the '
+                        '"fake_power_stuck_rate" driver_info field.')),
+    cfg.StrOpt('boot_delay',
+               default='0',
+               help=_('Delay in seconds of every operation of the "fake" '
+                      'boot interface (preparing and cleaning up the '
+                      'ramdisk and the instance). Either a single number, '
+                      'or a range MIN:MAX for a delay chosen uniformly in '
+                      'the range. Can be overridden per node with the '
+                      '"fake_boot_delay" driver_info field.')),
+    cfg.FloatOpt('boot_failure_rate',
+                 default=0.0,
+                 min=0.0,
+                 max=1.0,
+                 help=_('Probability (between 0 and 1) that an operation '
+                        'of the "fake" boot interface fails after its '
+                        'delay. Can be overridden per node with the '
+                        '"fake_boot_failure_rate" driver_info field.')),
+    cfg.FloatOpt('boot_stuck_rate',
+                 default=0.0,
+                 min=0.0,
+                 max=1.0,
+                 help=_('Probability (between 0 and 1) that an operation '
+                        'of the "fake" boot interface gets stuck for '
+                        '"stuck_duration" seconds, then fails. Can be '
+                        'overridden per node with the '
+                        '"fake_boot_stuck_rate" driver_info field.')),
+    cfg.StrOpt('deploy_delay',
+               default='0',
+               help=_('Delay in seconds of every operation of the "fake" '
+                      'deploy interface (prepare, deploy, tear down, clean '
+                      'up and take over). Either a single number, '
+                      'or a range MIN:MAX for a delay chosen uniformly in '
+                      'the range. Can be overridden per node with the '
+                      '"fake_deploy_delay" driver_info field.')),
+    cfg.FloatOpt('deploy_failure_rate',
+                 default=0.0,
+                 min=0.0,
+                 max=1.0,
+                 help=_('Probability (between 0 and 1) that an operation '
+                        'of the "fake" deploy interface fails after its '
+                        'delay. Can be overridden per node with the '
+                        '"fake_deploy_failure_rate" driver_info field.')),
+    cfg.FloatOpt('deploy_stuck_rate',
+                 default=0.0,
+                 min=0.0,
+                 max=1.0,
+                 help=_('Probability (between 0 and 1) that an operation '
+                        'of the "fake" deploy interface gets stuck for '
+                        '"stuck_duration" seconds, then fails. Can be '
+                        'overridden per node with the '
+                        '"fake_deploy_stuck_rate" driver_info field.')),
+    cfg.StrOpt('management_delay',
+               default='0',
+               help=_('Delay in seconds of every operation of the "fake" '
+                      'management interface (getting and setting the boot '
+                      'device, getting sensor data). Either a single '
+                      'number, '
+                      'or a range MIN:MAX for a delay chosen uniformly in '
+                      'the range. Can be overridden per node with the '
+                      '"fake_management_delay" driver_info field.')),
+    cfg.FloatOpt('management_failure_rate',
+                 default=0.0,
+                 min=0.0,
+                 max=1.0,
+                 help=_('Probability (between 0 and 1) that an operation '
+                        'of the "fake" management interface fails after its '
+                        'delay. Can be overridden per node with the '
+                        '"fake_management_failure_rate" driver_info field.')),
+    cfg.FloatOpt('management_stuck_rate',
+                 default=0.0,
+                 min=0.0,
+                 max=1.0,
+                 help=_('Probability (between 0 and 1) that an operation '
+                        'of the "fake" management interface gets stuck for '
+                        '"stuck_duration" seconds, then fails. Can be '
+                        'overridden per node with the '
+                        '"fake_management_stuck_rate" driver_info field.')),
+    cfg.IntOpt('stuck_duration',
+               default=3600,
+               min=0,
+               help=_('Seconds a stuck operation of a "fake" interface '
+                      'hangs before failing.')),
+]
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group='fake')
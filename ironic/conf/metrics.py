@@ -47,7 +47,23 @@ opts = [
                help=_('Prefix all metric names sent by the agent ramdisk '
                       'with this value. The format of metric names is '
                       '[global_prefix.][uuid.][host_name.]prefix.'
-                      'metric_name.'))
+                      'metric_name.')),
+    cfg.BoolOpt('prometheus_enabled',
+                default=False,
+                help=_('Expose the metrics recorded by the service in the '
+                       'Prometheus text format, whatever the backend: at '
+                       'the /metrics path of the API (without '
+                       'authentication) and on the "prometheus_host_ip" and '
+                       '"prometheus_port" of the conductor.')),
+    cfg.HostAddressOpt('prometheus_host_ip',
+                       default='0.0.0.0',
+                       help=_('The IP address or hostname on which the '
+                              'conductor serves its metrics when '
+                              '"prometheus_enabled" is set.')),
+    cfg.PortOpt('prometheus_port',
+                default=9608,
+                help=_('The port on which the conductor serves its metrics '
+                       'when "prometheus_enabled" is set.')),
 ]
 
 
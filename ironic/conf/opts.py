@@ -46,6 +46,7 @@ _opts = [
     ('deploy', ironic.conf.deploy.opts),
     ('dhcp', ironic.conf.dhcp.opts),
     ('drac', ironic.conf.drac.opts),
+    ('fake', ironic.conf.fake.opts),
     ('glance', ironic.conf.glance.list_opts()),
     ('healthcheck', ironic.conf.healthcheck.opts),
     ('ilo', ironic.conf.ilo.opts),
@@ -37,13 +37,58 @@ opts = [
                       'Service). This option caps the maximum number of '
                       'connections to maintain. The value of `0` disables '
                       'client connection caching completely.')),
+    cfg.IntOpt('connection_cache_idle_timeout',
+               min=0,
+               default=600,
+               help=_('Time (in seconds) after which a cached Redfish client '
+                      'connection that has not been used is closed and its '
+                      'session is logged out of the BMC. Keep it below the '
+                      'session timeout of the BMCs. The value of `0` keeps '
+                      'connections until they are evicted by newer ones.')),
     cfg.StrOpt('auth_type',
                choices=[('basic', _('Use HTTP basic authentication')),
                         ('session', _('Use HTTP session authentication')),
                         ('auto', _('Try HTTP session authentication first, '
                                    'fall back to basic HTTP authentication'))],
                default='auto',
-               help=_('Redfish HTTP client authentication method.'))
+               help=_('Redfish HTTP client authentication method.')),
+    cfg.BoolOpt('event_subscription',
+                default=False,
+                help=_('Subscribe to the EventService of the BMCs of the '
+                       'nodes with the redfish power interface, where '
+                       'supported. The conductor then synchronizes the power '
+                       'state of a node as soon as its BMC sends an event, '
+                       'and only polls it every '
+                       '"[conductor]power_event_poll_interval" seconds. '
+                       'The BMCs must be able to reach the event listener '
+                       'of the conductor, see "event_listener_url".')),
+    cfg.IntOpt('event_subscription_interval',
+               default=300,
+               min=1,
+               help=_('Interval (in seconds) between checks of the event '
+                      'subscriptions of the nodes, when "event_subscription" '
+                      'is enabled. The nodes newly mapped to the conductor '
+                      'are subscribed, the subscriptions of the nodes no '
+                      'longer mapped to it are deleted.')),
+    cfg.HostAddressOpt('event_listener_host_ip',
+                       default='$my_ip',
+                       help=_('The IP address or hostname on which the '
+                              'conductor listens to the events of the BMCs '
+                              'when "event_subscription" is enabled. The '
+                              'listener does not authenticate the BMCs, it '
+                              'should only be reachable from the management '
+                              'network of the BMCs.')),
+    cfg.PortOpt('event_listener_port',
+                default=6389,
+                help=_('The port on which the conductor listens to the '
+                       'events of the BMCs when "event_subscription" is '
+                       'enabled.')),
+    cfg.StrOpt('event_listener_url',
+               help=_('The URL the BMCs send their events to, e.g. the URL '
+                      'of a TLS terminating proxy in front of the event '
+                      'listener for the BMCs only accepting HTTPS '
+                      'destinations. Defaults to '
+                      'http://<my_ip>:<event_listener_port>/.')),
 ]
 
 
@@ -41,6 +41,32 @@ opts = [
                min=0,
                help=_('Maximum number of UDP request retries, '
                       '0 means no retries.')),
+    cfg.BoolOpt('use_async_io',
+                default=False,
+                help=_('Send SNMPv1 and SNMPv2c GET requests through a '
+                       'single non-blocking SNMP engine shared by all nodes '
+                       'instead of creating an SNMP engine and waiting on it '
+                       'for each request. This allows many power state '
+                       'queries to be in flight at once. SNMPv3 requests '
+                       'are not affected.')),
+    cfg.IntOpt('outlet_states_cache_ttl',
+               default=0,
+               min=0,
+               help=_('Time (in seconds) for which the power states of all '
+                      'outlets of a PDU, fetched with a single SNMP table '
+                      'walk, are used to answer power state queries of the '
+                      'nodes sharing this PDU. Setting it slightly below '
+                      '[conductor]sync_power_state_interval results in one '
+                      'walk per PDU per power state sync. Only applies to '
+                      'PDUs with a single power state object per outlet. '
+                      'Set to 0 to query every outlet separately.')),
+    cfg.IntOpt('bulk_max_repetitions',
+               default=64,
+               min=1,
+               help=_('Maximum number of objects requested in a single '
+                      'SNMP GETBULK request when walking a PDU table. '
+                      'SNMPv1 does not support GETBULK and walks tables '
+                      'with one GETNEXT request per object.')),
 ]
 
 
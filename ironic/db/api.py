@@ -64,6 +64,9 @@ class Connection(object):
                         :provisioned_before:
                             nodes with provision_updated_at field before this
                             interval in seconds
+                        :updated_since:
+                            nodes created or updated at or after this
+                            datetime
         :param limit: Maximum number of nodes to return.
         :param marker: the last item of the previous page; we return the next
                        result set.
@@ -147,6 +150,36 @@ class Connection(object):
         :returns: A node.
         """
 
+    @abc.abstractmethod
+    def create_nodes(self, nodes, trait_version):
+        """Create new nodes with their ports, port groups and traits.
+
+        The nodes are all created in a single transaction: either all of them
+        are created, or none.
+
+        :param nodes: A list of dicts with the values of the nodes, see
+                      :meth:`create_node`. Each dict may also contain:
+
+                      ::
+
+                        {
+                         'ports': [{'address': ..., ...}, ...],
+                         'portgroups': [{'address': ...,
+                                         'ports': [{...}, ...],
+                                         ...}, ...],
+                         'traits': ['CUSTOM_TRAIT', ...],
+                        }
+
+                      The ports and port groups are created for the node,
+                      the ports of a port group are its member ports.
+        :param trait_version: the version of the object.Trait.
+        :raises: the exceptions of :meth:`create_node`, :meth:`create_port`
+                 and :meth:`create_portgroup`.
+        :raises: InvalidParameterValue if a node would exceed the maximum
+                 number of traits.
+        :returns: A list of nodes.
+        """
+
     @abc.abstractmethod
     def get_node_by_id(self, node_id):
         """Return a node.
@@ -922,7 +955,7 @@ class Connection(object):
         """
 
     @abc.abstractmethod
-    def update_to_latest_versions(self, context, max_count):
+    def update_to_latest_versions(self, context, max_count, checkpoint=None):
         """Updates objects to their latest known versions.
 
         This scans all the tables and for objects that are not in their latest
@@ -931,6 +964,11 @@ class Connection(object):
         :param context: the admin context
         :param max_count: The maximum number of objects to migrate. Must be
                           >= 0. If zero, all the objects will be migrated.
+        :param checkpoint: Optional dictionary keeping the progress of the
+                           scan between calls, updated in place. It maps
+                           model names to dictionaries with the target
+                           ``version``, the ``last_key`` scanned, the number
+                           of ``remaining`` and of ``migrated`` objects.
         :returns: A 2-tuple, 1. the total number of objects that need to be
                   migrated (at the beginning of this call) and 2. the number
                   of migrated objects.
@@ -1165,3 +1203,13 @@ class Connection(object):
         :param allocation_id: Allocation ID
         :raises: AllocationNotFound
         """
+
+    @abc.abstractmethod
+    def get_query_count(self):
+        """Get the number of queries executed by the current thread.
+
+        The count only increases, the number of queries executed by some
+        code is the difference of the counts after and before it.
+
+        :returns: an integer.
+        """
@@ -48,6 +48,8 @@ LOG = log.getLogger(__name__)
 
 _CONTEXT = threading.local()
 
+_QUERIES = threading.local()
+
 # NOTE(mgoddard): We limit the number of traits per node to 50 as this is the
 # maximum number of traits per resource provider allowed in placement.
 MAX_TRAITS_PER_NODE = 50
@@ -58,6 +60,11 @@ def get_backend():
     return Connection()
 
 
+@sa.event.listens_for(sa.engine.Engine, 'before_cursor_execute')
+def _count_query(*args, **kwargs):
+    _QUERIES.count = getattr(_QUERIES, 'count', 0) + 1
+
+
 def _session_for_read():
     return _wrap_session(enginefacade.reader.using(_CONTEXT))
 
@@ -218,6 +225,51 @@ def _filter_active_conductors(query, interval=None):
     return query
 
 
+def _update_version_batch(model, state, max_count):
+    """Update the next range of objects of a model to the latest version.
+
+    Walks the table in the order of the (leading) primary key column,
+    starting after the last key recorded in the state. The rows of the
+    next key range are updated in a single transaction.
+
+    :param model: the model to update.
+    :param state: the migration state of the model, updated in place. See
+        :meth:`Connection.update_to_latest_versions`.
+    :param max_count: the maximum number of keys in the range.
+    :returns: the number of migrated objects.
+    """
+    version = state['version']
+    key = getattr(model, model.__table__.primary_key.columns.values()[0].name)
+    with _session_for_write():
+        query = model_query(key).filter(model.version != version)
+        if state['last_key'] is not None:
+            query = query.filter(key > state['last_key'])
+        keys = [row[0] for row in query.order_by(key).limit(max_count)]
+        if not keys:
+            # NOTE: the end of the table is reached. Objects updated
+            # to an old version behind the walk are picked up by restarting
+            # it from the beginning.
+            if state['last_key'] is None:
+                state['remaining'] = 0
+            else:
+                state['last_key'] = None
+                state['remaining'] = (model_query(model)
+                                      .filter(model.version != version)
+                                      .count())
+            return 0
+
+        num_migrated = (
+            model_query(model).
+            filter(sql.and_(key >= keys[0], key <= keys[-1],
+                            model.version != version)).
+            update({model.version: version}, synchronize_session=False))
+
+    state['last_key'] = keys[-1]
+    state['migrated'] += num_migrated
+    state['remaining'] = max(0, state['remaining'] - num_migrated)
+    return num_migrated
+
+
 @profiler.trace_cls("db_api")
 class Connection(api.Connection):
     """SqlAlchemy connection."""
@@ -234,7 +286,8 @@ class Connection(api.Connection):
                              'reserved_by_any_of', 'provisioned_before',
                              'inspection_started_before', 'fault',
                              'conductor_group', 'owner', 'uuid_in',
-                             'with_power_state', 'description_contains'}
+                             'name_in', 'with_power_state',
+                             'description_contains', 'updated_since'}
         unsupported_filters = set(filters).difference(supported_filters)
         if unsupported_filters:
             msg = _("SqlAlchemy API does not support "
@@ -279,6 +332,8 @@ class Connection(api.Connection):
             query = query.filter(models.Node.inspection_started_at < limit)
         if 'uuid_in' in filters:
             query = query.filter(models.Node.uuid.in_(filters['uuid_in']))
+        if 'name_in' in filters:
+            query = query.filter(models.Node.name.in_(filters['name_in']))
         if 'with_power_state' in filters:
             if filters['with_power_state']:
                 query = query.filter(models.Node.power_state != sql.null())
@@ -289,6 +344,10 @@ class Connection(api.Connection):
             if keyword is not None:
                 query = query.filter(
                     models.Node.description.like(r'%{}%'.format(keyword)))
+        if 'updated_since' in filters:
+            since = filters['updated_since']
+            query = query.filter(sql.or_(models.Node.updated_at >= since,
+                                         models.Node.created_at >= since))
 
         return query
 
@@ -414,6 +473,41 @@ class Connection(api.Connection):
             node['traits'] = []
         return node
 
+    @oslo_db_api.retry_on_deadlock
+    def create_nodes(self, nodes, trait_version):
+        with _session_for_write():
+            return [self._create_node_with_resources(values, trait_version)
+                    for values in nodes]
+
+    def _create_node_with_resources(self, values, trait_version):
+        values = dict(values)
+        ports = values.pop('ports', None) or []
+        portgroups = values.pop('portgroups', None) or []
+        traits = set(values.pop('traits', None) or [])
+
+        node = self.create_node(values)
+        for portgroup_values in portgroups:
+            portgroup_values = dict(portgroup_values, node_id=node.id)
+            member_ports = portgroup_values.pop('ports', None) or []
+            portgroup = self.create_portgroup(portgroup_values)
+            for port_values in member_ports:
+                self.create_port(dict(port_values, node_id=node.id,
+                                      portgroup_id=portgroup.id))
+        for port_values in ports:
+            self.create_port(dict(port_values, node_id=node.id))
+
+        self._verify_max_traits_per_node(node.id, len(traits))
+        with _session_for_write() as session:
+            node_traits = []
+            for trait in sorted(traits):
+                node_trait = models.NodeTrait(trait=trait, node_id=node.id,
+                                              version=trait_version)
+                session.add(node_trait)
+                node_traits.append(node_trait)
+            session.flush()
+            node['traits'] = node_traits
+        return node
+
     def get_node_by_id(self, node_id):
         query = _get_node_query_with_all()
         query = query.filter_by(id=node_id)
@@ -1304,30 +1398,61 @@ class Connection(api.Connection):
         return True
 
     @oslo_db_api.retry_on_deadlock
-    def update_to_latest_versions(self, context, max_count):
+    def update_to_latest_versions(self, context, max_count, checkpoint=None):
         """Updates objects to their latest known versions.
 
         This scans all the tables and for objects that are not in their latest
-        version, updates them to that version.
+        version, updates them to that version. Tables are walked in ranges of
+        the primary key, every range is updated in its own transaction.
 
         :param context: the admin context
         :param max_count: The maximum number of objects to migrate. Must be
                           >= 0. If zero, all the objects will be migrated.
+        :param checkpoint: Optional dictionary keeping the progress of the
+                           walk between calls, updated in place. It maps
+                           model names to dictionaries with the target
+                           ``version``, the ``last_key`` walked, the number
+                           of ``remaining`` and of ``migrated`` objects.
+                           Without it, every call walks the tables from
+                           the beginning.
         :returns: A 2-tuple, 1. the total number of objects that need to be
                   migrated (at the beginning of this call) and 2. the number
                   of migrated objects.
         """
         # NOTE(rloo): 'master' has the most recent (latest) versions.
         mapping = release_mappings.RELEASE_MAPPING['master']['objects']
-        total_to_migrate = 0
-        total_migrated = 0
+        if checkpoint is None:
+            checkpoint = {}
 
         sql_models = [model for model in models.Base.__subclasses__()
                       if model.__name__ in mapping]
+        counted = set()
         for model in sql_models:
             version = mapping[model.__name__][0]
-            query = model_query(model).filter(model.version != version)
-            total_to_migrate += query.count()
+            state = checkpoint.get(model.__name__)
+            if state is None or state['version'] != version:
+                checkpoint[model.__name__] = {
+                    'version': version,
+                    'last_key': None,
+                    'remaining': (model_query(model)
+                                  .filter(model.version != version)
+                                  .count()),
+                    'migrated': 0}
+                counted.add(model)
+
+        total_to_migrate = sum(checkpoint[model.__name__]['remaining']
+                               for model in sql_models)
+        if not total_to_migrate:
+            # NOTE: objects may have been updated to an old version
+            # after their range was walked, check before reporting success.
+            for model in set(sql_models) - counted:
+                state = checkpoint[model.__name__]
+                state['last_key'] = None
+                state['remaining'] = (model_query(model)
+                                      .filter(model.version
+                                              != state['version'])
+                                      .count())
+                total_to_migrate += state['remaining']
 
         if not total_to_migrate:
             return total_to_migrate, 0
@@ -1347,37 +1472,15 @@ class Connection(api.Connection):
 
         # If max_count is zero, we want to migrate all the objects.
         max_to_migrate = max_count or total_to_migrate
+        total_migrated = 0
 
         for model in sql_models:
-            version = mapping[model.__name__][0]
-            num_migrated = 0
-            with _session_for_write():
-                query = model_query(model).filter(model.version != version)
-                # NOTE(rloo) Caution here; after doing query.count(), it is
-                #            possible that the value is different in the
-                #            next invocation of the query.
-                if max_to_migrate < query.count():
-                    # Only want to update max_to_migrate objects; cannot use
-                    # sql's limit(), so we generate a new query with
-                    # max_to_migrate objects.
-                    ids = []
-                    for obj in query.slice(0, max_to_migrate):
-                        ids.append(obj['id'])
-                    num_migrated = (
-                        model_query(model).
-                        filter(sql.and_(model.id.in_(ids),
-                                        model.version != version)).
-                        update({model.version: version},
-                               synchronize_session=False))
-                else:
-                    num_migrated = (
-                        model_query(model).
-                        filter(model.version != version).
-                        update({model.version: version},
-                               synchronize_session=False))
-
-            total_migrated += num_migrated
-            max_to_migrate -= num_migrated
+            state = checkpoint[model.__name__]
+            while state['remaining'] and max_to_migrate > 0:
+                num_migrated = _update_version_batch(model, state,
+                                                     max_to_migrate)
+                total_migrated += num_migrated
+                max_to_migrate -= num_migrated
             if max_to_migrate <= 0:
                 break
 
@@ -1710,3 +1813,7 @@ class Connection(api.Connection):
             node_query.update({'allocation_id': None, 'instance_uuid': None})
 
             query.delete()
+
+    def get_query_count(self):
+        """Get the number of queries executed by the current thread."""
+        return getattr(_QUERIES, 'count', 0)
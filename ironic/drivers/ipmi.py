@@ -24,14 +24,15 @@ class IPMIHardware(generic.GenericHardware):
     """IPMI hardware type.
 
     Uses ``ipmitool`` to implement power and management.
-    Provides serial console implementations via ``shellinabox`` or ``socat``.
+    Provides serial console implementations via ``shellinabox``, ``socat``
+    or the console proxy of the conductor.
     """
 
     @property
     def supported_console_interfaces(self):
         """List of supported console interfaces."""
         return [ipmitool.IPMISocatConsole, ipmitool.IPMIShellinaboxConsole,
-                noop.NoConsole]
+                ipmitool.IPMIProxyConsole, noop.NoConsole]
 
     @property
     def supported_management_interfaces(self):
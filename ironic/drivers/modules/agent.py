@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from ironic_lib import metrics_utils
 from ironic_lib import utils as il_utils
 from oslo_log import log
 from oslo_utils import excutils
@@ -24,6 +23,7 @@ from ironic.common import exception
 from ironic.common.glance_service import service_utils
 from ironic.common.i18n import _
 from ironic.common import images
+from ironic.common import metrics
 from ironic.common import raid
 from ironic.common import states
 from ironic.common import utils
@@ -38,7 +38,7 @@ from ironic.drivers.modules import deploy_utils
 
 LOG = log.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 REQUIRED_PROPERTIES = {
     'deploy_kernel': _('UUID (from Glance) of the deployment kernel. '
@@ -18,7 +18,6 @@
 
 import collections
 
-from ironic_lib import metrics_utils
 from oslo_log import log
 from oslo_utils import strutils
 from oslo_utils import timeutils
@@ -27,6 +26,7 @@ import retrying
 from ironic.common import boot_devices
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import states
 from ironic.conductor import utils as manager_utils
 from ironic.conf import CONF
@@ -36,7 +36,7 @@ from ironic.drivers import utils as driver_utils
 
 LOG = log.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 # This contains a nested dictionary containing the post clean step
 # hooks registered for each clean step of every interface.
@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from ironic_lib import metrics_utils
 from oslo_log import log
 from oslo_serialization import jsonutils
 import requests
@@ -21,11 +20,12 @@ from six.moves import http_client
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.conf import CONF
 
 LOG = log.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 DEFAULT_IPA_PORTAL_PORT = 3260
 
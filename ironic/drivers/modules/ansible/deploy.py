@@ -15,13 +15,9 @@
 Ansible deploy interface
 """
 
-import json
 import os
-import shlex
 
-from ironic_lib import metrics_utils
 from ironic_lib import utils as irlib_utils
-from oslo_concurrency import processutils
 from oslo_log import log
 from oslo_utils import strutils
 from oslo_utils import units
@@ -34,19 +30,20 @@ from ironic.common import dhcp_factory
 from ironic.common import exception
 from ironic.common.i18n import _
 from ironic.common import images
+from ironic.common import metrics
 from ironic.common import states
-from ironic.common import utils
 from ironic.conductor import task_manager
 from ironic.conductor import utils as manager_utils
 from ironic.conf import CONF
 from ironic.drivers import base
 from ironic.drivers.modules import agent_base_vendor as agent_base
+from ironic.drivers.modules.ansible import runner
 from ironic.drivers.modules import deploy_utils
 
 
 LOG = log.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 OPTIONAL_PROPERTIES = {
     'ansible_username': _('Deploy ramdisk username for Ansible. '
@@ -124,40 +121,12 @@ def _run_playbook(node, name, extra_vars, key, tags=None, notags=None):
     """Execute ansible-playbook."""
     root = _get_playbooks_path(node)
     playbook = os.path.join(root, name)
+    if CONF.ansible.batch_window:
+        return runner.run_batched(node, playbook, extra_vars, key,
+                                  tags=tags, notags=notags)
     inventory = os.path.join(root, 'inventory')
-    ironic_vars = {'ironic': extra_vars}
-    args = [CONF.ansible.ansible_playbook_script, playbook,
-            '-i', inventory,
-            '-e', json.dumps(ironic_vars),
-            ]
-
-    if CONF.ansible.config_file_path:
-        env = ['env', 'ANSIBLE_CONFIG=%s' % CONF.ansible.config_file_path]
-        args = env + args
-
-    if tags:
-        args.append('--tags=%s' % ','.join(tags))
-
-    if notags:
-        args.append('--skip-tags=%s' % ','.join(notags))
-
-    if key:
-        args.append('--private-key=%s' % key)
-
-    verbosity = CONF.ansible.verbosity
-    if verbosity is None and CONF.debug:
-        verbosity = 4
-    if verbosity:
-        args.append('-' + 'v' * verbosity)
-
-    if CONF.ansible.ansible_extra_args:
-        args.extend(shlex.split(CONF.ansible.ansible_extra_args))
-
-    try:
-        out, err = utils.execute(*args)
-        return out, err
-    except processutils.ProcessExecutionError as e:
-        raise exception.InstanceDeployFailure(reason=e)
+    return runner.run_playbook(playbook, inventory, extra_vars, key,
+                               tags=tags, notags=notags)
 
 
 def _calculate_memory_req(task):
@@ -0,0 +1,72 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+
+
+# NOTE: must match ironic.drivers.modules.ansible.runner
+EVENTS_FILE_ENV = 'IRONIC_ANSIBLE_EVENTS_FILE'
+
+
+class CallbackModule(object):
+    """Streams per-host results of batched runs back to ironic-conductor.
+
+    Does nothing unless the IRONIC_ANSIBLE_EVENTS_FILE environment
+    variable is set. Each event is written as a single line of JSON.
+    """
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'notification'
+    CALLBACK_NAME = 'ironic_events'
+    CALLBACK_NEEDS_WHITELIST = False
+
+    def __init__(self, display=None):
+        self.path = os.environ.get(EVENTS_FILE_ENV)
+        self._plugin_options = {}
+
+    # NOTE: this method is required for Ansible>=2.4
+    def set_options(self, option=None, option_value=None):
+        if option:
+            if option_value:
+                self._plugin_options[option] = option_value
+            else:
+                self._plugin_options = option
+
+    def emit(self, **event):
+        if not self.path:
+            return
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(event) + '\n')
+            f.flush()
+
+    def emit_result(self, kind, result, ignore_errors=False):
+        self.emit(event=kind,
+                  host=result._host.get_name(),
+                  task=result._task.get_name(),
+                  msg=str(result._result.get('msg', '')),
+                  ignore_errors=ignore_errors)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self.emit_result('failed', result, ignore_errors=ignore_errors)
+
+    def v2_runner_on_unreachable(self, result):
+        self.emit_result('unreachable', result)
+
+    def v2_playbook_on_stats(self, stats):
+        for host in sorted(stats.processed):
+            summary = stats.summarize(host)
+            self.emit(event='stats', host=host,
+                      ok=summary['ok'],
+                      failures=summary['failures'],
+                      unreachable=summary['unreachable'])
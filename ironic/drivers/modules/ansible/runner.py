@@ -0,0 +1,358 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Helpers for running ansible-playbook, including batched multi-host runs.
+"""
+
+import collections
+import json
+import os
+import shlex
+import threading
+import time
+
+from oslo_concurrency import processutils
+from oslo_log import log
+import six
+import yaml
+
+from ironic.common import exception
+from ironic.common.i18n import _
+from ironic.common import utils
+from ironic.conf import CONF
+
+
+LOG = log.getLogger(__name__)
+
+# NOTE: must match the variable read by the ironic_events
+# callback plugin shipped with the default playbooks
+EVENTS_FILE_ENV = 'IRONIC_ANSIBLE_EVENTS_FILE'
+
+_EVENTS_POLL_INTERVAL = 1
+
+_RUNNERS = {}
+_RUNNERS_LOCK = threading.Lock()
+
+
+def build_command(playbook, inventory, extra_vars=None, key=None,
+                  tags=None, notags=None, env=None):
+    """Build the ansible-playbook command line.
+
+    :param playbook: full path to the playbook to run.
+    :param inventory: full path to the inventory to use.
+    :param extra_vars: optional dictionary passed as ``ironic`` extra vars.
+    :param key: optional private SSH key file to use for all hosts.
+    :param tags: optional list of tags to run.
+    :param notags: optional list of tags to skip.
+    :param env: optional list of ``NAME=value`` environment variables.
+    :returns: a list of command arguments.
+    """
+    args = [CONF.ansible.ansible_playbook_script, playbook,
+            '-i', inventory,
+            ]
+    if extra_vars is not None:
+        args.extend(['-e', json.dumps({'ironic': extra_vars})])
+
+    env = list(env or [])
+    if CONF.ansible.config_file_path:
+        env.insert(0, 'ANSIBLE_CONFIG=%s' % CONF.ansible.config_file_path)
+    if env:
+        args = ['env'] + env + args
+
+    if tags:
+        args.append('--tags=%s' % ','.join(tags))
+
+    if notags:
+        args.append('--skip-tags=%s' % ','.join(notags))
+
+    if key:
+        args.append('--private-key=%s' % key)
+
+    verbosity = CONF.ansible.verbosity
+    if verbosity is None and CONF.debug:
+        verbosity = 4
+    if verbosity:
+        args.append('-' + 'v' * verbosity)
+
+    if CONF.ansible.ansible_extra_args:
+        args.extend(shlex.split(CONF.ansible.ansible_extra_args))
+
+    return args
+
+
+def build_inventory(requests):
+    """Build a multi-host inventory for a batch of requests.
+
+    Every node becomes a host of the ``ironic`` group carrying its own
+    connection settings and its own ``ironic`` variables, so that
+    the playbooks see the same variables as in a single node run.
+    The ``conductor`` host gets an empty node list, which makes
+    the ``add-ironic-nodes.yaml`` play a no-op.
+
+    :param requests: a list of :class:`HostRequest` objects.
+    :returns: an inventory dictionary in the Ansible YAML inventory format.
+    """
+    hosts = dict((r.node_uuid, r.host_vars) for r in requests)
+    return {'all': {'hosts': {'conductor': {'ansible_connection': 'local',
+                                            'ironic': {'nodes': []}}},
+                    'children': {'ironic': {'hosts': hosts}}}}
+
+
+class EventReader(object):
+    """Incrementally reads per-host events written by ansible-playbook.
+
+    Events are JSON objects, one per line, written by the ``ironic_events``
+    callback plugin. Only complete lines are consumed, so the file can be
+    read while the playbook is still running.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._offset = 0
+
+    def read(self):
+        """Return the list of events written since the previous call."""
+        try:
+            with open(self.path) as f:
+                f.seek(self._offset)
+                data = f.read()
+        except (IOError, OSError) as e:
+            LOG.warning('Failed to read Ansible events from %(path)s: '
+                        '%(err)s', {'path': self.path, 'err': e})
+            return []
+
+        events = []
+        end = data.rfind('\n') + 1
+        self._offset += len(data[:end])
+        for line in data[:end].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                LOG.warning('Skipping malformed Ansible event %s', line)
+        return events
+
+
+class HostRequest(object):
+    """A request to run a playbook for a single node within a batch."""
+
+    def __init__(self, node_uuid, host_vars):
+        self.node_uuid = node_uuid
+        self.host_vars = host_vars
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def finish(self, error=None):
+        if self.done:
+            return
+        self.error = error
+        self._done.set()
+
+    def wait(self):
+        """Wait for the batch to report the result for this node.
+
+        :raises: InstanceDeployFailure if the playbook failed for the node.
+        """
+        self._done.wait()
+        if self.error is not None:
+            raise exception.InstanceDeployFailure(reason=self.error)
+
+
+class PlaybookRunner(object):
+    """Runs a single playbook for batches of nodes.
+
+    Requests submitted within ``[ansible]batch_window`` seconds of each
+    other are executed by one ``ansible-playbook`` process with a generated
+    multi-host inventory. The worker thread stays alive while there are
+    pending requests and exits after an idle window.
+
+    Results are demultiplexed per host from the events streamed by the
+    ``ironic_events`` callback plugin: a node is released as soon as its
+    host fails or becomes unreachable, the rest when the play finishes.
+    """
+
+    def __init__(self, playbook, tags=None, notags=None):
+        self.playbook = playbook
+        self.tags = tags
+        self.notags = notags
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, request):
+        """Queue a request, starting the worker thread if needed."""
+        with self._lock:
+            self._pending.append(request)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run_forever)
+                self._worker.daemon = True
+                self._worker.start()
+
+    def _next_batch(self):
+        time.sleep(CONF.ansible.batch_window)
+        batch = []
+        deferred = []
+        with self._lock:
+            while self._pending and len(batch) < CONF.ansible.batch_max_size:
+                request = self._pending.popleft()
+                if any(r.node_uuid == request.node_uuid for r in batch):
+                    deferred.append(request)
+                else:
+                    batch.append(request)
+            self._pending.extendleft(reversed(deferred))
+            if not batch:
+                self._worker = None
+        return batch
+
+    def _run_forever(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                self.run_batch(batch)
+            except Exception as e:
+                LOG.exception('Unexpected error when running playbook '
+                              '%(playbook)s for nodes %(nodes)s',
+                              {'playbook': self.playbook,
+                               'nodes': [r.node_uuid for r in batch]})
+                for request in batch:
+                    request.finish(six.text_type(e))
+
+    def run_batch(self, batch):
+        """Run the playbook once for all requests in the batch.
+
+        :param batch: a list of :class:`HostRequest` objects.
+        """
+        LOG.debug('Running playbook %(playbook)s for %(count)d node(s): '
+                  '%(nodes)s', {'playbook': self.playbook,
+                                'count': len(batch),
+                                'nodes': [r.node_uuid for r in batch]})
+        with utils.tempdir(prefix='ansible-batch-') as tmpdir:
+            inventory = os.path.join(tmpdir, 'inventory.yaml')
+            events_file = os.path.join(tmpdir, 'events')
+            utils.write_to_file(
+                inventory, yaml.safe_dump(build_inventory(batch),
+                                          default_flow_style=False))
+            utils.write_to_file(events_file, '')
+            args = build_command(self.playbook, inventory,
+                                 tags=self.tags, notags=self.notags,
+                                 env=['%s=%s' % (EVENTS_FILE_ENV,
+                                                 events_file)])
+            outcome = {}
+
+            def _execute():
+                try:
+                    utils.execute(*args)
+                except Exception as e:
+                    outcome['error'] = e
+
+            process = threading.Thread(target=_execute)
+            process.start()
+            reader = EventReader(events_file)
+            pending = dict((r.node_uuid, r) for r in batch)
+            finished = set()
+            while True:
+                alive = process.is_alive()
+                for event in reader.read():
+                    self._handle_event(event, pending, finished)
+                if not alive:
+                    break
+                process.join(_EVENTS_POLL_INTERVAL)
+
+        for node_uuid, request in pending.items():
+            if request.done:
+                continue
+            if node_uuid in finished:
+                request.finish()
+            else:
+                error = outcome.get('error') or _(
+                    'ansible-playbook did not report a result for the node')
+                request.finish(six.text_type(error))
+
+    def _handle_event(self, event, pending, finished):
+        request = pending.get(event.get('host'))
+        if request is None or request.done:
+            return
+        kind = event.get('event')
+        if kind == 'unreachable' or (kind == 'failed' and
+                                     not event.get('ignore_errors')):
+            request.finish(_('Ansible task %(task)s %(kind)s: %(msg)s') % {
+                'task': event.get('task'), 'kind': kind,
+                'msg': event.get('msg')})
+        elif kind == 'stats':
+            if event.get('failures') or event.get('unreachable'):
+                request.finish(_('Ansible reported %(failures)s failed and '
+                                 '%(unreachable)s unreachable tasks') % event)
+            else:
+                finished.add(request.node_uuid)
+
+
+def get_runner(playbook, tags=None, notags=None):
+    """Get the shared runner for a playbook and set of tags."""
+    key = (playbook, tuple(tags or ()), tuple(notags or ()))
+    with _RUNNERS_LOCK:
+        runner = _RUNNERS.get(key)
+        if runner is None:
+            runner = _RUNNERS[key] = PlaybookRunner(playbook, tags=tags,
+                                                    notags=notags)
+    return runner
+
+
+def run_batched(node, playbook, extra_vars, key, tags=None, notags=None):
+    """Run a playbook for a node as a part of a batched run.
+
+    Blocks until the result for this node is known.
+
+    :param node: the node to run the playbook for.
+    :param playbook: full path to the playbook to run.
+    :param extra_vars: the ``ironic`` variables for this node, containing
+        a single node entry in the ``nodes`` list.
+    :param key: optional private SSH key file for this node.
+    :param tags: optional list of tags to run.
+    :param notags: optional list of tags to skip.
+    :raises: InstanceDeployFailure if the playbook failed for the node.
+    """
+    node_var = extra_vars['nodes'][0]
+    host_vars = {'ansible_host': node_var['ip'],
+                 'ansible_user': node_var['user'],
+                 'ironic_extra': node_var.get('extra') or {},
+                 'ironic': extra_vars}
+    if key:
+        host_vars['ansible_ssh_private_key_file'] = key
+    request = HostRequest(node.uuid, host_vars)
+    get_runner(playbook, tags=tags, notags=notags).submit(request)
+    request.wait()
+
+
+def run_playbook(playbook, inventory, extra_vars, key, tags=None,
+                 notags=None):
+    """Run a playbook in a separate ansible-playbook process.
+
+    :raises: InstanceDeployFailure if the playbook failed.
+    :returns: a tuple with stdout and stderr of the process.
+    """
+    args = build_command(playbook, inventory, extra_vars=extra_vars,
+                         key=key, tags=tags, notags=notags)
+    try:
+        out, err = utils.execute(*args)
+        return out, err
+    except processutils.ProcessExecutionError as e:
+        raise exception.InstanceDeployFailure(reason=e)
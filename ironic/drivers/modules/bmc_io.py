@@ -0,0 +1,117 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Shared I/O layer for requests to BMCs and other management controllers.
+
+Hardware interfaces wrap their BMC requests with :func:`limit`, which bounds
+the number of requests in flight, both for the whole conductor and for every
+single BMC address. Requests themselves are expected to use non-blocking
+(green) sockets, so that a waiting request only costs a green thread.
+"""
+
+import contextlib
+import threading
+
+from oslo_log import log
+
+from ironic.conf import CONF
+
+
+LOG = log.getLogger(__name__)
+
+
+class RequestLimiter(object):
+    """Limits the number of concurrent requests to BMCs.
+
+    :param max_in_flight: maximum number of requests in flight for all BMCs,
+        0 for no limit.
+    :param max_per_bmc: maximum number of requests in flight for a single
+        BMC address, 0 for no limit.
+    """
+
+    def __init__(self, max_in_flight=0, max_per_bmc=0):
+        self.max_in_flight = max_in_flight
+        self.max_per_bmc = max_per_bmc
+        self._global = (threading.Semaphore(max_in_flight)
+                        if max_in_flight else None)
+        self._lock = threading.Lock()
+        # address -> [semaphore, number of users]
+        self._per_bmc = {}
+        self.in_flight = 0
+
+    def _get_bmc_semaphore(self, address):
+        with self._lock:
+            entry = self._per_bmc.get(address)
+            if entry is None:
+                entry = self._per_bmc[address] = [
+                    threading.Semaphore(self.max_per_bmc), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _put_bmc_semaphore(self, address):
+        with self._lock:
+            entry = self._per_bmc[address]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._per_bmc[address]
+
+    @contextlib.contextmanager
+    def limit(self, address):
+        """Wait for a free request slot for the BMC at the given address."""
+        bmc_semaphore = None
+        if self.max_per_bmc:
+            bmc_semaphore = self._get_bmc_semaphore(address)
+        try:
+            # NOTE: take the per-BMC slot first, so that requests
+            # queued for a busy BMC do not hold global slots
+            if bmc_semaphore is not None:
+                bmc_semaphore.acquire()
+            try:
+                if self._global is not None:
+                    self._global.acquire()
+                self.in_flight += 1
+                try:
+                    yield
+                finally:
+                    self.in_flight -= 1
+                    if self._global is not None:
+                        self._global.release()
+            finally:
+                if bmc_semaphore is not None:
+                    bmc_semaphore.release()
+        finally:
+            if bmc_semaphore is not None:
+                self._put_bmc_semaphore(address)
+
+
+_LIMITER = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_limiter():
+    """Get the request limiter shared by all hardware interfaces."""
+    global _LIMITER
+    with _LIMITER_LOCK:
+        if _LIMITER is None:
+            _LIMITER = RequestLimiter(
+                CONF.conductor.max_concurrent_bmc_requests,
+                CONF.conductor.max_concurrent_requests_per_bmc)
+        return _LIMITER
+
+
+def limit(address):
+    """Context manager waiting for a free request slot for a BMC.
+
+    :param address: the BMC address, used to limit per-BMC concurrency.
+    """
+    return get_limiter().limit(address)
@@ -0,0 +1,464 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Serial console proxy for all the nodes of a conductor.
+
+Instead of one ``socat`` daemon listening on its own port for every node, a
+single listener in the conductor accepts the console connections of all the
+nodes. A client first sends the routing token of a node, which is the path
+of the console URL, followed by a newline, and is then connected to the
+console of the node. The console command (for example
+``ipmitool sol activate``) is only started when a client connects, and is
+stopped once no client has been connected for
+``[console]proxy_idle_timeout`` seconds.
+"""
+
+import binascii
+import os
+import shlex
+import socket
+import threading
+import time
+
+import eventlet
+from eventlet.green import os as green_os
+from eventlet.green import subprocess
+from oslo_concurrency import lockutils
+from oslo_log import log as logging
+from oslo_utils import netutils
+
+from ironic.common import exception
+from ironic.common.i18n import _
+from ironic.conf import CONF
+
+
+LOG = logging.getLogger(__name__)
+
+# The time given to a client to send a routing token, in seconds
+TOKEN_TIMEOUT = 10
+# The interval between two checks for idle sessions, in seconds
+REAP_INTERVAL = 5
+
+# The type of the consoles served by the proxy. It differs from "socat",
+# since the clients of socat consoles do not send a token.
+CONSOLE_TYPE = 'proxy'
+
+_TOKEN_MAX_LENGTH = 128
+_BUFFER_SIZE = 4096
+
+_PROXY = None
+
+
+class _Session(object):
+    """The console of a node registered with the proxy."""
+
+    def __init__(self, node_uuid, command, token):
+        self.node_uuid = node_uuid
+        self.command = command
+        self.token = token
+        self.process = None
+        self.client = None
+        self.last_activity = time.time()
+
+
+class ConsoleProxy(object):
+    """Multiplexes the consoles of the nodes behind one listener.
+
+    :param host: the address to listen on.
+    :param port: the port to listen on, 0 to pick a free one.
+    :param idle_timeout: the time in seconds after which the console
+        command of a node without client is stopped.
+    :param client_timeout: the time in seconds after which a client that
+        did not send anything is disconnected, 0 to never disconnect it.
+    """
+
+    def __init__(self, host, port, idle_timeout=600, client_timeout=0):
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.client_timeout = client_timeout
+        self._lock = threading.Lock()
+        # node UUID -> session
+        self._sessions = {}
+        # token -> session
+        self._tokens = {}
+        self._server = None
+
+    def start(self):
+        """Start listening for console connections.
+
+        :raises: ConsoleError if the proxy cannot listen on its address.
+        """
+        family = (socket.AF_INET6 if netutils.is_valid_ipv6(self.host)
+                  else socket.AF_INET)
+        try:
+            self._server = eventlet.listen((self.host, self.port),
+                                           family=family)
+        except socket.error as e:
+            raise exception.ConsoleError(
+                _('Cannot listen on %(host)s:%(port)s for console '
+                  'connections: %(error)s') %
+                {'host': self.host, 'port': self.port, 'error': e})
+        self.port = self._server.getsockname()[1]
+        eventlet.spawn_n(self._serve, self._server)
+        eventlet.spawn_n(self._reap_periodically, self._server)
+        LOG.info('Console proxy listening on %(host)s:%(port)s',
+                 {'host': self.host, 'port': self.port})
+
+    def stop(self):
+        """Stop listening and close all the consoles."""
+        with self._lock:
+            server, self._server = self._server, None
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._tokens.clear()
+        if server is not None:
+            server.close()
+        for session in sessions:
+            self._close(session)
+
+    def register(self, node_uuid, command):
+        """Register the console of a node.
+
+        Registering a node again closes its previous console and
+        invalidates its previous token.
+
+        :param node_uuid: the UUID of the node.
+        :param command: the command connecting to the console of the node.
+        :returns: the routing token of the node.
+        """
+        token = binascii.hexlify(os.urandom(16)).decode('ascii')
+        session = _Session(node_uuid, command, token)
+        with self._lock:
+            old = self._sessions.get(node_uuid)
+            if old is not None:
+                del self._tokens[old.token]
+            self._sessions[node_uuid] = session
+            self._tokens[token] = session
+        if old is not None:
+            self._close(old)
+        return token
+
+    def unregister(self, node_uuid):
+        """Unregister the console of a node, closing it.
+
+        :param node_uuid: the UUID of the node.
+        :returns: False if the node was not registered, True otherwise.
+        """
+        with self._lock:
+            session = self._sessions.pop(node_uuid, None)
+            if session is not None:
+                del self._tokens[session.token]
+        if session is None:
+            return False
+        self._close(session)
+        return True
+
+    def get_url(self, node_uuid):
+        """Get the URL of the console of a node.
+
+        :param node_uuid: the UUID of the node.
+        :returns: the URL, None if the node is not registered.
+        """
+        with self._lock:
+            session = self._sessions.get(node_uuid)
+            if session is None:
+                return None
+            token = session.token
+
+        host = self.host
+        if netutils.is_valid_ipv6(host):
+            host = '[%s]' % host
+        return 'tcp://%(host)s:%(port)s/%(token)s' % {
+            'host': host, 'port': self.port, 'token': token}
+
+    def reap(self, now=None):
+        """Disconnect idle clients and stop idle console commands.
+
+        :param now: the current time, defaults to time.time().
+        """
+        now = now or time.time()
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            idle = now - session.last_activity
+            client = session.client
+            if client is not None:
+                if self.client_timeout and idle > self.client_timeout:
+                    LOG.info('Disconnecting the idle console client of '
+                             'node %s', session.node_uuid)
+                    _shutdown_socket(client)
+            elif session.process is not None and idle > self.idle_timeout:
+                LOG.debug('Stopping the idle console of node %s',
+                          session.node_uuid)
+                self._stop_process(session)
+
+    def _reap_periodically(self, server):
+        while self._server is server:
+            eventlet.sleep(REAP_INTERVAL)
+            try:
+                self.reap()
+            except Exception:
+                LOG.exception('Failed to reap idle console sessions')
+
+    def _serve(self, server):
+        while True:
+            try:
+                client, address = server.accept()
+            except Exception:
+                if self._server is not server:
+                    return
+                LOG.exception('Failed to accept a console connection')
+                continue
+            eventlet.spawn_n(self._handle, client, address)
+
+    def _read_token(self, client):
+        """Read the routing token sent by a client.
+
+        :returns: a tuple (token, data received after the token).
+        """
+        client.settimeout(TOKEN_TIMEOUT)
+        data = b''
+        while b'\n' not in data:
+            if len(data) > _TOKEN_MAX_LENGTH:
+                return None, b''
+            chunk = client.recv(_TOKEN_MAX_LENGTH)
+            if not chunk:
+                return None, b''
+            data += chunk
+        client.settimeout(None)
+        token, rest = data.split(b'\n', 1)
+        return token.strip().decode('ascii', 'replace'), rest
+
+    def _handle(self, client, address):
+        try:
+            token, data = self._read_token(client)
+        except (socket.error, socket.timeout) as e:
+            LOG.debug('Failed to read the console token from %(addr)s: '
+                      '%(error)s', {'addr': address, 'error': e})
+            _close_socket(client)
+            return
+
+        with self._lock:
+            session = self._tokens.get(token)
+            busy = session is not None and session.client is not None
+            if session is not None and not busy:
+                session.client = client
+                session.last_activity = time.time()
+
+        if session is None:
+            LOG.warning('Rejecting console connection from %s with an '
+                        'invalid token', address)
+            _close_socket(client)
+            return
+        if busy:
+            LOG.warning('Rejecting console connection from %(addr)s, the '
+                        'console of node %(node)s is already in use',
+                        {'addr': address, 'node': session.node_uuid})
+            _close_socket(client)
+            return
+
+        try:
+            process = self._start_process(session)
+        except exception.ConsoleSubprocessFailed as e:
+            LOG.error('Failed to start the console of node %(node)s: '
+                      '%(error)s', {'node': session.node_uuid, 'error': e})
+            self._detach(session, client)
+            return
+
+        self._forward_input(session, process, client, data)
+
+    def _start_process(self, session):
+        process = session.process
+        if process is not None and process.poll() is None:
+            return process
+
+        args = shlex.split(session.command)
+        LOG.debug('Starting the console of node %(node)s: %(cmd)s',
+                  {'node': session.node_uuid, 'cmd': session.command})
+        try:
+            process = subprocess.Popen(args, stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT)
+        except (OSError, ValueError) as e:
+            raise exception.ConsoleSubprocessFailed(
+                error=_("%(exec_error)s\nCommand: %(command)s") %
+                {'exec_error': e, 'command': session.command})
+        session.process = process
+        eventlet.spawn_n(self._forward_output, session, process)
+        return process
+
+    def _forward_input(self, session, process, client, data):
+        """Send the input of a client to its console command.
+
+        :param data: the data received after the token, often empty.
+        """
+        try:
+            while True:
+                if data:
+                    session.last_activity = time.time()
+                    _write_all(process.stdin.fileno(), data)
+                data = client.recv(_BUFFER_SIZE)
+                if not data:
+                    break
+        except (IOError, OSError, ValueError, socket.error) as e:
+            LOG.debug('Console input of node %(node)s closed: %(error)s',
+                      {'node': session.node_uuid, 'error': e})
+        finally:
+            self._detach(session, client)
+
+    def _forward_output(self, session, process):
+        """Send the output of a console command to its client, if any.
+
+        The output is discarded while no client is connected.
+        """
+        while True:
+            try:
+                data = green_os.read(process.stdout.fileno(), _BUFFER_SIZE)
+            except (IOError, OSError, ValueError):
+                data = b''
+            if not data:
+                break
+            client = session.client
+            if client is not None:
+                try:
+                    client.sendall(data)
+                except socket.error as e:
+                    # NOTE: the client is detached by _forward_input
+                    LOG.debug('Console output of node %(node)s closed: '
+                              '%(error)s',
+                              {'node': session.node_uuid, 'error': e})
+
+        LOG.info('The console command of node %(node)s exited with code '
+                 '%(code)s', {'node': session.node_uuid,
+                              'code': _wait_process(process)})
+        with self._lock:
+            exited = session.process is process
+            if exited:
+                session.process = None
+            client = session.client
+        if exited and client is not None:
+            # NOTE: unblocks _forward_input waiting for the client
+            _shutdown_socket(client)
+
+    def _detach(self, session, client):
+        with self._lock:
+            if session.client is client:
+                session.client = None
+                session.last_activity = time.time()
+        _close_socket(client)
+
+    def _stop_process(self, session):
+        with self._lock:
+            process, session.process = session.process, None
+        if process is not None and process.poll() is None:
+            # NOTE: _forward_output collects the exit status
+            process.terminate()
+
+    def _close(self, session):
+        client = session.client
+        if client is not None:
+            _shutdown_socket(client)
+        self._stop_process(session)
+
+
+def _wait_process(process):
+    """Wait for a console command to exit and close its pipes."""
+    code = process.wait()
+    process.stdin.close()
+    process.stdout.close()
+    return code
+
+
+def _write_all(fd, data):
+    while data:
+        written = green_os.write(fd, data)
+        data = data[written:]
+
+
+def _shutdown_socket(sock):
+    """Shut a socket down, waking up the thread receiving from it."""
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except socket.error:
+        pass
+
+
+def _close_socket(sock):
+    _shutdown_socket(sock)
+    sock.close()
+
+
+@lockutils.synchronized('console_proxy')
+def get_proxy():
+    """Get the console proxy of the conductor, starting it if needed.
+
+    :raises: ConsoleError if the proxy cannot listen on its address.
+    """
+    global _PROXY
+    if _PROXY is None:
+        proxy = ConsoleProxy(CONF.console.socat_address,
+                             CONF.console.proxy_port,
+                             idle_timeout=CONF.console.proxy_idle_timeout,
+                             client_timeout=CONF.console.terminal_timeout)
+        proxy.start()
+        _PROXY = proxy
+    return _PROXY
+
+
+def start_console(node_uuid, port, console_cmd):
+    """Make the console of a node available through the proxy.
+
+    The console command is only started when a client connects.
+
+    :param node_uuid: the UUID of the node.
+    :param port: ignored, the proxy listens on ``[console]proxy_port`` for
+        all the nodes.
+    :param console_cmd: the command connecting to the console of the node.
+    :raises: ConsoleError if the proxy cannot listen on its address.
+    """
+    get_proxy().register(node_uuid, console_cmd)
+
+
+def stop_console(node_uuid):
+    """Close the console of a node.
+
+    :param node_uuid: the UUID of the node.
+    """
+    if _PROXY is None or not _PROXY.unregister(node_uuid):
+        LOG.warning("No proxied console found for node %s while trying to "
+                    "stop it.", node_uuid)
+
+
+def get_console_url(node_uuid):
+    """Get the URL of the console of a node.
+
+    :param node_uuid: the UUID of the node.
+    :raises: ConsoleError if the console of the node is not started.
+    :returns: an access URL to the console of the node, the path of which
+        is the token to send to the proxy.
+    """
+    url = _PROXY.get_url(node_uuid) if _PROXY is not None else None
+    if url is None:
+        raise exception.ConsoleError(
+            _('The console of node %s is not started on this conductor') %
+            node_uuid)
+    return url
+
+
+def stop():
+    """Stop the console proxy, if any, closing all the consoles."""
+    global _PROXY
+    proxy, _PROXY = _PROXY, None
+    if proxy is not None:
+        proxy.stop()
@@ -21,7 +21,6 @@ import re
 import time
 
 from ironic_lib import disk_utils
-from ironic_lib import metrics_utils
 from ironic_lib import utils as il_utils
 from oslo_concurrency import processutils
 from oslo_log import log as logging
@@ -36,6 +35,7 @@ from ironic.common.glance_service import service_utils
 from ironic.common.i18n import _
 from ironic.common import image_service
 from ironic.common import keystone
+from ironic.common import metrics
 from ironic.common import states
 from ironic.common import utils
 from ironic.conductor import utils as manager_utils
@@ -57,7 +57,7 @@ if CONF.rootwrap_config != '/etc/ironic/rootwrap.conf':
 
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 SUPPORTED_CAPABILITIES = {
     'boot_option': ('local', 'netboot', 'ramdisk'),
@@ -15,13 +15,13 @@
 DRAC inspection interface
 """
 
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import importutils
 from oslo_utils import units
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import states
 from ironic.drivers import base
 from ironic.drivers.modules.drac import common as drac_common
@@ -31,7 +31,7 @@ drac_exceptions = importutils.try_import('dracclient.exceptions')
 
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 
 class DracInspect(base.InspectInterface):
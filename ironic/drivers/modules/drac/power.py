@@ -15,11 +15,11 @@
 DRAC power interface
 """
 
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import importutils
 
 from ironic.common import exception
+from ironic.common import metrics
 from ironic.common import states
 from ironic.conductor import task_manager
 from ironic.drivers import base
@@ -31,7 +31,7 @@ drac_exceptions = importutils.try_import('dracclient.exceptions')
 
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 if drac_constants:
     POWER_STATES = {
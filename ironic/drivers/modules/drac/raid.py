@@ -18,13 +18,13 @@ DRAC RAID specific methods
 import math
 
 from futurist import periodics
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import importutils
 from oslo_utils import units
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import raid as raid_common
 from ironic.common import states
 from ironic.conductor import task_manager
@@ -38,7 +38,7 @@ drac_exceptions = importutils.try_import('dracclient.exceptions')
 
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 RAID_LEVELS = {
     '0': {
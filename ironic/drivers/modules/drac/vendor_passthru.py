@@ -15,16 +15,15 @@
 DRAC vendor-passthru interface
 """
 
-from ironic_lib import metrics_utils
-
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.conductor import task_manager
 from ironic.drivers import base
 from ironic.drivers.modules.drac import bios as drac_bios
 from ironic.drivers.modules.drac import common as drac_common
 from ironic.drivers.modules.drac import job as drac_job
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 
 class DracVendorPassthru(base.VendorInterface):
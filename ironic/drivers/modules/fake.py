@@ -22,14 +22,22 @@ load more than one interface and wrap them in some logic to route incoming
 vendor_passthru requests appropriately. This can be useful eg. when mixing
 functionality between a power interface and a deploy interface, when both rely
 on separate vendor_passthru methods.
+
+The power, boot, deploy and management interfaces can also simulate the
+latency and failures of slow or flaky hardware, see the ``[fake]``
+configuration options.
 """
 
+import random
+import time
+
 from oslo_log import log
 
 from ironic.common import boot_devices
 from ironic.common import exception
 from ironic.common.i18n import _
 from ironic.common import states
+from ironic.conf import CONF
 from ironic.drivers import base
 from ironic import objects
 
@@ -37,6 +45,101 @@ from ironic import objects
 LOG = log.getLogger(__name__)
 
 
+def _get_setting(node, interface, setting):
+    name = '%s_%s' % (interface, setting)
+    if node is not None:
+        value = node.driver_info.get('fake_%s' % name)
+        if value is not None:
+            return 'fake_%s' % name, value
+    return '[fake]%s' % name, getattr(CONF.fake, name)
+
+
+def _parse_delay(node, interface):
+    """Parse the delay of the operations of an interface.
+
+    :returns: a tuple (MIN, MAX) of the range of the delay in seconds.
+    :raises: InvalidParameterValue if the delay is invalid.
+    """
+    name, value = _get_setting(node, interface, 'delay')
+    try:
+        delay = [float(part) for part in str(value).split(':')]
+    except ValueError:
+        delay = []
+    if len(delay) == 1:
+        delay *= 2
+    if len(delay) != 2 or not 0 <= delay[0] <= delay[1]:
+        raise exception.InvalidParameterValue(
+            _('%(name)s must be a non-negative number of seconds or a range '
+              'MIN:MAX, got %(value)s') % {'name': name, 'value': value})
+    return tuple(delay)
+
+
+def _parse_rate(node, interface, setting):
+    """Parse a probability of a simulated failure.
+
+    :raises: InvalidParameterValue if the rate is invalid.
+    """
+    name, value = _get_setting(node, interface, setting)
+    try:
+        rate = float(value)
+    except (TypeError, ValueError):
+        rate = -1
+    if not 0 <= rate <= 1:
+        raise exception.InvalidParameterValue(
+            _('%(name)s must be a number between 0 and 1, got %(value)s') %
+            {'name': name, 'value': value})
+    return rate
+
+
+def _validate_simulation(task, interface):
+    """Validate the simulated latency and failures of an interface."""
+    node = task.node if task is not None else None
+    _parse_delay(node, interface)
+    _parse_rate(node, interface, 'failure_rate')
+    _parse_rate(node, interface, 'stuck_rate')
+
+
+def _simulate(task, interface, operation):
+    """Simulate the latency and failures of a BMC.
+
+    Sleeps for the configured delay of the interface, and fails or gets
+    stuck with the configured probabilities. Does nothing by default.
+
+    :param task: a TaskManager instance, or None.
+    :param interface: the name of the interface, e.g. "power".
+    :param operation: the name of the operation, for the error messages.
+    :raises: DriverOperationError on a simulated failure.
+    :raises: InvalidParameterValue if the settings are invalid.
+    """
+    node = task.node if task is not None else None
+    low, high = _parse_delay(node, interface)
+    failure_rate = _parse_rate(node, interface, 'failure_rate')
+    stuck_rate = _parse_rate(node, interface, 'stuck_rate')
+    driver = node.driver if node is not None else 'fake'
+
+    if stuck_rate and random.random() < stuck_rate:
+        LOG.debug('Simulating a stuck %(op)s operation of the fake '
+                  '%(iface)s interface for node %(node)s',
+                  {'op': operation, 'iface': interface,
+                   'node': node.uuid if node is not None else None})
+        time.sleep(CONF.fake.stuck_duration)
+        raise exception.DriverOperationError(
+            driver=driver,
+            reason=_('simulated stuck %(op)s operation of the fake '
+                     '%(iface)s interface') %
+            {'op': operation, 'iface': interface})
+
+    if high:
+        time.sleep(random.uniform(low, high))
+
+    if failure_rate and random.random() < failure_rate:
+        raise exception.DriverOperationError(
+            driver=driver,
+            reason=_('simulated failure of the %(op)s operation of the '
+                     'fake %(iface)s interface') %
+            {'op': operation, 'iface': interface})
+
+
 class FakePower(base.PowerInterface):
     """Example implementation of a simple power interface."""
 
@@ -44,13 +147,14 @@ class FakePower(base.PowerInterface):
         return {}
 
     def validate(self, task):
-        pass
+        _validate_simulation(task, 'power')
 
     def get_power_state(self, task):
+        _simulate(task, 'power', 'get_power_state')
         return task.node.power_state
 
     def reboot(self, task, timeout=None):
-        pass
+        _simulate(task, 'power', 'reboot')
 
     def set_power_state(self, task, power_state, timeout=None):
         if power_state not in [states.POWER_ON, states.POWER_OFF,
@@ -58,6 +162,7 @@ class FakePower(base.PowerInterface):
             raise exception.InvalidParameterValue(
                 _("set_power_state called with an invalid power "
                   "state: %s.") % power_state)
+        _simulate(task, 'power', 'set_power_state')
         task.node.power_state = power_state
 
     def get_supported_power_states(self, task):
@@ -76,19 +181,19 @@ class FakeBoot(base.BootInterface):
         return {}
 
     def validate(self, task):
-        pass
+        _validate_simulation(task, 'boot')
 
     def prepare_ramdisk(self, task, ramdisk_params, mode='deploy'):
-        pass
+        _simulate(task, 'boot', 'prepare_ramdisk')
 
     def clean_up_ramdisk(self, task, mode='deploy'):
-        pass
+        _simulate(task, 'boot', 'clean_up_ramdisk')
 
     def prepare_instance(self, task):
-        pass
+        _simulate(task, 'boot', 'prepare_instance')
 
     def clean_up_instance(self, task):
-        pass
+        _simulate(task, 'boot', 'clean_up_instance')
 
 
 class FakeDeploy(base.DeployInterface):
@@ -102,23 +207,25 @@ class FakeDeploy(base.DeployInterface):
         return {}
 
     def validate(self, task):
-        pass
+        _validate_simulation(task, 'deploy')
 
     @base.deploy_step(priority=100)
     def deploy(self, task):
+        _simulate(task, 'deploy', 'deploy')
         return None
 
     def tear_down(self, task):
+        _simulate(task, 'deploy', 'tear_down')
         return states.DELETED
 
     def prepare(self, task):
-        pass
+        _simulate(task, 'deploy', 'prepare')
 
     def clean_up(self, task):
-        pass
+        _simulate(task, 'deploy', 'clean_up')
 
     def take_over(self, task):
-        pass
+        _simulate(task, 'deploy', 'take_over')
 
 
 class FakeVendorA(base.VendorInterface):
@@ -204,6 +311,7 @@ class FakeManagement(base.ManagementInterface):
             LOG.warning('Using "fake" management with "snmp" hardware type '
                         'is deprecated, use "noop" instead for node %s',
                         task.node.uuid)
+        _validate_simulation(task, 'management')
 
     def get_supported_boot_devices(self, task):
         return [boot_devices.PXE]
@@ -212,11 +320,14 @@ class FakeManagement(base.ManagementInterface):
         if device not in self.get_supported_boot_devices(task):
             raise exception.InvalidParameterValue(_(
                 "Invalid boot device %s specified.") % device)
+        _simulate(task, 'management', 'set_boot_device')
 
     def get_boot_device(self, task):
+        _simulate(task, 'management', 'get_boot_device')
         return {'boot_device': boot_devices.PXE, 'persistent': False}
 
     def get_sensors_data(self, task):
+        _simulate(task, 'management', 'get_sensors_data')
         return {}
 
 
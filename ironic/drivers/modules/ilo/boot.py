@@ -18,7 +18,6 @@ Boot Interface for iLO drivers and its supporting methods.
 import os
 import tempfile
 
-from ironic_lib import metrics_utils
 from ironic_lib import utils as ironic_utils
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -31,6 +30,7 @@ from ironic.common.glance_service import service_utils
 from ironic.common.i18n import _
 from ironic.common import image_service
 from ironic.common import images
+from ironic.common import metrics
 from ironic.common import states
 from ironic.common import swift
 from ironic.conductor import utils as manager_utils
@@ -42,7 +42,7 @@ from ironic.drivers.modules import pxe
 
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 CONF = cfg.CONF
 
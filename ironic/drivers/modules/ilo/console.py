@@ -15,14 +15,13 @@
 iLO Deploy Driver(s) and supporting methods.
 """
 
-from ironic_lib import metrics_utils
-
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.drivers.modules.ilo import common as ilo_common
 from ironic.drivers.modules import ipmitool
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 
 class IloConsoleInterface(ipmitool.IPMIShellinaboxConsole):
@@ -12,12 +12,12 @@
 """
 iLO Inspect Interface
 """
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import importutils
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import states
 from ironic.common import utils
 from ironic.conductor import utils as conductor_utils
@@ -29,7 +29,7 @@ ilo_error = importutils.try_import('proliantutils.exception')
 
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 CAPABILITIES_KEYS = {'secure_boot', 'rom_firmware_version',
                      'ilo_firmware_version', 'server_model',
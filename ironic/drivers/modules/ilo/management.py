@@ -15,7 +15,6 @@
 iLO Management Interface
 """
 
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import excutils
 from oslo_utils import importutils
@@ -25,6 +24,7 @@ import six.moves.urllib.parse as urlparse
 from ironic.common import boot_devices
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.conductor import task_manager
 from ironic.conf import CONF
 from ironic.drivers import base
@@ -38,7 +38,7 @@ from ironic.objects import volume_target
 
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 ilo_error = importutils.try_import('proliantutils.exception')
 
@@ -16,12 +16,12 @@
 iLO5 RAID specific methods
 """
 
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import importutils
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import raid
 from ironic.common import states
 from ironic.conductor import utils as manager_utils
@@ -33,7 +33,7 @@ from ironic.drivers.modules.ilo import common as ilo_common
 
 LOG = logging.getLogger(__name__)
 CONF = conf.CONF
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 ilo_error = importutils.try_import('proliantutils.exception')
 
@@ -37,7 +37,6 @@ import subprocess
 import tempfile
 import time
 
-from ironic_lib import metrics_utils
 from ironic_lib import utils as ironic_utils
 from oslo_concurrency import processutils
 from oslo_log import log as logging
@@ -48,6 +47,7 @@ import six
 from ironic.common import boot_devices
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import states
 from ironic.common import utils
 from ironic.conductor import task_manager
@@ -55,13 +55,14 @@ from ironic.conductor import utils as cond_utils
 from ironic.conf import CONF
 from ironic.drivers import base
 from ironic.drivers.modules import boot_mode_utils
+from ironic.drivers.modules import console_proxy
 from ironic.drivers.modules import console_utils
 from ironic.drivers import utils as driver_utils
 
 
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 VALID_PRIV_LEVELS = ['ADMINISTRATOR', 'CALLBACK', 'OPERATOR', 'USER']
 
@@ -1424,3 +1425,77 @@ class IPMISocatConsole(IPMIConsole):
         driver_info = _parse_driver_info(task.node)
         url = console_utils.get_socat_console_url(driver_info['port'])
         return {'type': 'socat', 'url': url}
+
+
+class IPMIProxyConsole(IPMISocatConsole):
+    """A ConsoleInterface that uses ipmitool and the conductor console proxy.
+
+    The consoles of all the nodes are served by a single listener of the
+    conductor, on the ``[console]proxy_port`` port, and ``ipmitool sol
+    activate`` is only run while a client is connected to the console.
+    """
+
+    def get_properties(self):
+        # NOTE: ipmi_terminal_port is not used, the proxy listens on
+        # [console]proxy_port for all the nodes
+        return COMMON_PROPERTIES.copy()
+
+    @METRICS.timer('IPMIProxyConsole.validate')
+    def validate(self, task):
+        """Validate the Node console info.
+
+        :param task: a task from TaskManager.
+        :raises: InvalidParameterValue
+        :raises: MissingParameterValue when a required parameter is missing
+        """
+        driver_info = _parse_driver_info(task.node)
+        if driver_info['protocol_version'] != '2.0':
+            raise exception.InvalidParameterValue(_(
+                "Serial over lan only works with IPMI protocol version 2.0. "
+                "Check the 'ipmi_protocol_version' parameter in "
+                "node's driver_info"))
+
+    @METRICS.timer('IPMIProxyConsole.start_console')
+    def start_console(self, task):
+        """Make the remote console of the node available through the proxy.
+
+        :param task: a task from TaskManager
+        :raises: InvalidParameterValue if required ipmi parameters are missing
+        :raises: PasswordFileFailedToCreate if unable to create a file
+                 containing the password
+        :raises: ConsoleError if the console proxy cannot be started
+        """
+        driver_info = _parse_driver_info(task.node)
+        try:
+            self._exec_stop_console(driver_info)
+        except OSError:
+            # We need to drop any existing sol sessions with sol deactivate.
+            # OSError is raised when sol session is already deactivated,
+            # so we can ignore it.
+            pass
+        self._start_console(driver_info, console_proxy.start_console)
+
+    @METRICS.timer('IPMIProxyConsole.stop_console')
+    def stop_console(self, task):
+        """Stop the remote console session for the node.
+
+        :param task: a task from TaskManager
+        :raises: ConsoleError if unable to stop the console
+        """
+        driver_info = _parse_driver_info(task.node)
+        try:
+            console_proxy.stop_console(task.node.uuid)
+        finally:
+            ironic_utils.unlink_without_raise(
+                _console_pwfile_path(task.node.uuid))
+        self._exec_stop_console(driver_info)
+
+    @METRICS.timer('IPMIProxyConsole.get_console')
+    def get_console(self, task):
+        """Get the type and connection information about the console.
+
+        :param task: a task from TaskManager
+        :raises: ConsoleError if the console is not started on this conductor
+        """
+        url = console_proxy.get_console_url(task.node.uuid)
+        return {'type': console_proxy.CONSOLE_TYPE, 'url': url}
@@ -15,11 +15,11 @@
 """
 iRMC BIOS configuration specific methods
 """
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import importutils
 
 from ironic.common import exception
+from ironic.common import metrics
 from ironic.drivers import base
 from ironic.drivers.modules.irmc import common as irmc_common
 from ironic import objects
@@ -29,7 +29,7 @@ irmc = importutils.try_import('scciclient.irmc')
 
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 
 class IRMCBIOS(base.BIOSInterface):
@@ -15,13 +15,13 @@
 iRMC Management Driver
 """
 
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import importutils
 
 from ironic.common import boot_devices
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import states
 from ironic.conductor import task_manager
 from ironic.conductor import utils as manager_utils
@@ -36,7 +36,7 @@ irmc = importutils.try_import('scciclient.irmc')
 LOG = logging.getLogger(__name__)
 CONF = conf.CONF
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 # Boot Option Parameters #5 Data2 defined in
 # Set/Get System Boot Options Command, IPMI spec v2.0.
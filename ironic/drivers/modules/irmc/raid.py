@@ -16,12 +16,12 @@
 Irmc RAID specific methods
 """
 from futurist import periodics
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import importutils
 import six
 
 from ironic.common import exception
+from ironic.common import metrics
 from ironic.common import raid as raid_common
 from ironic.common import states
 from ironic.conductor import task_manager
@@ -35,7 +35,7 @@ client = importutils.try_import('scciclient.irmc')
 LOG = logging.getLogger(__name__)
 CONF = conf.CONF
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 RAID_LEVELS = {
     '0': {
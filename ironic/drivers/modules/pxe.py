@@ -15,7 +15,6 @@
 PXE Boot Interface
 """
 
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import strutils
 
@@ -24,6 +23,7 @@ from ironic.common import dhcp_factory
 from ironic.common import exception
 from ironic.common.glance_service import service_utils
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import pxe_utils
 from ironic.common import states
 from ironic.conductor import task_manager
@@ -37,7 +37,7 @@ from ironic.drivers.modules import pxe_base
 from ironic.drivers import utils as driver_utils
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 COMMON_PROPERTIES = pxe_base.COMMON_PROPERTIES
 
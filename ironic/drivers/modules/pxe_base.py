@@ -13,16 +13,16 @@
 Base PXE Interface Methods
 """
 
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.common import pxe_utils
 from ironic.drivers.modules import deploy_utils
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 REQUIRED_PROPERTIES = {
     'deploy_kernel': _("UUID (from Glance) of the deployment kernel. "
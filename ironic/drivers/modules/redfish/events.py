@@ -0,0 +1,210 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Subscriptions of the nodes to the EventService of their BMCs.
+
+The BMCs send their events to a listener on the conductor, at
+``[redfish]event_listener_url``. The node an event is for is given by the
+context of the subscription, the UUID of the node. The events are only used
+as hints that the power state of a node may have changed (see
+:mod:`ironic.conductor.power_events`): the power state is always read back
+from the BMC, which is why the listener requires no authentication. The
+power state is read at most every ``[conductor]power_event_min_interval``
+seconds per node however many events are received, and the listener binds
+to ``[DEFAULT]my_ip`` by default rather than to all the interfaces.
+"""
+
+import json
+import threading
+
+from oslo_log import log
+from oslo_service import wsgi
+from oslo_utils import importutils
+from oslo_utils import netutils
+from oslo_utils import uuidutils
+import six
+
+from ironic.common import exception
+from ironic.common.i18n import _
+from ironic.conf import CONF
+from ironic.drivers.modules import bmc_io
+from ironic.drivers.modules.redfish import utils as redfish_utils
+
+sushy = importutils.try_import('sushy')
+
+LOG = log.getLogger(__name__)
+
+EVENT_TYPES = ['StatusChange', 'ResourceUpdated', 'Alert']
+
+# Events are small, refuse anything larger
+MAX_EVENT_SIZE = 1024 * 1024
+
+_LISTENER = None
+_LISTENER_LOCK = threading.Lock()
+
+
+def get_listener_url():
+    """Get the URL the BMCs send their events to."""
+    if CONF.redfish.event_listener_url:
+        return CONF.redfish.event_listener_url
+    return 'http://%s:%d/' % (netutils.escape_ipv6(CONF.my_ip),
+                              CONF.redfish.event_listener_port)
+
+
+def _delete_subscriptions(subscriptions, destination, context):
+    """Delete the subscriptions with the given destination and context."""
+    for subscription in subscriptions.get_members():
+        if (subscription.destination == destination
+                and subscription.context == context):
+            subscription.delete()
+
+
+def _manage_subscription(node, subscribe):
+    driver_info = redfish_utils.parse_driver_info(node)
+    destination = get_listener_url()
+    try:
+        with bmc_io.limit(driver_info['address']):
+            with redfish_utils.SessionCache(driver_info) as conn:
+                if not hasattr(conn, 'get_event_service'):
+                    raise exception.RedfishError(
+                        error=_('the installed sushy library does not '
+                                'support the EventService'))
+                subscriptions = conn.get_event_service().subscriptions
+                # NOTE: the subscriptions left behind, e.g. by a previous
+                # run of the conductor, are replaced
+                _delete_subscriptions(subscriptions, destination, node.uuid)
+                if subscribe:
+                    subscriptions.create({'Destination': destination,
+                                          'Context': node.uuid,
+                                          'EventTypes': EVENT_TYPES,
+                                          'Protocol': 'Redfish'})
+    except sushy.exceptions.ConnectionError as e:
+        raise exception.RedfishConnectionError(node=node.uuid, error=e)
+    except sushy.exceptions.SushyError as e:
+        raise exception.RedfishError(error=e)
+
+
+def subscribe(node):
+    """Subscribe a node to the events of its BMC.
+
+    :param node: an Ironic node object.
+    :raises: RedfishConnectionError when it fails to connect to Redfish.
+    :raises: RedfishError if the BMC does not support the EventService or
+        rejects the subscription.
+    :raises: InvalidParameterValue or MissingParameterValue on invalid
+        driver_info.
+    """
+    _manage_subscription(node, subscribe=True)
+    LOG.debug('Subscribed node %(node)s to the events of its BMC, sent to '
+              '%(url)s', {'node': node.uuid, 'url': get_listener_url()})
+
+
+def unsubscribe(node):
+    """Delete the subscription of a node to the events of its BMC.
+
+    :param node: an Ironic node object.
+    :raises: see :func:`subscribe`.
+    """
+    _manage_subscription(node, subscribe=False)
+    LOG.debug('Deleted the subscription of node %s to the events of its '
+              'BMC', node.uuid)
+
+
+def parse_event(body):
+    """Get the UUIDs of the nodes an event is for.
+
+    :param body: the decoded JSON body of an event.
+    :returns: a set of node UUIDs, from the context of the event and of its
+        records.
+    """
+    if not isinstance(body, dict):
+        return set()
+    contexts = [body.get('Context')]
+    records = body.get('Events')
+    if isinstance(records, list):
+        contexts.extend(record.get('Context') for record in records
+                        if isinstance(record, dict))
+    return set(context for context in contexts
+               if isinstance(context, six.string_types)
+               and uuidutils.is_uuid_like(context))
+
+
+class EventListener(object):
+    """WSGI application receiving the events of the BMCs.
+
+    :param callback: a function called with the UUID of every node an
+        event is received for.
+    """
+
+    def __init__(self, callback):
+        self._callback = callback
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') != 'POST':
+            start_response('405 Method Not Allowed',
+                           [('Content-Type', 'text/plain'),
+                            ('Allow', 'POST')])
+            return [b'Only the POST method is allowed\n']
+
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_EVENT_SIZE:
+            start_response('413 Request Entity Too Large',
+                           [('Content-Type', 'text/plain')])
+            return [b'Invalid event size\n']
+
+        try:
+            body = json.loads(
+                environ['wsgi.input'].read(length).decode('utf-8'))
+        except (ValueError, UnicodeDecodeError):
+            start_response('400 Bad Request',
+                           [('Content-Type', 'text/plain')])
+            return [b'Invalid event\n']
+
+        for node_uuid in parse_event(body):
+            self._callback(node_uuid)
+        start_response('204 No Content', [])
+        return []
+
+
+def start_listener(callback):
+    """Start the event listener of this process, if not running yet.
+
+    :param callback: see :class:`EventListener`.
+    """
+    global _LISTENER
+    with _LISTENER_LOCK:
+        if _LISTENER is not None:
+            return
+        server = wsgi.Server(CONF, 'ironic-redfish-events',
+                             EventListener(callback),
+                             host=CONF.redfish.event_listener_host_ip,
+                             port=CONF.redfish.event_listener_port)
+        server.start()
+        _LISTENER = server
+        LOG.info('Listening to the events of the Redfish BMCs on '
+                 '%(host)s:%(port)s',
+                 {'host': CONF.redfish.event_listener_host_ip,
+                  'port': CONF.redfish.event_listener_port})
+
+
+def stop_listener():
+    """Stop the event listener of this process, if running."""
+    global _LISTENER
+    with _LISTENER_LOCK:
+        if _LISTENER is None:
+            return
+        _LISTENER.stop()
+        _LISTENER = None
+        LOG.info('Stopped listening to the events of the Redfish BMCs')
@@ -13,16 +13,21 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from futurist import periodics
 from oslo_log import log
 from oslo_utils import importutils
 
 from ironic.common import exception
 from ironic.common.i18n import _
 from ironic.common import states
+from ironic.conductor import power_events
 from ironic.conductor import task_manager
 from ironic.conductor import utils as cond_utils
+from ironic.conf import CONF
 from ironic.drivers import base
+from ironic.drivers.modules.redfish import events as redfish_events
 from ironic.drivers.modules.redfish import utils as redfish_utils
+from ironic import objects
 
 LOG = log.getLogger(__name__)
 
@@ -64,6 +69,8 @@ class RedfishPower(base.PowerInterface):
             raise exception.DriverLoadError(
                 driver='redfish',
                 reason=_('Unable to import the sushy library'))
+        # UUIDs of the nodes which subscription failed, only logged once
+        self._subscription_failures = set()
 
     def get_properties(self):
         """Return the properties of the interface.
@@ -156,3 +163,67 @@ class RedfishPower(base.PowerInterface):
                   in :mod:`ironic.common.states`.
         """
         return list(SET_POWER_STATE_MAP)
+
+    @periodics.periodic(spacing=CONF.redfish.event_subscription_interval,
+                        enabled=CONF.redfish.event_subscription)
+    def _manage_event_subscriptions(self, manager, context):
+        """Periodic task to subscribe the nodes to the events of their BMCs.
+
+        The nodes mapped to this conductor are subscribed, the subscriptions
+        of the nodes no longer mapped to it are deleted. The nodes which
+        subscription fails are polled, see
+        :mod:`ironic.conductor.power_events`.
+        """
+        redfish_events.start_listener(power_events.POWER_EVENTS.received)
+
+        mapped = set()
+        node_list = manager.iter_nodes(fields=['power_interface'])
+        for (node_uuid, driver, conductor_group,
+             power_interface) in node_list:
+            if power_interface != 'redfish':
+                continue
+            mapped.add(node_uuid)
+            if power_events.POWER_EVENTS.is_subscribed(node_uuid):
+                continue
+            try:
+                with task_manager.acquire(
+                        context, node_uuid, shared=True,
+                        purpose='subscribing to redfish events') as task:
+                    if not isinstance(task.driver.power, RedfishPower):
+                        continue
+                    redfish_events.subscribe(task.node)
+            except exception.NodeNotFound:
+                continue
+            except (exception.RedfishError,
+                    exception.RedfishConnectionError,
+                    exception.InvalidParameterValue,
+                    exception.MissingParameterValue) as e:
+                log_func = (LOG.debug
+                            if node_uuid in self._subscription_failures
+                            else LOG.warning)
+                log_func('Failed to subscribe node %(node)s to the events of '
+                         'its BMC, its power state is polled. Error: '
+                         '%(error)s',
+                         {'node': node_uuid, 'error': e})
+                self._subscription_failures.add(node_uuid)
+                continue
+            self._subscription_failures.discard(node_uuid)
+            power_events.POWER_EVENTS.subscribed(node_uuid)
+
+        self._subscription_failures &= mapped
+        for node_uuid in power_events.POWER_EVENTS.list_subscribed():
+            if node_uuid in mapped:
+                continue
+            power_events.POWER_EVENTS.unsubscribed(node_uuid)
+            try:
+                node = objects.Node.get_by_uuid(context, node_uuid)
+                redfish_events.unsubscribe(node)
+            except exception.NodeNotFound:
+                pass
+            except (exception.RedfishError,
+                    exception.RedfishConnectionError,
+                    exception.InvalidParameterValue,
+                    exception.MissingParameterValue) as e:
+                LOG.debug('Failed to delete the subscription of node '
+                          '%(node)s to the events of its BMC. Error: '
+                          '%(error)s', {'node': node_uuid, 'error': e})
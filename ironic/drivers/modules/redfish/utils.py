@@ -15,6 +15,8 @@
 
 import collections
 import os
+import threading
+import time
 
 from oslo_log import log
 from oslo_utils import excutils
@@ -27,12 +29,16 @@ from six.moves import urllib
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.conf import CONF
+from ironic.drivers.modules import bmc_io
 
 sushy = importutils.try_import('sushy')
 
 LOG = log.getLogger(__name__)
 
+METRICS = metrics.get_metrics_logger(__name__)
+
 REQUIRED_PROPERTIES = {
     'redfish_address': _('The URL address to the Redfish controller. It '
                          'must include the authority portion of the URL. '
@@ -164,7 +170,16 @@ def parse_driver_info(node):
 
 
 class SessionCache(object):
-    """Cache of HTTP sessions credentials"""
+    """Pool of authenticated Redfish connections.
+
+    Connections are shared by all nodes with the same BMC address, user name
+    and CA verification setting. At most ``[redfish]connection_cache_size``
+    connections are kept, the least recently used one is evicted when the
+    pool is full, as well as connections not used for
+    ``[redfish]connection_cache_idle_timeout`` seconds. Evicted connections
+    are logged out of the BMC, so that their Redfish sessions do not count
+    against the session limit of the BMC until they time out.
+    """
     AUTH_CLASSES = {}
     if sushy:
         AUTH_CLASSES.update(
@@ -173,7 +188,13 @@ class SessionCache(object):
             auto=sushy.auth.SessionOrBasicAuth
         )
 
+    # session key -> _Session, the least recently used first
     _sessions = collections.OrderedDict()
+    _lock = threading.Lock()
+    _stats = collections.Counter()
+
+    _Session = collections.namedtuple(
+        '_Session', ['address', 'connection', 'auth', 'last_used'])
 
     def __init__(self, driver_info):
         self._driver_info = driver_info
@@ -183,48 +204,126 @@ class SessionCache(object):
         )
 
     def __enter__(self):
-        try:
-            return self.__class__._sessions[self._session_key]
+        with self._lock:
+            expired = self._expire_idle_sessions()
+            # NOTE: re-inserting keeps the sessions in the LRU order
+            session = self._sessions.pop(self._session_key, None)
+            if session is not None:
+                self._sessions[self._session_key] = session._replace(
+                    last_used=time.time())
+        self._logout(expired)
+
+        if session is not None:
+            self._count('hit')
+            return session.connection
+
+        self._count('miss')
+        auth_type = self._driver_info['auth_type']
+
+        auth_class = self.AUTH_CLASSES[auth_type]
+
+        authenticator = auth_class(
+            username=self._driver_info['username'],
+            password=self._driver_info['password']
+        )
 
-        except KeyError:
-            auth_type = self._driver_info['auth_type']
+        conn = sushy.Sushy(
+            self._driver_info['address'],
+            verify=self._driver_info['verify_ca'],
+            auth=authenticator
+        )
+
+        if CONF.redfish.connection_cache_size:
+            session = self._Session(self._driver_info['address'], conn,
+                                    authenticator, time.time())
+            with self._lock:
+                # NOTE: another thread may have connected to the same
+                # BMC in the meantime, use the session already pooled and
+                # log the new one out so that it does not hold a BMC slot
+                pooled = self._sessions.pop(self._session_key, None)
+                if pooled is not None:
+                    duplicate = session
+                    session = pooled._replace(last_used=time.time())
+                else:
+                    duplicate = None
+                self._sessions[self._session_key] = session
+                evicted = self._expire_oldest_sessions()
+            if duplicate is not None:
+                self._logout([duplicate], event=None)
+            self._logout(evicted)
+            return session.connection
+
+        return conn
 
-            auth_class = self.AUTH_CLASSES[auth_type]
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # NOTE(etingof): perhaps this session token is no good
+        if isinstance(exc_val, sushy.exceptions.ConnectionError):
+            with self._lock:
+                session = self._sessions.pop(self._session_key, None)
+            if session is not None:
+                self._logout([session], event='invalidation')
 
-            authenticator = auth_class(
-                username=self._driver_info['username'],
-                password=self._driver_info['password']
-            )
+    @classmethod
+    def _count(cls, event):
+        cls._stats[event] += 1
+        METRICS.send_counter('SessionCache.%s' % event, 1)
 
-            conn = sushy.Sushy(
-                self._driver_info['address'],
-                verify=self._driver_info['verify_ca'],
-                auth=authenticator
-            )
+    @classmethod
+    def _expire_idle_sessions(cls):
+        """Remove sessions not used for the configured idle timeout.
+
+        Must be called with the lock held.
+
+        :returns: a list of removed sessions.
+        """
+        timeout = CONF.redfish.connection_cache_idle_timeout
+        if not timeout:
+            return []
+        threshold = time.time() - timeout
+        expired = []
+        for session_key, session in list(cls._sessions.items()):
+            if session.last_used > threshold:
+                break
+            expired.append(cls._sessions.pop(session_key))
+        return expired
 
-            if CONF.redfish.connection_cache_size:
-                self.__class__._sessions[self._session_key] = conn
+    @classmethod
+    def _expire_oldest_sessions(cls):
+        """Remove the least recently used sessions above the cache size.
 
-                if (len(self.__class__._sessions) >
-                        CONF.redfish.connection_cache_size):
-                    self._expire_oldest_session()
+        Must be called with the lock held.
 
-            return conn
+        :returns: a list of removed sessions.
+        """
+        evicted = []
+        while len(cls._sessions) > CONF.redfish.connection_cache_size:
+            session_key = next(iter(cls._sessions))
+            evicted.append(cls._sessions.pop(session_key))
+        return evicted
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        # NOTE(etingof): perhaps this session token is no good
-        if isinstance(exc_val, sushy.exceptions.ConnectionError):
-            self.__class__._sessions.pop(self._session_key, None)
+    @classmethod
+    def _logout(cls, sessions, event='eviction'):
+        """Log the removed sessions out of their BMCs.
+
+        :param sessions: a list of removed sessions.
+        :param event: the statistics event to count for each session, or
+            None to not count them.
+        """
+        for session in sessions:
+            if event:
+                cls._count(event)
+            try:
+                session.auth.close()
+            except Exception as e:
+                LOG.warning('Failed to log out of Redfish session at '
+                            '%(address)s: %(error)s',
+                            {'address': session.address, 'error': e})
 
     @classmethod
-    def _expire_oldest_session(cls):
-        """Expire oldest session"""
-        session_keys = list(cls._sessions)
-        session_key = next(iter(session_keys))
-        # NOTE(etingof): GC should cause sushy to HTTP DELETE session
-        # at BMC. Trouble is that contemporary sushy (1.6.0) does
-        # does not do that.
-        cls._sessions.pop(session_key, None)
+    def stats(cls):
+        """Return the numbers of hits, misses, evictions and invalidations."""
+        return dict((event, cls._stats[event])
+                    for event in ('hit', 'miss', 'eviction', 'invalidation'))
 
 
 def get_system(node):
@@ -244,8 +343,9 @@ def get_system(node):
         wait_fixed=CONF.redfish.connection_retry_interval * 1000)
     def _get_system():
         try:
-            with SessionCache(driver_info) as conn:
-                return conn.get_system(system_id)
+            with bmc_io.limit(driver_info['address']):
+                with SessionCache(driver_info) as conn:
+                    return conn.get_system(system_id)
 
         except sushy.exceptions.ResourceNotFoundError as e:
             LOG.error('The Redfish System "%(system)s" was not found for '
@@ -24,6 +24,7 @@ models.
 """
 
 import abc
+import threading
 import time
 
 from oslo_log import log as logging
@@ -38,11 +39,13 @@ from ironic.common import utils
 from ironic.conductor import task_manager
 from ironic.conf import CONF
 from ironic.drivers import base
+from ironic.drivers.modules import bmc_io
 
 pysnmp = importutils.try_import('pysnmp')
 if pysnmp:
     from pysnmp import error as snmp_error
     from pysnmp import hlapi as snmp
+    from pysnmp.hlapi import asyncore as snmp_async
 
     snmp_auth_protocols = {
         'md5': snmp.usmHMACMD5AuthProtocol,
@@ -90,6 +93,7 @@ if pysnmp:
 else:
     snmp = None
     snmp_error = None
+    snmp_async = None
 
     snmp_auth_protocols = {
         'none': None
@@ -184,6 +188,113 @@ COMMON_PROPERTIES.update(OPTIONAL_PROPERTIES)
 COMMON_PROPERTIES.update(DEPRECATED_PROPERTIES)
 
 
+class SNMPDispatcher(object):
+    """Non-blocking SNMP request dispatcher shared by SNMP clients.
+
+    All requests go through a single SNMP engine, which uses one UDP socket
+    per transport domain for all PDUs. Requests are queued with the pysnmp
+    asyncore API and responses are processed by a single green thread, so
+    many queries can be in flight without a thread, an engine or a socket
+    per query.
+    """
+
+    # NOTE: the dispatcher cannot be woken up when a new request is queued,
+    # so this is the maximum delay before the request is actually sent.
+    timer_resolution = 0.05
+
+    def __init__(self):
+        self.snmp_engine = snmp.SnmpEngine()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def _run(self):
+        dispatcher = self.snmp_engine.transportDispatcher
+        while True:
+            try:
+                dispatcher.runDispatcher()
+            except Exception:
+                LOG.exception('SNMP dispatcher failed')
+            with self._lock:
+                if not dispatcher.jobsArePending():
+                    self._running = False
+                    return
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._running:
+                return
+            self.snmp_engine.transportDispatcher.setTimerResolution(
+                self.timer_resolution)
+            thread = threading.Thread(target=self._run)
+            thread.daemon = True
+            thread.start()
+            self._running = True
+
+    def get(self, auth, transport, context, oid):
+        """Perform an SNMP GET operation on a single object.
+
+        :param auth: authorization data for the request.
+        :param transport: the transport target for the request.
+        :param context: the SNMP context for the request.
+        :param oid: The OID of the object to get.
+        :raises: SNMPFailure if an SNMP request fails.
+        :returns: The value of the requested object.
+        """
+        result = {}
+        done = threading.Event()
+
+        def _callback(snmp_engine, handle, error_indication, error_status,
+                      error_index, var_binds, cb_ctx):
+            result.update(error_indication=error_indication,
+                          error_status=error_status,
+                          var_binds=var_binds)
+            done.set()
+
+        try:
+            snmp_async.getCmd(self.snmp_engine, auth, transport, context,
+                              snmp.ObjectType(snmp.ObjectIdentity(oid)),
+                              cbFun=_callback, lookupMib=False)
+        except snmp_error.PySnmpError as e:
+            raise exception.SNMPFailure(operation="GET", error=e)
+        self._ensure_running()
+
+        # The engine reports time outs itself, this is a safety net in case
+        # the dispatcher thread dies.
+        wait = (CONF.snmp.udp_transport_timeout *
+                (CONF.snmp.udp_transport_retries + 1) + 1)
+        if not done.wait(wait):
+            raise exception.SNMPFailure(
+                operation="GET",
+                error=_("no response processed within %s seconds") % wait)
+
+        if result['error_indication']:
+            # SNMP engine-level error.
+            raise exception.SNMPFailure(operation="GET",
+                                        error=result['error_indication'])
+
+        if result['error_status']:
+            # SNMP PDU error.
+            raise exception.SNMPFailure(
+                operation="GET", error=result['error_status'].prettyPrint())
+
+        # We only expect a single value back
+        name, val = result['var_binds'][0]
+        return val
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def _get_dispatcher():
+    """Return the SNMP dispatcher shared by all SNMP clients."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = SNMPDispatcher()
+        return _dispatcher
+
+
 class SNMPClient(object):
     """SNMP client object.
 
@@ -282,6 +393,16 @@ class SNMPClient(object):
         :raises: SNMPFailure if an SNMP request fails.
         :returns: The value of the requested object.
         """
+        if CONF.snmp.use_async_io and self.version != SNMP_V3:
+            with bmc_io.limit(self.address):
+                try:
+                    transport = self._get_transport()
+                    context = self._get_context()
+                except snmp_error.PySnmpError as e:
+                    raise exception.SNMPFailure(operation="GET", error=e)
+                return _get_dispatcher().get(self._get_auth(), transport,
+                                             context, oid)
+
         try:
             snmp_gen = snmp.getCmd(self.snmp_engine,
                                    self._get_auth(),
@@ -347,6 +468,63 @@ class SNMPClient(object):
 
         return vals
 
+    def walk(self, oid):
+        """Use PySNMP to fetch all objects of a table or a table column.
+
+        Uses GETBULK requests with SNMPv2c and SNMPv3, so that a table is
+        usually fetched in one request, and GETNEXT requests with SNMPv1.
+
+        :param oid: The OID of the table or table column to walk.
+        :raises: SNMPFailure if an SNMP request fails.
+        :returns: A list of (OID, value) tuples, the OIDs are tuples
+            of integers.
+        """
+        operation = "GET_NEXT" if self.version == SNMP_V1 else "GET_BULK"
+        try:
+            obj = snmp.ObjectType(snmp.ObjectIdentity(oid))
+            if self.version == SNMP_V1:
+                snmp_gen = snmp.nextCmd(self.snmp_engine,
+                                        self._get_auth(),
+                                        self._get_transport(),
+                                        self._get_context(),
+                                        obj,
+                                        lexicographicMode=False)
+            else:
+                snmp_gen = snmp.bulkCmd(self.snmp_engine,
+                                        self._get_auth(),
+                                        self._get_transport(),
+                                        self._get_context(),
+                                        0, CONF.snmp.bulk_max_repetitions,
+                                        obj,
+                                        lexicographicMode=False)
+
+        except snmp_error.PySnmpError as e:
+            raise exception.SNMPFailure(operation=operation, error=e)
+
+        objects = []
+        for (error_indication, error_status, error_index,
+                var_binds) in snmp_gen:
+
+            if error_indication:
+                # SNMP engine-level error.
+                raise exception.SNMPFailure(operation=operation,
+                                            error=error_indication)
+
+            if error_status:
+                # SNMP PDU error.
+                raise exception.SNMPFailure(operation=operation,
+                                            error=error_status.prettyPrint())
+
+            for name, value in var_binds:
+                # SNMPv2 agents report the end of the MIB and missing
+                # objects as values
+                if isinstance(value, (snmp.EndOfMibView, snmp.NoSuchObject,
+                                      snmp.NoSuchInstance)):
+                    continue
+                objects.append((tuple(name), value))
+
+        return objects
+
     def set(self, oid, value):
         """Use PySNMP to perform an SNMP SET operation on a single object.
 
@@ -430,6 +608,76 @@ def retry_on_outdated_cache(f):
     return wrapper
 
 
+class PDUOutletStates(object):
+    """Power states of all outlets of a PDU, fetched with one table walk.
+
+    Nodes sharing a PDU only differ in the outlet. Instead of querying
+    every outlet separately, the first power state query walks the whole
+    power state table of the PDU, and the following queries within
+    ``[snmp]outlet_states_cache_ttl`` seconds are served from that snapshot.
+    Concurrent queries wait for the walk in progress.
+
+    :param client: the SNMPClient to use for the walks.
+    :param table_oid: the OID of the outlet power state table column.
+    """
+
+    def __init__(self, client, table_oid):
+        self.client = client
+        self.table_oid = table_oid
+        self._lock = threading.Lock()
+        self._states = None
+        self._fetched_at = None
+
+    def _expired(self):
+        return (self._states is None
+                or time.time() - self._fetched_at
+                >= CONF.snmp.outlet_states_cache_ttl)
+
+    def get(self, oid):
+        """Return the value of the power state object of an outlet.
+
+        :param oid: The OID of the power state object of the outlet.
+        :raises: SNMPFailure if an SNMP request fails.
+        :returns: The value of the power state object.
+        """
+        with self._lock:
+            if self._expired():
+                self._states = dict(self.client.walk(self.table_oid))
+                self._fetched_at = time.time()
+                LOG.debug('Fetched power states of %(count)d outlets of '
+                          'SNMP PDU %(addr)s',
+                          {'count': len(self._states),
+                           'addr': self.client.address})
+            states = self._states
+
+        try:
+            return states[tuple(oid)]
+        except KeyError:
+            # Not all PDUs put the outlet objects right under the table
+            return self.client.get(oid)
+
+    def invalidate(self):
+        """Discard the snapshot, e.g. after changing an outlet power state."""
+        with self._lock:
+            self._states = None
+
+
+_outlet_states = {}
+_outlet_states_lock = threading.Lock()
+
+
+def _get_outlet_states(snmp_info, client, table_oid):
+    """Get the shared outlet states of the PDU a node is connected to."""
+    key = (frozenset((k, v) for k, v in snmp_info.items() if k != 'outlet'),
+           table_oid)
+    with _outlet_states_lock:
+        outlet_states = _outlet_states.get(key)
+        if outlet_states is None:
+            outlet_states = _outlet_states[key] = PDUOutletStates(client,
+                                                                  table_oid)
+        return outlet_states
+
+
 @six.add_metaclass(abc.ABCMeta)
 class SNMPDriverBase(object):
     """SNMP power driver base class.
@@ -576,9 +824,29 @@ class SNMPDriverSimple(SNMPDriverBase):
         outlet = self.snmp_info['outlet']
         return self.oid_enterprise + self.oid_device + (outlet,)
 
+    def _get_outlet_states(self):
+        return _get_outlet_states(self.snmp_info, self.client,
+                                  self.oid_enterprise + self.oid_device)
+
+    def power_state(self):
+        """Returns a node's current power state.
+
+        Uses the power states of all outlets of the PDU, fetched at most
+        once per ``[snmp]outlet_states_cache_ttl`` seconds, if set.
+
+        :raises: SNMPFailure if an SNMP request fails.
+        :returns: power state. One of :class:`ironic.common.states`.
+        """
+        if not CONF.snmp.outlet_states_cache_ttl:
+            return self._snmp_power_state()
+
+        state = self._get_outlet_states().get(self.oid)
+        return self._to_power_state(state)
+
     def _snmp_power_state(self):
-        state = self.client.get(self.oid)
+        return self._to_power_state(self.client.get(self.oid))
 
+    def _to_power_state(self, state):
         # Translate the state to an Ironic power state.
         if state == self.value_power_on:
             power_state = states.POWER_ON
@@ -597,10 +865,14 @@ class SNMPDriverSimple(SNMPDriverBase):
     def _snmp_power_on(self):
         value = snmp.Integer(self.value_power_on)
         self.client.set(self.oid, value)
+        if CONF.snmp.outlet_states_cache_ttl:
+            self._get_outlet_states().invalidate()
 
     def _snmp_power_off(self):
         value = snmp.Integer(self.value_power_off)
         self.client.set(self.oid, value)
+        if CONF.snmp.outlet_states_cache_ttl:
+            self._get_outlet_states().invalidate()
 
 
 class SNMPDriverAten(SNMPDriverSimple):
@@ -843,6 +1115,10 @@ class SNMPDriverAuto(SNMPDriverBase):
             "SNMPDriverAuto: no driver matching %(system_id)s") %
             {'system_id': system_id})
 
+    @retry_on_outdated_cache
+    def power_state(self):
+        return self.driver.power_state()
+
     @retry_on_outdated_cache
     def _snmp_power_state(self):
         current_power_state = self.driver._snmp_power_state()
@@ -13,20 +13,20 @@
 #    under the License.
 
 
-from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import importutils
 
 from ironic.common import boot_devices
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import metrics
 from ironic.conductor import task_manager
 from ironic.drivers import base
 from ironic.drivers.modules.xclarity import common
 
 LOG = logging.getLogger(__name__)
 
-METRICS = metrics_utils.get_metrics_logger(__name__)
+METRICS = metrics.get_metrics_logger(__name__)
 
 xclarity_client_exceptions = importutils.try_import(
     'xclarity_client.exceptions')
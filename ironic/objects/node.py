@@ -69,7 +69,8 @@ class Node(base.IronicObject, object_base.VersionedObjectDictCompat):
     # Version 1.30: Add owner field
     # Version 1.31: Add allocation_id field
     # Version 1.32: Add description field
-    VERSION = '1.32'
+    # Version 1.33: Add create_many()
+    VERSION = '1.33'
 
     dbapi = db_api.get_instance()
 
@@ -379,6 +380,47 @@ class Node(base.IronicObject, object_base.VersionedObjectDictCompat):
         db_node = self.dbapi.create_node(values)
         self._from_db_object(self._context, self, db_node)
 
+    @classmethod
+    def create_many(cls, context, nodes):
+        """Create Node records in the DB with their ports, groups and traits.
+
+        All the nodes are created in a single transaction, see
+        :meth:`ironic.db.api.Connection.create_nodes`.
+
+        :param cls: the :class:`Node`
+        :param context: Security context.
+        :param nodes: a list of dicts, each of them with the created (but not
+            saved to the database) node object as ``node``, and optionally
+            lists of port objects as ``ports``, of dicts with a port group
+            object as ``portgroup`` and its member port objects as ``ports``
+            as ``portgroups``, and of trait names as ``traits``.
+        :raises: InvalidParameterValue if some property values are invalid.
+        :raises: the exceptions of :meth:`create`,
+            :meth:`ironic.objects.port.Port.create` and
+            :meth:`ironic.objects.portgroup.Portgroup.create`.
+        """
+        db_values = []
+        for item in nodes:
+            node = item['node']
+            values = node.do_version_changes_for_db()
+            node._validate_property_values(values.get('properties'))
+            node._validate_and_remove_traits(values)
+            node._validate_and_format_conductor_group(values)
+            values['ports'] = [port.do_version_changes_for_db()
+                               for port in item.get('ports', [])]
+            values['portgroups'] = []
+            for group in item.get('portgroups', []):
+                group_values = group['portgroup'].do_version_changes_for_db()
+                group_values['ports'] = [port.do_version_changes_for_db()
+                                         for port in group.get('ports', [])]
+                values['portgroups'].append(group_values)
+            values['traits'] = item.get('traits', [])
+            db_values.append(values)
+
+        db_nodes = cls.dbapi.create_nodes(db_values, objects.Trait.VERSION)
+        for item, db_node in zip(nodes, db_nodes):
+            cls._from_db_object(context, item['node'], db_node)
+
     # NOTE(xek): We don't want to enable RPC on this call just yet. Remotable
     # methods can be used in the future to replace current explicit RPC calls.
     # Implications of calling new remote procedures should be thought through.
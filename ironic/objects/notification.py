@@ -13,7 +13,7 @@ from oslo_config import cfg
 from oslo_utils import strutils
 
 from ironic.common import exception
-from ironic.common import rpc
+from ironic.common import notification_queue
 from ironic.objects import base
 from ironic.objects import fields
 
@@ -100,6 +100,9 @@ class NotificationBase(base.IronicObject):
     def emit(self, context):
         """Send the notification.
 
+           The notification is sent asynchronously if
+           ``[DEFAULT]notification_async`` is enabled.
+
            :raises: NotificationPayloadError
            :raises: oslo_versionedobjects.exceptions.MessageDeliveryFailure
         """
@@ -118,9 +121,9 @@ class NotificationBase(base.IronicObject):
         publisher_id = '%s.%s' % (self.publisher.service, self.publisher.host)
         payload = self.payload.obj_to_primitive()
 
-        notifier = rpc.get_versioned_notifier(publisher_id)
-        notify = getattr(notifier, self.level)
-        notify(context, event_type=event_type, payload=payload)
+        notification_queue.emit(notification_queue.Notification(
+            context=context, publisher_id=publisher_id, level=self.level,
+            event_type=event_type, payload=payload))
 
 
 # NOTE(mariojv) This class will not be used directly and is just a base class
@@ -0,0 +1,360 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the API /bulk/ methods.
+"""
+
+import mock
+from oslo_utils import uuidutils
+from six.moves import http_client
+from wsme import types as wtypes
+
+from ironic.api.controllers import base as api_base
+from ironic.api.controllers.v1 import notification_utils
+from ironic.api.controllers.v1 import versions
+from ironic.common import exception
+from ironic.common import states
+from ironic.conductor import rpcapi
+from ironic.objects import fields
+from ironic.objects import node as node_objects
+from ironic.tests.unit.api import base as test_api_base
+from ironic.tests.unit.objects import utils as obj_utils
+
+
+class TestBulkPower(test_api_base.BaseApiTest):
+
+    def setUp(self):
+        super(TestBulkPower, self).setUp()
+        self.headers = {api_base.Version.string: str(
+            versions.max_version_string())}
+        self.nodes = [
+            obj_utils.create_test_node(
+                self.context, id=i, uuid=uuidutils.generate_uuid(),
+                name='node-%d' % i, conductor_group='group%d' % (i % 2))
+            for i in range(4)]
+        p = mock.patch.object(rpcapi.ConductorAPI, 'get_topic_for',
+                              autospec=True)
+        self.mock_gtf = p.start()
+        self.mock_gtf.side_effect = (
+            lambda _api, node: 'topic-%s' % node.conductor_group)
+        self.addCleanup(p.stop)
+        p = mock.patch.object(rpcapi.ConductorAPI, 'change_nodes_power_state',
+                              autospec=True)
+        self.mock_cnps = p.start()
+        self.mock_cnps.side_effect = (
+            lambda _api, _context, node_ids, *args, **kwargs:
+            dict((node_id, None) for node_id in node_ids))
+        self.addCleanup(p.stop)
+
+    def _put(self, body, **kwargs):
+        return self.put_json('/bulk/power', body, headers=self.headers,
+                             **kwargs)
+
+    def _results(self, response):
+        return dict((item['node'], item['error'])
+                    for item in response.json['nodes'])
+
+    def test_power_nodes(self):
+        response = self._put({'target': states.POWER_ON,
+                              'nodes': [self.nodes[0].uuid,
+                                        self.nodes[1].name,
+                                        self.nodes[2].uuid]})
+        self.assertEqual(http_client.ACCEPTED, response.status_int)
+        self.assertEqual({self.nodes[0].uuid: None,
+                          self.nodes[1].uuid: None,
+                          self.nodes[2].uuid: None},
+                         self._results(response))
+        self.assertTrue(all(item['accepted']
+                            for item in response.json['nodes']))
+        # One call per conductor
+        self.assertEqual(2, self.mock_cnps.call_count)
+        self.mock_cnps.assert_any_call(
+            mock.ANY, mock.ANY, [self.nodes[0].uuid, self.nodes[2].uuid],
+            states.POWER_ON, timeout=None, topic='topic-group0')
+        self.mock_cnps.assert_any_call(
+            mock.ANY, mock.ANY, [self.nodes[1].uuid],
+            states.POWER_ON, timeout=None, topic='topic-group1')
+
+    def test_power_filters(self):
+        response = self._put({'target': states.SOFT_POWER_OFF, 'timeout': 10,
+                              'conductor_group': 'group1'})
+        self.assertEqual(http_client.ACCEPTED, response.status_int)
+        self.assertEqual({self.nodes[1].uuid: None, self.nodes[3].uuid: None},
+                         self._results(response))
+        self.mock_cnps.assert_called_once_with(
+            mock.ANY, mock.ANY, mock.ANY, states.SOFT_POWER_OFF, timeout=10,
+            topic='topic-group1')
+        self.assertEqual({self.nodes[1].uuid, self.nodes[3].uuid},
+                         set(self.mock_cnps.call_args[0][2]))
+
+    def test_power_node_errors(self):
+        self.nodes[1].provision_state = states.CLEANING
+        self.nodes[1].save()
+        self.mock_gtf.side_effect = [exception.NoValidHost(reason='boom'),
+                                     'topic', 'topic']
+        self.mock_cnps.side_effect = None
+        self.mock_cnps.return_value = {self.nodes[2].uuid: 'locked',
+                                       self.nodes[3].uuid: None}
+
+        response = self._put({'target': states.REBOOT,
+                              'nodes': [node.uuid for node in self.nodes]
+                              + ['missing']})
+        self.assertEqual(http_client.ACCEPTED, response.status_int)
+        results = self._results(response)
+        self.assertIn('boom', results[self.nodes[0].uuid])
+        self.assertIn(states.CLEANING, results[self.nodes[1].uuid])
+        self.assertEqual('locked', results[self.nodes[2].uuid])
+        self.assertIsNone(results[self.nodes[3].uuid])
+        self.assertIn('could not be found', results['missing'])
+        self.assertEqual(
+            {self.nodes[3].uuid},
+            set(item['node'] for item in response.json['nodes']
+                if item['accepted']))
+
+    def test_power_conductor_failure(self):
+        self.mock_cnps.side_effect = exception.NoFreeConductorWorker()
+        response = self._put({'target': states.POWER_OFF,
+                              'nodes': [self.nodes[0].uuid]})
+        self.assertEqual(http_client.ACCEPTED, response.status_int)
+        self.assertEqual([{'node': self.nodes[0].uuid, 'accepted': False,
+                           'error': mock.ANY}], response.json['nodes'])
+
+    def test_power_invalid_target(self):
+        response = self._put({'target': 'rebuild',
+                              'nodes': [self.nodes[0].uuid]},
+                             expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        self.assertFalse(self.mock_cnps.called)
+
+    def test_power_nodes_and_filters(self):
+        response = self._put({'target': states.POWER_ON,
+                              'nodes': [self.nodes[0].uuid],
+                              'owner': 'someone'},
+                             expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        self.assertFalse(self.mock_cnps.called)
+
+    def test_power_no_nodes(self):
+        response = self._put({'target': states.POWER_ON},
+                             expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        self.assertFalse(self.mock_cnps.called)
+
+    def test_power_too_many_nodes(self):
+        self.config(bulk_max_nodes=3, group='api')
+        response = self._put({'target': states.POWER_ON,
+                              'nodes': [node.uuid for node in self.nodes]},
+                             expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        response = self._put({'target': states.POWER_ON,
+                              'maintenance': False},
+                             expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        self.assertFalse(self.mock_cnps.called)
+
+    def test_power_old_version(self):
+        self.headers[api_base.Version.string] = '1.54'
+        response = self._put({'target': states.POWER_ON,
+                              'nodes': [self.nodes[0].uuid]},
+                             expect_errors=True)
+        self.assertEqual(http_client.NOT_FOUND, response.status_int)
+        self.assertFalse(self.mock_cnps.called)
+
+
+class TestBulkNodes(test_api_base.BaseApiTest):
+
+    def setUp(self):
+        super(TestBulkNodes, self).setUp()
+        self.headers = {api_base.Version.string: str(
+            versions.max_version_string())}
+        p = mock.patch.object(rpcapi.ConductorAPI, 'get_topic_for',
+                              autospec=True)
+        self.mock_gtf = p.start()
+        self.mock_gtf.return_value = 'test-topic'
+        self.addCleanup(p.stop)
+        p = mock.patch.object(rpcapi.ConductorAPI, 'create_nodes',
+                              autospec=True)
+        self.mock_cn = p.start()
+        self.mock_cn.side_effect = (
+            lambda _api, _context, nodes, topic=None: [None] * len(nodes))
+        self.addCleanup(p.stop)
+
+    def _post(self, nodes, **kwargs):
+        return self.post_json('/bulk/nodes', {'nodes': nodes},
+                              headers=self.headers, **kwargs)
+
+    def _errors(self, response):
+        return [item['error'] for item in response.json['nodes']]
+
+    def test_create_nodes(self):
+        node_uuid = uuidutils.generate_uuid()
+        pg_uuid = uuidutils.generate_uuid()
+        response = self._post([
+            {'uuid': node_uuid, 'driver': 'fake-hardware', 'name': 'node-1',
+             'traits': ['CUSTOM_1'],
+             'portgroups': [{'uuid': pg_uuid, 'name': 'bond0',
+                             'address': '52:54:00:00:00:10'}],
+             'ports': [{'address': '52:54:00:00:00:01'},
+                       {'address': '52:54:00:00:00:11',
+                        'portgroup_uuid': 'bond0',
+                        'physical_network': 'physnet1'}]},
+            {'driver': 'fake-hardware'}])
+
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual([None, None], self._errors(response))
+        self.assertEqual(node_uuid, response.json['nodes'][0]['node'])
+        self.assertTrue(uuidutils.is_uuid_like(
+            response.json['nodes'][1]['node']))
+        self.mock_cn.assert_called_once_with(mock.ANY, mock.ANY, mock.ANY,
+                                             topic='test-topic')
+        nodes = self.mock_cn.call_args[0][2]
+        self.assertEqual(2, len(nodes))
+        node = nodes[0]['node']
+        self.assertEqual(node_uuid, node.uuid)
+        self.assertEqual('node-1', node.name)
+        self.assertEqual(states.ENROLL, node.provision_state)
+        self.assertEqual(['CUSTOM_1'], nodes[0]['traits'])
+        self.assertEqual(['52:54:00:00:00:01'],
+                         [port.address for port in nodes[0]['ports']])
+        group, = nodes[0]['portgroups']
+        self.assertEqual(pg_uuid, group['portgroup'].uuid)
+        member, = group['ports']
+        self.assertEqual('52:54:00:00:00:11', member.address)
+        self.assertEqual('physnet1', member.physical_network)
+        self.assertEqual(response.json['nodes'][1]['node'],
+                         nodes[1]['node'].uuid)
+        self.assertEqual([], nodes[1]['ports'])
+
+    @mock.patch.object(notification_utils, '_emit_api_notification',
+                       autospec=True)
+    def test_create_nodes_notifications(self, mock_notify):
+        chassis = obj_utils.create_test_chassis(self.context)
+        self.mock_cn.side_effect = None
+        self.mock_cn.return_value = [None, 'boom']
+        created, failed = uuidutils.generate_uuid(), uuidutils.generate_uuid()
+        pg_uuid = uuidutils.generate_uuid()
+        self._post([
+            {'uuid': created, 'driver': 'fake-hardware',
+             'chassis_uuid': chassis.uuid, 'traits': ['CUSTOM_1'],
+             'portgroups': [{'uuid': pg_uuid, 'name': 'bond0',
+                             'address': '52:54:00:00:00:10'}],
+             'ports': [{'address': '52:54:00:00:00:01'},
+                       {'address': '52:54:00:00:00:11',
+                        'portgroup_uuid': 'bond0'}]},
+            {'uuid': failed, 'driver': 'fake-hardware'}])
+
+        notifications = [(c[0][1].__class__.__name__, c[0][1].uuid, c[0][4],
+                          c[1]) for c in mock_notify.call_args_list]
+        nodes = self.mock_cn.call_args[0][2]
+        port, = nodes[0]['ports']
+        member, = nodes[0]['portgroups'][0]['ports']
+        for status in (fields.NotificationStatus.START,
+                       fields.NotificationStatus.END):
+            self.assertIn(('Node', created, status,
+                           {'chassis_uuid': chassis.uuid}), notifications)
+            self.assertIn(('Portgroup', pg_uuid, status,
+                           {'node_uuid': created}), notifications)
+            self.assertIn(('Port', port.uuid, status,
+                           {'node_uuid': created, 'portgroup_uuid': None}),
+                          notifications)
+            self.assertIn(('Port', member.uuid, status,
+                           {'node_uuid': created,
+                            'portgroup_uuid': pg_uuid}),
+                          notifications)
+        self.assertIn(('Node', failed, fields.NotificationStatus.START,
+                       {'chassis_uuid': wtypes.Unset}), notifications)
+        self.assertIn(('Node', failed, fields.NotificationStatus.ERROR,
+                       {'chassis_uuid': wtypes.Unset}), notifications)
+        self.assertEqual(10, len(notifications))
+        # The end notification of a node carries its traits
+        payload = node_objects.NodeCRUDPayload(nodes[0]['node'],
+                                               chassis_uuid=chassis.uuid)
+        self.assertEqual(['CUSTOM_1'], payload.traits)
+
+    def test_create_nodes_per_conductor(self):
+        self.mock_gtf.side_effect = (
+            lambda _api, node: 'topic-%s' % node.conductor_group)
+        self.mock_cn.side_effect = None
+        self.mock_cn.return_value = ['boom']
+        response = self._post([
+            {'driver': 'fake-hardware', 'conductor_group': 'a'},
+            {'driver': 'fake-hardware', 'conductor_group': 'b'}])
+
+        self.assertEqual(['boom', 'boom'], self._errors(response))
+        self.assertEqual(2, self.mock_cn.call_count)
+        self.mock_cn.assert_any_call(mock.ANY, mock.ANY, mock.ANY,
+                                     topic='topic-a')
+        self.mock_cn.assert_any_call(mock.ANY, mock.ANY, mock.ANY,
+                                     topic='topic-b')
+
+    def test_create_nodes_invalid(self):
+        def _get_topic_for(_api, node):
+            if node.driver == 'unknown':
+                raise exception.NoValidHost(reason='boom')
+            return 'test-topic'
+
+        self.mock_gtf.side_effect = _get_topic_for
+        nodes = [
+            {'driver': 'unknown'},
+            {'driver': 'fake-hardware', 'bogus': 42},
+            {'driver': 'fake-hardware', 'conductor': 'foo'},
+            {'driver': 'fake-hardware', 'traits': ['INVALID']},
+            {'driver': 'fake-hardware',
+             'ports': [{'address': '52:54:00:00:00:01',
+                        'portgroup_uuid': 'missing'}]},
+            {'driver': 'fake-hardware',
+             'ports': [{'address': '52:54:00:00:00:01',
+                        'node_uuid': uuidutils.generate_uuid()}]},
+            {'driver': 'fake-hardware', 'ports': [{'address': 'invalid'}]},
+            {'driver': 'fake-hardware',
+             'portgroups': [{'address': '52:54:00:00:00:02',
+                             'name': 'bond0',
+                             'standalone_ports_supported': False}],
+             'ports': [{'address': '52:54:00:00:00:01',
+                        'portgroup_uuid': 'bond0', 'pxe_enabled': True}]},
+            'invalid',
+            {'driver': 'fake-hardware'},
+        ]
+        response = self._post(nodes)
+
+        self.assertEqual(http_client.OK, response.status_int)
+        errors = self._errors(response)
+        self.assertEqual(len(nodes), len(errors))
+        for expected, error in zip(
+                ['boom', 'bogus', 'conductor', 'trait', 'missing',
+                 'node_uuid', 'MAC', 'standalone', 'JSON'], errors):
+            self.assertIn(expected, error)
+        self.assertIsNone(errors[-1])
+        self.assertFalse(any(item['accepted']
+                             for item in response.json['nodes'][:-1]))
+        self.assertIsNone(response.json['nodes'][-2]['node'])
+        self.assertEqual(1, len(self.mock_cn.call_args[0][2]))
+
+    def test_create_nodes_conductor_failure(self):
+        self.mock_cn.side_effect = exception.IronicException('boom')
+        response = self._post([{'driver': 'fake-hardware'}])
+        self.assertEqual(['boom'], self._errors(response))
+        self.assertFalse(response.json['nodes'][0]['accepted'])
+
+    def test_create_nodes_too_many(self):
+        self.config(bulk_max_nodes=1, group='api')
+        response = self._post([{'driver': 'fake-hardware'}] * 2,
+                              expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        self.assertFalse(self.mock_cn.called)
+
+    def test_create_nodes_old_version(self):
+        self.headers[api_base.Version.string] = '1.55'
+        response = self._post([{'driver': 'fake-hardware'}],
+                              expect_errors=True)
+        self.assertEqual(http_client.NOT_FOUND, response.status_int)
+        self.assertFalse(self.mock_cn.called)
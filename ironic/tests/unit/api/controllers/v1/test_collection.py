@@ -0,0 +1,137 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import mock
+import pecan
+
+from ironic.api.controllers.v1 import collection
+from ironic.tests import base
+
+
+class FakeObject(object):
+
+    def __init__(self, uuid):
+        self.uuid = uuid
+
+
+class TestFetchChunks(base.TestCase):
+
+    def setUp(self):
+        super(TestFetchChunks, self).setUp()
+        self.objects = [FakeObject(str(i)) for i in range(5)]
+        self.fetch = mock.Mock(side_effect=self._fetch)
+
+    def _fetch(self, limit, marker):
+        start = 0 if marker is None else self.objects.index(marker) + 1
+        return self.objects[start:start + limit]
+
+    def test_fetch_chunks(self):
+        chunks = list(collection.fetch_chunks(self.fetch, 10, chunk_size=2))
+        self.assertEqual([self.objects[:2], self.objects[2:4],
+                          self.objects[4:]], chunks)
+        self.fetch.assert_has_calls([mock.call(2, None),
+                                     mock.call(2, self.objects[1]),
+                                     mock.call(2, self.objects[3])])
+
+    def test_fetch_chunks_limit(self):
+        chunks = list(collection.fetch_chunks(self.fetch, 3, chunk_size=2))
+        self.assertEqual([self.objects[:2], self.objects[2:3]], chunks)
+        self.fetch.assert_has_calls([mock.call(2, None),
+                                     mock.call(1, self.objects[1])])
+
+    def test_fetch_chunks_marker(self):
+        chunks = list(collection.fetch_chunks(self.fetch, 10,
+                                              marker=self.objects[2]))
+        self.assertEqual([self.objects[3:]], chunks)
+        self.fetch.assert_called_once_with(10, self.objects[2])
+
+    def test_fetch_chunks_exact(self):
+        self.objects = self.objects[:4]
+        chunks = list(collection.fetch_chunks(self.fetch, 10, chunk_size=2))
+        self.assertEqual([self.objects[:2], self.objects[2:]], chunks)
+        self.assertEqual(3, self.fetch.call_count)
+
+    def test_fetch_chunks_default_size(self):
+        self.config(stream_chunk_size=4, group='api')
+        list(collection.fetch_chunks(self.fetch, 10))
+        self.fetch.assert_has_calls([mock.call(4, None),
+                                     mock.call(4, self.objects[3])])
+
+
+class TestStream(base.TestCase):
+
+    def setUp(self):
+        super(TestStream, self).setUp()
+        self.chunks = [[FakeObject('1'), FakeObject('2')], [FakeObject('3')]]
+        p = mock.patch.object(pecan, 'request', spec_set=['public_url'],
+                              public_url='http://ironic')
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _convert(self, objects):
+        return [{'uuid': obj.uuid} for obj in objects]
+
+    def _stream(self, limit, convert=None, **kwargs):
+        body = b''.join(collection.stream('things', self.chunks,
+                                          convert or self._convert, limit,
+                                          'things', **kwargs))
+        return json.loads(body.decode('utf-8'))
+
+    def test_stream(self):
+        self.assertEqual({'things': [{'uuid': '1'}, {'uuid': '2'},
+                                     {'uuid': '3'}]},
+                         self._stream(4))
+
+    def test_stream_next(self):
+        data = self._stream(3, sort_key='id')
+        self.assertEqual(3, len(data['things']))
+        self.assertEqual(
+            'http://ironic/v1/things?sort_key=id&limit=3&marker=3',
+            data['next'])
+
+    def test_stream_empty(self):
+        self.chunks = []
+        self.assertEqual({'things': []}, self._stream(3))
+
+    def test_stream_skipped(self):
+        def _convert(objects):
+            return [{'uuid': obj.uuid} for obj in objects if obj.uuid != '1']
+
+        data = self._stream(2, convert=_convert)
+        self.assertEqual({'things': [{'uuid': '2'}, {'uuid': '3'}],
+                          'next': 'http://ironic/v1/things?limit=2&marker=3'},
+                         data)
+
+    @mock.patch.object(collection.LOG, 'exception', autospec=True)
+    def test_stream_error(self, mock_log):
+        def _chunks():
+            yield [FakeObject('1')]
+            raise RuntimeError('boom')
+
+        body = collection.stream('things', _chunks(), self._convert, 3,
+                                 'things')
+        self.assertEqual(b'{"things": [{"uuid": "1"}', next(body))
+        self.assertRaises(RuntimeError, next, body)
+        self.assertTrue(mock_log.called)
+
+    @mock.patch.object(collection.LOG, 'exception', autospec=True)
+    def test_stream_error_first_chunk(self, mock_log):
+        def _chunks():
+            raise RuntimeError('boom')
+            yield
+
+        body = collection.stream('things', _chunks(), self._convert, 3,
+                                 'things')
+        self.assertRaises(RuntimeError, next, body)
+        self.assertFalse(mock_log.called)
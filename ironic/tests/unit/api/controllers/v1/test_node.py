@@ -25,6 +25,8 @@ import six
 from six.moves import http_client
 from six.moves.urllib import parse as urlparse
 from testtools import matchers
+import webob
+from wsme.rest import json as wsme_json
 from wsme import types as wtypes
 
 from ironic.api.controllers import base as api_base
@@ -43,6 +45,7 @@ from ironic.objects import fields as obj_fields
 from ironic.tests import base
 from ironic.tests.unit.api import base as test_api_base
 from ironic.tests.unit.api import utils as test_api_utils
+from ironic.tests.unit.db import utils as db_utils
 from ironic.tests.unit.objects import utils as obj_utils
 
 
@@ -1900,6 +1903,275 @@ class TestListNodes(test_api_base.BaseApiTest):
         self.assertEqual("******", data["driver_info"]["ssh_password"])
         self.assertEqual("******", data["driver_info"]["ssh_key_contents"])
 
+    def _create_serializer_test_nodes(self):
+        node = obj_utils.create_test_node(
+            self.context, chassis_id=self.chassis.id,
+            provision_state=states.AVAILABLE,
+            driver_info={'ipmi_password': 'secret',
+                         'ssh_key_contents': 'key'},
+            instance_info={'image_url': 'http://image',
+                           'configdrive': 'secret'})
+        db_utils.create_test_node_traits(['CUSTOM_1', 'CUSTOM_2'],
+                                         node_id=node.id)
+        allocation = obj_utils.create_test_allocation(self.context,
+                                                      node_id=node.id)
+        node.allocation_id = allocation.id
+        node.save()
+        obj_utils.create_test_node(
+            self.context, uuid=uuidutils.generate_uuid(),
+            provision_state=states.INSPECTWAIT, chassis_id=None)
+
+    def _check_serializer(self, url, version):
+        # The serializer must produce the same result as the WSME types
+        results = []
+        convert_collection = api_node.NodeSerializer.convert_collection
+
+        def _convert(serializer, rpc_nodes, limit, url=None, **kwargs):
+            legacy = api_node.NodeCollection.convert_with_links(
+                rpc_nodes, limit, url=url, fields=serializer.requested_fields,
+                **kwargs)
+            results.append(wsme_json.tojson(api_node.NodeCollection, legacy))
+            return convert_collection(serializer, rpc_nodes, limit, url=url,
+                                      **kwargs)
+
+        with mock.patch.object(api_node.NodeSerializer, 'convert_collection',
+                               autospec=True, side_effect=_convert):
+            data = self.get_json(url,
+                                 headers={api_base.Version.string: version})
+        self.assertEqual(json.loads(json.dumps(results[0])), data)
+        return data
+
+    def test_serializer_detail(self):
+        self._create_serializer_test_nodes()
+        for version in ('1.1', '1.14', '1.30', '1.40',
+                        str(api_v1.max_version())):
+            data = self._check_serializer('/nodes/detail?limit=2', version)
+            self.assertEqual(2, len(data['nodes']))
+            self.assertIn('next', data)
+
+    def test_serializer_fields(self):
+        self._create_serializer_test_nodes()
+        data = self._check_serializer(
+            '/nodes?fields=uuid,chassis_uuid,traits,driver_info,conductor,'
+            'allocation_uuid,provision_state', str(api_v1.max_version()))
+        self.assertEqual('******',
+                         data['nodes'][0]['driver_info']['ipmi_password'])
+        self.assertEqual(['CUSTOM_1', 'CUSTOM_2'],
+                         sorted(data['nodes'][0]['traits']))
+
+    def test_serializer_default_fields(self):
+        self._create_serializer_test_nodes()
+        self._check_serializer('/nodes', '1.1')
+        self._check_serializer('/nodes', str(api_v1.max_version()))
+
+    def test_serializer_chassis_fetched_once(self):
+        for i in range(3):
+            obj_utils.create_test_node(self.context,
+                                       uuid=uuidutils.generate_uuid(),
+                                       chassis_id=self.chassis.id)
+        with mock.patch.object(objects.Chassis, 'get', autospec=True,
+                               return_value=self.chassis) as mock_get:
+            data = self.get_json(
+                '/nodes/detail',
+                headers={api_base.Version.string: str(api_v1.max_version())})
+        self.assertEqual(3, len(data['nodes']))
+        mock_get.assert_called_once_with(mock.ANY, self.chassis.id)
+
+    def test_get_hidden_fields(self):
+        self.addCleanup(api_node._HIDDEN_FIELDS.clear)
+        with mock.patch.object(api_node.pecan, 'request',
+                               version=mock.Mock(minor=1)):
+            hidden = api_node.get_hidden_fields()
+            self.assertIn('name', hidden)
+            self.assertIn('conductor', hidden)
+            with mock.patch.object(api_utils, 'disallowed_fields',
+                                   autospec=True) as mock_fields:
+                self.assertIs(hidden, api_node.get_hidden_fields())
+                self.assertFalse(mock_fields.called)
+
+    def _check_streaming(self, url):
+        # A streamed response must be the same as a regular one
+        headers = {api_base.Version.string: str(api_v1.max_version())}
+        expected = self.get_json(url, headers=headers)
+        self.config(stream_collections=True, stream_chunk_size=2,
+                    group='api')
+        with mock.patch.object(objects.Node, 'list', autospec=True,
+                               side_effect=objects.Node.list) as mock_list:
+            response = self.get_json(url, headers=headers,
+                                     expect_errors=True)
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual('application/json', response.content_type)
+        self.assertEqual(expected, response.json)
+        return response.json, mock_list
+
+    def test_streaming(self):
+        for i in range(5):
+            obj_utils.create_test_node(self.context,
+                                       uuid=uuidutils.generate_uuid(),
+                                       chassis_id=self.chassis.id)
+        data, mock_list = self._check_streaming('/nodes/detail')
+        self.assertEqual(5, len(data['nodes']))
+        self.assertNotIn('next', data)
+        self.assertEqual(3, mock_list.call_count)
+
+        data, mock_list = self._check_streaming('/nodes?limit=4&fields=uuid')
+        self.assertEqual(4, len(data['nodes']))
+        self.assertIn('next', data)
+        self.assertEqual([2, 2], [call[0][1]
+                                  for call in mock_list.call_args_list])
+
+    def test_streaming_lazy(self):
+        for i in range(5):
+            obj_utils.create_test_node(self.context,
+                                       uuid=uuidutils.generate_uuid())
+        self.config(stream_collections=True, stream_chunk_size=2,
+                    group='api')
+        environ = webob.Request.blank(
+            '/v1/nodes/detail',
+            headers={api_base.Version.string: str(api_v1.max_version())}
+        ).environ
+        start_response = mock.Mock()
+        with mock.patch.object(objects.Node, 'list', autospec=True,
+                               side_effect=objects.Node.list) as mock_list:
+            body = self.app.app(environ, start_response)
+            start_response.assert_called_once_with('200 OK', mock.ANY)
+            # Only the first chunk is fetched before the response starts
+            self.assertEqual(1, mock_list.call_count)
+            data = json.loads(b''.join(body).decode('utf-8'))
+            self.assertEqual(3, mock_list.call_count)
+        self.assertEqual(5, len(data['nodes']))
+
+    def test_streaming_empty(self):
+        data, mock_list = self._check_streaming('/nodes')
+        self.assertEqual({'nodes': []}, data)
+
+    @mock.patch.object(rpcapi.ConductorAPI, 'get_conductor_for',
+                       autospec=True)
+    def test_streaming_filter_by_conductor(self, mock_get_conductor):
+        nodes = [obj_utils.create_test_node(self.context,
+                                            uuid=uuidutils.generate_uuid())
+                 for i in range(5)]
+        mock_get_conductor.side_effect = lambda _self, node: (
+            'c1' if node.uuid in (nodes[0].uuid, nodes[3].uuid) else 'c2')
+        data, mock_list = self._check_streaming(
+            '/nodes?conductor=c1&fields=uuid')
+        self.assertEqual([nodes[0].uuid, nodes[3].uuid],
+                         [node['uuid'] for node in data['nodes']])
+
+    def test_streaming_invalid_sort_key(self):
+        self.config(stream_collections=True, group='api')
+        response = self.get_json(
+            '/nodes?sort_key=foo', expect_errors=True,
+            headers={api_base.Version.string: str(api_v1.max_version())})
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        self.assertEqual('application/json', response.content_type)
+        self.assertTrue(response.json['error_message'])
+
+    def _get_conditional(self, url, status=http_client.OK, **headers):
+        headers[api_base.Version.string] = str(api_v1.max_version())
+        return self.app.get('/v1' + url, headers=headers, status=status)
+
+    def test_get_one_etag(self):
+        node = obj_utils.create_test_node(self.context)
+        response = self._get_conditional('/nodes/%s' % node.uuid)
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertNotIn('Last-Modified', response.headers)
+
+        with mock.patch.object(api_node.Node, 'convert_with_links',
+                               autospec=True) as mock_convert:
+            response = self._get_conditional('/nodes/%s' % node.uuid,
+                                             status=http_client.NOT_MODIFIED,
+                                             **{'If-None-Match': etag})
+        self.assertFalse(mock_convert.called)
+        self.assertEqual(b'', response.body)
+        self.assertEqual(etag, response.headers['ETag'])
+
+        # Another version or set of fields is another representation
+        response = self._get_conditional('/nodes/%s?fields=uuid' % node.uuid,
+                                         **{'If-None-Match': etag})
+        self.assertNotEqual(etag, response.headers['ETag'])
+
+    def test_get_one_etag_changed(self):
+        node = obj_utils.create_test_node(self.context)
+        etag = self._get_conditional('/nodes/%s' % node.uuid).headers['ETag']
+        node.power_state = states.POWER_OFF
+        node.save()
+        response = self._get_conditional('/nodes/%s' % node.uuid,
+                                         **{'If-None-Match': etag})
+        self.assertEqual(states.POWER_OFF, response.json['power_state'])
+        self.assertNotEqual(etag, response.headers['ETag'])
+
+    def test_get_one_etag_traits(self):
+        node = obj_utils.create_test_node(self.context)
+        etag = self._get_conditional('/nodes/%s' % node.uuid).headers['ETag']
+        # Changing the traits does not update the node
+        objects.TraitList.create(self.context, node.id, ['CUSTOM_1'])
+        response = self._get_conditional('/nodes/%s' % node.uuid,
+                                         **{'If-None-Match': etag})
+        self.assertEqual(['CUSTOM_1'], response.json['traits'])
+
+    def test_get_one_if_modified_since_ignored(self):
+        node = obj_utils.create_test_node(self.context)
+        response = self._get_conditional(
+            '/nodes/%s' % node.uuid,
+            **{'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+        self.assertEqual(node.uuid, response.json['uuid'])
+
+    def test_get_one_fields_changed(self):
+        node = obj_utils.create_test_node(self.context)
+        url = '/nodes/%s' % node.uuid
+        etag = self._get_conditional(url + '?fields=uuid').headers['ETag']
+        # The node is not modified, but another set of fields is requested
+        response = self._get_conditional(url + '?fields=uuid,name',
+                                         **{'If-None-Match': etag})
+        self.assertEqual({'uuid', 'name', 'links'}, set(response.json))
+        self.assertNotEqual(etag, response.headers['ETag'])
+
+    def test_node_states_etag(self):
+        node = obj_utils.create_test_node(self.context)
+        url = '/nodes/%s/states' % node.uuid
+        etag = self._get_conditional(url).headers['ETag']
+        self._get_conditional(url, status=http_client.NOT_MODIFIED,
+                              **{'If-None-Match': etag})
+        node.provision_state = states.DEPLOYING
+        node.save()
+        response = self._get_conditional(url, **{'If-None-Match': etag})
+        self.assertEqual(states.DEPLOYING, response.json['provision_state'])
+
+    def test_get_collection_etag(self):
+        nodes = [obj_utils.create_test_node(self.context,
+                                            uuid=uuidutils.generate_uuid())
+                 for i in range(3)]
+        etag = self._get_conditional('/nodes/detail').headers['ETag']
+        with mock.patch.object(api_node.NodeSerializer, 'convert',
+                               autospec=True) as mock_convert:
+            self._get_conditional('/nodes/detail',
+                                  status=http_client.NOT_MODIFIED,
+                                  **{'If-None-Match': etag})
+        self.assertFalse(mock_convert.called)
+
+        # Other query parameters
+        response = self._get_conditional('/nodes/detail?limit=2',
+                                         **{'If-None-Match': etag})
+        self.assertNotEqual(etag, response.headers['ETag'])
+
+        nodes[1].maintenance = True
+        nodes[1].save()
+        response = self._get_conditional('/nodes/detail',
+                                         **{'If-None-Match': etag})
+        self.assertNotEqual(etag, response.headers['ETag'])
+        self.assertEqual(3, len(response.json['nodes']))
+
+    def test_get_collection_etag_deleted(self):
+        nodes = [obj_utils.create_test_node(self.context,
+                                            uuid=uuidutils.generate_uuid())
+                 for i in range(3)]
+        etag = self._get_conditional('/nodes').headers['ETag']
+        nodes[2].destroy()
+        response = self._get_conditional('/nodes', **{'If-None-Match': etag})
+        self.assertEqual(2, len(response.json['nodes']))
+
 
 class TestPatch(test_api_base.BaseApiTest):
 
@@ -14,6 +14,7 @@ Tests for the API /ports/ methods.
 """
 
 import datetime
+import json
 import types
 
 import mock
@@ -24,6 +25,7 @@ import six
 from six.moves import http_client
 from six.moves.urllib import parse as urlparse
 from testtools import matchers
+from wsme.rest import json as wsme_json
 from wsme import types as wtypes
 
 from ironic.api.controllers import base as api_base
@@ -861,6 +863,108 @@ class TestListPorts(test_api_base.BaseApiTest):
         self.assertIn('Expected a logical name or UUID',
                       response.json['error_message'])
 
+    def _create_serializer_test_ports(self):
+        portgroup = obj_utils.create_test_portgroup(self.context,
+                                                    node_id=self.node.id)
+        obj_utils.create_test_port(self.context, node_id=self.node.id,
+                                   portgroup_id=portgroup.id,
+                                   physical_network='physnet1')
+        obj_utils.create_test_port(self.context, node_id=self.node.id,
+                                   uuid=uuidutils.generate_uuid(),
+                                   address='52:54:00:cf:2d:32')
+
+    def _check_serializer(self, url, version):
+        # The serializer must produce the same result as the WSME types
+        results = []
+        convert_collection = api_port.PortSerializer.convert_collection
+
+        def _convert(serializer, rpc_ports, limit, url=None, **kwargs):
+            legacy = api_port.PortCollection.convert_with_links(
+                rpc_ports, limit, url=url, fields=serializer.requested_fields,
+                **kwargs)
+            results.append(wsme_json.tojson(api_port.PortCollection, legacy))
+            return convert_collection(serializer, rpc_ports, limit, url=url,
+                                      **kwargs)
+
+        with mock.patch.object(api_port.PortSerializer, 'convert_collection',
+                               autospec=True, side_effect=_convert):
+            data = self.get_json(url,
+                                 headers={api_base.Version.string: version})
+        self.assertEqual(json.loads(json.dumps(results[0])), data)
+        return data
+
+    def test_serializer_detail(self):
+        self._create_serializer_test_ports()
+        for version in ('1.1', '1.18', '1.19', '1.24', '1.34',
+                        str(api_v1.max_version())):
+            data = self._check_serializer('/ports/detail?limit=1', version)
+            self.assertEqual(1, len(data['ports']))
+            self.assertIn('next', data)
+
+    def test_serializer_fields(self):
+        self._create_serializer_test_ports()
+        self._check_serializer('/ports', str(api_v1.max_version()))
+        data = self._check_serializer(
+            '/ports?fields=uuid,portgroup_uuid,physical_network',
+            str(api_v1.max_version()))
+        self.assertEqual(2, len(data['ports']))
+
+    def test_serializer_nodes_fetched_once(self):
+        self._create_serializer_test_ports()
+        with mock.patch.object(objects.Node, 'get',
+                               spec_set=types.FunctionType,
+                               return_value=self.node) as mock_get:
+            data = self.get_json(
+                '/ports/detail',
+                headers={api_base.Version.string: str(api_v1.max_version())})
+        self.assertEqual(2, len(data['ports']))
+        mock_get.assert_called_once_with(mock.ANY, self.node.id)
+
+    @mock.patch.object(objects.Portgroup, 'get', spec_set=types.FunctionType)
+    def test_serializer_deleted_portgroup(self, mock_get_portgroup):
+        self._create_serializer_test_ports()
+        mock_get_portgroup.side_effect = exception.PortgroupNotFound(
+            portgroup='boom')
+        data = self.get_json(
+            '/ports/detail',
+            headers={api_base.Version.string: str(api_v1.max_version())})
+        self.assertEqual([None, None],
+                         [port['portgroup_uuid'] for port in data['ports']])
+
+    def _check_streaming(self, url):
+        # A streamed response must be the same as a regular one
+        headers = {api_base.Version.string: str(api_v1.max_version())}
+        expected = self.get_json(url, headers=headers)
+        self.config(stream_collections=True, stream_chunk_size=2,
+                    group='api')
+        response = self.get_json(url, headers=headers, expect_errors=True)
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual('application/json', response.content_type)
+        self.assertEqual(expected, response.json)
+        return response.json
+
+    def test_streaming(self):
+        self._create_serializer_test_ports()
+        for i in range(3):
+            obj_utils.create_test_port(self.context, node_id=self.node.id,
+                                       uuid=uuidutils.generate_uuid(),
+                                       address='52:54:00:cf:2d:4%s' % i)
+        data = self._check_streaming('/ports/detail')
+        self.assertEqual(5, len(data['ports']))
+        self.assertNotIn('next', data)
+        data = self._check_streaming('/ports?limit=3&sort_dir=desc')
+        self.assertEqual(3, len(data['ports']))
+        self.assertIn('next', data)
+        data = self._check_streaming('/nodes/%s/ports' % self.node.uuid)
+        self.assertEqual(5, len(data['ports']))
+
+    @mock.patch.object(objects.Node, 'get', spec_set=types.FunctionType)
+    def test_streaming_deleted_node(self, mock_get_node):
+        mock_get_node.side_effect = exception.NodeNotFound(node='fake')
+        self._create_serializer_test_ports()
+        data = self._check_streaming('/ports')
+        self.assertEqual({'ports': []}, data)
+
 
 @mock.patch.object(rpcapi.ConductorAPI, 'update_port', autospec=True,
                    side_effect=_rpcapi_update_port)
@@ -14,6 +14,8 @@ Tests for the API /portgroups/ methods.
 """
 
 import datetime
+import json
+import types
 
 import mock
 from oslo_config import cfg
@@ -23,6 +25,7 @@ import six
 from six.moves import http_client
 from six.moves.urllib import parse as urlparse
 from testtools.matchers import HasLength
+from wsme.rest import json as wsme_json
 from wsme import types as wtypes
 
 from ironic.api.controllers import base as api_base
@@ -570,6 +573,89 @@ class TestListPortgroups(test_api_base.BaseApiTest):
         self.assertEqual(portgroup.uuid, data['portgroups'][0]['uuid'])
         self.assertEqual(self.node.uuid, data['portgroups'][0]['node_uuid'])
 
+    def _create_serializer_test_portgroups(self, count=2):
+        for i in range(count):
+            obj_utils.create_test_portgroup(
+                self.context, node_id=self.node.id,
+                uuid=uuidutils.generate_uuid(), name='portgroup%s' % i,
+                address='52:54:00:cf:2d:3%s' % i)
+
+    def _check_serializer(self, url):
+        # The serializer must produce the same result as the WSME types
+        results = []
+        serializer_class = api_portgroup.PortgroupSerializer
+        convert_collection = serializer_class.convert_collection
+
+        def _convert(serializer, rpc_portgroups, limit, url=None, **kwargs):
+            legacy = api_portgroup.PortgroupCollection.convert_with_links(
+                rpc_portgroups, limit, url=url,
+                fields=serializer.requested_fields, **kwargs)
+            results.append(wsme_json.tojson(
+                api_portgroup.PortgroupCollection, legacy))
+            return convert_collection(serializer, rpc_portgroups, limit,
+                                      url=url, **kwargs)
+
+        with mock.patch.object(serializer_class, 'convert_collection',
+                               autospec=True, side_effect=_convert):
+            data = self.get_json(url, headers=self.headers)
+        self.assertEqual(json.loads(json.dumps(results[0])), data)
+        return data
+
+    def test_serializer_detail(self):
+        self._create_serializer_test_portgroups()
+        data = self._check_serializer('/portgroups/detail?limit=1')
+        self.assertEqual(1, len(data['portgroups']))
+        self.assertIn('next', data)
+        data = self._check_serializer('/portgroups/detail')
+        self.assertEqual(2, len(data['portgroups']))
+        self.assertNotIn('next', data)
+
+    def test_serializer_fields(self):
+        self._create_serializer_test_portgroups()
+        self._check_serializer('/portgroups')
+        data = self._check_serializer(
+            '/portgroups?fields=uuid,node_uuid,mode,created_at')
+        self.assertEqual(self.node.uuid, data['portgroups'][0]['node_uuid'])
+
+    def test_serializer_nodes_fetched_once(self):
+        self._create_serializer_test_portgroups()
+        with mock.patch.object(objects.Node, 'get',
+                               spec_set=types.FunctionType,
+                               return_value=self.node) as mock_get:
+            data = self.get_json('/portgroups/detail', headers=self.headers)
+        self.assertEqual(2, len(data['portgroups']))
+        mock_get.assert_called_once_with(mock.ANY, self.node.id)
+
+    @mock.patch.object(objects.Node, 'get', spec_set=types.FunctionType)
+    def test_serializer_deleted_node(self, mock_get_node):
+        mock_get_node.side_effect = exception.NodeNotFound(node='fake')
+        self._create_serializer_test_portgroups()
+        data = self.get_json('/portgroups', headers=self.headers)
+        self.assertEqual([], data['portgroups'])
+
+    def _check_streaming(self, url):
+        # A streamed response must be the same as a regular one
+        expected = self.get_json(url, headers=self.headers)
+        self.config(stream_collections=True, stream_chunk_size=2,
+                    group='api')
+        response = self.get_json(url, headers=self.headers,
+                                 expect_errors=True)
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual('application/json', response.content_type)
+        self.assertEqual(expected, response.json)
+        return response.json
+
+    def test_streaming(self):
+        self._create_serializer_test_portgroups(count=5)
+        data = self._check_streaming('/portgroups/detail')
+        self.assertEqual(5, len(data['portgroups']))
+        self.assertNotIn('next', data)
+        data = self._check_streaming('/portgroups?limit=4&fields=uuid')
+        self.assertEqual(4, len(data['portgroups']))
+        self.assertIn('next', data)
+        data = self._check_streaming('/nodes/%s/portgroups' % self.node.uuid)
+        self.assertEqual(5, len(data['portgroups']))
+
 
 @mock.patch.object(rpcapi.ConductorAPI, 'update_portgroup')
 class TestPatch(test_api_base.BaseApiTest):
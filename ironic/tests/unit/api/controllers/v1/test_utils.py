@@ -14,12 +14,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import types
+
 import mock
 import os_traits
 from oslo_config import cfg
 from oslo_utils import uuidutils
 import pecan
 from six.moves import http_client
+import webob
 from webob import static
 import wsme
 
@@ -530,6 +533,20 @@ class TestApiUtils(base.TestCase):
         mock_request.version.minor = 52
         self.assertFalse(utils.allow_port_is_smartnic())
 
+    @mock.patch.object(pecan, 'request', spec_set=['version'])
+    def test_allow_bulk_power(self, mock_request):
+        mock_request.version.minor = 55
+        self.assertTrue(utils.allow_bulk_power())
+        mock_request.version.minor = 54
+        self.assertFalse(utils.allow_bulk_power())
+
+    @mock.patch.object(pecan, 'request', spec_set=['version'])
+    def test_allow_bulk_nodes(self, mock_request):
+        mock_request.version.minor = 56
+        self.assertTrue(utils.allow_bulk_nodes())
+        mock_request.version.minor = 55
+        self.assertFalse(utils.allow_bulk_nodes())
+
 
 class TestNodeIdent(base.TestCase):
 
@@ -718,6 +735,81 @@ class TestVendorPassthru(base.TestCase):
                                 api_node.NodesController)))
 
 
+@mock.patch.object(pecan, 'override_template', autospec=True)
+@mock.patch.object(pecan, 'response', spec_set=['app_iter'])
+class TestStreamResponse(base.TestCase):
+
+    def test_stream_response(self, mock_response, mock_override):
+        response = utils.stream_response([b'{"a": [1', b', 2]}'])
+
+        self.assertIsInstance(response, wsme.api.Response)
+        self.assertIsNone(response.obj)
+        self.assertIsNone(response.return_type)
+        self.assertEqual(http_client.OK, response.status_code)
+        mock_override.assert_called_once_with(
+            None, content_type='application/json')
+        # NOTE: pecan reads the whole body unless it is a generator
+        self.assertIsInstance(mock_response.app_iter, types.GeneratorType)
+        self.assertEqual(b'{"a": [1, 2]}', b''.join(mock_response.app_iter))
+
+    def test_stream_response_error(self, mock_response, mock_override):
+        def _body():
+            raise exception.InvalidParameterValue('boom')
+            yield b'{}'
+
+        self.assertRaises(exception.InvalidParameterValue,
+                          utils.stream_response, _body())
+        self.assertFalse(mock_override.called)
+
+
+class TestCheckNotModified(base.TestCase):
+
+    def setUp(self):
+        super(TestCheckNotModified, self).setUp()
+        self.response = webob.Response()
+        p = mock.patch.object(pecan, 'response', self.response)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _check(self, headers, method='GET'):
+        request = webob.Request.blank('/', headers=headers, method=method)
+        with mock.patch.object(pecan, 'request', request):
+            return utils.check_not_modified('abc')
+
+    def _assert_not_modified(self, response):
+        self.assertIsInstance(response, wsme.api.Response)
+        self.assertEqual(http_client.NOT_MODIFIED, response.status_code)
+        self.assertIsNone(response.return_type)
+
+    def test_no_condition(self):
+        self.assertIsNone(self._check({}))
+        self.assertEqual('W/"abc"', self.response.headers['ETag'])
+        self.assertNotIn('Last-Modified', self.response.headers)
+
+    def test_if_none_match(self):
+        self._assert_not_modified(self._check({'If-None-Match': 'W/"abc"'}))
+        self._assert_not_modified(self._check({'If-None-Match': '"x", "abc"'}))
+        self._assert_not_modified(self._check({'If-None-Match': '*'}))
+        self.assertIsNone(self._check({'If-None-Match': '"x"'}))
+
+    def test_if_none_match_not_get(self):
+        self.assertIsNone(self._check({'If-None-Match': '"abc"'},
+                                      method='PATCH'))
+
+    def test_if_modified_since_ignored(self):
+        self.assertIsNone(self._check(
+            {'If-Modified-Since': 'Sat, 01 Jun 2019 12:00:00 GMT'}))
+        self._assert_not_modified(self._check(
+            {'If-None-Match': '"abc"',
+             'If-Modified-Since': 'Tue, 09 Mar 1971 00:00:00 GMT'}))
+
+    def test_make_etag(self):
+        self.assertEqual(utils.make_etag('a', 1, None),
+                         utils.make_etag('a', '1', 'None'))
+        self.assertNotEqual(utils.make_etag('ab', 'c'),
+                            utils.make_etag('a', 'bc'))
+
+
 class TestPortgroupIdent(base.TestCase):
     def setUp(self):
         super(TestPortgroupIdent, self).setUp()
@@ -0,0 +1,47 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests to assert that the Prometheus metrics middleware works as expected.
+"""
+
+import mock
+from oslo_config import cfg
+
+from ironic.common import metrics
+from ironic.tests.unit.api import base
+
+
+CONF = cfg.CONF
+
+
+class TestMetricsMiddleware(base.BaseApiTest):
+    """Provide a basic smoke test to ensure the metrics middleware works."""
+
+    @mock.patch.object(metrics, 'MetricsMiddleware', autospec=True)
+    def test_enable(self, mock_middleware):
+        CONF.set_override('prometheus_enabled', True, group='metrics')
+        self._make_app()
+        mock_middleware.assert_called_once_with(mock.ANY)
+
+    @mock.patch.object(metrics, 'MetricsMiddleware', autospec=True)
+    def test_disable(self, mock_middleware):
+        CONF.set_override('prometheus_enabled', False, group='metrics')
+        self._make_app()
+        self.assertFalse(mock_middleware.called)
+
+    def test_get(self):
+        CONF.set_override('prometheus_enabled', True, group='metrics')
+        self.app = self._make_app()
+        metrics.REGISTRY.counter('ironic_test_api_total').inc()
+        response = self.app.get('/metrics', headers={})
+        self.assertEqual(200, response.status_int)
+        self.assertIn('ironic_test_api_total 1.0', response.text)
@@ -15,6 +15,7 @@ import mock
 from oslo_config import cfg
 
 from ironic.cmd import conductor
+from ironic.conductor import task_manager
 from ironic.tests.unit.db import base as db_base
 
 
@@ -55,3 +56,21 @@ class ConductorStartTestCase(db_base.DbTestCase):
     def test_warn_on_missing_default_boot_option(self, log_mock):
         conductor.warn_about_missing_default_boot_option(cfg.CONF)
         self.assertTrue(log_mock.warning.called)
+
+    @mock.patch.object(task_manager, 'list_held_locks', autospec=True)
+    def test_node_locks_report(self, mock_list):
+        lock = task_manager.HeldLock('1be26c0b-03f2-4d2e-ae87-c02d7f33c123',
+                                     'power state sync', stack='stack')
+        mock_list.return_value = [
+            lock, task_manager.HeldLock('uuid2', 'deploying')]
+        report = conductor.node_locks_report()
+        self.assertEqual('power state sync',
+                         report['1be26c0b-03f2-4d2e-ae87-c02d7f33c123'][
+                             'purpose'])
+        self.assertEqual('stack',
+                         report['1be26c0b-03f2-4d2e-ae87-c02d7f33c123'][
+                             'acquired_at'])
+        self.assertIn('slow_lock_threshold',
+                      report['uuid2']['acquired_at'])
+        report.set_current_view_type('text')
+        self.assertIn('purpose = deploying', str(report))
@@ -13,6 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
+import os
+
+import fixtures
 import mock
 
 from ironic.cmd import dbsync
@@ -249,3 +253,104 @@ class OnlineMigrationTestCase(db_base.DbTestCase):
         mock_functions.side_effect = TypeError("yuck")
         self.assertRaises(TypeError, self.db_cmds._run_online_data_migrations)
         mock_functions.assert_called_once_with(self.db_cmds, mock.ANY, 50, {})
+
+    @mock.patch.object(dbsync.DBCommand, '_run_migration_functions',
+                       autospec=True)
+    def test__run_online_data_migrations_max_count_batches(self,
+                                                           mock_functions):
+        mock_functions.return_value = False
+        exit = self.assertRaises(SystemExit,
+                                 self.db_cmds._run_online_data_migrations,
+                                 max_count=120, batch_size=50)
+        self.assertEqual(1, exit.code)
+        mock_functions.assert_has_calls(
+            [mock.call(self.db_cmds, mock.ANY, 50, {}),
+             mock.call(self.db_cmds, mock.ANY, 50, {}),
+             mock.call(self.db_cmds, mock.ANY, 20, {})])
+        self.assertEqual(3, mock_functions.call_count)
+
+    @mock.patch.object(dbsync.DBCommand, '_run_migration_functions',
+                       autospec=True)
+    def test__run_online_data_migrations_max_count_done(self, mock_functions):
+        mock_functions.side_effect = (False, True)
+        exit = self.assertRaises(SystemExit,
+                                 self.db_cmds._run_online_data_migrations,
+                                 max_count=500, batch_size=10)
+        self.assertEqual(0, exit.code)
+        self.assertEqual(2, mock_functions.call_count)
+
+    @mock.patch.object(dbsync.DBCommand, '_run_migration_functions',
+                       autospec=True)
+    def test__run_online_data_migrations_batch_size_neg(self, mock_functions):
+        exit = self.assertRaises(SystemExit,
+                                 self.db_cmds._run_online_data_migrations,
+                                 batch_size=0)
+        self.assertEqual(127, exit.code)
+        self.assertFalse(mock_functions.called)
+
+    @mock.patch.object(dbsync.time, 'sleep', autospec=True)
+    @mock.patch.object(dbsync.time, 'time', autospec=True)
+    @mock.patch.object(dbsync.DBCommand, '_run_migration_functions',
+                       autospec=True)
+    def test__run_online_data_migrations_max_rate(self, mock_functions,
+                                                  mock_time, mock_sleep):
+        mock_functions.side_effect = (False, True)
+        mock_time.side_effect = (100.0, 100.5, 101.0)
+        exit = self.assertRaises(SystemExit,
+                                 self.db_cmds._run_online_data_migrations,
+                                 batch_size=20, max_rate=10)
+        self.assertEqual(0, exit.code)
+        # The first batch took 0.5s out of the 2s it is allowed to take,
+        # the last one does not need to be followed by a pause.
+        mock_sleep.assert_called_once_with(1.5)
+
+    @mock.patch.object(dbsync, 'ONLINE_MIGRATIONS', autospec=True)
+    def test__run_online_data_migrations_checkpoint(self, mock_migrations):
+        path = self.useFixture(fixtures.TempDir()).join('checkpoint')
+        mock_migrations.__iter__.return_value = (
+            (self.dbapi, 'update_to_latest_versions'),)
+
+        def _migrate(context, max_count, checkpoint):
+            checkpoint.setdefault('Node', {'version': '1.0', 'last_key': 0,
+                                           'remaining': 20, 'migrated': 0})
+            checkpoint['Node']['last_key'] += max_count
+            checkpoint['Node']['migrated'] += max_count
+            checkpoint['Node']['remaining'] -= max_count
+            return 20, max_count
+
+        mock_func = mock.Mock(side_effect=_migrate,
+                              __name__='update_to_latest_versions')
+        with mock.patch.object(self.dbapi, 'update_to_latest_versions',
+                               mock_func):
+            exit = self.assertRaises(SystemExit,
+                                     self.db_cmds._run_online_data_migrations,
+                                     max_count=10, batch_size=5,
+                                     checkpoint_file=path)
+            self.assertEqual(1, exit.code)
+            with open(path) as fp:
+                self.assertEqual({'update_to_latest_versions': {
+                    'Node': {'version': '1.0', 'last_key': 10,
+                             'remaining': 10, 'migrated': 10}}},
+                    json.load(fp))
+
+            # A new run resumes from the checkpoint
+            mock_func.side_effect = None
+            mock_func.return_value = (0, 0)
+            exit = self.assertRaises(SystemExit,
+                                     self.db_cmds._run_online_data_migrations,
+                                     checkpoint_file=path)
+            self.assertEqual(0, exit.code)
+            mock_func.assert_called_with(
+                mock.ANY, 50,
+                checkpoint={'Node': {'version': '1.0', 'last_key': 10,
+                                     'remaining': 10, 'migrated': 10}})
+        self.assertFalse(os.path.exists(path))
+
+    def test__run_online_data_migrations_bad_checkpoint(self):
+        path = self.useFixture(fixtures.TempDir()).join('checkpoint')
+        with open(path, 'w') as fp:
+            fp.write('{')
+        exit = self.assertRaises(SystemExit,
+                                 self.db_cmds._run_online_data_migrations,
+                                 checkpoint_file=path)
+        self.assertEqual(127, exit.code)
@@ -23,6 +23,7 @@ from ironic.drivers import base as drivers_base
 from ironic.drivers import fake_hardware
 from ironic.drivers import hardware_type
 from ironic.drivers.modules import fake
+from ironic.drivers.modules import ipmitool
 from ironic.drivers.modules import noop
 from ironic.tests import base
 from ironic.tests.unit.db import base as db_base
@@ -428,6 +429,44 @@ class HardwareTypeLoadTestCase(db_base.DbTestCase):
                 impl = getattr(task.driver, iface)
                 self.assertIsNotNone(impl)
 
+    @mock.patch.object(driver_factory, 'get_hardware_type', autospec=True,
+                       side_effect=driver_factory.get_hardware_type)
+    def test_build_driver_for_task_cached(self, mock_get_hw_type):
+        node1 = obj_utils.create_test_node(
+            self.context, uuid=uuidutils.generate_uuid(),
+            driver='fake-hardware', **self.node_kwargs)
+        node2 = obj_utils.create_test_node(
+            self.context, uuid=uuidutils.generate_uuid(),
+            driver='fake-hardware', **self.node_kwargs)
+        drivers = []
+        for node in (node1, node2, node1):
+            with task_manager.acquire(self.context, node.id) as task:
+                drivers.append(task.driver)
+        mock_get_hw_type.assert_called_once_with('fake-hardware')
+        for iface in drivers_base.ALL_INTERFACES:
+            self.assertIs(getattr(drivers[0], iface),
+                          getattr(drivers[1], iface))
+        self.assertIsNot(drivers[0], drivers[2])
+
+        # Reloading the interfaces drops the cache
+        factory = driver_factory._INTERFACE_LOADERS['power']
+        factory._extension_manager = None
+        factory()
+        with task_manager.acquire(self.context, node1.id):
+            pass
+        self.assertEqual(2, mock_get_hw_type.call_count)
+
+    def test_build_driver_for_task_cached_other_interface(self):
+        self.config(enabled_power_interfaces=['fake', 'ipmitool'])
+        node = obj_utils.create_test_node(self.context, driver='fake-hardware',
+                                          **self.node_kwargs)
+        with task_manager.acquire(self.context, node.id) as task:
+            self.assertIsInstance(task.driver.power, fake.FakePower)
+            task.node.power_interface = 'ipmitool'
+            task.node.save()
+        with task_manager.acquire(self.context, node.id) as task:
+            self.assertIsInstance(task.driver.power, ipmitool.IPMIPower)
+
     def test_build_driver_for_task_incorrect(self):
         self.node_kwargs['power_interface'] = 'foobar'
         node = obj_utils.create_test_node(self.context, driver='fake-hardware',
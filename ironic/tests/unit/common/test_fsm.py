@@ -96,3 +96,21 @@ class FSMTest(base.TestCase):
         self.fsm.initialize('wakeup')
         self.assertRaises(excp.InvalidState, self.fsm.process_event,
                           'walk', 'daydream')
+
+    def test_shallow_copy(self):
+        self.fsm.freeze()
+        first = self.fsm.copy(shallow=True)
+        second = self.fsm.copy(shallow=True)
+        self.assertIs(self.fsm._states, first._states)
+        self.assertIs(self.fsm._transitions, first._transitions)
+
+        first.initialize('wakeup')
+        second.initialize('working')
+        first.process_event('walk', 'play')
+        self.assertEqual('working', first.current_state)
+        self.assertEqual('play', first.target_state)
+        self.assertEqual('working', second.current_state)
+        self.assertIsNone(second.target_state)
+        self.assertIsNone(self.fsm.current_state)
+
+        self.assertRaises(excp.InvalidState, first.add_state, 'new')
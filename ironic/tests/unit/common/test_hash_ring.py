@@ -15,6 +15,7 @@
 
 import time
 
+import mock
 from oslo_config import cfg
 
 from ironic.common import exception
@@ -116,6 +117,13 @@ class HashRingManagerTestCase(db_base.DbTestCase):
         ring = self.ring_manager.get_ring('hardware-type', '')
         self.assertEqual(2, len(ring))
 
+    @mock.patch.object(hash_ring.METRICS, 'send_counter', autospec=True)
+    def test_hash_ring_manager_rebuild_counter(self, mock_counter):
+        self.register_conductors()
+        self.ring_manager.get_ring('hardware-type', '')
+        self.ring_manager.get_ring('hardware-type', '')
+        mock_counter.assert_called_once_with('HashRingManager.rebuild', 1)
+
     def test_hash_ring_manager_uncached(self):
         ring_mgr = hash_ring.HashRingManager(cache=False,
                                              use_groups=self.use_groups)
@@ -0,0 +1,175 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import webob
+
+from ironic.common import metrics
+from ironic.tests import base
+
+
+class RegistryTestCase(base.TestCase):
+
+    def setUp(self):
+        super(RegistryTestCase, self).setUp()
+        self.registry = metrics.Registry()
+
+    def test_render(self):
+        counter = self.registry.counter('ironic_requests_total',
+                                        'Number of requests.')
+        counter.inc()
+        counter.inc(2, labels={'method': 'GET'})
+        self.registry.gauge('ironic_queued').set(3)
+        histogram = self.registry.histogram('ironic_duration_seconds',
+                                            buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        self.assertEqual(
+            '# TYPE ironic_duration_seconds histogram\n'
+            'ironic_duration_seconds_bucket{le="0.1"} 1.0\n'
+            'ironic_duration_seconds_bucket{le="1.0"} 2.0\n'
+            'ironic_duration_seconds_bucket{le="+Inf"} 3.0\n'
+            'ironic_duration_seconds_sum 5.55\n'
+            'ironic_duration_seconds_count 3.0\n'
+            '# TYPE ironic_queued gauge\n'
+            'ironic_queued 3.0\n'
+            '# HELP ironic_requests_total Number of requests.\n'
+            '# TYPE ironic_requests_total counter\n'
+            'ironic_requests_total 1.0\n'
+            'ironic_requests_total{method="GET"} 2.0\n',
+            self.registry.render())
+
+    def test_same_metric(self):
+        self.assertIs(self.registry.counter('ironic_a'),
+                      self.registry.counter('ironic_a'))
+        self.assertRaises(ValueError, self.registry.gauge, 'ironic_a')
+
+    def test_label_escaping(self):
+        self.registry.gauge('ironic_a').set(1, labels={'x': 'a"b\\c\nd'})
+        self.assertIn('ironic_a{x="a\\"b\\\\c\\nd"} 1.0',
+                      self.registry.render())
+
+    def test_collector(self):
+        def _collect():
+            gauge = metrics.Gauge('ironic_collected')
+            gauge.set(42)
+            return [gauge]
+
+        self.registry.add_collector(_collect)
+        self.assertIn('ironic_collected 42.0', self.registry.render())
+        self.registry.remove_collector(_collect)
+        self.assertEqual('', self.registry.render())
+        # Removing twice is fine
+        self.registry.remove_collector(_collect)
+
+
+class MetricLoggerTestCase(base.TestCase):
+
+    def setUp(self):
+        super(MetricLoggerTestCase, self).setUp()
+        self.registry = metrics.Registry()
+        patcher = mock.patch.object(metrics, 'REGISTRY', self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.logger = metrics.get_metrics_logger('ironic.test')
+        self.backend = mock.Mock(spec=['_gauge', '_counter', '_timer'])
+        self.logger._backend = self.backend
+
+    def test_metric_name(self):
+        self.assertEqual(
+            'ironic_conductor_manager_Manager_do_it',
+            metrics.metric_name('conductor.manager.Manager.do-it'))
+        self.assertEqual('ironic_api', metrics.metric_name('ironic.api'))
+
+    @mock.patch('ironic_lib.metrics._time', autospec=True)
+    def test_timer(self, mock_time):
+        mock_time.side_effect = [1.0, 1.5]
+
+        @self.logger.timer('Manager.do')
+        def _do():
+            pass
+
+        _do()
+        self.backend._timer.assert_called_once_with('ironic.test.Manager.do',
+                                                    500.0)
+        histogram = self.registry.histogram(
+            'ironic_test_Manager_do_seconds')
+        self.assertIn(('_sum', (), 0.5), histogram.samples())
+
+    def test_counter(self):
+        self.logger.send_counter('Manager.rejected', 2)
+        self.backend._counter.assert_called_once_with(
+            'Manager.rejected', 2, sample_rate=None)
+        counter = self.registry.counter('ironic_Manager_rejected_total')
+        self.assertEqual([('', (), 2)], counter.samples())
+
+    def test_gauge(self):
+        self.logger.send_gauge('Manager.queued', 5)
+        self.backend._gauge.assert_called_once_with('Manager.queued', 5)
+        gauge = self.registry.gauge('ironic_Manager_queued')
+        self.assertEqual([('', (), 5)], gauge.samples())
+
+    def test_labels(self):
+        self.logger.send_timer('TaskManager.lock_wait', 250,
+                               labels={'purpose': 'power state sync'})
+        self.backend._timer.assert_called_once_with(
+            'TaskManager.lock_wait.power_state_sync', 250)
+        histogram = self.registry.histogram(
+            'ironic_TaskManager_lock_wait_seconds')
+        self.assertIn(('_sum', (('purpose', 'power state sync'),), 0.25),
+                      histogram.samples())
+
+    def test_histogram(self):
+        self.logger.send_histogram('TaskManager.db_queries', 3,
+                                   labels={'purpose': '!'}, buckets=(1, 5))
+        self.backend._timer.assert_called_once_with(
+            'TaskManager.db_queries.unspecified', 3)
+        histogram = self.registry.histogram('ironic_TaskManager_db_queries')
+        self.assertEqual((1, 5), histogram.buckets)
+        self.assertIn(('_count', (('purpose', '!'),), 1),
+                      histogram.samples())
+
+
+class ApplicationTestCase(base.TestCase):
+
+    def setUp(self):
+        super(ApplicationTestCase, self).setUp()
+        registry = metrics.Registry()
+        registry.gauge('ironic_queued').set(1)
+        patcher = mock.patch.object(metrics, 'REGISTRY', registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app = mock.Mock(return_value=[b'app'])
+        self.middleware = metrics.MetricsMiddleware(self.app)
+
+    def test_metrics(self):
+        response = webob.Request.blank('/metrics').get_response(
+            self.middleware)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(metrics.CONTENT_TYPE,
+                         response.headers['Content-Type'])
+        self.assertEqual(b'# TYPE ironic_queued gauge\nironic_queued 1.0\n',
+                         response.body)
+        self.assertFalse(self.app.called)
+
+    def test_method_not_allowed(self):
+        response = webob.Request.blank(
+            '/metrics', method='POST').get_response(self.middleware)
+        self.assertEqual(405, response.status_int)
+
+    def test_other_path(self):
+        environ = {'PATH_INFO': '/v1/nodes', 'REQUEST_METHOD': 'GET'}
+        start_response = mock.Mock()
+        self.assertEqual([b'app'], self.middleware(environ, start_response))
+        self.app.assert_called_once_with(environ, start_response)
@@ -0,0 +1,267 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import stat
+import tempfile
+import threading
+
+import mock
+from oslo_config import cfg
+from oslo_serialization import jsonutils
+
+from ironic.common import context
+from ironic.common import exception
+from ironic.common import notification_queue
+from ironic.tests import base
+
+CONF = cfg.CONF
+
+
+class NotificationQueueTestCase(base.TestCase):
+
+    def setUp(self):
+        super(NotificationQueueTestCase, self).setUp()
+        self.context = context.get_admin_context()
+        self.sent = []
+        # Set to let the sender go
+        self.go = threading.Event()
+        self.go.set()
+
+    def _sender(self, notification):
+        self.go.wait()
+        self.sent.append(notification.payload)
+
+    def _notification(self, payload):
+        return notification_queue.Notification(
+            context=self.context, publisher_id='ironic-conductor.host',
+            level='info', event_type='baremetal.node.power_set.end',
+            payload=payload)
+
+    def _queue(self, size=10, **kwargs):
+        queue = notification_queue.NotificationQueue(size, sender=self._sender,
+                                                     **kwargs)
+        self.addCleanup(queue.stop, 5)
+        return queue
+
+    def _wait_sending(self, queue):
+        # Wait for the sender thread to take notifications from the queue
+        for _ in range(1000):
+            if queue._sending:
+                return
+            threading.Event().wait(0.001)
+        self.fail('No notification is being sent')
+
+    def test_order(self):
+        queue = self._queue()
+        for i in range(30):
+            self.assertTrue(queue.put(self._notification(i)))
+        self.assertTrue(queue.flush(5))
+        self.assertEqual(list(range(30)), self.sent)
+        self.assertEqual(0, len(queue))
+
+    @mock.patch.object(notification_queue.METRICS, 'send_gauge',
+                       autospec=True)
+    def test_depth_reported(self, mock_gauge):
+        queue = self._queue()
+        queue.put(self._notification(1))
+        queue.flush(5)
+        mock_gauge.assert_called_with('NotificationQueue.depth', 0)
+
+    def test_sender_failure(self):
+        def _sender(notification):
+            if notification.payload == 1:
+                raise RuntimeError('boom')
+            self.sent.append(notification.payload)
+
+        queue = self._queue()
+        queue._sender = _sender
+        for i in range(3):
+            queue.put(self._notification(i))
+        self.assertTrue(queue.flush(5))
+        self.assertEqual([0, 2], self.sent)
+
+    @mock.patch.object(notification_queue.METRICS, 'send_counter',
+                       autospec=True)
+    def test_overflow_drop(self, mock_counter):
+        self.go.clear()
+        queue = self._queue(size=2, overflow=notification_queue.DROP)
+        queue.put(self._notification(0))
+        self._wait_sending(queue)
+        self.assertTrue(queue.put(self._notification(1)))
+        self.assertTrue(queue.put(self._notification(2)))
+        self.assertFalse(queue.put(self._notification(3)))
+        mock_counter.assert_called_once_with('NotificationQueue.dropped', 1)
+        self.go.set()
+        self.assertTrue(queue.flush(5))
+        self.assertEqual([0, 1, 2], self.sent)
+
+    def test_overflow_block(self):
+        self.go.clear()
+        queue = self._queue(size=1)
+        queue.put(self._notification(0))
+        self._wait_sending(queue)
+        queue.put(self._notification(1))
+
+        producer = threading.Thread(target=queue.put,
+                                    args=(self._notification(2),))
+        producer.start()
+        producer.join(0.05)
+        self.assertTrue(producer.is_alive())
+        self.go.set()
+        producer.join(5)
+        self.assertFalse(producer.is_alive())
+        self.assertTrue(queue.flush(5))
+        self.assertEqual([0, 1, 2], self.sent)
+
+    def test_overflow_spill(self):
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        self.go.clear()
+        queue = self._queue(size=1, overflow=notification_queue.SPILL,
+                            spill_dir=spill_dir)
+        queue.put(self._notification(0))
+        self._wait_sending(queue)
+        for i in range(1, 5):
+            self.assertTrue(queue.put(self._notification(i)))
+        # Everything after the first spilled notification is spilled
+        self.assertEqual(3, len(os.listdir(spill_dir)))
+
+        self.go.set()
+        self.assertTrue(queue.flush(5))
+        self.assertEqual([0, 1, 2, 3, 4], self.sent)
+        self.assertEqual([], os.listdir(spill_dir))
+
+    def test_spilled_sent_on_restart(self):
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        self.go.clear()
+        queue = notification_queue.NotificationQueue(
+            1, overflow=notification_queue.SPILL, spill_dir=spill_dir,
+            sender=self._sender)
+        queue.put(self._notification(0))
+        self._wait_sending(queue)
+        queue.put(self._notification(1))
+        queue.put(self._notification(2))
+        queue.put(self._notification(3))
+        self.go.set()
+        queue.stop(5)
+        # The one being sent and the one in memory
+        self.assertEqual([0, 1], self.sent)
+
+        self.sent = []
+        queue = self._queue(size=1, overflow=notification_queue.SPILL,
+                            spill_dir=spill_dir)
+        self.assertTrue(queue.flush(5))
+        self.assertEqual([2, 3], self.sent)
+        self.assertEqual([], os.listdir(spill_dir))
+
+    def _spill(self, spill_dir, count):
+        self.go.clear()
+        queue = notification_queue.NotificationQueue(
+            1, overflow=notification_queue.SPILL, spill_dir=spill_dir,
+            sender=self._sender)
+        self.addCleanup(queue.stop, 5)
+        queue.put(self._notification(0))
+        self._wait_sending(queue)
+        queue.put(self._notification(1))
+        for i in range(count):
+            queue.put(self._notification(i + 2))
+        return queue
+
+    def test_spill_file(self):
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        self.context = context.RequestContext(auth_token='secret',
+                                              request_id='req-1')
+        queue = self._spill(spill_dir, 1)
+        name, = os.listdir(spill_dir)
+        self.assertEqual('%s.%d.%020d.json' % (CONF.host, os.getpid(), 0),
+                         name)
+        path = os.path.join(spill_dir, name)
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(path).st_mode))
+        with open(path) as f:
+            data = f.read()
+        self.assertNotIn('secret', data)
+        self.assertIn('req-1', data)
+        self.go.set()
+        self.assertTrue(queue.flush(5))
+
+    @mock.patch.object(notification_queue, '_is_running', autospec=True)
+    def test_spilled_by_other_processes(self, mock_running):
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        data = {'context': self.context.to_dict(),
+                'publisher_id': 'ironic-api.host', 'level': 'info',
+                'event_type': 'baremetal.node.create.end'}
+        for host, pid, payload in ((CONF.host, 1, 'dead'),
+                                   (CONF.host, 2, 'running'),
+                                   ('other-host', 1, 'other')):
+            data['payload'] = payload
+            with open(os.path.join(spill_dir, '%s.%d.%020d.json' % (
+                    host, pid, 0)), 'w') as f:
+                f.write(jsonutils.dumps(data))
+        mock_running.side_effect = lambda pid: pid == 2
+
+        queue = self._queue(size=10, overflow=notification_queue.SPILL,
+                            spill_dir=spill_dir)
+        self.assertTrue(queue.flush(5))
+        # Only the notification of the exited process of this host is sent
+        self.assertEqual(['dead'], self.sent)
+        self.assertEqual(
+            sorted(['%s.2.%020d.json' % (CONF.host, 0),
+                    'other-host.1.%020d.json' % 0]),
+            sorted(os.listdir(spill_dir)))
+
+    def test_is_running(self):
+        self.assertTrue(notification_queue._is_running(os.getpid()))
+
+    def test_spill_without_dir(self):
+        self.assertRaises(exception.ConfigInvalid,
+                          notification_queue.NotificationQueue, 10,
+                          overflow=notification_queue.SPILL)
+
+    def test_put_after_stop(self):
+        queue = self._queue()
+        queue.put(self._notification(0))
+        queue.stop(5)
+        self.assertEqual([0], self.sent)
+        queue.put(self._notification(1))
+        self.assertEqual([0, 1], self.sent)
+
+
+@mock.patch.object(notification_queue, 'send', autospec=True)
+class EmitTestCase(base.TestCase):
+
+    def setUp(self):
+        super(EmitTestCase, self).setUp()
+        self.addCleanup(notification_queue.stop, 5)
+        self.notification = notification_queue.Notification(
+            context=context.get_admin_context(),
+            publisher_id='ironic-conductor.host', level='info',
+            event_type='baremetal.node.power_set.end', payload={})
+
+    def test_sync(self, mock_send):
+        notification_queue.emit(self.notification)
+        mock_send.assert_called_once_with(self.notification)
+        self.assertIsNone(notification_queue._QUEUE)
+
+    @mock.patch.object(notification_queue.NotificationQueue, 'put',
+                       autospec=True)
+    def test_async(self, mock_put, mock_send):
+        self.config(notification_async=True, notification_queue_size=42)
+        notification_queue.emit(self.notification)
+        queue = notification_queue.get_queue()
+        mock_put.assert_called_once_with(queue, self.notification)
+        self.assertEqual(42, queue._size)
+        self.assertFalse(mock_send.called)
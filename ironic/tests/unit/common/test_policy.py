@@ -21,6 +21,7 @@ import mock
 from oslo_config import cfg
 from oslo_policy import policy as oslo_policy
 
+from ironic.common import context
 from ironic.common import exception
 from ironic.common import policy
 from ironic.tests import base
@@ -148,3 +149,65 @@ class PolicyTestCase(base.TestCase):
         mock_cfg.assert_called_once_with(['--config-file', 'my.cfg'],
                                          project='ironic')
         self.assertEqual(1, mock_gpe.call_count)
+
+
+class PolicyDecisionCacheTestCase(base.TestCase):
+    """Tests the caching of the decisions made for a request context."""
+
+    def setUp(self):
+        super(PolicyDecisionCacheTestCase, self).setUp()
+        enforcer = policy.get_enforcer()
+        enforcer.register_default(
+            oslo_policy.RuleDefault('has_foo_role', "role:foo"))
+        p = mock.patch.object(enforcer, 'enforce', autospec=True,
+                              side_effect=enforcer.enforce)
+        self.mock_enforce = p.start()
+        self.addCleanup(p.stop)
+
+    def test_check_cached(self):
+        ctx = context.RequestContext(roles=['foo'])
+        for i in range(3):
+            creds = ctx.to_policy_values()
+            self.assertTrue(policy.check('has_foo_role', creds, creds))
+        self.assertEqual(1, self.mock_enforce.call_count)
+
+    def test_authorize_cached(self):
+        self.config(auth_strategy='keystone')
+        ctx = context.RequestContext(roles=['bar'])
+        for i in range(3):
+            creds = ctx.to_policy_values()
+            self.assertRaises(exception.HTTPForbidden, policy.authorize,
+                              'has_foo_role', creds, creds)
+        self.assertEqual(1, self.mock_enforce.call_count)
+
+    def test_cache_per_context(self):
+        for roles in (['foo'], ['bar']):
+            creds = context.RequestContext(roles=roles).to_policy_values()
+            self.assertEqual(roles == ['foo'],
+                             policy.check('has_foo_role', creds, creds))
+        self.assertEqual(2, self.mock_enforce.call_count)
+
+    def test_cache_keyed_by_values(self):
+        ctx = context.RequestContext(roles=['foo'])
+        creds = ctx.to_policy_values()
+        self.assertTrue(policy.check('has_foo_role', creds, creds))
+        ctx.roles = ['bar']
+        creds = ctx.to_policy_values()
+        self.assertFalse(policy.check('has_foo_role', creds, creds))
+        # Another target
+        self.assertFalse(policy.check('has_foo_role', {'project_id': 'a'},
+                                      creds))
+        self.assertEqual(3, self.mock_enforce.call_count)
+
+    def test_not_cached(self):
+        creds = {'roles': ['foo']}
+        for i in range(2):
+            self.assertTrue(policy.check('has_foo_role', creds, creds))
+        self.assertEqual(2, self.mock_enforce.call_count)
+
+    def test_policy_not_registered_not_cached(self):
+        self.config(auth_strategy='keystone')
+        creds = context.RequestContext(roles=['foo']).to_policy_values()
+        for i in range(2):
+            self.assertRaises(oslo_policy.PolicyNotRegistered,
+                              policy.authorize, 'has_bar_role', creds, creds)
@@ -14,8 +14,11 @@ import mock
 from oslo_config import cfg
 import oslo_messaging
 from oslo_service import service as base_service
+from oslo_service import wsgi
 
 from ironic.common import context
+from ironic.common import driver_factory
+from ironic.common import metrics
 from ironic.common import rpc
 from ironic.common import rpc_service
 from ironic.conductor import manager
@@ -51,3 +54,29 @@ class TestRPCService(base.TestCase):
         mock_ios.assert_called_once_with(is_server=True)
         mock_init_method.assert_called_once_with(self.rpc_svc.manager,
                                                  mock_ctx.return_value)
+        self.assertIsNone(self.rpc_svc.metrics_server)
+
+    @mock.patch.object(wsgi, 'Server', autospec=True)
+    @mock.patch.object(rpc, 'get_server', autospec=True)
+    @mock.patch.object(manager.ConductorManager, 'init_host', autospec=True)
+    @mock.patch.object(manager.ConductorManager, 'del_host', autospec=True)
+    @mock.patch.object(context, 'get_admin_context', autospec=True)
+    def test_start_stop_metrics(self, mock_ctx, mock_del_host,
+                                mock_init_method, mock_rpc, mock_server):
+        CONF.set_override('prometheus_enabled', True, group='metrics')
+        CONF.set_override('prometheus_port', 9000, group='metrics')
+        self.rpc_svc.handle_signal = mock.MagicMock()
+        self.rpc_svc.start()
+        mock_server.assert_called_once_with(
+            CONF, 'ironic-metrics', metrics.application, host='0.0.0.0',
+            port=9000)
+        mock_server.return_value.start.assert_called_once_with()
+
+        self.rpc_svc.stop()
+        mock_server.return_value.stop.assert_called_once_with()
+        mock_server.return_value.wait.assert_called_once_with()
+
+    @mock.patch.object(driver_factory, 'clear_driver_cache', autospec=True)
+    def test_reset(self, mock_clear):
+        self.rpc_svc.reset()
+        mock_clear.assert_called_once_with()
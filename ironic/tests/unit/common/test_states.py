@@ -14,6 +14,7 @@
 
 import six
 
+from ironic.common import exception
 from ironic.common import states
 from ironic.tests import base
 
@@ -36,3 +37,8 @@ class StatesTest(base.TestCase):
                     len(value), 15,
                     "Value for state: {} is greater than 15 characters".format(
                         key))
+
+    def test_machine_frozen(self):
+        self.assertTrue(states.machine.frozen)
+        self.assertRaises(exception.InvalidState,
+                          states.machine.add_state, 'new state')
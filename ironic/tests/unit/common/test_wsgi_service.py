@@ -15,6 +15,7 @@ from oslo_concurrency import processutils
 from oslo_config import cfg
 
 from ironic.common import exception
+from ironic.common import notification_queue
 from ironic.common import wsgi_service
 from ironic.tests import base
 
@@ -64,3 +65,13 @@ class TestWSGIService(base.TestCase):
                                             host='0.0.0.0',
                                             port=6385,
                                             use_ssl=True)
+
+    @mock.patch.object(notification_queue, 'stop', autospec=True)
+    @mock.patch.object(wsgi_service.wsgi, 'Server', autospec=True)
+    def test_wait_stops_notification_queue(self, mock_server, mock_stop):
+        srv = wsgi_service.WSGIService('ironic_api')
+        srv.stop()
+        self.assertFalse(mock_stop.called)
+        srv.wait()
+        mock_server.return_value.wait.assert_called_once_with()
+        mock_stop.assert_called_once_with()
@@ -265,7 +265,8 @@ class DoAllocateTestCase(db_base.DbTestCase):
     @mock.patch.object(task_manager, 'acquire', autospec=True,
                        side_effect=task_manager.acquire)
     def test_nodes_locked(self, mock_acquire):
-        self.config(node_locked_retry_attempts=2, group='conductor')
+        self.config(node_locked_retry_attempts=3, group='conductor')
+        self.config(node_locked_retry_interval=0, group='conductor')
         node1 = obj_utils.create_test_node(self.context,
                                            uuid=uuidutils.generate_uuid(),
                                            maintenance=False,
@@ -25,6 +25,7 @@ from oslo_utils import uuidutils
 
 from ironic.common import driver_factory
 from ironic.common import exception
+from ironic.common import metrics
 from ironic.common import states
 from ironic.conductor import base_manager
 from ironic.conductor import manager
@@ -32,7 +33,9 @@ from ironic.conductor import notification_utils
 from ironic.conductor import task_manager
 from ironic.drivers import fake_hardware
 from ironic.drivers import generic
+from ironic.drivers.modules import console_proxy
 from ironic.drivers.modules import fake
+from ironic.drivers.modules.redfish import events as redfish_events
 from ironic import objects
 from ironic.objects import fields
 from ironic.tests import base as tests_base
@@ -247,6 +250,59 @@ class StartStopTestCase(mgr_utils.ServiceSetUpMixin, db_base.DbTestCase):
         self.service.del_host()
         self.assertTrue(self.service._shutdown)
 
+    @mock.patch.object(console_proxy, 'stop', autospec=True)
+    def test_del_host_stops_console_proxy(self, mock_stop):
+        self._start_service()
+        self.assertFalse(mock_stop.called)
+        self.service.del_host()
+        mock_stop.assert_called_once_with()
+
+    @mock.patch.object(redfish_events, 'stop_listener', autospec=True)
+    def test_del_host_stops_redfish_event_listener(self, mock_stop):
+        self._start_service()
+        self.assertFalse(mock_stop.called)
+        self.service.del_host()
+        mock_stop.assert_called_once_with()
+
+    def test_metrics_collector(self):
+        self._start_service()
+        self.assertIn(self.service._collect_metrics,
+                      metrics.REGISTRY._collectors)
+        self.service.del_host()
+        self.assertNotIn(self.service._collect_metrics,
+                         metrics.REGISTRY._collectors)
+
+    def test__collect_metrics(self):
+        self._start_service()
+
+        @periodics.periodic(spacing=100, run_immediately=True)
+        def task():
+            pass
+
+        worker = periodics.PeriodicWorker([(task, (), {})])
+        watcher = next(worker.iter_watchers())
+        with mock.patch.object(self.service, '_periodic_tasks', worker), \
+                mock.patch.object(self.service._executor, 'stats',
+                                  autospec=True,
+                                  return_value=(3, {'periodic': 1})):
+            collected = {metric.name: metric
+                         for metric in self.service._collect_metrics()}
+
+        self.assertEqual(
+            [('', (), CONF.conductor.workers_pool_size)],
+            collected['ironic_conductor_workers'].samples())
+        self.assertEqual(
+            [('', (), 3)],
+            collected['ironic_conductor_workers_running'].samples())
+        self.assertEqual(
+            [('', (('work_class', 'periodic'),), 1)],
+            collected['ironic_conductor_work_queued'].samples())
+        self.assertEqual(
+            [('', (('task', watcher.work.name),), 0)],
+            collected['ironic_conductor_periodic_task_runs_total'].samples())
+        self.assertIn('ironic_conductor_periodic_task_failures_total',
+                      collected)
+
 
 class CheckInterfacesTestCase(mgr_utils.ServiceSetUpMixin, db_base.DbTestCase):
     def test__check_enabled_interfaces_success(self):
@@ -485,3 +541,145 @@ class StartConsolesTestCase(mgr_utils.ServiceSetUpMixin, db_base.DbTestCase):
             self.assertIsNone(test_node.last_error)
             self.assertTrue(log_mock.warning.called)
             self.assertFalse(mock_notify.called)
+
+    def _start_service_without_consoles(self):
+        # NOTE: do not let init_host start the consoles concurrently
+        with mock.patch.object(base_manager.BaseConductorManager,
+                               '_start_consoles', autospec=True):
+            self._start_service()
+
+    def test__start_consoles_shared_lock(self, mock_notify,
+                                         mock_start_console):
+        self._start_service_without_consoles()
+        test_node = obj_utils.create_test_node(self.context,
+                                               driver='fake-hardware',
+                                               console_enabled=True)
+
+        def _start_console(iface, task):
+            self.assertTrue(task.shared)
+            test_node.refresh()
+            self.assertIsNone(test_node.reservation)
+
+        mock_start_console.side_effect = _start_console
+        self.service._start_consoles(self.context)
+        mock_start_console.assert_called_once_with(mock.ANY, mock.ANY)
+        test_node.refresh()
+        self.assertTrue(test_node.console_enabled)
+
+    @mock.patch.object(fake.FakeConsole, 'stop_console', autospec=True)
+    def test__start_consoles_disabled_while_starting(
+            self, mock_stop_console, mock_notify, mock_start_console):
+        self._start_service_without_consoles()
+        test_node = obj_utils.create_test_node(self.context,
+                                               driver='fake-hardware',
+                                               console_enabled=True)
+
+        def _start_console(iface, task):
+            node = objects.Node.get(self.context, test_node.uuid)
+            node.console_enabled = False
+            node.save()
+
+        mock_start_console.side_effect = _start_console
+        self.service._start_consoles(self.context)
+        mock_start_console.assert_called_once_with(mock.ANY, mock.ANY)
+        mock_stop_console.assert_called_once_with(mock.ANY, mock.ANY)
+        mock_notify.assert_called_once_with(
+            mock.ANY, 'console_restore', fields.NotificationStatus.START)
+
+    def _record_locked(self, times):
+        """Fail to record the console start the given number of times."""
+        self.config(node_locked_retry_attempts=3, group='conductor')
+        record = self.service._record_console_start
+        calls = []
+
+        def _record(*args):
+            calls.append(args)
+            if len(calls) <= times:
+                raise exception.NodeLocked(node=args[1], host='other-host')
+            return record(*args)
+
+        patcher = mock.patch.object(self.service, '_record_console_start',
+                                    autospec=True, side_effect=_record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return calls
+
+    @mock.patch.object(fake.FakeConsole, 'stop_console', autospec=True)
+    def test__start_consoles_locked_after_start(
+            self, mock_stop_console, mock_notify, mock_start_console):
+        self._start_service_without_consoles()
+        obj_utils.create_test_node(self.context, driver='fake-hardware',
+                                   console_enabled=True)
+        calls = self._record_locked(2)
+        self.service._start_consoles(self.context)
+        self.assertEqual(3, len(calls))
+        self.assertFalse(mock_stop_console.called)
+        mock_notify.assert_called_with(
+            mock.ANY, 'console_restore', fields.NotificationStatus.END)
+
+    @mock.patch.object(fake.FakeConsole, 'stop_console', autospec=True)
+    def test__start_consoles_locked_after_start_stop(
+            self, mock_stop_console, mock_notify, mock_start_console):
+        self._start_service_without_consoles()
+        test_node = obj_utils.create_test_node(self.context,
+                                               driver='fake-hardware',
+                                               console_enabled=True)
+        calls = self._record_locked(3)
+        self.service._start_consoles(self.context)
+        self.assertEqual(3, len(calls))
+        mock_stop_console.assert_called_once_with(mock.ANY, mock.ANY)
+        mock_notify.assert_called_once_with(
+            mock.ANY, 'console_restore', fields.NotificationStatus.START)
+        test_node.refresh()
+        self.assertIsNone(test_node.reservation)
+
+    @mock.patch.object(base_manager, 'LOG', autospec=True)
+    @mock.patch.object(fake.FakeConsole, 'stop_console', autospec=True)
+    def test__start_consoles_locked_after_failure(
+            self, mock_stop_console, mock_log, mock_notify,
+            mock_start_console):
+        self._start_service_without_consoles()
+        test_node = obj_utils.create_test_node(self.context,
+                                               driver='fake-hardware',
+                                               console_enabled=True)
+        mock_start_console.side_effect = exception.ConsoleSubprocessFailed(
+            error='boom')
+        calls = self._record_locked(3)
+        self.service._start_consoles(self.context)
+        self.assertEqual(3, len(calls))
+        self.assertFalse(mock_stop_console.called)
+        self.assertTrue(mock_log.error.called)
+        test_node.refresh()
+        self.assertTrue(test_node.console_enabled)
+        self.assertIsNone(test_node.last_error)
+
+    def test__start_consoles_concurrently(self, mock_notify,
+                                          mock_start_console):
+        self.config(restore_workers=3, group='console')
+        self._start_service_without_consoles()
+        for _ in range(5):
+            obj_utils.create_test_node(self.context,
+                                       uuid=uuidutils.generate_uuid(),
+                                       driver='fake-hardware',
+                                       console_enabled=True)
+        with mock.patch.object(self.service, '_spawn_worker',
+                               wraps=self.service._spawn_worker) as mock_spawn:
+            self.service._start_consoles(self.context)
+            self.assertEqual(2, mock_spawn.call_count)
+        self.assertEqual(5, mock_start_console.call_count)
+
+    @mock.patch.object(base_manager, 'LOG')
+    def test__start_consoles_no_free_worker(self, log_mock, mock_notify,
+                                            mock_start_console):
+        self._start_service_without_consoles()
+        for _ in range(3):
+            obj_utils.create_test_node(self.context,
+                                       uuid=uuidutils.generate_uuid(),
+                                       driver='fake-hardware',
+                                       console_enabled=True)
+        with mock.patch.object(self.service, '_spawn_worker',
+                               autospec=True) as mock_spawn:
+            mock_spawn.side_effect = exception.NoFreeConductorWorker()
+            self.service._start_consoles(self.context)
+        self.assertEqual(3, mock_start_console.call_count)
+        self.assertTrue(log_mock.warning.called)
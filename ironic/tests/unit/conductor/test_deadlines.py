@@ -0,0 +1,135 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the deadlines of the nodes in wait states."""
+
+import datetime
+import threading
+
+import mock
+from oslo_utils import timeutils
+import pytz
+
+from ironic.common import states
+from ironic.conductor import deadlines
+from ironic.tests import base
+
+
+class DeadlineSchedulerTestCase(base.TestCase):
+
+    def setUp(self):
+        super(DeadlineSchedulerTestCase, self).setUp()
+        self.config(deploy_callback_timeout=60, clean_callback_timeout=120,
+                    group='conductor')
+        self.now = datetime.datetime(2000, 1, 1, 0, 0)
+        timeutils.set_time_override(self.now)
+        self.addCleanup(timeutils.clear_time_override)
+        self.callback = mock.Mock()
+        self.scheduler = deadlines.DeadlineScheduler(self.callback)
+
+    def _after(self, seconds):
+        return self.now + datetime.timedelta(seconds=seconds)
+
+    def test_pop_expired(self):
+        self.scheduler.arm('node1', states.DEPLOYWAIT)
+        self.scheduler.arm('node2', states.CLEANWAIT)
+        self.scheduler.arm('node3', states.DEPLOYWAIT,
+                           since=self._after(-30))
+        self.assertEqual({}, self.scheduler.pop_expired(self._after(29)))
+        self.assertEqual({states.DEPLOYWAIT: ['node3']},
+                         self.scheduler.pop_expired(self._after(30)))
+        self.assertEqual({states.DEPLOYWAIT: ['node1'],
+                          states.CLEANWAIT: ['node2']},
+                         self.scheduler.pop_expired(self._after(120)))
+        self.assertEqual(0, len(self.scheduler))
+
+    def test_rearm(self):
+        self.scheduler.arm('node1', states.DEPLOYWAIT)
+        timeutils.advance_time_seconds(50)
+        self.scheduler.arm('node1', states.DEPLOYWAIT)
+        self.assertEqual({}, self.scheduler.pop_expired(self._after(60)))
+        self.assertEqual({states.DEPLOYWAIT: ['node1']},
+                         self.scheduler.pop_expired(self._after(110)))
+
+    def test_disarm(self):
+        self.scheduler.arm('node1', states.DEPLOYWAIT)
+        self.scheduler.disarm('node1')
+        self.assertEqual({}, self.scheduler.pop_expired(self._after(60)))
+        # Disarming a node without a deadline is fine
+        self.scheduler.disarm('node2')
+
+    def test_timeout_disabled(self):
+        self.config(deploy_callback_timeout=0, group='conductor')
+        self.scheduler.arm('node1', states.DEPLOYWAIT)
+        self.assertEqual(0, len(self.scheduler))
+
+    def test_min_delay(self):
+        self.scheduler.arm('node1', states.DEPLOYWAIT,
+                           since=self._after(-3600), min_delay=10)
+        self.assertEqual({}, self.scheduler.pop_expired(self._after(9)))
+        self.assertEqual({states.DEPLOYWAIT: ['node1']},
+                         self.scheduler.pop_expired(self._after(10)))
+
+    def test_since_aware(self):
+        since = self._after(-30).replace(tzinfo=pytz.utc)
+        self.scheduler.arm('node1', states.DEPLOYWAIT, since=since)
+        self.assertEqual({states.DEPLOYWAIT: ['node1']},
+                         self.scheduler.pop_expired(self._after(30)))
+
+
+class DeadlineSchedulerThreadTestCase(base.TestCase):
+
+    def setUp(self):
+        super(DeadlineSchedulerThreadTestCase, self).setUp()
+        self.config(deploy_callback_timeout=1, group='conductor')
+        self.called = threading.Event()
+        self.expired = []
+        self.addCleanup(deadlines.stop)
+
+    def _callback(self, provision_state, node_uuids):
+        self.expired.append((provision_state, node_uuids))
+        self.called.set()
+
+    def test_callback(self):
+        deadlines.start(self._callback)
+        deadlines.arm('node1', states.DEPLOYWAIT,
+                      since=timeutils.utcnow() - datetime.timedelta(hours=1))
+        self.assertTrue(self.called.wait(5))
+        self.assertEqual([(states.DEPLOYWAIT, ['node1'])], self.expired)
+
+    def test_callback_failure(self):
+        def _callback(provision_state, node_uuids):
+            self._callback(provision_state, node_uuids)
+            raise RuntimeError('boom')
+
+        deadlines.start(_callback)
+        since = timeutils.utcnow() - datetime.timedelta(hours=1)
+        deadlines.arm('node1', states.DEPLOYWAIT, since=since)
+        self.assertTrue(self.called.wait(5))
+        self.called.clear()
+        # The scheduler keeps running
+        deadlines.arm('node2', states.DEPLOYWAIT, since=since)
+        self.assertTrue(self.called.wait(5))
+        self.assertEqual([(states.DEPLOYWAIT, ['node1']),
+                          (states.DEPLOYWAIT, ['node2'])], self.expired)
+
+    def test_node_state_changed(self):
+        node = mock.Mock(uuid='node1', provision_state=states.DEPLOYWAIT)
+        # Does nothing when the scheduler is not running
+        deadlines.node_state_changed(node)
+
+        scheduler = deadlines.start(self._callback)
+        deadlines.node_state_changed(node)
+        self.assertEqual(1, len(scheduler))
+        node.provision_state = states.DEPLOYING
+        deadlines.node_state_changed(node)
+        self.assertEqual(0, len(scheduler))
@@ -27,6 +27,7 @@ import mock
 from oslo_config import cfg
 from oslo_db import exception as db_exception
 import oslo_messaging as messaging
+from oslo_utils import timeutils
 from oslo_utils import uuidutils
 from oslo_versionedobjects import base as ovo_base
 from oslo_versionedobjects import fields
@@ -39,8 +40,10 @@ from ironic.common import exception
 from ironic.common import images
 from ironic.common import states
 from ironic.common import swift
+from ironic.conductor import deadlines
 from ironic.conductor import manager
 from ironic.conductor import notification_utils
+from ironic.conductor import power_events
 from ironic.conductor import task_manager
 from ironic.conductor import utils as conductor_utils
 from ironic.db import api as dbapi
@@ -436,6 +439,210 @@ class ChangeNodePowerStateTestCase(mgr_utils.ServiceSetUpMixin,
         self.assertIsNone(node.last_error)
 
 
+@mgr_utils.mock_record_keepalive
+class ChangeNodesPowerStateTestCase(mgr_utils.ServiceSetUpMixin,
+                                    db_base.DbTestCase):
+
+    def _create_nodes(self, count, **kwargs):
+        return [obj_utils.create_test_node(
+                self.context, id=i, uuid=uuidutils.generate_uuid(),
+                driver='fake-hardware', power_state=states.POWER_OFF,
+                **kwargs)
+                for i in range(1, count + 1)]
+
+    @mock.patch.object(fake.FakePower, 'get_power_state', autospec=True)
+    def test_change_nodes_power_state(self, get_power_mock):
+        get_power_mock.return_value = states.POWER_OFF
+        nodes = self._create_nodes(3)
+        self.config(bulk_power_workers=2, group='conductor')
+        self._start_service()
+
+        result = self.service.change_nodes_power_state(
+            self.context, [node.uuid for node in nodes], states.POWER_ON)
+        self._stop_service()
+
+        self.assertEqual(dict((node.uuid, None) for node in nodes), result)
+        self.assertEqual(3, get_power_mock.call_count)
+        for node in nodes:
+            node.refresh()
+            self.assertEqual(states.POWER_ON, node.power_state)
+            self.assertIsNone(node.target_power_state)
+            self.assertIsNone(node.last_error)
+            self.assertIsNone(node.reservation)
+
+    @mock.patch.object(fake.FakePower, 'validate', autospec=True)
+    @mock.patch.object(conductor_utils, 'node_power_action', autospec=True)
+    def test_change_nodes_power_state_errors(self, power_action_mock,
+                                             validate_mock):
+        locked, invalid, valid = self._create_nodes(3)
+        locked.reservation = 'fake-reserv'
+        locked.save()
+        missing = uuidutils.generate_uuid()
+
+        def _validate(_self, task):
+            if task.node.uuid == invalid.uuid:
+                raise exception.InvalidParameterValue(
+                    'wrong power driver info')
+
+        validate_mock.side_effect = _validate
+        self._start_service()
+
+        result = self.service.change_nodes_power_state(
+            self.context, [locked.uuid, invalid.uuid, valid.uuid, missing],
+            states.POWER_ON)
+        self._stop_service()
+
+        self.assertIsNone(result[valid.uuid])
+        self.assertIn('locked', result[locked.uuid])
+        self.assertIn('wrong power driver info', result[invalid.uuid])
+        self.assertIn('could not be found', result[missing])
+        power_action_mock.assert_called_once_with(mock.ANY, states.POWER_ON,
+                                                  timeout=None)
+        locked.refresh()
+        self.assertEqual('fake-reserv', locked.reservation)
+        for node, target in ((invalid, None), (valid, states.POWER_ON)):
+            node.refresh()
+            self.assertEqual(target, node.target_power_state)
+            self.assertIsNone(node.reservation)
+
+    @mock.patch.object(task_manager, 'get_lock_retry_delay', autospec=True)
+    @mock.patch.object(conductor_utils, 'node_power_action', autospec=True)
+    def test_change_nodes_power_state_locked_no_retry(self, power_action_mock,
+                                                      delay_mock):
+        nodes = self._create_nodes(4)
+        for node in nodes[:3]:
+            node.reservation = 'other-host'
+            node.save()
+        self.config(node_locked_retry_attempts=3,
+                    node_locked_retry_interval=60, group='conductor')
+        self._start_service()
+
+        result = self.service.change_nodes_power_state(
+            self.context, [node.uuid for node in nodes], states.POWER_ON)
+        self._stop_service()
+
+        self.assertFalse(delay_mock.called)
+        for node in nodes[:3]:
+            self.assertIn('locked', result[node.uuid])
+            node.refresh()
+            self.assertEqual('other-host', node.reservation)
+            self.assertIsNone(node.target_power_state)
+        self.assertIsNone(result[nodes[3].uuid])
+        power_action_mock.assert_called_once_with(mock.ANY, states.POWER_ON,
+                                                  timeout=None)
+
+    @mock.patch.object(conductor_utils, 'node_power_action', autospec=True)
+    def test_change_nodes_power_state_workers(self, power_action_mock):
+        nodes = self._create_nodes(3)
+        self.config(bulk_power_workers=2, group='conductor')
+        self._start_service()
+
+        with mock.patch.object(self.service, '_spawn_worker',
+                               autospec=True) as spawn_mock:
+            self.service.change_nodes_power_state(
+                self.context, [node.uuid for node in nodes],
+                states.SOFT_POWER_OFF)
+            self.assertEqual(2, spawn_mock.call_count)
+            nodes_queue = spawn_mock.call_args[0][1]
+            self.assertEqual(3, nodes_queue.qsize())
+            # Run the power actions in a single worker
+            self.service._change_nodes_power_state_task(
+                nodes_queue, states.SOFT_POWER_OFF)
+
+        self.assertEqual(3, power_action_mock.call_count)
+        power_action_mock.assert_called_with(
+            mock.ANY, states.SOFT_POWER_OFF,
+            timeout=CONF.conductor.soft_power_off_timeout)
+        for node in nodes:
+            node.refresh()
+            self.assertEqual(states.POWER_OFF, node.target_power_state)
+            self.assertIsNone(node.reservation)
+
+    def test_change_nodes_power_state_worker_pool_full(self):
+        nodes = self._create_nodes(2)
+        self._start_service()
+
+        with mock.patch.object(self.service, '_spawn_worker',
+                               autospec=True) as spawn_mock:
+            spawn_mock.side_effect = exception.NoFreeConductorWorker()
+            exc = self.assertRaises(messaging.rpc.ExpectedException,
+                                    self.service.change_nodes_power_state,
+                                    self.context,
+                                    [node.uuid for node in nodes],
+                                    states.POWER_ON)
+        self.assertEqual(exception.NoFreeConductorWorker, exc.exc_info[0])
+
+        for node in nodes:
+            node.refresh()
+            self.assertEqual(states.POWER_OFF, node.power_state)
+            self.assertIsNone(node.target_power_state)
+            self.assertIsNotNone(node.last_error)
+            self.assertIsNone(node.reservation)
+
+    @mock.patch.object(conductor_utils, 'node_power_action', autospec=True)
+    def test_change_nodes_power_state_driver_not_built(self,
+                                                       power_action_mock):
+        valid, broken = self._create_nodes(2)
+        # Not enabled, so the driver of the node cannot be built
+        broken.power_interface = 'ipmitool'
+        broken.save()
+        self._start_service()
+
+        result = self.service.change_nodes_power_state(
+            self.context, [valid.uuid, broken.uuid], states.POWER_ON)
+        self._stop_service()
+
+        self.assertIsNone(result[valid.uuid])
+        self.assertIn('ipmitool', result[broken.uuid])
+        power_action_mock.assert_called_once_with(mock.ANY, states.POWER_ON,
+                                                  timeout=None)
+        for node, target in ((valid, states.POWER_ON), (broken, None)):
+            node.refresh()
+            self.assertEqual(target, node.target_power_state)
+            self.assertIsNone(node.reservation)
+
+    def test_change_nodes_power_state_unexpected_error(self):
+        nodes = self._create_nodes(3)
+        self._start_service()
+        prepare = self.service._prepare_power_action
+
+        def _prepare(task, new_state, timeout):
+            if task.node.uuid == nodes[1].uuid:
+                raise RuntimeError('boom')
+            return prepare(task, new_state, timeout)
+
+        with mock.patch.object(self.service, '_prepare_power_action',
+                               autospec=True, side_effect=_prepare):
+            with mock.patch.object(self.service, '_spawn_worker',
+                                   autospec=True) as spawn_mock:
+                self.assertRaises(RuntimeError,
+                                  self.service.change_nodes_power_state,
+                                  self.context,
+                                  [node.uuid for node in nodes],
+                                  states.POWER_ON)
+        self.assertFalse(spawn_mock.called)
+
+        for node in nodes:
+            node.refresh()
+            self.assertEqual(states.POWER_OFF, node.power_state)
+            self.assertIsNone(node.target_power_state)
+            self.assertIsNone(node.reservation)
+
+    def test_change_nodes_power_state_worker_pool_partially_full(self):
+        nodes = self._create_nodes(3)
+        self._start_service()
+
+        with mock.patch.object(self.service, '_spawn_worker',
+                               autospec=True) as spawn_mock:
+            spawn_mock.side_effect = [None, exception.NoFreeConductorWorker()]
+            result = self.service.change_nodes_power_state(
+                self.context, [node.uuid for node in nodes], states.POWER_ON)
+            self.assertEqual(2, spawn_mock.call_count)
+            # The spawned worker gets all the nodes
+            self.assertEqual(3, spawn_mock.call_args[0][1].qsize())
+        self.assertEqual(dict((node.uuid, None) for node in nodes), result)
+
+
 @mgr_utils.mock_record_keepalive
 class CreateNodeTestCase(mgr_utils.ServiceSetUpMixin, db_base.DbTestCase):
     def test_create_node(self):
@@ -467,6 +674,84 @@ class CreateNodeTestCase(mgr_utils.ServiceSetUpMixin, db_base.DbTestCase):
                           objects.Node.get_by_uuid, self.context, node['uuid'])
 
 
+@mgr_utils.mock_record_keepalive
+class CreateNodesTestCase(mgr_utils.ServiceSetUpMixin, db_base.DbTestCase):
+
+    def _node(self, **kwargs):
+        return {'node': objects.Node(self.context,
+                                     uuid=uuidutils.generate_uuid(),
+                                     driver='fake-hardware', **kwargs)}
+
+    def _port(self, address, **kwargs):
+        return objects.Port(self.context, uuid=uuidutils.generate_uuid(),
+                            address=address, **kwargs)
+
+    def test_create_nodes(self):
+        nodes = [self._node(name='node-%d' % i) for i in range(3)]
+        nodes[0]['ports'] = [self._port('52:54:00:00:00:01')]
+        nodes[0]['traits'] = ['CUSTOM_1']
+        self.config(bulk_create_chunk_size=2, group='conductor')
+
+        with mock.patch.object(objects.Node, 'create_many', autospec=True,
+                               side_effect=objects.Node.create_many) as mock_c:
+            res = self.service.create_nodes(self.context, nodes)
+
+        self.assertEqual([None, None, None], res)
+        self.assertEqual(2, mock_c.call_count)
+        for item in nodes:
+            node = objects.Node.get_by_uuid(self.context, item['node'].uuid)
+            # The default interfaces are set
+            self.assertEqual('fake', node.power_interface)
+        node = objects.Node.get_by_uuid(self.context, nodes[0]['node'].uuid)
+        self.assertEqual(['CUSTOM_1'], node.traits.get_trait_names())
+        self.assertEqual(
+            [nodes[0]['ports'][0].uuid],
+            [port.uuid for port in objects.Port.list_by_node_id(
+                self.context, node.id)])
+
+    def test_create_nodes_errors(self):
+        existing = obj_utils.create_test_node(self.context, name='existing')
+        nodes = [self._node(name='node-%d' % i) for i in range(4)]
+        # Fails validation
+        nodes[0]['node'].power_interface = 'foo'
+        # Fails in the database
+        nodes[1]['node'].name = existing.name
+        nodes[2]['ports'] = [self._port('52:54:00:00:00:01')]
+        nodes[3]['portgroups'] = [{
+            'portgroup': objects.Portgroup(self.context,
+                                           uuid=uuidutils.generate_uuid(),
+                                           address='52:54:00:00:00:02'),
+            'ports': [self._port('52:54:00:00:00:03')]}]
+
+        res = self.service.create_nodes(self.context, nodes)
+
+        self.assertIn('power', res[0])
+        self.assertIn(existing.name, res[1])
+        self.assertEqual([None, None], res[2:])
+        for item, created in zip(nodes, (False, False, True, True)):
+            if created:
+                objects.Node.get_by_uuid(self.context, item['node'].uuid)
+            else:
+                self.assertRaises(exception.NodeNotFound,
+                                  objects.Node.get_by_uuid, self.context,
+                                  item['node'].uuid)
+
+    def test_create_nodes_inconsistent_physnets(self):
+        node = self._node()
+        node['portgroups'] = [{
+            'portgroup': objects.Portgroup(self.context,
+                                           uuid=uuidutils.generate_uuid(),
+                                           address='52:54:00:00:00:01'),
+            'ports': [self._port('52:54:00:00:00:02', physical_network='a'),
+                      self._port('52:54:00:00:00:03')]}]
+
+        res = self.service.create_nodes(self.context, [node])
+
+        self.assertIn('inconsistent physical networks', res[0])
+        self.assertRaises(exception.NodeNotFound, objects.Node.get_by_uuid,
+                          self.context, node['node'].uuid)
+
+
 @mgr_utils.mock_record_keepalive
 class UpdateNodeTestCase(mgr_utils.ServiceSetUpMixin, db_base.DbTestCase):
     def test_update_node(self):
@@ -2648,6 +2933,53 @@ class CheckTimeoutsTestCase(mgr_utils.ServiceSetUpMixin, db_base.DbTestCase):
         self.assertIsNotNone(node.last_error)
         mock_cleanup.assert_called_once_with(mock.ANY)
 
+    @mock.patch('ironic.drivers.modules.fake.FakeDeploy.clean_up')
+    def test__check_wait_deadlines(self, mock_cleanup):
+        self._start_service()
+        CONF.set_override('deploy_callback_timeout', 60, group='conductor')
+        expired = obj_utils.create_test_node(
+            self.context, driver='fake-hardware',
+            provision_state=states.DEPLOYWAIT,
+            target_provision_state=states.ACTIVE,
+            provision_updated_at=datetime.datetime(2000, 1, 1, 0, 0))
+        # Touched since its deadline was set
+        touched = obj_utils.create_test_node(
+            self.context, driver='fake-hardware',
+            uuid=uuidutils.generate_uuid(),
+            provision_state=states.DEPLOYWAIT,
+            target_provision_state=states.ACTIVE,
+            provision_updated_at=timeutils.utcnow())
+
+        self.service._check_wait_deadlines(states.DEPLOYWAIT,
+                                           [expired.uuid, touched.uuid])
+        scheduler = deadlines._SCHEDULER
+        self._stop_service()
+        expired.refresh()
+        touched.refresh()
+        self.assertEqual(states.DEPLOYFAIL, expired.provision_state)
+        self.assertEqual(states.DEPLOYWAIT, touched.provision_state)
+        mock_cleanup.assert_called_once_with(mock.ANY)
+        self.assertEqual([touched.uuid], list(scheduler._deadlines))
+
+    def test_wait_deadlines_armed(self):
+        waiting = obj_utils.create_test_node(
+            self.context, driver='fake-hardware',
+            provision_state=states.CLEANWAIT,
+            target_provision_state=states.AVAILABLE,
+            provision_updated_at=timeutils.utcnow())
+        self._start_service()
+        scheduler = deadlines._SCHEDULER
+        self.assertEqual([waiting.uuid], list(scheduler._deadlines))
+
+        with task_manager.acquire(self.context, waiting.uuid) as task:
+            task.process_event('abort')
+        self.assertEqual(0, len(scheduler))
+
+    def test_wait_deadlines_disabled(self):
+        self.config(wait_deadlines=False, group='conductor')
+        self._start_service()
+        self.assertIsNone(deadlines._SCHEDULER)
+
     def _check_cleanwait_timeouts(self, manual=False):
         self._start_service()
         CONF.set_override('clean_callback_timeout', 1, group='conductor')
@@ -4801,6 +5133,8 @@ class MiscTestCase(mgr_utils.ServiceSetUpMixin, mgr_utils.CommonMixIn,
     @mock.patch.object(dbapi.IMPL, 'get_nodeinfo_list')
     def test_iter_nodes(self, mock_nodeinfo_list, mock_mapped,
                         mock_fail_if_state):
+        # NOTE: the deadlines of the waiting nodes are set on start up
+        self.config(wait_deadlines=False, group='conductor')
         self._start_service()
         self.columns = ['uuid', 'driver', 'conductor_group', 'id']
         nodes = [self._create_node(id=i, driver='fake-hardware',
@@ -4842,6 +5176,35 @@ class MiscTestCase(mgr_utils.ServiceSetUpMixin, mgr_utils.CommonMixIn,
                                               filters=mock.sentinel.filters))
         self.assertEqual([], result)
 
+    def test_iter_nodes_snapshot(self):
+        self.config(node_snapshot=True, group='conductor')
+        active = obj_utils.create_test_node(
+            self.context, uuid=uuidutils.generate_uuid(),
+            driver='fake-hardware', provision_state=states.ACTIVE)
+        obj_utils.create_test_node(
+            self.context, uuid=uuidutils.generate_uuid(),
+            driver='fake-hardware', provision_state=states.AVAILABLE)
+        # NOTE: the snapshot is loaded on start up
+        self._start_service()
+
+        with mock.patch.object(self.dbapi, 'get_nodeinfo_list',
+                               wraps=self.dbapi.get_nodeinfo_list) as mock_get:
+            filters = {'provision_state': states.ACTIVE,
+                       'maintenance': False}
+            for _ in range(2):
+                result = list(self.service.iter_nodes(fields=['id'],
+                                                      filters=filters))
+                self.assertEqual(
+                    [(active.uuid, 'fake-hardware', '', active.id)], result)
+            self.assertFalse(mock_get.called)
+
+            # Not supported by the snapshot
+            result = list(self.service.iter_nodes(
+                filters={'uuid_in': [active.uuid]}))
+            self.assertEqual([(active.uuid, 'fake-hardware', '')], result)
+            mock_get.assert_called_once_with(
+                columns=mock.ANY, filters={'uuid_in': [active.uuid]})
+
 
 @mgr_utils.mock_record_keepalive
 class ConsoleTestCase(mgr_utils.ServiceSetUpMixin, db_base.DbTestCase):
@@ -6660,6 +7023,143 @@ class ManagerSyncPowerStatesTestCase(mgr_utils.CommonMixIn,
                       mock.call(tasks[5], mock.ANY)]
         self.assertEqual(sync_calls, sync_mock.call_args_list)
 
+    def _patch_power_events(self):
+        events = power_events.PowerEvents()
+        patcher = mock.patch.object(power_events, 'POWER_EVENTS', events)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        events.subscribed(self.node.uuid)
+        return events
+
+    def test_subscribed_node_not_due(self, get_nodeinfo_mock, mapped_mock,
+                                     acquire_mock, sync_mock):
+        self._patch_power_events()
+        get_nodeinfo_mock.return_value = self._get_nodeinfo_list_response()
+        mapped_mock.return_value = True
+
+        self.service._sync_power_states(self.context)
+
+        self.assertFalse(acquire_mock.called)
+        self.assertFalse(sync_mock.called)
+
+    def test_subscribed_node_due(self, get_nodeinfo_mock, mapped_mock,
+                                 acquire_mock, sync_mock):
+        CONF.set_override('power_event_poll_interval', 0, group='conductor')
+        events = self._patch_power_events()
+        get_nodeinfo_mock.return_value = self._get_nodeinfo_list_response()
+        mapped_mock.return_value = True
+        task = self._create_task(node_attrs=dict(uuid=self.node.uuid))
+        acquire_mock.side_effect = self._get_acquire_side_effect(task)
+        sync_mock.return_value = 0
+
+        with mock.patch.object(events, 'polled', autospec=True) as polled:
+            self.service._sync_power_states(self.context)
+            polled.assert_called_once_with(self.node.uuid)
+
+        sync_mock.assert_called_once_with(task, mock.ANY)
+        self.assertTrue(events.is_subscribed(self.node.uuid))
+
+    def test_subscribed_node_out_of_sync(self, get_nodeinfo_mock,
+                                         mapped_mock, acquire_mock,
+                                         sync_mock):
+        CONF.set_override('power_event_poll_interval', 0, group='conductor')
+        events = self._patch_power_events()
+        get_nodeinfo_mock.return_value = self._get_nodeinfo_list_response()
+        mapped_mock.return_value = True
+        task = self._create_task(node_attrs=dict(uuid=self.node.uuid))
+        acquire_mock.side_effect = self._get_acquire_side_effect(task)
+        sync_mock.return_value = 1
+
+        self.service._sync_power_states(self.context)
+
+        sync_mock.assert_called_once_with(task, mock.ANY)
+        self.assertFalse(events.is_subscribed(self.node.uuid))
+
+    def test_power_event(self, get_nodeinfo_mock, mapped_mock,
+                         acquire_mock, sync_mock):
+        events = self._patch_power_events()
+        mapped_mock.return_value = True
+        task = self._create_task(node_attrs=dict(uuid=self.node.uuid))
+        acquire_mock.side_effect = self._get_acquire_side_effect(task)
+        sync_mock.return_value = 1
+
+        self.service._sync_power_state_node(self.context, self.node.uuid,
+                                            event=True)
+
+        mapped_mock.assert_called_once_with(self.node.uuid,
+                                            task.node.driver,
+                                            task.node.conductor_group)
+        sync_mock.assert_called_once_with(task, mock.ANY)
+        # The power state was expected to change
+        self.assertTrue(events.is_subscribed(self.node.uuid))
+        self.assertFalse(get_nodeinfo_mock.called)
+
+    def test_power_event_node_not_mapped(self, get_nodeinfo_mock,
+                                         mapped_mock, acquire_mock,
+                                         sync_mock):
+        self._patch_power_events()
+        mapped_mock.return_value = False
+        task = self._create_task(node_attrs=dict(uuid=self.node.uuid))
+        acquire_mock.side_effect = self._get_acquire_side_effect(task)
+
+        self.service._sync_power_state_node(self.context, self.node.uuid,
+                                            event=True)
+
+        self.assertFalse(sync_mock.called)
+
+
+@mgr_utils.mock_record_keepalive
+class PowerEventsTestCase(mgr_utils.ServiceSetUpMixin, db_base.DbTestCase):
+
+    def setUp(self):
+        super(PowerEventsTestCase, self).setUp()
+        self.events = power_events.PowerEvents()
+        patcher = mock.patch.object(power_events, 'POWER_EVENTS',
+                                    self.events)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.config(power_event_min_interval=0, group='conductor')
+        self.node = obj_utils.create_test_node(self.context,
+                                               driver='fake-hardware')
+        self.events.subscribed(self.node.uuid)
+
+    def test_event(self):
+        self._start_service()
+        with mock.patch.object(self.service, '_spawn_worker',
+                               autospec=True) as mock_spawn:
+            self.assertTrue(self.events.received(self.node.uuid))
+            # Coalesced until the worker runs
+            self.assertFalse(self.events.received(self.node.uuid))
+        mock_spawn.assert_called_once_with(
+            self.service._sync_power_state_node, mock.ANY, self.node.uuid,
+            event=True)
+
+        self._stop_service()
+        self.events.clear(self.node.uuid)
+        self.assertFalse(self.events.received(self.node.uuid))
+
+    @mock.patch.object(manager, 'do_sync_power_state', autospec=True)
+    def test_event_synced(self, mock_sync):
+        mock_sync.return_value = 1
+        self._start_service()
+        with mock.patch.object(self.service, '_spawn_worker',
+                               autospec=True) as mock_spawn:
+            mock_spawn.side_effect = lambda func, *args, **kwargs: func(
+                *args, **kwargs)
+            self.assertTrue(self.events.received(self.node.uuid))
+            mock_sync.assert_called_once_with(mock.ANY, 0)
+            self.assertTrue(self.events.received(self.node.uuid))
+        self.assertTrue(self.events.is_subscribed(self.node.uuid))
+
+    def test_event_no_free_worker(self):
+        self._start_service()
+        with mock.patch.object(self.service, '_spawn_worker',
+                               autospec=True) as mock_spawn:
+            mock_spawn.side_effect = exception.NoFreeConductorWorker()
+            self.assertTrue(self.events.received(self.node.uuid))
+            self.assertTrue(self.events.received(self.node.uuid))
+        self.assertEqual(2, mock_spawn.call_count)
+
 
 @mock.patch.object(task_manager, 'acquire')
 @mock.patch.object(manager.ConductorManager, '_mapped_to_this_conductor')
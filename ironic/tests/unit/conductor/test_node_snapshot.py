@@ -0,0 +1,174 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the node snapshot shared by the periodic tasks."""
+
+import datetime
+
+import mock
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+
+from ironic.common import states
+from ironic.conductor import node_snapshot
+from ironic.tests.unit.db import base as db_base
+from ironic.tests.unit.db import utils as db_utils
+
+
+class NodeSnapshotTestCase(db_base.DbTestCase):
+
+    def setUp(self):
+        super(NodeSnapshotTestCase, self).setUp()
+        self.config(node_snapshot_max_age=10,
+                    node_snapshot_full_refresh_interval=600,
+                    group='conductor')
+        self.now = datetime.datetime(2000, 1, 1, 0, 0)
+        timeutils.set_time_override(self.now)
+        self.addCleanup(timeutils.clear_time_override)
+        self.snapshot = node_snapshot.NodeSnapshot(self.dbapi)
+        patcher = mock.patch.object(self.dbapi, 'get_nodeinfo_list',
+                                    wraps=self.dbapi.get_nodeinfo_list)
+        self.get_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _create_node(self, **kwargs):
+        return db_utils.create_test_node(uuid=uuidutils.generate_uuid(),
+                                         **kwargs)
+
+    def _uuids(self, filters=None):
+        return sorted(row[0] for row in self.snapshot.get_nodeinfo_list(
+            ['uuid'], filters=filters))
+
+    def test_filters(self):
+        active = self._create_node(provision_state=states.ACTIVE,
+                                   instance_uuid=uuidutils.generate_uuid())
+        maintenance = self._create_node(provision_state=states.ACTIVE,
+                                        maintenance=True)
+        reserved = self._create_node(provision_state=states.DEPLOYWAIT,
+                                     reservation='host1',
+                                     provision_updated_at=self.now)
+        inspecting = self._create_node(provision_state=states.INSPECTWAIT,
+                                       inspection_started_at=self.now)
+        timeutils.advance_time_seconds(5)
+
+        self.assertEqual(sorted([active.uuid, maintenance.uuid,
+                                 reserved.uuid, inspecting.uuid]),
+                         self._uuids())
+        self.assertEqual(
+            [active.uuid],
+            self._uuids({'provision_state': states.ACTIVE,
+                         'maintenance': False}))
+        self.assertEqual([active.uuid], self._uuids({'associated': True}))
+        self.assertEqual([reserved.uuid], self._uuids({'reserved': True}))
+        self.assertEqual(
+            [reserved.uuid],
+            self._uuids({'reserved_by_any_of': ['host1', 'host2']}))
+        self.assertEqual([reserved.uuid],
+                         self._uuids({'provisioned_before': 1}))
+        self.assertEqual([], self._uuids({'provisioned_before': 10}))
+        self.assertEqual([inspecting.uuid],
+                         self._uuids({'inspection_started_before': 1}))
+        # All served by a single query
+        self.get_mock.assert_called_once_with(
+            columns=list(node_snapshot.BASE_COLUMNS))
+
+    def test_columns(self):
+        node = self._create_node(driver_internal_info={'foo': 'bar'})
+        self.assertEqual(
+            [(node.uuid, node.id)],
+            self.snapshot.get_nodeinfo_list(['uuid', 'id']))
+        self.assertEqual(
+            [(node.uuid, {'foo': 'bar'})],
+            self.snapshot.get_nodeinfo_list(['uuid',
+                                             'driver_internal_info']))
+        # A new column reloads the snapshot
+        self.assertEqual(2, self.get_mock.call_count)
+        self.get_mock.assert_called_with(
+            columns=list(node_snapshot.BASE_COLUMNS)
+            + ['driver_internal_info'])
+
+    def test_sort(self):
+        node1 = self._create_node(
+            provision_updated_at=self.now + datetime.timedelta(seconds=1))
+        node2 = self._create_node(provision_updated_at=self.now)
+        node3 = self._create_node()
+        node4 = self._create_node()
+
+        def _sorted(**kwargs):
+            return [row[0] for row in self.snapshot.get_nodeinfo_list(
+                ['uuid'], **kwargs)]
+
+        self.assertEqual([node1.uuid, node2.uuid, node3.uuid, node4.uuid],
+                         _sorted())
+        self.assertEqual([node3.uuid, node4.uuid, node2.uuid, node1.uuid],
+                         _sorted(sort_key='provision_updated_at',
+                                 sort_dir='asc'))
+        self.assertEqual([node1.uuid, node2.uuid, node4.uuid, node3.uuid],
+                         _sorted(sort_key='provision_updated_at',
+                                 sort_dir='desc'))
+
+    def test_incremental_refresh(self):
+        node1 = self._create_node(provision_state=states.AVAILABLE)
+        node2 = self._create_node(provision_state=states.AVAILABLE)
+        self.assertEqual(sorted([node1.uuid, node2.uuid]),
+                         self._uuids({'provision_state': states.AVAILABLE}))
+
+        timeutils.advance_time_seconds(5)
+        self.dbapi.update_node(node1.id,
+                               {'provision_state': states.DEPLOYING})
+        node3 = self._create_node(provision_state=states.AVAILABLE)
+        # Too recent to be refreshed
+        self.assertEqual(sorted([node1.uuid, node2.uuid]),
+                         self._uuids({'provision_state': states.AVAILABLE}))
+        self.get_mock.assert_called_once_with(columns=mock.ANY)
+
+        timeutils.advance_time_seconds(5)
+        self.assertEqual(sorted([node2.uuid, node3.uuid]),
+                         self._uuids({'provision_state': states.AVAILABLE}))
+        self.get_mock.assert_called_with(
+            columns=mock.ANY,
+            filters={'updated_since': self.now - datetime.timedelta(
+                seconds=node_snapshot._CLOCK_SKEW)})
+
+    def test_full_refresh(self):
+        node1 = self._create_node()
+        node2 = self._create_node()
+        self.assertEqual(sorted([node1.uuid, node2.uuid]), self._uuids())
+
+        self.dbapi.destroy_node(node1.uuid)
+        timeutils.advance_time_seconds(10)
+        # Deleted nodes stay until the next full refresh
+        self.assertEqual(sorted([node1.uuid, node2.uuid]), self._uuids())
+        timeutils.advance_time_seconds(600)
+        self.assertEqual([node2.uuid], self._uuids())
+        self.get_mock.assert_called_with(columns=mock.ANY)
+
+    def test_invalidate(self):
+        node1 = self._create_node()
+        self.assertEqual([node1.uuid], self._uuids())
+        self.dbapi.destroy_node(node1.uuid)
+        self.snapshot.invalidate()
+        self.assertEqual([], self._uuids())
+        self.assertEqual(2, self.get_mock.call_count)
+
+    def test_supports(self):
+        self.assertTrue(self.snapshot.supports())
+        self.assertTrue(self.snapshot.supports(
+            filters={'provision_state': states.ACTIVE, 'reserved': False}))
+        self.assertFalse(self.snapshot.supports(
+            filters={'uuid_in': ['uuid']}))
+        self.assertFalse(self.snapshot.supports(
+            filters={'chassis_uuid': 'uuid'}))
+        self.assertTrue(self.snapshot.supports(
+            sort_key='provision_updated_at', sort_dir='asc'))
+        self.assertFalse(self.snapshot.supports(sort_key='name'))
+        self.assertFalse(self.snapshot.supports(limit=10))
@@ -0,0 +1,106 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the power events sent by the BMCs of the nodes."""
+
+import mock
+
+from ironic.conductor import power_events
+from ironic.tests import base
+
+
+class PowerEventsTestCase(base.TestCase):
+
+    def setUp(self):
+        super(PowerEventsTestCase, self).setUp()
+        self.events = power_events.PowerEvents()
+        self.config(power_event_min_interval=0, group='conductor')
+        self.handler = mock.Mock()
+        self.events.start(self.handler)
+
+    def test_subscriptions(self):
+        self.events.subscribed('node1')
+        self.events.subscribed('node2')
+        self.assertTrue(self.events.is_subscribed('node1'))
+        self.assertEqual(2, len(self.events))
+        self.events.unsubscribed('node1')
+        self.events.unsubscribed('node3')
+        self.assertFalse(self.events.is_subscribed('node1'))
+        self.assertEqual(['node2'], self.events.list_subscribed())
+
+    def test_poll_due(self):
+        self.config(power_event_poll_interval=600, group='conductor')
+        self.events.subscribed('node1')
+        self.assertFalse(self.events.poll_due('node1'))
+        self.assertTrue(self.events.poll_due('node2'))
+        self.config(power_event_poll_interval=0, group='conductor')
+        self.assertTrue(self.events.poll_due('node1'))
+
+    def test_polled(self):
+        self.events.subscribed('node1')
+        with mock.patch.object(self.events._subscribed['node1'], 'elapsed',
+                               autospec=True, return_value=1000):
+            self.assertTrue(self.events.poll_due('node1'))
+        self.events.polled('node1')
+        self.assertFalse(self.events.poll_due('node1'))
+        # Not recorded without a subscription
+        self.events.polled('node2')
+        self.assertFalse(self.events.is_subscribed('node2'))
+
+    def test_received(self):
+        self.events.subscribed('node1')
+        self.assertTrue(self.events.received('node1'))
+        self.handler.assert_called_once_with('node1')
+        # Coalesced until cleared
+        self.assertFalse(self.events.received('node1'))
+        self.events.clear('node1')
+        self.assertTrue(self.events.received('node1'))
+        self.assertEqual(2, self.handler.call_count)
+
+    def test_received_rate_limited(self):
+        self.config(power_event_min_interval=10, group='conductor')
+        self.events.subscribed('node1')
+        # Deferred to the periodic synchronization
+        self.assertFalse(self.events.received('node1'))
+        self.assertFalse(self.handler.called)
+        self.assertTrue(self.events.poll_due('node1'))
+        self.events.polled('node1')
+        self.assertFalse(self.events.poll_due('node1'))
+        with mock.patch.object(self.events._subscribed['node1'], 'elapsed',
+                               autospec=True, return_value=10):
+            self.assertTrue(self.events.received('node1'))
+        self.handler.assert_called_once_with('node1')
+
+    def test_received_rate_limited_unsubscribed(self):
+        self.config(power_event_min_interval=10, group='conductor')
+        self.events.subscribed('node1')
+        self.assertFalse(self.events.received('node1'))
+        self.events.unsubscribed('node1')
+        self.events.subscribed('node1')
+        self.assertFalse(self.events.poll_due('node1'))
+
+    def test_received_not_subscribed(self):
+        self.assertFalse(self.events.received('node1'))
+        self.assertFalse(self.handler.called)
+
+    def test_received_stopped(self):
+        self.events.subscribed('node1')
+        self.events.stop()
+        self.assertFalse(self.events.received('node1'))
+        self.assertFalse(self.handler.called)
+
+    def test_received_handler_failure(self):
+        self.events.subscribed('node1')
+        self.handler.side_effect = RuntimeError('boom')
+        self.assertFalse(self.events.received('node1'))
+        self.assertFalse(self.events.received('node1'))
+        self.assertEqual(2, self.handler.call_count)
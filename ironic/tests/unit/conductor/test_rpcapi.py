@@ -259,6 +259,19 @@ class RPCAPITestCase(db_base.DbTestCase):
                           node_id=self.fake_node['uuid'],
                           new_state=states.POWER_ON)
 
+    def test_create_nodes(self):
+        self._test_rpcapi('create_nodes',
+                          'call',
+                          version='1.50',
+                          nodes=[{'node': self.fake_node_obj}])
+
+    def test_change_nodes_power_state(self):
+        self._test_rpcapi('change_nodes_power_state',
+                          'call',
+                          version='1.49',
+                          node_ids=[self.fake_node['uuid']],
+                          new_state=states.POWER_OFF)
+
     def test_vendor_passthru(self):
         self._test_rpcapi('vendor_passthru',
                           'call',
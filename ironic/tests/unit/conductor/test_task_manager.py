@@ -51,6 +51,11 @@ class TaskManagerTestCase(db_base.DbTestCase):
         self.config(node_locked_retry_interval=0, group='conductor')
         self.node = obj_utils.create_test_node(self.context)
         self.future_mock = mock.Mock(spec=['cancel', 'add_done_callback'])
+        # NOTE: the tasks spawning work are never released
+        patcher = mock.patch.object(task_manager, '_LOCAL_LOCKS',
+                                    task_manager.LocalLocks())
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_excl_lock(self, get_voltgt_mock, get_volconn_mock,
                        get_portgroups_mock, get_ports_mock,
@@ -224,6 +229,164 @@ class TaskManagerTestCase(db_base.DbTestCase):
         self.assertFalse(build_driver_mock.called)
         self.assertFalse(release_mock.called)
 
+    @mock.patch.object(task_manager.time, 'sleep', autospec=True)
+    def test_excl_lock_locked_by_other_host(
+            self, sleep_mock, get_voltgt_mock, get_volconn_mock,
+            get_portgroups_mock, get_ports_mock, build_driver_mock,
+            reserve_mock, release_mock, node_get_mock):
+        self.config(node_locked_retry_attempts=3, group='conductor')
+        self.config(node_locked_retry_interval=4, group='conductor')
+        reserve_mock.side_effect = [
+            exception.NodeLocked(node='foo', host='other-host'),
+            exception.NodeLocked(node='foo', host='other-host'),
+            self.node]
+
+        with task_manager.TaskManager(self.context, 'fake-node-id'):
+            pass
+
+        self.assertEqual(3, reserve_mock.call_count)
+        self.assertEqual(2, sleep_mock.call_count)
+        # Exponential backoff with jitter, then the rest of the period
+        first = sleep_mock.call_args_list[0][0][0]
+        self.assertTrue(1 <= first <= 3, first)
+        self.assertTrue(sleep_mock.call_args_list[1][0][0] > 8 - first - 1)
+
+    @mock.patch.object(task_manager.time, 'sleep', autospec=True)
+    def test_excl_lock_locked_by_this_host(
+            self, sleep_mock, get_voltgt_mock, get_volconn_mock,
+            get_portgroups_mock, get_ports_mock, build_driver_mock,
+            reserve_mock, release_mock, node_get_mock):
+        self.config(node_locked_retry_attempts=2, group='conductor')
+        self.config(node_locked_retry_interval=60, group='conductor')
+        node_get_mock.return_value = self.node
+
+        def _reserve(*args):
+            if reserve_mock.call_count < 4:
+                # Released by another thread before waiting
+                task_manager._LOCAL_LOCKS.acquired(self.node.id)
+                task_manager._LOCAL_LOCKS.released(self.node.id)
+                task_manager._LOCAL_LOCKS.acquired(self.node.id)
+                raise exception.NodeLocked(node='foo', host=self.host)
+            return self.node
+
+        reserve_mock.side_effect = _reserve
+        with task_manager.TaskManager(self.context, 'fake-node-id'):
+            self.assertTrue(task_manager._LOCAL_LOCKS.is_held(self.node.id))
+
+        # Wake-ups do not count as attempts
+        self.assertEqual(4, reserve_mock.call_count)
+        self.assertFalse(sleep_mock.called)
+        self.assertFalse(task_manager._LOCAL_LOCKS.is_held(self.node.id))
+        self.assertEqual({}, task_manager._LOCAL_LOCKS._waiters)
+
+    def test_excl_lock_locked_by_this_host_timeout(
+            self, get_voltgt_mock, get_volconn_mock, get_portgroups_mock,
+            get_ports_mock, build_driver_mock,
+            reserve_mock, release_mock, node_get_mock):
+        self.config(node_locked_retry_attempts=2, group='conductor')
+        node_get_mock.return_value = self.node
+        reserve_mock.side_effect = exception.NodeLocked(node='foo',
+                                                        host=self.host)
+        task_manager._LOCAL_LOCKS.acquired(self.node.id)
+        self.addCleanup(task_manager._LOCAL_LOCKS.released, self.node.id)
+
+        self.assertRaises(exception.NodeLocked,
+                          task_manager.TaskManager,
+                          self.context, 'fake-node-id')
+        self.assertEqual(2, reserve_mock.call_count)
+        self.assertEqual({}, task_manager._LOCAL_LOCKS._waiters)
+
+    @mock.patch.object(task_manager.METRICS, 'send_timer', autospec=True)
+    def test_excl_lock_wait_reported(
+            self, timer_mock, get_voltgt_mock, get_volconn_mock,
+            get_portgroups_mock, get_ports_mock, build_driver_mock,
+            reserve_mock, release_mock, node_get_mock):
+        reserve_mock.return_value = self.node
+        with task_manager.TaskManager(self.context, 'fake-node-id',
+                                      purpose='power state sync'):
+            pass
+        timer_mock.assert_any_call(
+            'TaskManager.lock_wait', mock.ANY,
+            labels={'purpose': 'power state sync'})
+
+    @mock.patch.object(task_manager, '_query_count', autospec=True)
+    @mock.patch.object(task_manager.METRICS, 'send_histogram', autospec=True)
+    @mock.patch.object(task_manager.METRICS, 'send_timer', autospec=True)
+    def test_excl_lock_hold_reported(
+            self, timer_mock, histogram_mock, count_mock, get_voltgt_mock,
+            get_volconn_mock, get_portgroups_mock, get_ports_mock,
+            build_driver_mock, reserve_mock, release_mock, node_get_mock):
+        count_mock.side_effect = [10, 13]
+        node_get_mock.return_value = self.node
+        reserve_mock.return_value = self.node
+        with task_manager.TaskManager(self.context, 'fake-node-id',
+                                      purpose='power state sync'):
+            held, = task_manager.list_held_locks()
+            self.assertEqual(self.node.uuid, held.node_uuid)
+            self.assertEqual('power state sync', held.purpose)
+            self.assertIsNone(held.stack)
+        self.assertEqual([], task_manager.list_held_locks())
+        timer_mock.assert_called_with(
+            'TaskManager.lock_hold', mock.ANY,
+            labels={'purpose': 'power state sync'})
+        histogram_mock.assert_called_once_with(
+            'TaskManager.db_queries', 3,
+            labels={'purpose': 'power state sync'},
+            buckets=task_manager._QUERY_BUCKETS)
+
+    @mock.patch.object(task_manager, 'LOG', autospec=True)
+    def test_excl_lock_slow(
+            self, log_mock, get_voltgt_mock, get_volconn_mock,
+            get_portgroups_mock, get_ports_mock, build_driver_mock,
+            reserve_mock, release_mock, node_get_mock):
+        self.config(slow_lock_threshold=10, group='conductor')
+        node_get_mock.return_value = self.node
+        reserve_mock.return_value = self.node
+        with mock.patch.object(task_manager.HeldLock, 'age', autospec=True,
+                               return_value=5):
+            with task_manager.TaskManager(self.context, 'fake-node-id'):
+                self.assertIn('test_excl_lock_slow',
+                              task_manager.list_held_locks()[0].stack)
+        self.assertFalse(log_mock.warning.called)
+
+        with mock.patch.object(task_manager.HeldLock, 'age', autospec=True,
+                               return_value=11):
+            with task_manager.TaskManager(self.context, 'fake-node-id',
+                                          purpose='deploying'):
+                pass
+        log_mock.warning.assert_called_once_with(mock.ANY, mock.ANY)
+        params = log_mock.warning.call_args[0][1]
+        self.assertEqual('deploying', params['purpose'])
+        self.assertIn('test_excl_lock_slow', params['stack'])
+
+    @mock.patch.object(task_manager.METRICS, 'send_histogram', autospec=True)
+    @mock.patch.object(task_manager.METRICS, 'send_timer', autospec=True)
+    def test_shared_lock_reported(
+            self, timer_mock, histogram_mock, get_voltgt_mock,
+            get_volconn_mock, get_portgroups_mock, get_ports_mock,
+            build_driver_mock, reserve_mock, release_mock, node_get_mock):
+        node_get_mock.return_value = self.node
+        with task_manager.TaskManager(self.context, 'fake-node-id',
+                                      shared=True, purpose='inspecting'):
+            self.assertEqual([], task_manager.list_held_locks())
+        self.assertFalse(timer_mock.called)
+        histogram_mock.assert_called_once_with(
+            'TaskManager.db_queries', 0, labels={'purpose': 'inspecting'},
+            buckets=task_manager._QUERY_BUCKETS)
+
+    def test_excl_lock_release_notifies(
+            self, get_voltgt_mock, get_volconn_mock, get_portgroups_mock,
+            get_ports_mock, build_driver_mock,
+            reserve_mock, release_mock, node_get_mock):
+        node_get_mock.return_value = self.node
+        reserve_mock.return_value = self.node
+        event = task_manager._LOCAL_LOCKS.register(self.node.id)
+        self.addCleanup(task_manager._LOCAL_LOCKS.unregister, self.node.id,
+                        event)
+        with task_manager.TaskManager(self.context, 'fake-node-id'):
+            self.assertFalse(event.is_set())
+        self.assertTrue(event.is_set())
+
     def test_excl_lock_get_ports_exception(
             self, get_voltgt_mock, get_volconn_mock, get_portgroups_mock,
             get_ports_mock, build_driver_mock,
@@ -499,6 +662,7 @@ class TaskManagerTestCase(db_base.DbTestCase):
             task.upgrade_lock(purpose='spam')
             self.assertFalse(task.shared)
             self.assertEqual('spam', task._purpose)
+            self.assertEqual('spam', task_manager.list_held_locks()[0].purpose)
 
             build_driver_mock.assert_called_once_with(mock.ANY)
 
@@ -681,7 +845,7 @@ class TaskManagerTestCase(db_base.DbTestCase):
         reserve_mock.return_value = self.node
         copy_mock.return_value = m
         t = task_manager.TaskManager('fake', 'fake')
-        copy_mock.assert_called_once_with()
+        copy_mock.assert_called_once_with(shallow=True)
         self.assertIs(m, t.fsm)
         m.initialize.assert_called_once_with(
             start_state=self.node.provision_state,
@@ -998,3 +1162,82 @@ class ProvisionNotifyTestCase(tests_base.TestCase):
         self.task.notifier(self.task)
         self.assertEqual(1, emit_mock.call_count)
         self.assertIsNone(self.task._event)
+
+
+class LocalLocksTestCase(tests_base.TestCase):
+
+    def setUp(self):
+        super(LocalLocksTestCase, self).setUp()
+        self.locks = task_manager.LocalLocks()
+
+    def test_held(self):
+        self.assertFalse(self.locks.is_held(1))
+        self.locks.acquired(1)
+        self.assertTrue(self.locks.is_held(1))
+        self.assertFalse(self.locks.is_held(2))
+        self.locks.released(1)
+        self.assertFalse(self.locks.is_held(1))
+
+    def test_holder(self):
+        holder = task_manager.HeldLock('uuid', 'purpose')
+        self.locks.acquired(1, holder)
+        self.locks.acquired(2)
+        self.assertIs(holder, self.locks.holder(1))
+        self.assertIsNone(self.locks.holder(2))
+        self.assertEqual([holder], self.locks.list_held())
+        self.locks.released(1)
+        self.assertIsNone(self.locks.holder(1))
+        self.assertEqual([], self.locks.list_held())
+
+    def test_released(self):
+        event1 = self.locks.register(1)
+        event2 = self.locks.register(1)
+        other = self.locks.register(2)
+        self.assertIs(event1, event2)
+        self.locks.released(1)
+        self.assertTrue(event1.is_set())
+        self.assertFalse(other.is_set())
+        # New waiters get a new event
+        event3 = self.locks.register(1)
+        self.assertFalse(event3.is_set())
+        for event in (event1, event2, event3):
+            self.locks.unregister(1, event)
+        self.locks.unregister(2, other)
+        self.assertEqual({}, self.locks._waiters)
+
+    def test_unregister(self):
+        event = self.locks.register(1)
+        self.locks.register(1)
+        self.locks.unregister(1, event)
+        self.assertIn(1, self.locks._waiters)
+        self.locks.unregister(1, event)
+        self.assertEqual({}, self.locks._waiters)
+        self.locks.released(1)
+        self.assertFalse(event.is_set())
+
+
+class GetLockRetryDelayTestCase(tests_base.TestCase):
+
+    def setUp(self):
+        super(GetLockRetryDelayTestCase, self).setUp()
+        self.config(node_locked_retry_interval=8, group='conductor')
+        self.watch = mock.Mock(spec=['leftover'])
+        self.watch.leftover.return_value = 100
+
+    def test_backoff(self):
+        for failures, low, high in ((1, 2, 6), (2, 4, 12), (3, 8, 24)):
+            delay = task_manager.get_lock_retry_delay(failures, 10,
+                                                      self.watch)
+            self.assertTrue(low <= delay <= high, delay)
+
+    def test_last_attempt(self):
+        self.assertEqual(100, task_manager.get_lock_retry_delay(
+            2, 3, self.watch))
+
+    def test_leftover(self):
+        self.watch.leftover.return_value = 1
+        self.assertEqual(1, task_manager.get_lock_retry_delay(
+            1, 3, self.watch))
+        self.watch.leftover.return_value = -1
+        self.assertEqual(0, task_manager.get_lock_retry_delay(
+            1, 3, self.watch))
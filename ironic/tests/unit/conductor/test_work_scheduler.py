@@ -0,0 +1,168 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the conductor work scheduler."""
+
+import threading
+
+import futurist
+from futurist import waiters
+import mock
+
+from ironic.common import exception
+from ironic.conductor import work_scheduler
+from ironic.tests import base
+
+
+class WorkSchedulerTestCase(base.TestCase):
+
+    def setUp(self):
+        super(WorkSchedulerTestCase, self).setUp()
+        self.go = threading.Event()
+        self.done = []
+
+    def _scheduler(self, max_workers=1, **kwargs):
+        scheduler = work_scheduler.WorkScheduler(max_workers, **kwargs)
+        self.addCleanup(scheduler.shutdown)
+        # NOTE: do not block the cleanup on blocked work
+        self.addCleanup(self.go.set)
+        return scheduler
+
+    def _work(self, name):
+        self.go.wait()
+        self.done.append(name)
+        return name
+
+    def test_submit(self):
+        scheduler = self._scheduler()
+        self.go.set()
+        future = scheduler.submit(self._work, 'a')
+        self.assertEqual('a', future.result(5))
+
+    def test_submit_failure(self):
+        scheduler = self._scheduler()
+        future = scheduler.submit(int, 'a')
+        self.assertRaises(ValueError, future.result, 5)
+
+    def test_work_class_inherited(self):
+        scheduler = self._scheduler(max_workers=2)
+
+        def _parent():
+            return scheduler.submit(
+                work_scheduler.current_work_class).result(5)
+
+        self.assertEqual(
+            work_scheduler.INTERACTIVE,
+            scheduler.submit(_parent).result(5))
+        self.assertEqual(
+            work_scheduler.PERIODIC,
+            scheduler.spawn(work_scheduler.PERIODIC, _parent).result(5))
+        self.assertEqual(
+            work_scheduler.HEARTBEAT,
+            scheduler.executor_for(work_scheduler.HEARTBEAT).submit(
+                _parent).result(5))
+
+    def test_work_class_context(self):
+        scheduler = self._scheduler()
+        with work_scheduler.work_class(work_scheduler.BACKGROUND):
+            future = scheduler.submit(work_scheduler.current_work_class)
+        self.assertEqual(work_scheduler.BACKGROUND, future.result(5))
+        self.assertEqual(work_scheduler.INTERACTIVE,
+                         work_scheduler.current_work_class())
+
+    @mock.patch.object(work_scheduler.METRICS, 'send_counter', autospec=True)
+    def test_admission(self, mock_counter):
+        # Capacity of 4 work items, periodic work is admitted up to 2
+        scheduler = self._scheduler(max_workers=2)
+        futures = [scheduler.submit(self._work, i) for i in range(2)]
+        self.assertRaises(futurist.RejectedSubmission, scheduler.spawn,
+                          work_scheduler.PERIODIC, self._work, 'p')
+        mock_counter.assert_called_once_with(
+            'WorkScheduler.periodic.rejected', 1)
+        # Background work is admitted up to 3
+        futures.append(scheduler.spawn(work_scheduler.BACKGROUND,
+                                       self._work, 'b'))
+        self.assertRaises(futurist.RejectedSubmission, scheduler.spawn,
+                          work_scheduler.BACKGROUND, self._work, 'b')
+        futures.append(scheduler.submit(self._work, 'i'))
+        self.assertRaises(futurist.RejectedSubmission, scheduler.submit,
+                          self._work, 'i')
+
+        self.go.set()
+        waiters.wait_for_all(futures, 5)
+        self.assertEqual([0, 1, 'b', 'i'], sorted(self.done, key=str))
+        scheduler.spawn(work_scheduler.PERIODIC, self._work, 'p').result(5)
+
+    def test_weights(self):
+        scheduler = self._scheduler(
+            max_queued=10, weights={'interactive': 3, 'periodic': 1})
+        blocker = scheduler.submit(self._work, 'blocker')
+        futures = [scheduler.spawn(work_scheduler.PERIODIC, self._work,
+                                   'p%d' % i) for i in range(3)]
+        futures.extend(scheduler.submit(self._work, 'i%d' % i)
+                       for i in range(3))
+        self.go.set()
+        waiters.wait_for_all([blocker] + futures, 5)
+        self.assertEqual(['blocker', 'i0', 'i1', 'p0', 'i2', 'p1', 'p2'],
+                         self.done)
+
+    def test_zero_weight(self):
+        scheduler = self._scheduler(max_queued=10,
+                                    weights={'background': 0})
+        blocker = scheduler.submit(self._work, 'blocker')
+        futures = [scheduler.spawn(work_scheduler.BACKGROUND, self._work,
+                                   'b'),
+                   scheduler.spawn(work_scheduler.PERIODIC, self._work,
+                                   'p')]
+        self.go.set()
+        waiters.wait_for_all([blocker] + futures, 5)
+        self.assertEqual(['blocker', 'p', 'b'], self.done)
+
+    @mock.patch.object(work_scheduler.METRICS, 'send_timer', autospec=True)
+    @mock.patch.object(work_scheduler.METRICS, 'send_gauge', autospec=True)
+    def test_metrics(self, mock_gauge, mock_timer):
+        scheduler = self._scheduler()
+        self.go.set()
+        scheduler.spawn(work_scheduler.PERIODIC, self._work, 'p').result(5)
+        mock_gauge.assert_called_with('WorkScheduler.periodic.queued', 0)
+        mock_timer.assert_called_once_with('WorkScheduler.periodic.wait',
+                                           mock.ANY)
+
+    def test_stats(self):
+        scheduler = self._scheduler(max_queued=10)
+        scheduler.submit(self._work, 'a')
+        scheduler.spawn(work_scheduler.PERIODIC, self._work, 'p')
+        running, queued = scheduler.stats()
+        self.assertEqual(1, running)
+        self.assertEqual(1, queued[work_scheduler.PERIODIC])
+        self.assertEqual(0, queued[work_scheduler.INTERACTIVE])
+
+    def test_shutdown(self):
+        scheduler = self._scheduler()
+        future = scheduler.submit(self._work, 'a')
+        queued = scheduler.submit(self._work, 'b')
+        self.go.set()
+        scheduler.shutdown()
+        self.assertTrue(future.done())
+        self.assertTrue(queued.done())
+        self.assertFalse(scheduler.alive)
+        self.assertRaises(RuntimeError, scheduler.submit, self._work, 'c')
+
+    def test_invalid_work_class(self):
+        self.assertRaises(exception.ConfigInvalid,
+                          work_scheduler.WorkScheduler, 10,
+                          weights={'fancy': 1})
+
+    def test_invalid_value(self):
+        self.assertRaises(exception.ConfigInvalid,
+                          work_scheduler.WorkScheduler, 10,
+                          admission={'periodic': 'half'})
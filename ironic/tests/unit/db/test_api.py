@@ -237,3 +237,85 @@ class UpdateToLatestVersionsTestCase(base.DbTestCase):
         for uuid in nodes:
             node = self.dbapi.get_node_by_uuid(uuid)
             self.assertEqual(self.node_ver, node.version)
+
+    def test_checkpoint(self):
+        if self.node_version_same:
+            # can't test if we don't have diff versions of the node
+            return
+
+        nodes = self._create_nodes(5)
+        checkpoint = {}
+        self.assertEqual(
+            (5, 2), self.dbapi.update_to_latest_versions(
+                self.context, 2, checkpoint=checkpoint))
+        state = checkpoint['Node']
+        self.assertEqual(self.node_ver, state['version'])
+        self.assertEqual(3, state['remaining'])
+        self.assertEqual(2, state['migrated'])
+        self.assertIsNotNone(state['last_key'])
+        self.assertEqual(
+            (3, 3), self.dbapi.update_to_latest_versions(
+                self.context, 3, checkpoint=checkpoint))
+        self.assertEqual(0, state['remaining'])
+        self.assertEqual(5, state['migrated'])
+        self.assertEqual(
+            (0, 0), self.dbapi.update_to_latest_versions(
+                self.context, 3, checkpoint=checkpoint))
+        for uuid in nodes:
+            node = self.dbapi.get_node_by_uuid(uuid)
+            self.assertEqual(self.node_ver, node.version)
+
+    def test_checkpoint_resumes_after_last_key(self):
+        if self.node_version_same:
+            # can't test if we don't have diff versions of the node
+            return
+
+        nodes = self._create_nodes(3)
+        first = self.dbapi.get_node_by_uuid(nodes[0])
+        checkpoint = {'Node': {'version': self.node_ver,
+                               'last_key': first.id,
+                               'remaining': 2,
+                               'migrated': 1}}
+        self.assertEqual(
+            (2, 2), self.dbapi.update_to_latest_versions(
+                self.context, 0, checkpoint=checkpoint))
+        # The first node is before the recorded key and is left alone
+        self.assertEqual(self.node_old_ver,
+                         self.dbapi.get_node_by_uuid(nodes[0]).version)
+        self.assertEqual(self.node_ver,
+                         self.dbapi.get_node_by_uuid(nodes[2]).version)
+        # It is picked up once the walk restarts from the beginning
+        self.assertEqual(
+            (1, 1), self.dbapi.update_to_latest_versions(
+                self.context, 0, checkpoint=checkpoint))
+        self.assertEqual(self.node_ver,
+                         self.dbapi.get_node_by_uuid(nodes[0]).version)
+        self.assertEqual(4, checkpoint['Node']['migrated'])
+
+    def test_checkpoint_new_version(self):
+        if self.node_version_same:
+            # can't test if we don't have diff versions of the node
+            return
+
+        self._create_nodes(2)
+        checkpoint = {'Node': {'version': 'old',
+                               'last_key': 100,
+                               'remaining': 0,
+                               'migrated': 7}}
+        self.assertEqual(
+            (2, 2), self.dbapi.update_to_latest_versions(
+                self.context, 0, checkpoint=checkpoint))
+        self.assertEqual({'version': self.node_ver, 'last_key': mock.ANY,
+                          'remaining': 0, 'migrated': 2},
+                         checkpoint['Node'])
+
+
+class GetQueryCountTestCase(base.DbTestCase):
+
+    def test_get_query_count(self):
+        before = self.dbapi.get_query_count()
+        self.dbapi.get_conductor_list()
+        middle = self.dbapi.get_query_count()
+        self.assertGreater(middle, before)
+        self.dbapi.get_conductor_list()
+        self.assertGreater(self.dbapi.get_query_count(), middle)
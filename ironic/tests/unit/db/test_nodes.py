@@ -59,6 +59,73 @@ class DbNodeTestCase(base.DbTestCase):
                           uuid=uuidutils.generate_uuid(),
                           instance_uuid=instance)
 
+    def _bulk_node(self, ports=(), portgroups=(), traits=(), **kw):
+        values = utils.get_test_node(uuid=uuidutils.generate_uuid(), **kw)
+        del values['id']
+        del values['tags']
+        values.update(ports=list(ports), portgroups=list(portgroups),
+                      traits=list(traits))
+        return values
+
+    def _bulk_port(self, address, **kw):
+        values = utils.get_test_port(uuid=uuidutils.generate_uuid(),
+                                     address=address, **kw)
+        for field in ('id', 'node_id', 'portgroup_id'):
+            del values[field]
+        return values
+
+    def test_create_nodes(self):
+        portgroup = utils.get_test_portgroup(
+            uuid=uuidutils.generate_uuid(), address='52:54:00:00:00:10')
+        del portgroup['id']
+        del portgroup['node_id']
+        portgroup['ports'] = [self._bulk_port('52:54:00:00:00:11')]
+        node1 = self._bulk_node(
+            name='node1', portgroups=[portgroup],
+            ports=[self._bulk_port('52:54:00:00:00:01')],
+            traits=['CUSTOM_1', 'CUSTOM_2', 'CUSTOM_1'])
+        node2 = self._bulk_node(name='node2')
+
+        res = self.dbapi.create_nodes([node1, node2], '1.0')
+
+        self.assertEqual([node1['uuid'], node2['uuid']],
+                         [node.uuid for node in res])
+        self.assertEqual(['CUSTOM_1', 'CUSTOM_2'],
+                         [trait.trait for trait in res[0].traits])
+        self.assertEqual([], res[1].traits)
+        ports = self.dbapi.get_ports_by_node_id(res[0].id)
+        self.assertEqual(2, len(ports))
+        portgroups = self.dbapi.get_portgroups_by_node_id(res[0].id)
+        self.assertEqual([portgroup['uuid']], [pg.uuid for pg in portgroups])
+        member = self.dbapi.get_port_by_address('52:54:00:00:00:11')
+        self.assertEqual(portgroups[0].id, member.portgroup_id)
+        standalone = self.dbapi.get_port_by_address('52:54:00:00:00:01')
+        self.assertIsNone(standalone.portgroup_id)
+        self.assertEqual([], self.dbapi.get_ports_by_node_id(res[1].id))
+
+    def test_create_nodes_rollback(self):
+        utils.create_test_port(node_id=42, address='52:54:00:00:00:01')
+        node1 = self._bulk_node(name='node1')
+        node2 = self._bulk_node(name='node2',
+                                ports=[self._bulk_port('52:54:00:00:00:01')])
+
+        self.assertRaises(exception.MACAlreadyExists,
+                          self.dbapi.create_nodes, [node1, node2], '1.0')
+
+        # None of the nodes was created
+        self.assertRaises(exception.NodeNotFound,
+                          self.dbapi.get_node_by_uuid, node1['uuid'])
+        self.assertRaises(exception.NodeNotFound,
+                          self.dbapi.get_node_by_uuid, node2['uuid'])
+
+    @mock.patch('ironic.db.sqlalchemy.api.MAX_TRAITS_PER_NODE', 1)
+    def test_create_nodes_too_many_traits(self):
+        node = self._bulk_node(traits=['CUSTOM_1', 'CUSTOM_2'])
+        self.assertRaises(exception.InvalidParameterValue,
+                          self.dbapi.create_nodes, [node], '1.0')
+        self.assertRaises(exception.NodeNotFound,
+                          self.dbapi.get_node_by_uuid, node['uuid'])
+
     def test_create_node_name_duplicate(self):
         node = utils.create_test_node(name='spam')
         self.assertRaises(exception.DuplicateName,
@@ -286,6 +353,26 @@ class DbNodeTestCase(base.DbTestCase):
                                                     'World!'})
         self.assertEqual([node2.id], [r[0] for r in res])
 
+    @mock.patch.object(timeutils, 'utcnow', autospec=True)
+    def test_get_nodeinfo_list_updated_since(self, mock_utcnow):
+        past = datetime.datetime(2000, 1, 1, 0, 0)
+        present = past + datetime.timedelta(minutes=10)
+        mock_utcnow.return_value = past
+        node1 = utils.create_test_node(uuid=uuidutils.generate_uuid())
+        node2 = utils.create_test_node(uuid=uuidutils.generate_uuid())
+        utils.create_test_node(uuid=uuidutils.generate_uuid())
+
+        mock_utcnow.return_value = present
+        self.dbapi.update_node(node1.id, {'maintenance': True})
+        node3 = utils.create_test_node(uuid=uuidutils.generate_uuid())
+        res = self.dbapi.get_nodeinfo_list(
+            filters={'updated_since': present})
+        self.assertEqual(sorted([node1.id, node3.id]),
+                         sorted(r[0] for r in res))
+
+        res = self.dbapi.get_nodeinfo_list(filters={'updated_since': past})
+        self.assertIn(node2.id, [r[0] for r in res])
+
     def test_get_node_list(self):
         uuids = []
         for i in range(1, 6):
@@ -316,7 +403,8 @@ class DbNodeTestCase(base.DbTestCase):
             fault='boom',
             resource_class='foo',
             conductor_group='group1',
-            power_state='power on')
+            power_state='power on',
+            name='node2')
 
         res = self.dbapi.get_node_list(filters={'chassis_uuid': ch1['uuid']})
         self.assertEqual([node1.id], [r.id for r in res])
@@ -375,6 +463,10 @@ class DbNodeTestCase(base.DbTestCase):
         res = self.dbapi.get_node_list(filters={'uuid_in': uuids})
         self.assertEqual([node1.id], [r.id for r in res])
 
+        res = self.dbapi.get_node_list(
+            filters={'name_in': [node2.name, 'missing']})
+        self.assertEqual([node2.id], [r.id for r in res])
+
         res = self.dbapi.get_node_list(filters={'with_power_state': True})
         self.assertEqual([node2.id], [r.id for r in res])
 
@@ -21,6 +21,7 @@ from ironic.common import utils as com_utils
 from ironic.conductor import task_manager
 from ironic.conductor import utils
 from ironic.drivers.modules.ansible import deploy as ansible_deploy
+from ironic.drivers.modules.ansible import runner as ansible_runner
 from ironic.drivers.modules import deploy_utils
 from ironic.drivers.modules import fake
 from ironic.drivers.modules.network import flat as flat_network
@@ -183,6 +184,21 @@ class TestAnsibleMethods(AnsibleDeployTestCaseBase):
             '/path/to/playbooks/inventory', '-e', '{"ironic": {"foo": "bar"}}',
             '--private-key=/path/to/key')
 
+    @mock.patch.object(ansible_runner, 'run_batched', autospec=True)
+    @mock.patch.object(com_utils, 'execute', autospec=True)
+    def test__run_playbook_batched(self, execute_mock, batched_mock):
+        self.config(group='ansible', playbooks_path='/path/to/playbooks')
+        self.config(group='ansible', batch_window=1.5)
+        extra_vars = {'foo': 'bar'}
+
+        ansible_deploy._run_playbook(self.node, 'deploy', extra_vars,
+                                     '/path/to/key', tags=['spam'])
+
+        batched_mock.assert_called_once_with(
+            self.node, '/path/to/playbooks/deploy', extra_vars,
+            '/path/to/key', tags=['spam'], notags=None)
+        self.assertFalse(execute_mock.called)
+
     def test__parse_partitioning_info_root_msdos(self):
         expected_info = {
             'partition_info': {
@@ -0,0 +1,244 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import threading
+
+import mock
+from oslo_concurrency import processutils
+import six
+import yaml
+
+from ironic.common import exception
+from ironic.common import utils as com_utils
+from ironic.drivers.modules.ansible import runner
+from ironic.tests import base
+
+
+def _events_file(args):
+    for arg in args:
+        if arg.startswith(runner.EVENTS_FILE_ENV + '='):
+            return arg.split('=', 1)[1]
+
+
+def _write_events(path, *events):
+    with open(path, 'a') as f:
+        for event in events:
+            f.write(json.dumps(event) + '\n')
+
+
+def _stats(host, failures=0, unreachable=0):
+    return {'event': 'stats', 'host': host, 'ok': 1,
+            'failures': failures, 'unreachable': unreachable}
+
+
+class BuildCommandTestCase(base.TestCase):
+
+    def setUp(self):
+        super(BuildCommandTestCase, self).setUp()
+        self.config(group='ansible', config_file_path='/path/to/config')
+        self.config(debug=False)
+
+    def test_build_command(self):
+        self.config(group='ansible', verbosity=2)
+        args = runner.build_command('/pb/deploy.yaml', '/pb/inventory',
+                                    extra_vars={'foo': 'bar'}, key='/key',
+                                    tags=['spam'], notags=['ham'])
+        self.assertEqual(
+            ['env', 'ANSIBLE_CONFIG=/path/to/config',
+             'ansible-playbook', '/pb/deploy.yaml', '-i', '/pb/inventory',
+             '-e', '{"ironic": {"foo": "bar"}}',
+             '--tags=spam', '--skip-tags=ham', '--private-key=/key', '-vv'],
+            args)
+
+    def test_build_command_env_no_extra_vars(self):
+        args = runner.build_command('/pb/deploy.yaml', '/tmp/inventory.yaml',
+                                    env=['SPAM=ham'])
+        self.assertEqual(
+            ['env', 'ANSIBLE_CONFIG=/path/to/config', 'SPAM=ham',
+             'ansible-playbook', '/pb/deploy.yaml',
+             '-i', '/tmp/inventory.yaml'],
+            args)
+
+
+class EventReaderTestCase(base.TestCase):
+
+    def test_read_complete_lines_only(self):
+        with com_utils.tempdir() as tmpdir:
+            path = os.path.join(tmpdir, 'events')
+            com_utils.write_to_file(path, '{"host": "a"}\n{"host"')
+            reader = runner.EventReader(path)
+            self.assertEqual([{'host': 'a'}], reader.read())
+            with open(path, 'a') as f:
+                f.write(': "b"}\nnot json\n')
+            self.assertEqual([{'host': 'b'}], reader.read())
+            self.assertEqual([], reader.read())
+
+    def test_read_missing_file(self):
+        reader = runner.EventReader('/nonexistent/events')
+        self.assertEqual([], reader.read())
+
+
+class PlaybookRunnerTestCase(base.TestCase):
+
+    def setUp(self):
+        super(PlaybookRunnerTestCase, self).setUp()
+        self.config(group='ansible', config_file_path='')
+        self.config(debug=False)
+        self.runner = runner.PlaybookRunner('/pb/deploy.yaml', tags=['spam'])
+        self.requests = [
+            runner.HostRequest('node-1', {'ansible_host': '10.0.0.1'}),
+            runner.HostRequest('node-2', {'ansible_host': '10.0.0.2'}),
+        ]
+
+    def test_build_inventory(self):
+        inventory = runner.build_inventory(self.requests)
+        self.assertEqual({'node-1': {'ansible_host': '10.0.0.1'},
+                          'node-2': {'ansible_host': '10.0.0.2'}},
+                         inventory['all']['children']['ironic']['hosts'])
+        self.assertEqual({'ansible_connection': 'local',
+                          'ironic': {'nodes': []}},
+                         inventory['all']['hosts']['conductor'])
+
+    @mock.patch.object(com_utils, 'execute', autospec=True)
+    def test_run_batch(self, execute_mock):
+        inventories = []
+
+        def _execute(*args):
+            inventory = args[args.index('-i') + 1]
+            with open(inventory) as f:
+                inventories.append(yaml.safe_load(f))
+            _write_events(_events_file(args),
+                          {'event': 'failed', 'host': 'node-2',
+                           'task': 'write image', 'msg': 'boom'},
+                          _stats('node-1'),
+                          _stats('node-2', failures=1))
+            raise processutils.ProcessExecutionError(exit_code=2)
+
+        execute_mock.side_effect = _execute
+
+        self.runner.run_batch(self.requests)
+
+        self.assertEqual(1, execute_mock.call_count)
+        args = execute_mock.call_args[0]
+        self.assertEqual('env', args[0])
+        self.assertIn('/pb/deploy.yaml', args)
+        self.assertIn('--tags=spam', args)
+        self.assertNotIn('-e', args)
+        self.assertEqual(
+            runner.build_inventory(self.requests), inventories[0])
+        self.requests[0].wait()
+        exc = self.assertRaises(exception.InstanceDeployFailure,
+                                self.requests[1].wait)
+        self.assertIn('write image', six.text_type(exc))
+        self.assertIn('boom', six.text_type(exc))
+
+    @mock.patch.object(com_utils, 'execute', autospec=True)
+    def test_run_batch_ignored_failure(self, execute_mock):
+        def _execute(*args):
+            _write_events(_events_file(args),
+                          {'event': 'failed', 'host': 'node-1',
+                           'task': 'shutdown', 'ignore_errors': True},
+                          _stats('node-1'), _stats('node-2'))
+            return '', ''
+
+        execute_mock.side_effect = _execute
+
+        self.runner.run_batch(self.requests)
+
+        for request in self.requests:
+            request.wait()
+
+    @mock.patch.object(com_utils, 'execute', autospec=True)
+    def test_run_batch_no_results(self, execute_mock):
+        def _execute(*args):
+            _write_events(_events_file(args), _stats('node-1'))
+            raise processutils.ProcessExecutionError(description='VIKINGS!')
+
+        execute_mock.side_effect = _execute
+
+        self.runner.run_batch(self.requests)
+
+        self.requests[0].wait()
+        exc = self.assertRaises(exception.InstanceDeployFailure,
+                                self.requests[1].wait)
+        self.assertIn('VIKINGS!', six.text_type(exc))
+
+    @mock.patch.object(com_utils, 'execute', autospec=True)
+    def test_run_batched_collects_concurrent_requests(self, execute_mock):
+        self.config(group='ansible', batch_window=0.1)
+        calls = []
+
+        def _execute(*args):
+            inventory = args[args.index('-i') + 1]
+            with open(inventory) as f:
+                hosts = yaml.safe_load(f)['all']['children']['ironic'][
+                    'hosts']
+            calls.append(sorted(hosts))
+            _write_events(_events_file(args),
+                          *[_stats(host) for host in hosts])
+            return '', ''
+
+        execute_mock.side_effect = _execute
+        errors = []
+
+        def _deploy(node_uuid, ip):
+            node = mock.Mock(uuid=node_uuid)
+            extra_vars = {'nodes': [{'name': node_uuid, 'ip': ip,
+                                     'user': 'ansible', 'extra': {}}],
+                          'image': {'url': 'http://image'}}
+            try:
+                runner.run_batched(node, '/pb/batched.yaml', extra_vars,
+                                   '/key')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_deploy,
+                                    args=('node-%d' % i, '10.0.0.%d' % i))
+                   for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual([['node-0', 'node-1', 'node-2']], calls)
+
+    @mock.patch.object(com_utils, 'execute', autospec=True)
+    def test_run_batched_host_vars(self, execute_mock):
+        self.config(group='ansible', batch_window=0.01)
+        host_vars = {}
+
+        def _execute(*args):
+            inventory = args[args.index('-i') + 1]
+            with open(inventory) as f:
+                host_vars.update(yaml.safe_load(f)['all']['children'][
+                    'ironic']['hosts'])
+            _write_events(_events_file(args), _stats('node-1'))
+            return '', ''
+
+        execute_mock.side_effect = _execute
+        extra_vars = {'nodes': [{'name': 'node-1', 'ip': '10.0.0.1',
+                                 'user': 'ansible', 'extra': {'a': 1}}],
+                      'image': {'url': 'http://image'}}
+
+        runner.run_batched(mock.Mock(uuid='node-1'), '/pb/vars.yaml',
+                           extra_vars, '/key')
+
+        self.assertEqual({'node-1': {'ansible_host': '10.0.0.1',
+                                     'ansible_user': 'ansible',
+                                     'ansible_ssh_private_key_file': '/key',
+                                     'ironic_extra': {'a': 1},
+                                     'ironic': extra_vars}},
+                         host_vars)
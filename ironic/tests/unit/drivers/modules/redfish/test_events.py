@@ -0,0 +1,178 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import mock
+from oslo_utils import importutils
+from oslo_utils import uuidutils
+import webob
+
+from ironic.common import exception
+from ironic.drivers.modules.redfish import events as redfish_events
+from ironic.tests import base
+from ironic.tests.unit.db import base as db_base
+from ironic.tests.unit.db import utils as db_utils
+from ironic.tests.unit.objects import utils as obj_utils
+
+sushy = importutils.try_import('sushy')
+
+INFO_DICT = db_utils.get_test_redfish_info()
+
+
+@mock.patch.object(sushy, 'Sushy', autospec=True)
+class SubscriptionTestCase(db_base.DbTestCase):
+
+    def setUp(self):
+        super(SubscriptionTestCase, self).setUp()
+        self.node = obj_utils.create_test_node(
+            self.context, driver='redfish', driver_info=INFO_DICT)
+        self.config(my_ip='192.0.2.1')
+        # Every test gets its own connection
+        self.config(connection_cache_size=0, group='redfish')
+
+    def _subscriptions(self, mock_sushy, *existing):
+        subscriptions = (mock_sushy.return_value.get_event_service
+                         .return_value.subscriptions)
+        subscriptions.get_members.return_value = [
+            mock.Mock(destination=destination, context=context)
+            for destination, context in existing]
+        return subscriptions
+
+    def test_get_listener_url(self, mock_sushy):
+        self.assertEqual('http://192.0.2.1:6389/',
+                         redfish_events.get_listener_url())
+        self.config(my_ip='2001:db8::1')
+        self.assertEqual('http://[2001:db8::1]:6389/',
+                         redfish_events.get_listener_url())
+        self.config(event_listener_url='https://proxy/events',
+                    group='redfish')
+        self.assertEqual('https://proxy/events',
+                         redfish_events.get_listener_url())
+
+    def test_subscribe(self, mock_sushy):
+        url = 'http://192.0.2.1:6389/'
+        subscriptions = self._subscriptions(
+            mock_sushy, (url, self.node.uuid), (url, 'other'),
+            ('http://other/', self.node.uuid))
+
+        redfish_events.subscribe(self.node)
+
+        members = subscriptions.get_members.return_value
+        members[0].delete.assert_called_once_with()
+        self.assertFalse(members[1].delete.called)
+        self.assertFalse(members[2].delete.called)
+        subscriptions.create.assert_called_once_with(
+            {'Destination': url, 'Context': self.node.uuid,
+             'EventTypes': redfish_events.EVENT_TYPES,
+             'Protocol': 'Redfish'})
+
+    def test_unsubscribe(self, mock_sushy):
+        subscriptions = self._subscriptions(
+            mock_sushy, ('http://192.0.2.1:6389/', self.node.uuid))
+
+        redfish_events.unsubscribe(self.node)
+
+        member = subscriptions.get_members.return_value[0]
+        member.delete.assert_called_once_with()
+        self.assertFalse(subscriptions.create.called)
+
+    def test_subscribe_not_supported(self, mock_sushy):
+        mock_sushy.return_value = mock.Mock(spec=['get_system'])
+        self.assertRaisesRegex(exception.RedfishError, 'EventService',
+                               redfish_events.subscribe, self.node)
+
+    def test_subscribe_rejected(self, mock_sushy):
+        subscriptions = self._subscriptions(mock_sushy)
+        subscriptions.create.side_effect = sushy.exceptions.SushyError()
+        self.assertRaises(exception.RedfishError,
+                          redfish_events.subscribe, self.node)
+
+    def test_subscribe_connection_error(self, mock_sushy):
+        mock_sushy.return_value.get_event_service.side_effect = (
+            sushy.exceptions.ConnectionError())
+        self.assertRaises(exception.RedfishConnectionError,
+                          redfish_events.subscribe, self.node)
+
+
+class EventListenerTestCase(base.TestCase):
+
+    def setUp(self):
+        super(EventListenerTestCase, self).setUp()
+        self.callback = mock.Mock()
+        self.app = redfish_events.EventListener(self.callback)
+        self.node_uuid = uuidutils.generate_uuid()
+
+    def _post(self, body, method='POST'):
+        request = webob.Request.blank('/', method=method)
+        request.body = body if isinstance(body, bytes) else json.dumps(
+            body).encode('utf-8')
+        return request.get_response(self.app)
+
+    def test_parse_event(self):
+        other_uuid = uuidutils.generate_uuid()
+        self.assertEqual(
+            {self.node_uuid, other_uuid},
+            redfish_events.parse_event(
+                {'Context': self.node_uuid,
+                 'Events': [{'EventType': 'StatusChange',
+                             'Context': other_uuid},
+                            {'Context': 'not a node'}, 'invalid']}))
+        self.assertEqual(set(), redfish_events.parse_event(['invalid']))
+        self.assertEqual(set(), redfish_events.parse_event(
+            {'Context': 42, 'Events': 'invalid'}))
+
+    def test_event(self):
+        response = self._post({'Context': self.node_uuid,
+                               'Events': [{'EventType': 'ResourceUpdated'}]})
+        self.assertEqual(204, response.status_int)
+        self.callback.assert_called_once_with(self.node_uuid)
+
+    def test_invalid_event(self):
+        response = self._post(b'{"Context"')
+        self.assertEqual(400, response.status_int)
+        self.assertFalse(self.callback.called)
+
+    def test_event_too_large(self):
+        with mock.patch.object(redfish_events, 'MAX_EVENT_SIZE', 10):
+            response = self._post({'Context': self.node_uuid})
+        self.assertEqual(413, response.status_int)
+        self.assertFalse(self.callback.called)
+
+    def test_method_not_allowed(self):
+        response = self._post(b'', method='GET')
+        self.assertEqual(405, response.status_int)
+        self.assertFalse(self.callback.called)
+
+    @mock.patch.object(redfish_events, '_LISTENER', None)
+    @mock.patch.object(redfish_events.wsgi, 'Server', autospec=True)
+    def test_start_listener(self, mock_server):
+        redfish_events.start_listener(self.callback)
+        redfish_events.start_listener(self.callback)
+        mock_server.assert_called_once_with(
+            redfish_events.CONF, 'ironic-redfish-events', mock.ANY,
+            host=redfish_events.CONF.my_ip, port=6389)
+        mock_server.return_value.start.assert_called_once_with()
+
+    @mock.patch.object(redfish_events, '_LISTENER', None)
+    @mock.patch.object(redfish_events.wsgi, 'Server', autospec=True)
+    def test_stop_listener(self, mock_server):
+        # Not running
+        redfish_events.stop_listener()
+        redfish_events.start_listener(self.callback)
+        redfish_events.stop_listener()
+        redfish_events.stop_listener()
+        mock_server.return_value.stop.assert_called_once_with()
+        self.assertIsNone(redfish_events._LISTENER)
+        # Started again
+        redfish_events.start_listener(self.callback)
+        self.assertEqual(2, mock_server.return_value.start.call_count)
@@ -15,10 +15,13 @@
 
 import mock
 from oslo_utils import importutils
+from oslo_utils import uuidutils
 
 from ironic.common import exception
 from ironic.common import states
+from ironic.conductor import power_events
 from ironic.conductor import task_manager
+from ironic.drivers.modules.redfish import events as redfish_events
 from ironic.drivers.modules.redfish import power as redfish_power
 from ironic.drivers.modules.redfish import utils as redfish_utils
 from ironic.tests.unit.db import base as db_base
@@ -231,3 +234,83 @@ class RedfishPowerTestCase(db_base.DbTestCase):
                 task.driver.power.get_supported_power_states(task))
             self.assertEqual(list(redfish_power.SET_POWER_STATE_MAP),
                              supported_power_states)
+
+
+@mock.patch.object(redfish_events, 'start_listener', autospec=True)
+@mock.patch.object(redfish_events, 'unsubscribe', autospec=True)
+@mock.patch.object(redfish_events, 'subscribe', autospec=True)
+class RedfishPowerEventsTestCase(db_base.DbTestCase):
+
+    def setUp(self):
+        super(RedfishPowerEventsTestCase, self).setUp()
+        self.config(enabled_hardware_types=['redfish'],
+                    enabled_power_interfaces=['redfish'],
+                    enabled_management_interfaces=['redfish'],
+                    enabled_inspect_interfaces=['redfish'],
+                    enabled_bios_interfaces=['redfish'])
+        self.node = obj_utils.create_test_node(
+            self.context, driver='redfish', driver_info=INFO_DICT)
+        self.events = power_events.PowerEvents()
+        patcher = mock.patch.object(power_events, 'POWER_EVENTS',
+                                    self.events)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.power = redfish_power.RedfishPower()
+        self.manager = mock.Mock(spec=['iter_nodes'])
+        self.manager.iter_nodes.return_value = [
+            (self.node.uuid, 'redfish', '', 'redfish')]
+
+    def test_subscribe(self, mock_subscribe, mock_unsubscribe,
+                       mock_start_listener):
+        self.power._manage_event_subscriptions(self.manager, self.context)
+
+        mock_start_listener.assert_called_once_with(self.events.received)
+        self.manager.iter_nodes.assert_called_once_with(
+            fields=['power_interface'])
+        mock_subscribe.assert_called_once_with(mock.ANY)
+        self.assertEqual(self.node.uuid, mock_subscribe.call_args[0][0].uuid)
+        self.assertTrue(self.events.is_subscribed(self.node.uuid))
+        self.assertFalse(mock_unsubscribe.called)
+
+    def test_already_subscribed(self, mock_subscribe, mock_unsubscribe,
+                                mock_start_listener):
+        self.events.subscribed(self.node.uuid)
+        self.power._manage_event_subscriptions(self.manager, self.context)
+        self.assertFalse(mock_subscribe.called)
+        self.assertTrue(self.events.is_subscribed(self.node.uuid))
+
+    def test_other_power_interface(self, mock_subscribe, mock_unsubscribe,
+                                   mock_start_listener):
+        self.manager.iter_nodes.return_value = [
+            (self.node.uuid, 'redfish', '', 'fake')]
+        self.power._manage_event_subscriptions(self.manager, self.context)
+        self.assertFalse(mock_subscribe.called)
+        self.assertFalse(self.events.is_subscribed(self.node.uuid))
+
+    @mock.patch.object(redfish_power, 'LOG', autospec=True)
+    def test_subscribe_failure(self, mock_log, mock_subscribe,
+                               mock_unsubscribe, mock_start_listener):
+        mock_subscribe.side_effect = exception.RedfishError(error='boom')
+        for _ in range(2):
+            self.power._manage_event_subscriptions(self.manager,
+                                                   self.context)
+        self.assertEqual(2, mock_subscribe.call_count)
+        self.assertFalse(self.events.is_subscribed(self.node.uuid))
+        # Only warned once
+        self.assertEqual(1, mock_log.warning.call_count)
+        self.assertEqual(1, mock_log.debug.call_count)
+
+    def test_unmapped(self, mock_subscribe, mock_unsubscribe,
+                      mock_start_listener):
+        self.events.subscribed(self.node.uuid)
+        deleted = uuidutils.generate_uuid()
+        self.events.subscribed(deleted)
+        self.manager.iter_nodes.return_value = []
+
+        self.power._manage_event_subscriptions(self.manager, self.context)
+
+        mock_unsubscribe.assert_called_once_with(mock.ANY)
+        self.assertEqual(self.node.uuid,
+                         mock_unsubscribe.call_args[0][0].uuid)
+        self.assertEqual([], self.events.list_subscribed())
+        self.assertFalse(mock_subscribe.called)
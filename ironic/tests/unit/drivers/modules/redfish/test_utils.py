@@ -16,14 +16,18 @@
 import collections
 import copy
 import os
+import time
 
+import fixtures
 import mock
 from oslo_config import cfg
 from oslo_utils import importutils
 import requests
 
 from ironic.common import exception
+from ironic.drivers.modules import bmc_io
 from ironic.drivers.modules.redfish import utils as redfish_utils
+from ironic.tests import base
 from ironic.tests.unit.db import base as db_base
 from ironic.tests.unit.db import utils as db_utils
 from ironic.tests.unit.objects import utils as obj_utils
@@ -166,6 +170,16 @@ class RedfishUtilsTestCase(db_base.DbTestCase):
         fake_conn.get_system.assert_called_once_with(
             '/redfish/v1/Systems/FAKESYSTEM')
 
+    @mock.patch.object(bmc_io, 'limit', autospec=True)
+    @mock.patch.object(sushy, 'Sushy', autospec=True)
+    @mock.patch('ironic.drivers.modules.redfish.utils.'
+                'SessionCache._sessions', {})
+    def test_get_system_limited(self, mock_sushy, mock_limit):
+        redfish_utils.get_system(self.node)
+        mock_limit.assert_called_once_with('https://example.com')
+        self.assertTrue(mock_limit.return_value.__enter__.called)
+        self.assertTrue(mock_limit.return_value.__exit__.called)
+
     @mock.patch.object(sushy, 'Sushy', autospec=True)
     @mock.patch('ironic.drivers.modules.redfish.utils.'
                 'SessionCache._sessions', {})
@@ -318,3 +332,125 @@ class RedfishUtilsTestCase(db_base.DbTestCase):
             mock.ANY, verify=mock.ANY,
             auth=mock_basic_auth.return_value
         )
+
+
+@mock.patch.object(sushy, 'Sushy', autospec=True)
+class SessionCacheTestCase(base.TestCase):
+
+    def setUp(self):
+        super(SessionCacheTestCase, self).setUp()
+        self.useFixture(fixtures.MockPatchObject(
+            redfish_utils.SessionCache, '_sessions',
+            collections.OrderedDict()))
+        self.useFixture(fixtures.MockPatchObject(
+            redfish_utils.SessionCache, '_stats', collections.Counter()))
+        self.auth_class = mock.Mock(side_effect=lambda **kw: mock.Mock())
+        self.useFixture(fixtures.MockPatchObject(
+            redfish_utils.SessionCache, 'AUTH_CLASSES',
+            {'auto': self.auth_class}))
+
+    def _connect(self, address):
+        driver_info = {'address': address, 'username': 'user',
+                       'password': 'pass', 'verify_ca': True,
+                       'auth_type': 'auto'}
+        with redfish_utils.SessionCache(driver_info) as conn:
+            return conn
+
+    def test_reuse(self, mock_sushy):
+        self._connect('https://bmc1')
+        self._connect('https://bmc1')
+        self.assertEqual(1, mock_sushy.call_count)
+        self.assertEqual({'hit': 1, 'miss': 1, 'eviction': 0,
+                          'invalidation': 0},
+                         redfish_utils.SessionCache.stats())
+
+    def test_lru_eviction(self, mock_sushy):
+        self.config(connection_cache_size=2, group='redfish')
+        self._connect('https://bmc1')
+        self._connect('https://bmc2')
+        self._connect('https://bmc1')
+        self._connect('https://bmc3')
+        auth1, auth2, auth3 = [c[1]['auth']
+                               for c in mock_sushy.call_args_list]
+        # bmc2 is the least recently used one
+        auth2.close.assert_called_once_with()
+        self.assertFalse(auth1.close.called)
+        self.assertFalse(auth3.close.called)
+        self.assertEqual(
+            [('https://bmc1', 'user', True), ('https://bmc3', 'user', True)],
+            list(redfish_utils.SessionCache._sessions))
+        self.assertEqual(1, redfish_utils.SessionCache.stats()['eviction'])
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_idle_timeout(self, mock_time, mock_sushy):
+        self.config(connection_cache_idle_timeout=600, group='redfish')
+        mock_time.return_value = 1000
+        self._connect('https://bmc1')
+        mock_time.return_value = 1500
+        self._connect('https://bmc2')
+        mock_time.return_value = 1600
+        self._connect('https://bmc2')
+        self.assertEqual(2, mock_sushy.call_count)
+        auth1, auth2 = [c[1]['auth'] for c in mock_sushy.call_args_list]
+        auth1.close.assert_called_once_with()
+        self.assertFalse(auth2.close.called)
+        self.assertEqual([('https://bmc2', 'user', True)],
+                         list(redfish_utils.SessionCache._sessions))
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_idle_timeout_disabled(self, mock_time, mock_sushy):
+        self.config(connection_cache_idle_timeout=0, group='redfish')
+        mock_time.return_value = 1000
+        self._connect('https://bmc1')
+        mock_time.return_value = 100000
+        self._connect('https://bmc1')
+        self.assertEqual(1, mock_sushy.call_count)
+
+    @mock.patch.object(redfish_utils.LOG, 'warning', autospec=True)
+    def test_logout_failure(self, mock_log, mock_sushy):
+        self.config(connection_cache_size=1, group='redfish')
+        self._connect('https://bmc1')
+        auth = mock_sushy.call_args[1]['auth']
+        auth.close.side_effect = sushy.exceptions.ConnectionError()
+        self._connect('https://bmc2')
+        auth.close.assert_called_once_with()
+        self.assertTrue(mock_log.called)
+        self.assertEqual([('https://bmc2', 'user', True)],
+                         list(redfish_utils.SessionCache._sessions))
+
+    def test_invalidate_on_connection_error(self, mock_sushy):
+        driver_info = {'address': 'https://bmc1', 'username': 'user',
+                       'password': 'pass', 'verify_ca': True,
+                       'auth_type': 'auto'}
+
+        def _fail():
+            with redfish_utils.SessionCache(driver_info):
+                raise sushy.exceptions.ConnectionError()
+
+        self.assertRaises(sushy.exceptions.ConnectionError, _fail)
+        self.assertEqual({}, dict(redfish_utils.SessionCache._sessions))
+        self.assertEqual(1,
+                         redfish_utils.SessionCache.stats()['invalidation'])
+        self.assertEqual(0, redfish_utils.SessionCache.stats()['eviction'])
+        mock_sushy.call_args[1]['auth'].close.assert_called_once_with()
+
+    def test_concurrent_miss(self, mock_sushy):
+        pooled_conn = mock.Mock()
+        pooled_auth = mock.Mock()
+        session_key = ('https://bmc1', 'user', True)
+
+        def _connect_concurrently(*args, **kwargs):
+            # another thread pools a session while this one connects
+            redfish_utils.SessionCache._sessions[session_key] = (
+                redfish_utils.SessionCache._Session(
+                    'https://bmc1', pooled_conn, pooled_auth, 0))
+            return mock.Mock()
+
+        mock_sushy.side_effect = _connect_concurrently
+        conn = self._connect('https://bmc1')
+        self.assertIs(pooled_conn, conn)
+        mock_sushy.call_args[1]['auth'].close.assert_called_once_with()
+        self.assertFalse(pooled_auth.close.called)
+        self.assertEqual([session_key],
+                         list(redfish_utils.SessionCache._sessions))
+        self.assertEqual(0, redfish_utils.SessionCache.stats()['eviction'])
@@ -0,0 +1,101 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Test class for the shared BMC I/O layer."""
+
+import threading
+
+import mock
+
+from ironic.drivers.modules import bmc_io
+from ironic.tests import base
+
+
+class RequestLimiterTestCase(base.TestCase):
+
+    def test_limit_unlimited(self):
+        limiter = bmc_io.RequestLimiter()
+        with limiter.limit('1.2.3.4'):
+            with limiter.limit('1.2.3.4'):
+                self.assertEqual(2, limiter.in_flight)
+        self.assertEqual(0, limiter.in_flight)
+        self.assertEqual({}, limiter._per_bmc)
+
+    def test_limit_per_bmc(self):
+        limiter = bmc_io.RequestLimiter(max_per_bmc=1)
+        with limiter.limit('1.2.3.4'):
+            semaphore = limiter._per_bmc['1.2.3.4'][0]
+            self.assertFalse(semaphore.acquire(False))
+            # Other BMCs are not affected
+            with limiter.limit('5.6.7.8'):
+                self.assertEqual(2, limiter.in_flight)
+        self.assertEqual(0, limiter.in_flight)
+        self.assertEqual({}, limiter._per_bmc)
+
+    def test_limit_global(self):
+        limiter = bmc_io.RequestLimiter(max_in_flight=2)
+        with limiter.limit('1.2.3.4'):
+            with limiter.limit('5.6.7.8'):
+                self.assertFalse(limiter._global.acquire(False))
+        self.assertTrue(limiter._global.acquire(False))
+
+    def test_limit_released_on_error(self):
+        limiter = bmc_io.RequestLimiter(max_in_flight=1, max_per_bmc=1)
+
+        def _fail():
+            with limiter.limit('1.2.3.4'):
+                raise RuntimeError('boom')
+
+        self.assertRaises(RuntimeError, _fail)
+        self.assertEqual(0, limiter.in_flight)
+        self.assertEqual({}, limiter._per_bmc)
+        self.assertTrue(limiter._global.acquire(False))
+
+    def test_limit_waits(self):
+        limiter = bmc_io.RequestLimiter(max_per_bmc=1)
+        entered = threading.Event()
+        finished = threading.Event()
+
+        def _request():
+            with limiter.limit('1.2.3.4'):
+                entered.set()
+            finished.set()
+
+        with limiter.limit('1.2.3.4'):
+            thread = threading.Thread(target=_request)
+            thread.start()
+            self.assertFalse(entered.wait(0.1))
+        self.assertTrue(finished.wait(5))
+        thread.join()
+        self.assertEqual({}, limiter._per_bmc)
+
+
+class GetLimiterTestCase(base.TestCase):
+
+    def setUp(self):
+        super(GetLimiterTestCase, self).setUp()
+        self.addCleanup(setattr, bmc_io, '_LIMITER', None)
+        bmc_io._LIMITER = None
+
+    def test_get_limiter(self):
+        self.config(max_concurrent_bmc_requests=10,
+                    max_concurrent_requests_per_bmc=2,
+                    group='conductor')
+        limiter = bmc_io.get_limiter()
+        self.assertEqual(10, limiter.max_in_flight)
+        self.assertEqual(2, limiter.max_per_bmc)
+        self.assertIs(limiter, bmc_io.get_limiter())
+
+    @mock.patch.object(bmc_io.RequestLimiter, 'limit', autospec=True)
+    def test_limit(self, mock_limit):
+        self.assertIs(mock_limit.return_value, bmc_io.limit('1.2.3.4'))
+        mock_limit.assert_called_once_with(bmc_io.get_limiter(), '1.2.3.4')
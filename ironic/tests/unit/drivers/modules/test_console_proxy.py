@@ -0,0 +1,239 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Test class for the console proxy."""
+
+import os
+import socket
+import time
+
+import eventlet
+import fixtures
+import mock
+
+from ironic.common import exception
+from ironic.drivers.modules import console_proxy
+from ironic.tests import base
+
+
+class FakeProcess(object):
+    """A console command echoing its input, or exiting if it fails."""
+
+    def __init__(self, args, **kwargs):
+        read_fd, write_fd = os.pipe()
+        self.stdout = os.fdopen(read_fd, 'rb', 0)
+        self.stdin = os.fdopen(write_fd, 'wb', 0)
+        self.returncode = None
+        if args[0] == 'false':
+            self._exit(1)
+
+    def _exit(self, returncode):
+        self.returncode = returncode
+        self.stdin.close()
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self._exit(-15)
+
+    def wait(self):
+        while self.returncode is None:
+            eventlet.sleep(0.01)
+        return self.returncode
+
+
+class ConsoleProxyTestCase(base.TestCase):
+
+    def setUp(self):
+        super(ConsoleProxyTestCase, self).setUp()
+        self.useFixture(fixtures.MonkeyPatch(
+            'ironic.drivers.modules.console_proxy.subprocess.Popen',
+            FakeProcess))
+        self.proxy = console_proxy.ConsoleProxy('127.0.0.1', 0,
+                                                idle_timeout=60)
+        self.proxy.start()
+        self.addCleanup(self.proxy.stop)
+        self.node_uuid = '1be26c0b-03f2-4d2e-ae87-c02d7f33c123'
+
+    def _connect(self, token):
+        client = socket.create_connection(('127.0.0.1', self.proxy.port))
+        client.settimeout(5)
+        self.addCleanup(client.close)
+        client.sendall(token.encode('ascii') + b'\n')
+        return client
+
+    def _wait_for(self, condition):
+        for _ in range(500):
+            if condition():
+                return
+            eventlet.sleep(0.01)
+        self.fail('Condition not met')
+
+    def test_register(self):
+        token = self.proxy.register(self.node_uuid, 'cat')
+        self.assertEqual(
+            'tcp://127.0.0.1:%d/%s' % (self.proxy.port, token),
+            self.proxy.get_url(self.node_uuid))
+        session = self.proxy._sessions[self.node_uuid]
+        # The console command is only started on connection
+        self.assertIsNone(session.process)
+
+    def test_register_again(self):
+        token = self.proxy.register(self.node_uuid, 'cat')
+        new_token = self.proxy.register(self.node_uuid, 'cat')
+        self.assertNotEqual(token, new_token)
+        self.assertEqual([new_token], list(self.proxy._tokens))
+
+    def test_unregister(self):
+        self.proxy.register(self.node_uuid, 'cat')
+        self.assertTrue(self.proxy.unregister(self.node_uuid))
+        self.assertIsNone(self.proxy.get_url(self.node_uuid))
+        self.assertEqual({}, self.proxy._tokens)
+        self.assertFalse(self.proxy.unregister(self.node_uuid))
+
+    def test_get_url_ipv6(self):
+        proxy = console_proxy.ConsoleProxy('::1', 6390)
+        token = proxy.register(self.node_uuid, 'cat')
+        self.assertEqual('tcp://[::1]:6390/%s' % token,
+                         proxy.get_url(self.node_uuid))
+
+    def test_connect(self):
+        token = self.proxy.register(self.node_uuid, 'cat')
+        client = self._connect(token)
+        client.sendall(b'hello\n')
+        self.assertEqual(b'hello\n', client.recv(100))
+        session = self.proxy._sessions[self.node_uuid]
+        self.assertIsNotNone(session.process)
+
+        # The console command keeps running for the next client
+        client.close()
+        self._wait_for(lambda: session.client is None)
+        process = session.process
+        self.assertIsNone(process.poll())
+
+        client = self._connect(token)
+        client.sendall(b'again\n')
+        self.assertEqual(b'again\n', client.recv(100))
+        self.assertIs(process, session.process)
+
+    def test_connect_token_only(self):
+        token = self.proxy.register(self.node_uuid, 'cat')
+        client = self._connect(token)
+        session = self.proxy._sessions[self.node_uuid]
+        # The client waits after sending the token line
+        self._wait_for(lambda: session.process is not None)
+        eventlet.sleep(0.1)
+        self.assertIsNotNone(session.client)
+        client.sendall(b'hello\n')
+        self.assertEqual(b'hello\n', client.recv(100))
+
+    def test_connect_invalid_token(self):
+        self.proxy.register(self.node_uuid, 'cat')
+        client = self._connect('wrong')
+        self.assertEqual(b'', client.recv(100))
+
+    def test_connect_busy(self):
+        token = self.proxy.register(self.node_uuid, 'cat')
+        client = self._connect(token)
+        client.sendall(b'hello\n')
+        self.assertEqual(b'hello\n', client.recv(100))
+
+        other = self._connect(token)
+        self.assertEqual(b'', other.recv(100))
+        # The first client is still connected
+        client.sendall(b'still\n')
+        self.assertEqual(b'still\n', client.recv(100))
+
+    def test_connect_command_fails(self):
+        token = self.proxy.register(self.node_uuid, 'false')
+        client = self._connect(token)
+        self.assertEqual(b'', client.recv(100))
+        session = self.proxy._sessions[self.node_uuid]
+        self._wait_for(lambda: session.process is None)
+
+    def test_unregister_disconnects(self):
+        token = self.proxy.register(self.node_uuid, 'cat')
+        client = self._connect(token)
+        client.sendall(b'hello\n')
+        self.assertEqual(b'hello\n', client.recv(100))
+        process = self.proxy._sessions[self.node_uuid].process
+
+        self.proxy.unregister(self.node_uuid)
+        self.assertEqual(b'', client.recv(100))
+        self._wait_for(lambda: process.poll() is not None)
+
+    def test_reap_idle_process(self):
+        token = self.proxy.register(self.node_uuid, 'cat')
+        client = self._connect(token)
+        client.sendall(b'hello\n')
+        self.assertEqual(b'hello\n', client.recv(100))
+        session = self.proxy._sessions[self.node_uuid]
+        process = session.process
+        client.close()
+        self._wait_for(lambda: session.client is None)
+
+        self.proxy.reap()
+        self.assertIs(process, session.process)
+        self.proxy.reap(now=time.time() + 61)
+        self.assertIsNone(session.process)
+        self._wait_for(lambda: process.poll() is not None)
+
+    def test_reap_idle_client(self):
+        self.proxy.client_timeout = 30
+        token = self.proxy.register(self.node_uuid, 'cat')
+        client = self._connect(token)
+        client.sendall(b'hello\n')
+        self.assertEqual(b'hello\n', client.recv(100))
+        session = self.proxy._sessions[self.node_uuid]
+
+        self.proxy.reap()
+        self.assertIsNotNone(session.client)
+        self.proxy.reap(now=time.time() + 31)
+        self.assertEqual(b'', client.recv(100))
+        self._wait_for(lambda: session.client is None)
+        # The console command is kept until the idle timeout
+        self.assertIsNotNone(session.process)
+
+
+class ConsoleProxyFunctionsTestCase(base.TestCase):
+
+    def setUp(self):
+        super(ConsoleProxyFunctionsTestCase, self).setUp()
+        self.config(socat_address='127.0.0.1', proxy_port=0,
+                    group='console')
+        self.addCleanup(console_proxy.stop)
+        self.node_uuid = '1be26c0b-03f2-4d2e-ae87-c02d7f33c123'
+
+    def test_start_stop_console(self):
+        console_proxy.start_console(self.node_uuid, None, 'cat')
+        url = console_proxy.get_console_url(self.node_uuid)
+        proxy = console_proxy.get_proxy()
+        self.assertTrue(url.startswith('tcp://127.0.0.1:%d/' % proxy.port))
+
+        console_proxy.stop_console(self.node_uuid)
+        self.assertRaises(exception.ConsoleError,
+                          console_proxy.get_console_url, self.node_uuid)
+
+    def test_get_console_url_not_started(self):
+        self.assertRaises(exception.ConsoleError,
+                          console_proxy.get_console_url, self.node_uuid)
+
+    @mock.patch.object(console_proxy, 'LOG', autospec=True)
+    def test_stop_console_not_started(self, mock_log):
+        console_proxy.stop_console(self.node_uuid)
+        self.assertTrue(mock_log.warning.called)
+
+    def test_get_proxy_listen_failure(self):
+        self.config(socat_address='192.0.2.1', group='console')
+        self.assertRaises(exception.ConsoleError, console_proxy.get_proxy)
+        self.assertIsNone(console_proxy._PROXY)
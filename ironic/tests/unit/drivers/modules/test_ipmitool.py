@@ -43,6 +43,7 @@ from ironic.common import utils
 from ironic.conductor import task_manager
 import ironic.conf
 from ironic.drivers.modules import boot_mode_utils
+from ironic.drivers.modules import console_proxy
 from ironic.drivers.modules import console_utils
 from ironic.drivers.modules import ipmitool as ipmi
 from ironic.drivers import utils as driver_utils
@@ -2772,3 +2773,88 @@ class IPMIToolSocatDriverTestCase(IPMIToolShellinaboxTestCase):
 
         self.assertEqual(expected, console_info)
         mock_get_url.assert_called_once_with(self.info['port'])
+
+
+class IPMIToolProxyConsoleTestCase(db_base.DbTestCase):
+
+    def setUp(self):
+        super(IPMIToolProxyConsoleTestCase, self).setUp()
+        self.config(enabled_console_interfaces=['ipmitool-proxy',
+                                                'no-console'])
+        driver_info = dict(INFO_DICT)
+        driver_info.pop('ipmi_terminal_port', None)
+        self.node = obj_utils.create_test_node(
+            self.context, console_interface='ipmitool-proxy',
+            driver_info=driver_info)
+        self.console = ipmi.IPMIProxyConsole()
+
+    def test_get_properties(self):
+        self.assertNotIn('ipmi_terminal_port', self.console.get_properties())
+
+    def test_console_validate(self):
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=True) as task:
+            task.driver.console.validate(task)
+
+    def test_console_validate_wrong_ipmi_protocol_version(self):
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=True) as task:
+            task.node.driver_info['ipmi_protocol_version'] = '1.5'
+            self.assertRaises(exception.InvalidParameterValue,
+                              task.driver.console.validate, task)
+
+    @mock.patch.object(ipmi.IPMIConsole, '_start_console', autospec=True)
+    @mock.patch.object(ipmi.IPMIProxyConsole, '_exec_stop_console',
+                       autospec=True)
+    def test_start_console(self, mock_stop, mock_start):
+        with task_manager.acquire(self.context,
+                                  self.node.uuid) as task:
+            self.console.start_console(task)
+            driver_info = ipmi._parse_driver_info(task.node)
+        mock_stop.assert_called_once_with(self.console, driver_info)
+        mock_start.assert_called_once_with(
+            self.console, driver_info, console_proxy.start_console)
+
+    @mock.patch.object(console_proxy, 'get_proxy', autospec=True)
+    @mock.patch.object(console_utils, 'make_persistent_password_file',
+                       autospec=True)
+    @mock.patch.object(ipmi, '_exec_ipmitool', autospec=True)
+    def test_start_console_registers(self, mock_exec, mock_pass,
+                                     mock_get_proxy):
+        mock_pass.return_value = 'pw_file'
+        with task_manager.acquire(self.context,
+                                  self.node.uuid) as task:
+            self.console.start_console(task)
+        mock_get_proxy.return_value.register.assert_called_once_with(
+            self.node.uuid, mock.ANY)
+        command = mock_get_proxy.return_value.register.call_args[0][1]
+        self.assertTrue(command.startswith('ipmitool '))
+        self.assertIn(' -f pw_file ', command)
+        self.assertTrue(command.endswith(' sol activate'))
+
+    @mock.patch.object(ipmi.IPMIProxyConsole, '_exec_stop_console',
+                       autospec=True)
+    @mock.patch.object(ironic_utils, 'unlink_without_raise', autospec=True)
+    @mock.patch.object(console_proxy, 'stop_console', autospec=True)
+    def test_stop_console(self, mock_stop, mock_unlink, mock_exec_stop):
+        with task_manager.acquire(self.context,
+                                  self.node.uuid) as task:
+            driver_info = ipmi._parse_driver_info(task.node)
+            self.console.stop_console(task)
+
+        mock_stop.assert_called_once_with(self.node.uuid)
+        mock_unlink.assert_called_once_with(
+            ipmi._console_pwfile_path(self.node.uuid))
+        mock_exec_stop.assert_called_once_with(self.console, driver_info)
+
+    @mock.patch.object(console_proxy, 'get_console_url', autospec=True)
+    def test_get_console(self, mock_get_url):
+        url = 'tcp://localhost:6390/token'
+        mock_get_url.return_value = url
+
+        with task_manager.acquire(self.context,
+                                  self.node.uuid) as task:
+            console_info = self.console.get_console(task)
+
+        self.assertEqual({'type': 'proxy', 'url': url}, console_info)
+        mock_get_url.assert_called_once_with(self.node.uuid)
@@ -26,6 +26,7 @@ from pysnmp import hlapi as pysnmp
 from ironic.common import exception
 from ironic.common import states
 from ironic.conductor import task_manager
+from ironic.drivers.modules import bmc_io
 from ironic.drivers.modules import snmp
 from ironic.drivers.modules.snmp import SNMPDriverAuto
 from ironic.tests import base
@@ -208,6 +209,98 @@ class SNMPClientTestCase(base.TestCase):
         self.assertRaises(exception.SNMPFailure, client.get_next, self.oid)
         self.assertEqual(1, mock_nextcmd.call_count)
 
+    @mock.patch.object(pysnmp, 'nextCmd', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_context', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_walk_v1(self, mock_auth, mock_context, mock_transport,
+                     mock_nextcmd):
+        mock_nextcmd.return_value = iter([
+            ("", None, 0, [(self.oid + (1,), 1)]),
+            ("", None, 0, [(self.oid + (2,), 2)])])
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V1)
+        val = client.walk(self.oid)
+        self.assertEqual([(self.oid + (1,), 1), (self.oid + (2,), 2)], val)
+        self.assertEqual(1, mock_nextcmd.call_count)
+
+    @mock.patch.object(pysnmp, 'bulkCmd', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_context', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_walk_bulk(self, mock_auth, mock_context, mock_transport,
+                       mock_bulkcmd):
+        self.config(bulk_max_repetitions=48, group='snmp')
+        mock_bulkcmd.return_value = iter([
+            ("", None, 0, [(self.oid + (1,), 1), (self.oid + (2,), 2)]),
+            ("", None, 0, [(self.oid + (2,), pysnmp.EndOfMibView())])])
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V2C)
+        val = client.walk(self.oid)
+        self.assertEqual([(self.oid + (1,), 1), (self.oid + (2,), 2)], val)
+        mock_bulkcmd.assert_called_once_with(
+            client.snmp_engine, mock_auth.return_value,
+            mock_transport.return_value, mock_context.return_value,
+            0, 48, mock.ANY, lexicographicMode=False)
+
+    @mock.patch.object(pysnmp, 'bulkCmd', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_context', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_walk_err_engine(self, mock_auth, mock_context, mock_transport,
+                             mock_bulkcmd):
+        mock_bulkcmd.return_value = iter([("engine error", None, 0, [])])
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V3)
+        self.assertRaisesRegex(exception.SNMPFailure, 'GET_BULK',
+                               client.walk, self.oid)
+
+    @mock.patch.object(bmc_io, 'limit', autospec=True)
+    @mock.patch.object(snmp, '_get_dispatcher', autospec=True)
+    @mock.patch.object(pysnmp, 'getCmd', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_context', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_get_async(self, mock_auth, mock_context, mock_transport,
+                       mock_getcmd, mock_dispatcher, mock_limit):
+        self.config(use_async_io=True, group='snmp')
+        mock_get = mock_dispatcher.return_value.get
+        mock_get.return_value = self.value
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V2C)
+        val = client.get(self.oid)
+        self.assertEqual(self.value, val)
+        mock_get.assert_called_once_with(mock_auth.return_value,
+                                         mock_transport.return_value,
+                                         mock_context.return_value,
+                                         self.oid)
+        mock_limit.assert_called_once_with(self.address)
+        self.assertFalse(mock_getcmd.called)
+
+    @mock.patch.object(snmp, '_get_dispatcher', autospec=True)
+    @mock.patch.object(pysnmp, 'getCmd', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_context', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_get_async_v3(self, mock_auth, mock_context, mock_transport,
+                          mock_getcmd, mock_dispatcher):
+        self.config(use_async_io=True, group='snmp')
+        var_bind = (self.oid, self.value)
+        mock_getcmd.return_value = iter([("", None, 0, [var_bind])])
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V3)
+        val = client.get(self.oid)
+        self.assertEqual(self.value, val)
+        self.assertEqual(1, mock_getcmd.call_count)
+        self.assertFalse(mock_dispatcher.called)
+
+    @mock.patch.object(snmp, '_get_dispatcher', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_context', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_get_async_err_transport(self, mock_auth, mock_context,
+                                     mock_transport, mock_dispatcher):
+        self.config(use_async_io=True, group='snmp')
+        mock_transport.side_effect = snmp_error.PySnmpError
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V1)
+        self.assertRaises(exception.SNMPFailure, client.get, self.oid)
+        self.assertFalse(mock_dispatcher.called)
+
     @mock.patch.object(pysnmp, 'setCmd', autospec=True)
     @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
     @mock.patch.object(snmp.SNMPClient, '_get_context', autospec=True)
@@ -251,6 +344,120 @@ class SNMPClientTestCase(base.TestCase):
         self.assertEqual(1, mock_setcmd.call_count)
 
 
+@mock.patch.object(snmp.SNMPDispatcher, '_ensure_running', autospec=True)
+@mock.patch.object(snmp.snmp_async, 'getCmd', autospec=True)
+@mock.patch.object(pysnmp, 'SnmpEngine', autospec=True)
+class SNMPDispatcherTestCase(base.TestCase):
+    def setUp(self):
+        super(SNMPDispatcherTestCase, self).setUp()
+        self.oid = (1, 3, 6, 1, 1, 1, 0)
+        self.value = 'value'
+        self.auth = mock.Mock()
+        self.transport = mock.Mock()
+        self.context = mock.Mock()
+
+    def _respond(self, mock_getcmd, error_indication=None, error_status=0,
+                 var_binds=None):
+        def _getcmd(engine, auth, transport, context, obj, cbFun, **kwargs):
+            cbFun(engine, 1, error_indication, error_status, 0,
+                  var_binds or [(self.oid, self.value)], None)
+
+        mock_getcmd.side_effect = _getcmd
+
+    def test_get(self, mock_engine, mock_getcmd, mock_running):
+        self._respond(mock_getcmd)
+        dispatcher = snmp.SNMPDispatcher()
+        val = dispatcher.get(self.auth, self.transport, self.context,
+                             self.oid)
+        self.assertEqual(self.value, val)
+        mock_getcmd.assert_called_once_with(
+            mock_engine.return_value, self.auth, self.transport,
+            self.context, mock.ANY, cbFun=mock.ANY, lookupMib=False)
+        mock_running.assert_called_once_with(dispatcher)
+
+    def test_get_err_engine(self, mock_engine, mock_getcmd, mock_running):
+        self._respond(mock_getcmd, error_indication='engine error')
+        dispatcher = snmp.SNMPDispatcher()
+        self.assertRaisesRegex(exception.SNMPFailure, 'engine error',
+                               dispatcher.get, self.auth, self.transport,
+                               self.context, self.oid)
+
+    def test_get_err_pdu(self, mock_engine, mock_getcmd, mock_running):
+        error_status = mock.Mock()
+        error_status.prettyPrint.return_value = 'noSuchName'
+        self._respond(mock_getcmd, error_status=error_status)
+        dispatcher = snmp.SNMPDispatcher()
+        self.assertRaisesRegex(exception.SNMPFailure, 'noSuchName',
+                               dispatcher.get, self.auth, self.transport,
+                               self.context, self.oid)
+
+    def test_get_no_response(self, mock_engine, mock_getcmd, mock_running):
+        self.config(udp_transport_timeout=0, udp_transport_retries=0,
+                    group='snmp')
+        dispatcher = snmp.SNMPDispatcher()
+        with mock.patch.object(snmp.threading, 'Event',
+                               autospec=True) as mock_event:
+            mock_event.return_value.wait.return_value = False
+            self.assertRaisesRegex(exception.SNMPFailure, 'no response',
+                                   dispatcher.get, self.auth,
+                                   self.transport, self.context, self.oid)
+            mock_event.return_value.wait.assert_called_once_with(1)
+
+    def test_get_err_queue(self, mock_engine, mock_getcmd, mock_running):
+        mock_getcmd.side_effect = snmp_error.PySnmpError
+        dispatcher = snmp.SNMPDispatcher()
+        self.assertRaises(exception.SNMPFailure, dispatcher.get, self.auth,
+                          self.transport, self.context, self.oid)
+        self.assertFalse(mock_running.called)
+
+
+class PDUOutletStatesTestCase(base.TestCase):
+    def setUp(self):
+        super(PDUOutletStatesTestCase, self).setUp()
+        self.config(outlet_states_cache_ttl=60, group='snmp')
+        self.table = (1, 3, 6, 1, 4, 1, 318, 1, 1, 4, 4, 2, 1, 3)
+        self.client = mock.Mock(spec=snmp.SNMPClient, address='1.2.3.4')
+        self.client.walk.return_value = [(self.table + (1,), 1),
+                                         (self.table + (2,), 2)]
+        self.outlet_states = snmp.PDUOutletStates(self.client, self.table)
+
+    def test_get(self):
+        self.assertEqual(1, self.outlet_states.get(self.table + (1,)))
+        self.assertEqual(2, self.outlet_states.get(self.table + (2,)))
+        self.client.walk.assert_called_once_with(self.table)
+        self.assertFalse(self.client.get.called)
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_get_expired(self, mock_time):
+        mock_time.return_value = 1000
+        self.outlet_states.get(self.table + (1,))
+        mock_time.return_value = 1059
+        self.outlet_states.get(self.table + (1,))
+        self.assertEqual(1, self.client.walk.call_count)
+        mock_time.return_value = 1060
+        self.outlet_states.get(self.table + (1,))
+        self.assertEqual(2, self.client.walk.call_count)
+
+    def test_get_missing(self):
+        self.client.get.return_value = 3
+        self.assertEqual(3, self.outlet_states.get(self.table + (3, 0)))
+        self.client.get.assert_called_once_with(self.table + (3, 0))
+
+    def test_get_walk_failure(self):
+        self.client.walk.side_effect = exception.SNMPFailure(
+            operation='GET_BULK', error='error')
+        self.assertRaises(exception.SNMPFailure, self.outlet_states.get,
+                          self.table + (1,))
+        self.client.walk.side_effect = None
+        self.assertEqual(1, self.outlet_states.get(self.table + (1,)))
+
+    def test_invalidate(self):
+        self.outlet_states.get(self.table + (1,))
+        self.outlet_states.invalidate()
+        self.outlet_states.get(self.table + (1,))
+        self.assertEqual(2, self.client.walk.call_count)
+
+
 class SNMPValidateParametersTestCase(db_base.DbTestCase):
 
     def _get_test_node(self, driver_info):
@@ -674,6 +881,7 @@ class SNMPDeviceDriverTestCase(db_base.DbTestCase):
         super(SNMPDeviceDriverTestCase, self).setUp()
         self.config(enabled_power_interfaces=['fake', 'snmp'])
         snmp._memoized = {}
+        snmp._outlet_states = {}
         self.node = obj_utils.get_test_node(
             self.context,
             power_interface='snmp',
@@ -725,6 +933,39 @@ class SNMPDeviceDriverTestCase(db_base.DbTestCase):
                           driver.power_state)
         mock_client.get.assert_called_once_with(driver._snmp_oid())
 
+    def test_power_state_outlet_states(self, mock_get_client):
+        # Ensure nodes sharing a PDU are served from a single table walk
+        self.config(outlet_states_cache_ttl=60, group='snmp')
+        mock_client = mock_get_client.return_value
+        driver = snmp._get_driver(self.node)
+        second_node = obj_utils.get_test_node(
+            self.context, driver_info=dict(INFO_DICT, snmp_outlet='2'))
+        second_driver = snmp._get_driver(second_node)
+        mock_client.walk.return_value = [
+            (driver._snmp_oid(), driver.value_power_on),
+            (second_driver._snmp_oid(), driver.value_power_off)]
+        self.assertEqual(states.POWER_ON, driver.power_state())
+        self.assertEqual(states.POWER_OFF, second_driver.power_state())
+        mock_client.walk.assert_called_once_with(
+            driver.oid_enterprise + driver.oid_device)
+        self.assertFalse(mock_client.get.called)
+
+    def test_power_on_outlet_states(self, mock_get_client):
+        # Ensure changing the power state discards the PDU snapshot
+        self.config(outlet_states_cache_ttl=60, group='snmp')
+        mock_client = mock_get_client.return_value
+        driver = snmp._get_driver(self.node)
+        mock_client.walk.return_value = [
+            (driver._snmp_oid(), driver.value_power_off)]
+        self.assertEqual(states.POWER_OFF, driver.power_state())
+        mock_client.get.return_value = driver.value_power_on
+        self.assertEqual(states.POWER_ON, driver.power_on())
+        mock_client.get.assert_called_once_with(driver._snmp_oid())
+        mock_client.walk.return_value = [
+            (driver._snmp_oid(), driver.value_power_on)]
+        self.assertEqual(states.POWER_ON, driver.power_state())
+        self.assertEqual(2, mock_client.walk.call_count)
+
     def test_power_on(self, mock_get_client):
         # Ensure the device is powered on correctly
         mock_client = mock_get_client.return_value
@@ -17,6 +17,7 @@
 
 """Test class for Fake driver."""
 
+import mock
 
 from ironic.common import boot_devices
 from ironic.common import boot_modes
@@ -24,8 +25,10 @@ from ironic.common import exception
 from ironic.common import states
 from ironic.conductor import task_manager
 from ironic.drivers import base as driver_base
+from ironic.drivers.modules import fake
 from ironic.tests.unit.db import base as db_base
 from ironic.tests.unit.db import utils as db_utils
+from ironic.tests.unit.objects import utils as obj_utils
 
 
 class FakeHardwareTestCase(db_base.DbTestCase):
@@ -123,3 +126,75 @@ class FakeHardwareTestCase(db_base.DbTestCase):
         self.assertEqual({}, self.driver.inspect.get_properties())
         self.driver.inspect.validate(self.task)
         self.driver.inspect.inspect_hardware(self.task)
+
+
+@mock.patch.object(fake, 'time', autospec=True)
+@mock.patch.object(fake, 'random', autospec=True)
+class FakeSimulationTestCase(db_base.DbTestCase):
+
+    def setUp(self):
+        super(FakeSimulationTestCase, self).setUp()
+        self.node = obj_utils.create_test_node(self.context)
+
+    def _acquire(self):
+        task = task_manager.acquire(self.context, self.node.id, shared=True)
+        self.addCleanup(task.release_resources)
+        return task
+
+    def test_no_simulation(self, mock_random, mock_time):
+        task = self._acquire()
+        task.driver.power.get_power_state(task)
+        self.assertFalse(mock_time.sleep.called)
+        self.assertFalse(mock_random.random.called)
+
+    def test_delay(self, mock_random, mock_time):
+        self.config(power_delay='0.5:2', group='fake')
+        mock_random.uniform.return_value = 1.5
+        task = self._acquire()
+        task.driver.power.set_power_state(task, states.POWER_ON)
+        mock_random.uniform.assert_called_once_with(0.5, 2.0)
+        mock_time.sleep.assert_called_once_with(1.5)
+        self.assertFalse(mock_random.random.called)
+
+    def test_delay_driver_info(self, mock_random, mock_time):
+        self.config(deploy_delay='5', group='fake')
+        self.node.driver_info = {'fake_deploy_delay': 2}
+        self.node.save()
+        task = self._acquire()
+        mock_random.uniform.side_effect = lambda low, high: high
+        task.driver.deploy.deploy(task)
+        mock_random.uniform.assert_called_once_with(2.0, 2.0)
+        mock_time.sleep.assert_called_once_with(2.0)
+
+    def test_failure(self, mock_random, mock_time):
+        self.config(management_failure_rate=0.5, group='fake')
+        mock_random.random.return_value = 0.3
+        task = self._acquire()
+        self.assertRaisesRegex(exception.DriverOperationError,
+                               'get_sensors_data',
+                               task.driver.management.get_sensors_data, task)
+        self.assertFalse(mock_time.sleep.called)
+
+        mock_random.random.return_value = 0.7
+        self.assertEqual({}, task.driver.management.get_sensors_data(task))
+
+    def test_stuck(self, mock_random, mock_time):
+        self.config(stuck_duration=600, group='fake')
+        self.node.driver_info = {'fake_boot_stuck_rate': '0.1'}
+        self.node.save()
+        mock_random.random.return_value = 0.05
+        task = self._acquire()
+        self.assertRaisesRegex(exception.DriverOperationError, 'stuck',
+                               task.driver.boot.prepare_instance, task)
+        mock_time.sleep.assert_called_once_with(600)
+
+    def test_validate_invalid(self, mock_random, mock_time):
+        for driver_info in ({'fake_power_delay': '2:1'},
+                            {'fake_power_delay': 'slow'},
+                            {'fake_power_failure_rate': 2},
+                            {'fake_power_stuck_rate': 'often'}):
+            self.node.driver_info = driver_info
+            self.node.save()
+            task = self._acquire()
+            self.assertRaises(exception.InvalidParameterValue,
+                              task.driver.power.validate, task)
@@ -108,10 +108,14 @@ if not pysnmp:
     pysnmp = mock.MagicMock(spec_set=mock_specs.PYWSNMP_SPEC)
     sys.modules["pysnmp"] = pysnmp
     sys.modules["pysnmp.hlapi"] = pysnmp.hlapi
+    sys.modules["pysnmp.hlapi.asyncore"] = pysnmp.hlapi.asyncore
     sys.modules["pysnmp.error"] = pysnmp.error
     pysnmp.error.PySnmpError = Exception
     # Patch the RFC1902 integer class with a python int
     pysnmp.hlapi.Integer = int
+    # Patch the RFC1905 exception values with distinct classes
+    for name in ('EndOfMibView', 'NoSuchInstance', 'NoSuchObject'):
+        setattr(pysnmp.hlapi, name, type(name, (object,), {}))
 
 
 # if anything has loaded the snmp driver yet, reload it now that the
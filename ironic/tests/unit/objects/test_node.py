@@ -367,6 +367,49 @@ class TestNodeObject(db_base.DbTestCase, obj_utils.SchemasTestMixIn):
         node.traits = objects.TraitList(self.context, objects=[trait])
         self.assertRaises(exception.BadRequest, node.create)
 
+    def test_create_many(self):
+        nodes = [objects.Node(self.context, uuid=uuidutils.generate_uuid(),
+                              driver='fake-hardware',
+                              conductor_group='Group')
+                 for _i in range(2)]
+        port = objects.Port(self.context, uuid=uuidutils.generate_uuid(),
+                            address='52:54:00:00:00:01')
+        portgroup = objects.Portgroup(self.context,
+                                      uuid=uuidutils.generate_uuid(),
+                                      address='52:54:00:00:00:02')
+        member = objects.Port(self.context, uuid=uuidutils.generate_uuid(),
+                              address='52:54:00:00:00:03')
+
+        objects.Node.create_many(
+            self.context,
+            [{'node': nodes[0], 'ports': [port],
+              'portgroups': [{'portgroup': portgroup, 'ports': [member]}],
+              'traits': ['CUSTOM_1']},
+             {'node': nodes[1]}])
+
+        self.assertEqual('group', nodes[0].conductor_group)
+        self.assertEqual(['CUSTOM_1'], nodes[0].traits.get_trait_names())
+        self.assertEqual([], nodes[1].traits.get_trait_names())
+        ports = objects.Port.list_by_node_id(self.context, nodes[0].id)
+        self.assertEqual({port.uuid, member.uuid},
+                         set(p.uuid for p in ports))
+        self.assertEqual(
+            [portgroup.uuid],
+            [pg.uuid for pg in objects.Portgroup.list_by_node_id(
+                self.context, nodes[0].id)])
+        self.assertEqual(
+            [], objects.Port.list_by_node_id(self.context, nodes[1].id))
+
+    def test_create_many_with_invalid_properties(self):
+        node = obj_utils.get_test_node(self.ctxt, **self.fake_node)
+        node.properties = {"local_gb": "5G"}
+        with mock.patch.object(self.dbapi, 'create_nodes',
+                               autospec=True) as mock_create_nodes:
+            self.assertRaises(exception.InvalidParameterValue,
+                              objects.Node.create_many, self.context,
+                              [{'node': node}])
+            self.assertFalse(mock_create_nodes.called)
+
     def test_update_with_invalid_properties(self):
         uuid = self.fake_node['uuid']
         with mock.patch.object(self.dbapi, 'get_node_by_uuid',
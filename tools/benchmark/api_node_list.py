@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the throughput of the node and port list API endpoints.
+
+A temporary SQLite database is populated with nodes and ports, then
+``GET /v1/nodes/detail?limit=<N>`` and ``GET /v1/ports/detail?limit=<N>``
+are requested in-process through the whole API application (without
+authentication), using the dictionary serializers, the legacy WSME types for
+comparison and the streamed responses (``[api]stream_collections``). The
+peak memory allocated while handling a request is reported as well.
+
+Requires webtest to be installed.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import mock
+from oslo_db.sqlalchemy import enginefacade
+from oslo_utils import uuidutils
+import webtest
+from wsme.rest import json as wsme_json
+
+from ironic.api.controllers.v1 import node as api_node
+from ironic.api.controllers.v1 import port as api_port
+from ironic.api import app
+from ironic.common import config
+from ironic.conf import CONF
+from ironic.db import api as db_api
+from ironic.db.sqlalchemy import models
+from ironic import objects
+
+
+def populate(count):
+    engine = enginefacade.writer.get_engine()
+    models.Base.metadata.create_all(engine)
+    dbapi = db_api.get_instance()
+    # NOTE: without a conductor the hash ring is rebuilt for every node
+    conductor = dbapi.register_conductor({'hostname': 'benchmark',
+                                          'drivers': [],
+                                          'conductor_group': ''})
+    dbapi.register_conductor_hardware_interfaces(
+        conductor.id, 'ipmi', 'power', ['ipmitool'], 'ipmitool')
+    for i in range(count):
+        node = dbapi.create_node({
+            'uuid': uuidutils.generate_uuid(),
+            'version': objects.Node.VERSION,
+            'name': 'node-%d' % i,
+            'driver': 'ipmi',
+            'driver_info': {'ipmi_address': '10.0.%d.%d' % (i // 250,
+                                                            i % 250),
+                            'ipmi_username': 'admin',
+                            'ipmi_password': 'secret'},
+            'properties': {'cpus': 16, 'memory_mb': 65536, 'local_gb': 400,
+                           'cpu_arch': 'x86_64'},
+            'instance_info': {},
+            'extra': {'rack': i // 40},
+            'provision_state': 'available',
+            'power_state': 'power off'})
+        dbapi.create_port({
+            'uuid': uuidutils.generate_uuid(),
+            'version': objects.Port.VERSION,
+            'node_id': node.id,
+            'address': '52:54:00:%02x:%02x:%02x' % (
+                i // 65536, (i // 256) % 256, i % 256),
+            'pxe_enabled': True})
+
+
+def _legacy(collection_class, attr):
+    def _convert(serializer, items, limit, url=None, **kwargs):
+        result = collection_class.convert_with_links(
+            items, limit, url=url, fields=serializer.requested_fields,
+            **kwargs)
+        return wsme_json.tojson(collection_class, result)
+    return _convert
+
+
+def run(client, url, number, expected):
+    headers = {'X-OpenStack-Ironic-API-Version': 'latest'}
+    start = time.time()
+    for _ in range(number):
+        response = client.get(url, headers=headers)
+        assert len(response.json[expected]) > 0, response.json
+    elapsed = time.time() - start
+
+    # NOTE: the body is consumed by the WSGI server, not kept in memory
+    environ = webtest.TestRequest.blank(url, headers=headers).environ
+    tracemalloc.start()
+    try:
+        for _ in client.app(environ, lambda *args: None):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--number', type=int, default=20,
+                        help='Number of requests per endpoint '
+                        '(default: 20).')
+    parser.add_argument('-l', '--limit', type=int, default=1000,
+                        help='Number of items per page (default: 1000).')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        config.parse_args([], default_config_files=[])
+        CONF.set_override('connection',
+                          'sqlite:///%s' % os.path.join(tmpdir, 'ironic.db'),
+                          group='database')
+        CONF.set_override('auth_strategy', 'noauth')
+        CONF.set_override('max_limit', args.limit, group='api')
+        objects.register_all()
+        populate(args.limit)
+        client = webtest.TestApp(app.setup_app(app.get_pecan_config()))
+
+        print('%-8s %-8s %10s %12s %10s' % ('resource', 'mode', 'seconds',
+                                            'requests/s', 'peak MiB'))
+        for resource, serializer, collection in (
+                ('nodes', api_node.NodeSerializer, api_node.NodeCollection),
+                ('ports', api_port.PortSerializer, api_port.PortCollection)):
+            url = '/v1/%s/detail?limit=%d' % (resource, args.limit)
+            for mode in ('wsme', 'dict', 'stream'):
+                CONF.set_override('stream_collections', mode == 'stream',
+                                  group='api')
+                if mode == 'wsme':
+                    with mock.patch.object(serializer, 'convert_collection',
+                                           autospec=True,
+                                           side_effect=_legacy(collection,
+                                                               resource)):
+                        elapsed, peak = run(client, url, args.number,
+                                            resource)
+                else:
+                    elapsed, peak = run(client, url, args.number, resource)
+                print('%-8s %-8s %10.2f %12.2f %10.1f' % (
+                    resource, mode, elapsed, args.number / elapsed,
+                    peak / 1024.0 / 1024.0))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
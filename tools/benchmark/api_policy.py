@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the cost of the policy checks of the list API endpoints.
+
+The database is populated as in ``api_node_list.py``, then the node and
+port lists are requested in-process with the credentials of an
+administrator, with and without the per-request cache of policy decisions.
+The legacy WSME conversion of nodes does several policy checks per node.
+The number of policy rules evaluated per request is reported as well.
+
+Requires webtest to be installed.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+# NOTE: the directory of the script is in sys.path
+from api_node_list import _legacy
+from api_node_list import populate
+import mock
+import webtest
+
+from ironic.api.controllers.v1 import node as api_node
+from ironic.api import app
+from ironic.common import config
+from ironic.common import policy
+from ironic.conf import CONF
+from ironic import objects
+
+HEADERS = {'X-OpenStack-Ironic-API-Version': 'latest',
+           'X-Roles': 'admin',
+           'X-Project-Id': 'benchmark',
+           'X-User-Id': 'benchmark'}
+
+
+def run(client, url, number, expected, cached):
+    enforcer = policy.get_enforcer()
+    with mock.patch.object(enforcer, 'enforce', autospec=True,
+                           side_effect=enforcer.enforce) as mock_enforce:
+        with mock.patch.object(policy, '_get_decision_key', autospec=True,
+                               side_effect=(policy._get_decision_key
+                                            if cached
+                                            else lambda *a: (None, None))):
+            start = time.time()
+            for _ in range(number):
+                response = client.get(url, headers=HEADERS)
+                assert len(response.json[expected]) > 0, response.json
+            elapsed = time.time() - start
+    return elapsed, mock_enforce.call_count // number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--number', type=int, default=20,
+                        help='Number of requests per endpoint '
+                        '(default: 20).')
+    parser.add_argument('-l', '--limit', type=int, default=1000,
+                        help='Number of items per page (default: 1000).')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        config.parse_args([], default_config_files=[])
+        CONF.set_override('connection',
+                          'sqlite:///%s' % os.path.join(tmpdir, 'ironic.db'),
+                          group='database')
+        # NOTE: no authentication middleware, the credentials are taken
+        # from the headers, but the policies are enforced
+        CONF.set_override('auth_strategy', 'noauth')
+        CONF.set_override('max_limit', args.limit, group='api')
+        objects.register_all()
+        populate(args.limit)
+        client = webtest.TestApp(app.setup_app(app.get_pecan_config()))
+        CONF.set_override('auth_strategy', 'keystone')
+
+        print('%-8s %-8s %-8s %10s %12s %8s' % ('resource', 'mode', 'cache',
+                                                'seconds', 'requests/s',
+                                                'checks'))
+        for resource, mode in (('nodes', 'wsme'), ('nodes', 'dict'),
+                               ('ports', 'dict')):
+            url = '/v1/%s/detail?limit=%d' % (resource, args.limit)
+            for cached in (False, True):
+                if mode == 'wsme':
+                    with mock.patch.object(
+                            api_node.NodeSerializer, 'convert_collection',
+                            autospec=True,
+                            side_effect=_legacy(api_node.NodeCollection,
+                                                resource)):
+                        elapsed, checks = run(client, url, args.number,
+                                              resource, cached)
+                else:
+                    elapsed, checks = run(client, url, args.number, resource,
+                                          cached)
+                print('%-8s %-8s %-8s %10.2f %12.2f %8d' % (
+                    resource, mode, 'yes' if cached else 'no', elapsed,
+                    args.number / elapsed, checks))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
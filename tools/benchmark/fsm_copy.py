@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Compare full and shallow copies of the provisioning state machine.
+
+Every TaskManager gets its own copy of ``ironic.common.states.machine``.
+This measures the time and memory needed to create and initialize one
+copy, which is the per-acquire cost of the state machine.
+"""
+
+from __future__ import print_function
+
+import argparse
+import timeit
+import tracemalloc
+
+from ironic.common import states
+
+
+def _make_copy(shallow):
+    m = states.machine.copy(shallow=shallow)
+    m.initialize(start_state=states.AVAILABLE)
+    return m
+
+
+def _allocated(shallow, count):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        copies = [_make_copy(shallow) for _ in range(count)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del copies
+    stats = after.compare_to(before, 'filename')
+    return sum(stat.size_diff for stat in stats) / float(count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--number', type=int, default=10000,
+                        help='Number of copies to make (default: 10000).')
+    args = parser.parse_args()
+
+    print('%-8s %14s %14s' % ('copy', 'usec/acquire', 'bytes/acquire'))
+    for shallow in (False, True):
+        seconds = timeit.timeit(lambda: _make_copy(shallow),
+                                number=args.number)
+        print('%-8s %14.2f %14.0f' % ('shallow' if shallow else 'full',
+                                      seconds / args.number * 1e6,
+                                      _allocated(shallow, args.number)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure SNMP power state query throughput against a fake BMC.
+
+A fake SNMPv2c agent is started in a separate process. It answers every GET
+with an integer after a configurable delay, emulating a slow BMC, without
+blocking other requests. The same number of GET requests is then issued
+from green threads, like the conductor does during the power state sync,
+once using a client per request (the default) and once using the shared
+non-blocking dispatcher enabled by ``[snmp]use_async_io``.
+
+Then the power states of all outlets of the fake PDU are queried, like the
+power state sync does for the nodes sharing a PDU, and the number of SNMP
+requests received by the PDU is reported with and without
+``[snmp]outlet_states_cache_ttl``.
+
+Requires pysnmp to be installed.
+"""
+
+from __future__ import print_function
+
+import eventlet
+eventlet.monkey_patch(os=False)
+
+import argparse  # noqa
+import heapq  # noqa
+import multiprocessing  # noqa
+import socket  # noqa
+import time  # noqa
+
+from pyasn1.codec.ber import decoder  # noqa
+from pyasn1.codec.ber import encoder  # noqa
+from pysnmp.proto import api  # noqa
+
+from ironic.conf import CONF  # noqa
+from ironic.drivers.modules import bmc_io  # noqa
+from ironic.drivers.modules import snmp  # noqa
+
+
+# APC MasterSwitch sPDUOutletCtl column
+TABLE_OID = (1, 3, 6, 1, 4, 1, 318, 1, 1, 4, 4, 2, 1, 3)
+OID = TABLE_OID + (1,)
+
+
+def _respond(proto, request, table):
+    pdu = proto.apiMessage.getPDU(request)
+    var_binds = []
+    if pdu.isSameTypeWith(proto.GetRequestPDU()):
+        var_binds = [(oid, proto.Integer(1))
+                     for oid, _ in proto.apiPDU.getVarBinds(pdu)]
+    else:
+        if pdu.isSameTypeWith(proto.GetBulkRequestPDU()):
+            count = proto.apiBulkPDU.getMaxRepetitions(pdu)
+        else:
+            count = 1
+        for oid, _ in proto.apiPDU.getVarBinds(pdu):
+            oid = tuple(oid)
+            for _ in range(count):
+                following = [name for name in table if name > oid]
+                if not following:
+                    var_binds.append((oid, proto.EndOfMibView()))
+                    break
+                oid = following[0]
+                var_binds.append((oid, proto.Integer(1)))
+    response = proto.apiMessage.getResponse(request)
+    proto.apiPDU.setVarBinds(proto.apiMessage.getPDU(response), var_binds)
+    return encoder.encode(response)
+
+
+def _agent(sock, delay, outlets, counter):
+    proto = api.protoModules[api.protoVersion2c]
+    table = [TABLE_OID + (outlet,) for outlet in range(1, outlets + 1)]
+    pending = []
+    sock.settimeout(0.001)
+    while True:
+        now = time.time()
+        while pending and pending[0][0] <= now:
+            _, _, response, address = heapq.heappop(pending)
+            sock.sendto(response, address)
+        try:
+            data, address = sock.recvfrom(65535)
+        except socket.timeout:
+            continue
+        with counter.get_lock():
+            counter.value += 1
+        request, _ = decoder.decode(data, asn1Spec=proto.Message())
+        heapq.heappush(pending, (now + delay, counter.value,
+                                 _respond(proto, request, table), address))
+
+
+def start_agent(delay, outlets):
+    """Start the fake agent.
+
+    :returns: the process, the UDP port and the request counter.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    counter = multiprocessing.Value('i', 0)
+    process = multiprocessing.Process(target=_agent,
+                                      args=(sock, delay, outlets, counter))
+    process.daemon = True
+    process.start()
+    sock.close()
+    return process, port, counter
+
+
+def run(port, count, concurrency):
+    # NOTE: creating an SNMP engine is CPU-bound and costs the same in both
+    # modes, so every green thread gets its own client in advance. A client
+    # cannot be shared, its engine owns the socket used for blocking GETs.
+    clients = [snmp.SNMPClient('127.0.0.1', port, snmp.SNMP_V2C,
+                               read_community='public')
+               for _ in range(concurrency)]
+
+    def _worker(client):
+        return [client.get(OID) for _ in range(count // concurrency)]
+
+    pool = eventlet.GreenPool(concurrency)
+    start = time.time()
+    results = sum(pool.imap(_worker, clients), [])
+    elapsed = time.time() - start
+    assert all(int(r) == 1 for r in results), results
+    return len(results), elapsed
+
+
+def sync_outlets(port, outlets, counter):
+    """Query the power state of every outlet of a PDU, like a power sync.
+
+    :returns: the number of SNMP requests received by the PDU.
+    """
+    snmp._outlet_states.clear()
+    drivers = [snmp.SNMPDriverAPCMasterSwitch(
+        {'address': '127.0.0.1', 'port': port, 'version': snmp.SNMP_V2C,
+         'read_community': 'public', 'outlet': outlet})
+        for outlet in range(1, outlets + 1)]
+    before = counter.value
+    pool = eventlet.GreenPool(len(drivers))
+    results = list(pool.imap(lambda driver: driver.power_state(), drivers))
+    assert all(r == 'power on' for r in results), results
+    return counter.value - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--number', type=int, default=500,
+                        help='Number of GET requests (default: 500).')
+    parser.add_argument('-c', '--concurrency', type=int, default=100,
+                        help='Number of green threads issuing requests '
+                        '(default: 100).')
+    parser.add_argument('-d', '--delay', type=float, default=0.05,
+                        help='Fake BMC response delay in seconds '
+                        '(default: 0.05).')
+    parser.add_argument('-o', '--outlets', type=int, default=48,
+                        help='Number of outlets of the fake PDU '
+                        '(default: 48).')
+    args = parser.parse_args()
+
+    CONF([], project='ironic')
+    CONF.set_override('udp_transport_timeout', 5, group='snmp')
+    process, port, counter = start_agent(args.delay, args.outlets)
+    try:
+        print('%-10s %10s %12s' % ('mode', 'seconds', 'requests/s'))
+        for use_async_io in (False, True):
+            CONF.set_override('use_async_io', use_async_io, group='snmp')
+            bmc_io._LIMITER = None
+            count, elapsed = run(port, args.number, args.concurrency)
+            print('%-10s %10.2f %12.1f' % (
+                'async' if use_async_io else 'sync', elapsed,
+                count / elapsed))
+
+        print()
+        print('%-10s %24s' % ('outlets', 'PDU requests per sync'))
+        CONF.set_override('use_async_io', False, group='snmp')
+        for ttl in (0, 60):
+            CONF.set_override('outlet_states_cache_ttl', ttl, group='snmp')
+            print('%-10s %24d' % (
+                'cached' if ttl else 'separate',
+                sync_outlets(port, args.outlets, counter)))
+    finally:
+        process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the throughput of task acquisitions and driver composition.
+
+A temporary SQLite database is populated with nodes of the ``fake-hardware``
+type, then shared and exclusive tasks are acquired on them in a loop, with
+the cached drivers and with the cache dropped before every acquisition. The
+cost of building the driver of a task alone
+(``driver_factory.build_driver_for_task``) is reported as well.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from oslo_db.sqlalchemy import enginefacade
+from oslo_utils import uuidutils
+
+from ironic.common import config
+from ironic.common import context as ironic_context
+from ironic.common import driver_factory
+from ironic.conductor import task_manager
+from ironic.conf import CONF
+from ironic.db import api as db_api
+from ironic.db.sqlalchemy import models
+from ironic import objects
+
+INTERFACES = {'bios': 'fake', 'boot': 'fake', 'console': 'fake',
+              'deploy': 'fake', 'inspect': 'fake', 'management': 'fake',
+              'network': 'noop', 'power': 'fake', 'raid': 'fake',
+              'rescue': 'fake', 'storage': 'noop', 'vendor': 'fake'}
+
+
+def populate(count):
+    engine = enginefacade.writer.get_engine()
+    models.Base.metadata.create_all(engine)
+    dbapi = db_api.get_instance()
+    node_ids = []
+    for i in range(count):
+        values = {'uuid': uuidutils.generate_uuid(),
+                  'name': 'node-%d' % i,
+                  'version': objects.Node.VERSION,
+                  'driver': 'fake-hardware'}
+        for interface, impl in INTERFACES.items():
+            values['%s_interface' % interface] = impl
+        node_ids.append(dbapi.create_node(values).id)
+    return node_ids
+
+
+def measure(seconds, func, args_list, cached):
+    """Call func with the arguments in turn, returns the calls per second.
+
+    :param cached: if False, the driver cache is dropped before every call.
+    """
+    calls = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        for arg in args_list:
+            if not cached:
+                driver_factory.clear_driver_cache()
+            func(arg)
+        calls += len(args_list)
+    return calls / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-N', '--nodes', type=int, default=100,
+                        help='Number of nodes (default: 100).')
+    parser.add_argument('-s', '--seconds', type=float, default=5,
+                        help='Duration of every measurement (default: 5).')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        config.parse_args([], default_config_files=[])
+        CONF.set_override('connection', 'sqlite:///%s' % os.path.join(
+            tmpdir, 'ironic.db'), group='database')
+        CONF.set_override('host', 'benchmark')
+        CONF.set_override('enabled_hardware_types', ['fake-hardware'])
+        for interface, impl in INTERFACES.items():
+            CONF.set_override('enabled_%s_interfaces' % interface, [impl])
+        objects.register_all()
+        node_ids = populate(args.nodes)
+        context = ironic_context.get_admin_context()
+
+        def _shared(node_id):
+            with task_manager.acquire(context, node_id, shared=True):
+                pass
+
+        def _exclusive(node_id):
+            with task_manager.acquire(context, node_id):
+                pass
+
+        nodes = [objects.Node.get_by_id(context, node_id)
+                 for node_id in node_ids]
+
+        print('%-30s %12s %12s' % ('calls per second', 'cached',
+                                   'uncached'))
+        for name, func, args_list in (
+                ('shared acquire', _shared, node_ids),
+                ('exclusive acquire', _exclusive, node_ids),
+                ('build_driver_for_task', _build_driver(nodes),
+                 list(range(len(nodes))))):
+            results = [measure(args.seconds, func, args_list, cached)
+                       for cached in (True, False)]
+            print('%-30s %12.1f %12.1f' % tuple([name] + results))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def _build_driver(nodes):
+    """Get a function building the driver of a node given by index."""
+    class _Task(object):
+        node = None
+
+    task = _Task()
+
+    def _build(index):
+        task.node = nodes[index]
+        driver_factory.build_driver_for_task(task)
+
+    return _build
+
+
+if __name__ == '__main__':
+    main()